@@ -6,9 +6,14 @@ Analiza los datos de librerías y proporciona recomendaciones para estimar venta
 import pandas as pd
 import os
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import json
 
+from cubo_sri import construir_cubo
+from incremental_sri import comparar_con_anterior, guardar_foto, imprimir_resumen
+from ingesta_sri import COLUMNAS_LIBRERIAS, leer_excel_filtrado
+from palabras_clave import BuscadorPalabras
+
 class AnalizadorLibrerias:
     """Analiza datos de librerías y proporciona insights."""
     
@@ -20,6 +25,14 @@ class AnalizadorLibrerias:
             'G476103': 'VENTA AL POR MENOR DE ARTÍCULOS DE OFICINA Y PAPELERÍA COMO LÁPICES, BOLÍGRAFOS, PAPEL, ETCÉTERA, EN ESTABLECIMIENTOS ESPECIALIZADOS.',
             'G476104': 'VENTA AL POR MENOR DE LIBROS, PERIODICOS, REVISTAS Y ARTICULOS DE PAPELERIA.'
         }
+        # Palabras que indican una librería (sin tildes: 'librería' y 'libreria' cuentan juntas)
+        self.palabras_clave = [
+            'libreria', 'libro', 'papeleria', 'papel', 'libros', 'book', 'books',
+            'stationery', 'oficina', 'escolar', 'educacion'
+        ]
+        # Las que marcan VERIFICACION_LIBRERIA en la exportación
+        self.palabras_verificacion = ['libreria', 'libro', 'libros', 'papeleria']
+        self.buscador_palabras = BuscadorPalabras(self.palabras_clave)
     
     def cargar_datos(self, directorio: str = "datos_excel") -> pd.DataFrame:
         """Carga todos los archivos Excel y filtra por códigos de librerías."""
@@ -35,15 +48,15 @@ class AnalizadorLibrerias:
         for archivo in archivos_excel:
             ruta = os.path.join(directorio, archivo)
             try:
-                df = pd.read_excel(ruta)
-                print(f"✅ Cargado: {archivo} ({len(df):,} registros)")
+                # Filtrar por códigos de librerías mientras se lee el archivo
+                df_filtrado, conteos = leer_excel_filtrado(
+                    ruta, codigos_ciiu=self.codigos_librerias, columnas=COLUMNAS_LIBRERIAS
+                )
+                print(f"✅ Cargado: {archivo} ({conteos['total']:,} registros)")
                 
-                # Filtrar por códigos de librerías
-                if 'CODIGO_CIIU' in df.columns:
-                    df_filtrado = df[df['CODIGO_CIIU'].isin(self.codigos_librerias)]
-                    if not df_filtrado.empty:
-                        todos_datos.append(df_filtrado)
-                        print(f"   → {len(df_filtrado):,} librerías encontradas")
+                if not df_filtrado.empty:
+                    todos_datos.append(df_filtrado)
+                    print(f"   → {len(df_filtrado):,} librerías encontradas")
             except Exception as e:
                 print(f"⚠️  Error al leer {archivo}: {str(e)}")
         
@@ -72,9 +85,12 @@ class AnalizadorLibrerias:
             'agentes_retencion': 0
         }
         
+        # Una sola agrupación para todos los conteos
+        cubo = construir_cubo(df)
+        
         # Análisis por código CIIU
-        if 'CODIGO_CIIU' in df.columns:
-            distribucion = df['CODIGO_CIIU'].value_counts()
+        if 'ciiu' in cubo.dimensiones:
+            distribucion = cubo.conteo('ciiu')
             for codigo, cantidad in distribucion.items():
                 stats['por_codigo_ciiu'][codigo] = {
                     'cantidad': int(cantidad),
@@ -83,8 +99,8 @@ class AnalizadorLibrerias:
                 }
         
         # Análisis por estado
-        if 'ESTADO_CONTRIBUYENTE' in df.columns:
-            estados = df['ESTADO_CONTRIBUYENTE'].value_counts()
+        if 'estado' in cubo.dimensiones:
+            estados = cubo.conteo('estado')
             for estado, cantidad in estados.items():
                 estado_str = str(estado).upper().strip()
                 stats['por_estado'][estado_str] = int(cantidad)
@@ -97,56 +113,36 @@ class AnalizadorLibrerias:
                     stats['pasivas'] += int(cantidad)
         
         # Análisis por provincia
-        col_provincia = next((col for col in df.columns if 'provincia' in col.lower()), None)
-        if col_provincia:
-            provincias = df[col_provincia].value_counts()
+        if 'provincia' in cubo.dimensiones:
+            provincias = cubo.conteo('provincia')
             for provincia, cantidad in provincias.items():
                 stats['por_provincia'][str(provincia)] = int(cantidad)
         
         # Análisis por cantón
-        col_canton = next((col for col in df.columns if 'canton' in col.lower()), None)
-        if col_canton:
-            cantones = df[col_canton].value_counts()
+        if 'canton' in cubo.dimensiones:
+            cantones = cubo.conteo('canton')
             stats['top_cantones'] = dict(cantones.head(10))
         
-        # Análisis de nombre fantasia
-        col_fantasia = next((col for col in df.columns if 'fantasia' in col.lower() or 'comercial' in col.lower()), None)
-        if col_fantasia:
-            stats['con_fantasia'] = int(df[col_fantasia].notna().sum())
-        
-        # Agentes de retención
-        if 'AGENTE_RETENCION' in df.columns:
-            stats['agentes_retencion'] = int(df['AGENTE_RETENCION'].notna().sum())
+        # Análisis de nombre fantasia y agentes de retención
+        stats['con_fantasia'] = int(cubo.total('con_fantasia'))
+        stats['agentes_retencion'] = int(cubo.total('agentes_retencion'))
         
         return stats
     
-    def identificar_palabras_clave(self, df: pd.DataFrame) -> Dict[str, int]:
-        """Identifica palabras clave en nombres que indican si son librerías."""
-        palabras_clave = {
-            'libreria': 0,
-            'libro': 0,
-            'papeleria': 0,
-            'papel': 0,
-            'libros': 0,
-            'librería': 0,
-            'papelería': 0,
-            'book': 0,
-            'books': 0,
-            'stationery': 0,
-            'oficina': 0,
-            'escolar': 0,
-            'educacion': 0,
-            'educación': 0
-        }
-        
+    def buscar_palabras_clave(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Marca las palabras clave de cada nombre en una sola pasada (None si no hay columna de nombre)."""
         col_nombre = next((col for col in df.columns if any(x in col.lower() for x in ['razon', 'nombre', 'fantasia'])), None)
-        
-        if col_nombre:
-            nombres = df[col_nombre].astype(str).str.lower()
-            for palabra, _ in palabras_clave.items():
-                palabras_clave[palabra] = int(nombres.str.contains(palabra, na=False).sum())
-        
-        return palabras_clave
+        if not col_nombre:
+            return None
+        return self.buscador_palabras.coincidencias(df[col_nombre])
+    
+    def identificar_palabras_clave(self, df: pd.DataFrame, coincidencias: Optional[pd.DataFrame] = None) -> Dict[str, int]:
+        """Identifica palabras clave en nombres que indican si son librerías."""
+        if coincidencias is None:
+            coincidencias = self.buscar_palabras_clave(df)
+        if coincidencias is None:
+            return {palabra: 0 for palabra in self.palabras_clave}
+        return {palabra: int(total) for palabra, total in coincidencias.sum().items()}
     
     def generar_recomendaciones(self, stats: Dict) -> List[str]:
         """Genera recomendaciones para obtener más información sobre ventas."""
@@ -201,7 +197,8 @@ class AnalizadorLibrerias:
         
         return recomendaciones
     
-    def generar_reporte(self, df: pd.DataFrame, archivo_salida: str = "reporte_librerias.txt"):
+    def generar_reporte(self, df: pd.DataFrame, archivo_salida: str = "reporte_librerias.txt",
+                        coincidencias: Optional[pd.DataFrame] = None):
         """Genera un reporte completo de análisis."""
         print("\n" + "="*70)
         print("📚 ANÁLISIS DE LIBRERÍAS - CÓDIGOS G476101 y G476104")
@@ -213,7 +210,7 @@ class AnalizadorLibrerias:
         
         # Estadísticas
         stats = self.analizar_estadisticas(df)
-        palabras_clave = self.identificar_palabras_clave(df)
+        palabras_clave = self.identificar_palabras_clave(df, coincidencias)
         
         # Generar reporte
         reporte = []
@@ -292,7 +289,8 @@ class AnalizadorLibrerias:
         print(f"✅ Reporte guardado en: {archivo_salida}")
         print("="*70)
     
-    def exportar_datos_librerias(self, df: pd.DataFrame, archivo_salida: str = "librerias_detalle.xlsx"):
+    def exportar_datos_librerias(self, df: pd.DataFrame, archivo_salida: str = "librerias_detalle.xlsx",
+                                 coincidencias: Optional[pd.DataFrame] = None):
         """Exporta los datos de librerías a Excel para análisis adicional."""
         if df.empty:
             print("❌ No hay datos para exportar")
@@ -310,14 +308,11 @@ class AnalizadorLibrerias:
         columnas_disponibles = [col for col in columnas_relevantes if col in df.columns]
         df_exportar = df[columnas_disponibles].copy()
         
-        # Agregar columna de verificación
-        col_nombre = next((col for col in df.columns if 'razon' in col.lower() or 'nombre' in col.lower()), None)
-        if col_nombre:
-            nombres = df[col_nombre].astype(str).str.lower()
-            df_exportar['VERIFICACION_LIBRERIA'] = nombres.str.contains(
-                'libreria|librería|libro|libros|papeleria|papelería', 
-                na=False, regex=True
-            )
+        # Agregar columna de verificación (mismo recorrido que el conteo de palabras clave)
+        if coincidencias is None:
+            coincidencias = self.buscar_palabras_clave(df)
+        if coincidencias is not None:
+            df_exportar['VERIFICACION_LIBRERIA'] = coincidencias[self.palabras_verificacion].any(axis=1)
         
         df_exportar.to_excel(archivo_salida, index=False)
         print(f"✅ Datos exportados a: {archivo_salida}")
@@ -332,11 +327,20 @@ def main():
     df = analizador.cargar_datos()
     
     if not df.empty:
+        # Cambios respecto a la ejecución anterior (por RUC y establecimiento)
+        diferencias = comparar_con_anterior(df, "librerias")
+        if diferencias.hay_anterior:
+            imprimir_resumen(diferencias.resumen(), "Librerías desde la ejecución anterior")
+        guardar_foto(diferencias, "librerias")
+        
+        # Palabras clave de los nombres: un recorrido para el reporte y la exportación
+        coincidencias = analizador.buscar_palabras_clave(df)
+        
         print("\n📊 Generando análisis...")
-        analizador.generar_reporte(df)
+        analizador.generar_reporte(df, coincidencias=coincidencias)
         
         print("\n💾 Exportando datos detallados...")
-        analizador.exportar_datos_librerias(df)
+        analizador.exportar_datos_librerias(df, coincidencias=coincidencias)
         
         print("\n✅ Análisis completado!")
         print("\n📝 Próximos pasos:")
@@ -0,0 +1,848 @@
+"""
+Benchmarks de rendimiento sobre datos sintéticos de tamaño nacional.
+Compara los tiempos de las implementaciones fila por fila originales (datos_sinteticos.py) con los de
+las vectorizadas; que ambas den el mismo resultado lo verifican las pruebas de tests/
+(python3 -m pytest).
+
+Uso:
+    python3 benchmark_rendimiento.py agrupacion --filas 500000
+    python3 benchmark_rendimiento.py places --consultas 300
+    python3 benchmark_rendimiento.py estimacion --filas 1000000
+    python3 benchmark_rendimiento.py mapa --filas 500000
+    python3 benchmark_rendimiento.py cubo --filas 500000
+    python3 benchmark_rendimiento.py palabras --filas 1000000
+    python3 benchmark_rendimiento.py ruc --filas 500000
+    python3 benchmark_rendimiento.py nombres --filas 200000
+    python3 benchmark_rendimiento.py geocodificacion --consultas 200
+    python3 benchmark_rendimiento.py nomenclator
+    python3 benchmark_rendimiento.py servidor --clientes 50
+    python3 benchmark_rendimiento.py consultas --filas 1000000
+    python3 benchmark_rendimiento.py tabla --filas 50000
+    python3 benchmark_rendimiento.py plantillas --filas 200000
+    python3 benchmark_rendimiento.py columnar --filas 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from datos_sinteticos import (agrupar_con_iterrows, estado_archivos, estimacion_google_original,
+                              estimar_ventas_con_iterrows, generar_catalogo_sintetico, generar_librerias_sinteticas,
+                              generar_resultados_google, marcadores_mapa, procesar_online_con_iterrows,
+                              reportes_con_cubo, reportes_con_groupby)
+from ubicaciones_sri import agrupar_por_ubicacion
+
+
+def _medir(funcion, *args):
+    """Ejecuta una función y devuelve (resultado, segundos)."""
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def benchmark_agrupacion(filas: int):
+    """Compara la agrupación por ubicación fila por fila contra la vectorizada."""
+    print(f"\n📍 Agrupación por ubicación ({filas:,} filas sintéticas)")
+    df = generar_catalogo_sintetico(filas)
+
+    _, t_original = _medir(agrupar_con_iterrows, df)
+    vectorizado, t_vectorizado = _medir(agrupar_por_ubicacion, df)
+
+    print(f"   iterrows:     {t_original:8.2f} s  ({filas / t_original:,.0f} filas/s)")
+    print(f"   vectorizado:  {t_vectorizado:8.2f} s  ({filas / t_vectorizado:,.0f} filas/s)")
+    print(f"   Aceleración:  {t_original / t_vectorizado:.1f}x")
+    print(f"   Ubicaciones:  {len(vectorizado):,}")
+
+
+def benchmark_places(consultas: int, hilos: int = 16, qps: float = 60):
+    """Compara el enriquecimiento secuencial contra el concurrente usando servidor_places_falso.py."""
+    from buscar_info_google_places import BuscadorGooglePlaces
+    from cache_places import CachePlaces
+    from servidor_places_falso import ServidorPlacesFalso
+
+    print(f"\n🔍 Enriquecimiento con Google Places ({consultas:,} librerías, servidor falso)")
+    df = generar_catalogo_sintetico(consultas)
+    lote = list(zip(df['RAZON_SOCIAL'], df['DESCRIPCION_CANTON_EST'].fillna(''),
+                    df['DESCRIPCION_PROVINCIA_EST'].fillna('')))
+
+    # La cuota del servidor es menor que la del cliente para forzar OVER_QUERY_LIMIT
+    # Cada corrida usa un cache vacío para que ambas paguen todas las llamadas
+    with ServidorPlacesFalso(latencia=0.05, qps_maximo=qps * 0.8) as servidor, \
+            tempfile.TemporaryDirectory() as directorio:
+        secuencial = BuscadorGooglePlaces("AIzaPrueba", qps=1000, base_url=servidor.url,
+                                          cache_places=CachePlaces(os.path.join(directorio, "secuencial.sqlite")))
+        _, t_secuencial = _medir(lambda: [secuencial.buscar_libreria(*c) for c in lote])
+
+        concurrente = BuscadorGooglePlaces("AIzaPrueba", qps=qps, base_url=servidor.url,
+                                           cache_places=CachePlaces(os.path.join(directorio, "concurrente.sqlite")))
+        _, t_concurrente = _medir(lambda: concurrente.buscar_lote(lote, hilos=hilos))
+        rechazadas = servidor.rechazadas
+
+        secuencial.cache_places.cerrar()
+        concurrente.cache_places.cerrar()
+
+    print(f"   secuencial:   {t_secuencial:8.2f} s  ({consultas / t_secuencial:,.1f} librerías/s)")
+    print(f"   {hilos} hilos:     {t_concurrente:8.2f} s  ({consultas / t_concurrente:,.1f} librerías/s, "
+          f"máx. {qps:g} consultas/s)")
+    print(f"   Aceleración:  {t_secuencial / t_concurrente:.1f}x")
+    print(f"   OVER_QUERY_LIMIT: {rechazadas}  |  Reintentos: {concurrente.reintentos}")
+
+
+def benchmark_estimacion(filas: int, filas_referencia: int = 50000):
+    """Compara los estimadores de ventas fila por fila contra los vectorizados."""
+    import contextlib
+    import io
+
+    from buscar_info_google_places import BuscadorGooglePlaces
+    from cache_places import CachePlaces
+    from estimar_ventas_librerias import EstimadorVentasLibrerias
+    from estimar_ventas_online import EstimadorVentasOnline
+
+    print(f"\n💰 Estimación de ventas ({filas:,} filas sintéticas; referencia fila por fila con "
+          f"{min(filas, filas_referencia):,})")
+    df = generar_librerias_sinteticas(filas)
+    muestra = df.iloc[:filas_referencia]
+
+    estimador = EstimadorVentasLibrerias()
+    online = EstimadorVentasOnline()
+    silencioso = contextlib.redirect_stdout(io.StringIO())
+
+    directorio = tempfile.mkdtemp(prefix="bench_estimacion_")
+    with silencioso:
+        buscador = BuscadorGooglePlaces(cache_places=CachePlaces(os.path.join(directorio, "places.sqlite")))
+    resultados_google = generar_resultados_google(filas)
+
+    def google_original(d):
+        estimaciones = [estimacion_google_original(info, row)
+                        for info, (_, row) in zip(resultados_google, d.iterrows())]
+        return pd.DataFrame({campo: [e[campo] for e in estimaciones] for campo in estimaciones[0]}, index=d.index)
+
+    def google_vectorizado(d):
+        estimaciones = buscador.calcular_estimaciones(resultados_google[:len(d)], d)
+        return pd.DataFrame({campo: estimaciones[campo].tolist() for campo in estimaciones.columns}, index=d.index)
+
+    casos = [
+        ('Tamaño (librerías)', lambda d: estimar_ventas_con_iterrows(estimador, d), estimador.estimar_ventas),
+        ('Indicadores (online)', lambda d: procesar_online_con_iterrows(online, d), online.procesar_librerias),
+        ('Estimación mejorada (Google)', google_original, google_vectorizado)
+    ]
+    for nombre, original, vectorizado in casos:
+        _, t_original = _medir(original, muestra)
+        with silencioso:
+            _, t_vectorizado = _medir(vectorizado, df)
+
+        print(f"   {nombre}:")
+        print(f"      iterrows:     {len(muestra) / t_original:12,.0f} filas/s")
+        print(f"      vectorizado:  {filas / t_vectorizado:12,.0f} filas/s  ({t_vectorizado:.2f} s para {filas:,})")
+
+    buscador.cache_places.cerrar()
+
+
+def benchmark_mapa(filas: int):
+    """Mide cuánto JSON lleva el HTML del mapa filtrado frente a los fragmentos de detalle."""
+    import contextlib
+    import io
+
+    from cache_geocodificacion import CacheGeocodificacion
+    from clusters_mapa import construir_indice_clusters
+    from detalles_mapa import directorio_detalles
+    from generar_mapa_filtrado import GeneradorMapaFiltrado
+    from servidor_places_falso import ServidorPlacesFalso
+
+    print(f"\n🗺️  Mapa filtrado ({filas:,} filas sintéticas)")
+    directorio = tempfile.mkdtemp(prefix="bench_mapa_")
+    archivo_html = os.path.join(directorio, "mapa.html")
+
+    df = generar_catalogo_sintetico(filas)
+    # Coordenadas deterministas del servidor falso en lugar de la Geocoding API
+    with contextlib.redirect_stdout(io.StringIO()), ServidorPlacesFalso(latencia=0) as servidor:
+        generador = GeneradorMapaFiltrado(google_api_key="AIzaPrueba", cache_geocodificacion=CacheGeocodificacion(
+            os.path.join(directorio, "geo.sqlite")), qps=1000, hilos=32, base_url=servidor.url)
+        ubicaciones = generador.procesar_datos_filtrados(df)
+        _, segundos = _medir(generador.generar_html_google_maps, ubicaciones, archivo_html)
+    generador.cache_coordenadas.cerrar()
+
+    fragmentos = [os.path.join(directorio_detalles(archivo_html), f)
+                  for f in os.listdir(directorio_detalles(archivo_html)) if f.endswith('.json')]
+    tamanos = [os.path.getsize(f) for f in fragmentos]
+    tamano_html = os.path.getsize(archivo_html) + os.path.getsize(
+        os.path.join(directorio_detalles(archivo_html), "datos.js"))
+    print(f"   Ubicaciones: {len(ubicaciones):,}  (generado en {segundos:.2f} s)")
+    print(f"   HTML y datos.js (marcadores):      {tamano_html / 1e6:10.2f} MB")
+    print(f"   Fragmentos de detalle:             {sum(tamanos) / 1e6:10.2f} MB en {len(tamanos):,} archivos "
+          f"(el mayor, {max(tamanos) / 1e3:,.0f} KB)")
+    print(f"   Antes todo iba dentro del HTML:    {(tamano_html + sum(tamanos)) / 1e6:10.2f} MB aprox.")
+
+    # Marcadores que la página mantiene en el mapa (vista completa) según el zoom
+    puntos = [{'lat': u['latitud'], 'lng': u['longitud'], 'cantidad': u['cantidad']}
+              for u in ubicaciones if u.get('latitud') and u.get('longitud')]
+    indice, segundos = _medir(construir_indice_clusters, puntos)
+    por_zoom = ', '.join(f"z{nivel['zoom']}: {len(nivel['lat']):,}" for nivel in indice['niveles']
+                         if nivel['zoom'] in (5, 7, 9, 11, 13))
+    print(f"   Índice de clusters ({segundos * 1000:.0f} ms): {por_zoom} marcadores "
+          f"(antes {len(puntos):,} en cualquier zoom)")
+
+
+def benchmark_cubo(filas: int):
+    """Compara leer las filas y agrupar en cada reporte contra leer el cubo guardado en disco."""
+    from cubo_sri import construir_cubo, guardar_cubo, leer_cubo
+
+    print(f"\n🧊 Cubo de agregados ({filas:,} filas sintéticas)")
+    df = generar_catalogo_sintetico(filas)
+    df['ESTIMACION_VENTA_MENSUAL'] = np.random.default_rng(3).integers(500, 50000, filas)
+    directorio = tempfile.mkdtemp(prefix="bench_cubo_")
+
+    # Copia de las filas en disco, como la cache columnar de ingesta
+    ruta_filas = os.path.join(directorio, "filas.pkl")
+    df.to_pickle(ruta_filas)
+    cubo, t_construir = _medir(construir_cubo, df)
+    guardar_cubo(cubo, 'sintetico', directorio=directorio)
+
+    def con_filas():
+        return reportes_con_groupby(pd.read_pickle(ruta_filas))
+
+    def con_cubo():
+        return reportes_con_cubo(leer_cubo('sintetico', None, directorio))
+
+    _, t_filas = _medir(con_filas)
+    _, t_cubo = _medir(con_cubo)
+
+    print(f"   construir cubo:          {t_construir:8.3f} s  ({cubo.celdas:,} celdas, una vez)")
+    print(f"   filas + groupby/reporte: {t_filas:8.3f} s  ({os.path.getsize(ruta_filas) / 1e6:.1f} MB)")
+    print(f"   cubo + consultas:        {t_cubo:8.3f} s  "
+          f"({os.path.getsize(os.path.join(directorio, 'sintetico.pkl')) / 1e6:.1f} MB)")
+    print(f"   Aceleración por reporte: {t_filas / t_cubo:.1f}x")
+
+
+def benchmark_palabras(filas: int):
+    """Compara un str.contains por palabra clave contra el buscador de una sola pasada."""
+    from analizar_librerias import AnalizadorLibrerias
+    from palabras_clave import BuscadorPalabras, plegar_texto
+
+    print(f"\n🔍 Palabras clave en nombres ({filas:,} razones sociales sintéticas)")
+    rng = np.random.default_rng(5)
+    fragmentos = np.array(['LIBRERÍA', 'LIBRERIA', 'PAPELERÍA', 'LIBROS', 'EL LIBRO', 'BOOKS', 'OFICINA',
+                           'SUMINISTROS', 'ESCOLAR', 'EDUCACIÓN', 'COMERCIAL', 'DISTRIBUIDORA', 'S.A.',
+                           'CIA. LTDA.', 'PÉREZ', 'PAPELES'], dtype=object)
+    partes = fragmentos[rng.integers(0, len(fragmentos), (filas, 3))]
+    df = pd.DataFrame({'RAZON_SOCIAL': partes[:, 0] + ' ' + partes[:, 1] + ' ' + partes[:, 2]
+                       + ' ' + rng.integers(0, filas, filas).astype(str).astype(object)})
+    analizador = AnalizadorLibrerias()
+
+    def con_str_contains(d):
+        # Un recorrido por palabra (sobre los nombres ya sin tildes para comparar lo mismo)
+        nombres = plegar_texto(d['RAZON_SOCIAL'])
+        conteos = {p: int(nombres.str.contains(p, regex=False).sum()) for p in analizador.palabras_clave}
+        verificacion = nombres.str.contains('|'.join(analizador.palabras_verificacion), regex=True)
+        return conteos, verificacion.to_numpy().tolist()
+
+    def con_buscador(d):
+        coincidencias = analizador.buscar_palabras_clave(d)
+        verificacion = coincidencias[analizador.palabras_verificacion].any(axis=1)
+        return analizador.identificar_palabras_clave(d, coincidencias), verificacion.to_numpy().tolist()
+
+    _, t_original = _medir(con_str_contains, df)
+    _, t_buscador = _medir(con_buscador, df)
+
+    print(f"   str.contains × {len(analizador.palabras_clave) + 1}:  {t_original:8.2f} s  ({filas / t_original:,.0f} nombres/s)")
+    print(f"   una pasada:          {t_buscador:8.2f} s  ({filas / t_buscador:,.0f} nombres/s)")
+    print(f"   Aceleración:         {t_original / t_buscador:.1f}x")
+
+    # Con más palabras el buscador sigue siendo un solo recorrido
+    muchas = analizador.palabras_clave + [f"{a}{b}" for a in 'bcdlmprst' for b in 'aeiou']
+    nombres = plegar_texto(df['RAZON_SOCIAL'])
+    _, t_muchas_original = _medir(lambda: [nombres.str.contains(p, regex=False).sum() for p in muchas])
+    _, t_muchas = _medir(BuscadorPalabras(muchas).coincidencias, df['RAZON_SOCIAL'])
+    print(f"   {len(muchas)} palabras:         str.contains {t_muchas_original:.2f} s  |  una pasada {t_muchas:.2f} s")
+
+
+def benchmark_ruc(filas: int, consultas: int = 200):
+    """Compara releer las filas por cada consulta de RUC contra el almacén SQLite indexado."""
+    from consulta_ruc import AlmacenRUC, normalizar_ruc
+
+    print(f"\n🔎 Consulta por RUC ({filas:,} filas sintéticas, {consultas} consultas)")
+    df = generar_catalogo_sintetico(filas)
+    directorio = tempfile.mkdtemp(prefix="bench_ruc_")
+    ruta_filas = os.path.join(directorio, "filas.pkl")
+    df.to_pickle(ruta_filas)
+
+    almacen = AlmacenRUC(os.path.join(directorio, "ruc.sqlite"))
+    _, t_carga = _medir(almacen.cargar_dataframe, 'catastro', df)
+    rucs = [normalizar_ruc(r) for r in np.random.default_rng(9).choice(df['NUMERO_RUC'].to_numpy(), consultas)]
+
+    def releyendo():
+        # Como los scripts de ejemplo: abrir el archivo y filtrar en cada consulta
+        resultado = {}
+        for ruc in rucs:
+            d = pd.read_pickle(ruta_filas)
+            resultado[ruc] = d[d['NUMERO_RUC'] == int(ruc)]['RAZON_SOCIAL'].tolist()
+        return resultado
+
+    def con_almacen():
+        return {ruc: [fila['RAZON_SOCIAL'] for fila in almacen.buscar([ruc])[ruc].get('catastro', [])]
+                for ruc in rucs}
+
+    _, t_releer = _medir(releyendo)
+    _, t_almacen = _medir(con_almacen)
+    _, t_lote = _medir(almacen.buscar, rucs)
+    _, t_prefijo = _medir(almacen.buscar_prefijo, rucs[0][:6], 50)
+    almacen.cerrar()
+
+    print(f"   cargar almacén:       {t_carga:8.2f} s  (una vez)")
+    print(f"   releer por consulta:  {t_releer / consultas * 1000:8.2f} ms/RUC")
+    print(f"   almacén:              {t_almacen / consultas * 1000:8.3f} ms/RUC")
+    print(f"   {consultas} RUCs en lote:    {t_lote * 1000:8.2f} ms  |  prefijo: {t_prefijo * 1000:.2f} ms")
+    print(f"   Aceleración:          {t_releer / t_almacen:.0f}x")
+
+
+def benchmark_nombres(filas: int, consultas: int = 5):
+    """Compara el índice de trigramas contra recorrer todos los nombres en cada búsqueda."""
+    from busqueda_nombres import construir_indice, trigramas_consulta, _trigramas_bloque
+    from normalizacion_sri import normalizar_texto
+
+    print(f"\n🔤 Búsqueda por nombre ({filas:,} filas sintéticas, {consultas} consultas)")
+    rng = np.random.default_rng(13)
+    df = generar_catalogo_sintetico(filas)
+    palabras = np.array(['LIBRERÍA', 'PAPELERÍA', 'BAZAR', 'EL ESTUDIANTE', 'LA ECONOMÍA', 'SAN JOSÉ',
+                         'DISTRIBUIDORA', 'COMERCIAL', 'FERRETERÍA', 'HOTEL', 'RESTAURANTE', 'MARÍA',
+                         'PÉREZ', 'GONZÁLEZ', 'TORRES', 'ANDRADE', 'VERA', 'CASTILLO'], dtype=object)
+    partes = palabras[rng.integers(0, len(palabras), (filas, 3))]
+    numeros = rng.integers(0, filas // 4, filas).astype(str).astype(object)
+    df['RAZON_SOCIAL'] = partes[:, 0] + ' ' + partes[:, 1] + ' ' + numeros
+    df['NOMBRE_FANTASIA_COMERCIAL'] = np.where(rng.random(filas) < 0.4, partes[:, 2] + ' ' + partes[:, 0], None)
+
+    indice, t_construir = _medir(construir_indice, df)
+    textos = ['libreria el estudiante', 'papeleria san jose', 'ferreteria perez 12', 'hotl castilo', 'bazar maria']
+    textos = textos[:consultas]
+
+    # Trigramas de cada nombre calculados de antemano: se mide solo el recorrido por consulta
+    trigramas_fila = [[set(_trigramas_bloque([clave])[1].tolist()) for clave in claves if clave]
+                      for claves in zip(*(df[c].map(normalizar_texto) for c in ('RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL')))]
+
+    def recorriendo():
+        resultados = []
+        for texto in textos:
+            consulta = set(trigramas_consulta(texto).tolist())
+            puntajes = []
+            for fila, conjuntos in enumerate(trigramas_fila):
+                mejor = max(((len(consulta & propios) / len(consulta),
+                              2 * len(consulta & propios) / (len(consulta) + len(propios)))
+                             for propios in conjuntos), default=None)
+                if mejor and mejor[0] >= 0.5:
+                    puntajes.append((-mejor[0], -mejor[1], fila))
+            resultados.append([(indice.filas['RUC'].iat[f], round(-c, 3)) for c, _, f in sorted(puntajes)[:10]])
+        return resultados
+
+    def con_indice():
+        return [[(r['ruc'], r['puntaje']) for r in indice.buscar(texto, limite=10)] for texto in textos]
+
+    _, t_recorrer = _medir(recorriendo)
+    _, t_indice = _medir(con_indice)
+    _, t_filtro = _medir(indice.buscar, 'libreria el estudiante', None, 'CANTON 007', 10)
+
+    print(f"   armar índice:        {t_construir:8.2f} s  ({len(indice.nombres):,} nombres, una vez)")
+    print(f"   recorrer nombres:    {t_recorrer / len(textos) * 1000:8.1f} ms/consulta")
+    print(f"   índice de trigramas: {t_indice / len(textos) * 1000:8.1f} ms/consulta  "
+          f"(con filtro de cantón: {t_filtro * 1000:.1f} ms)")
+    print(f"   Aceleración:         {t_recorrer / t_indice:.0f}x")
+
+
+def benchmark_geocodificacion(ubicaciones: int, archivos: int = 4, hilos: int = 8, qps: float = 50):
+    """Compara geocodificar archivo por archivo contra el lote deduplicado, con servidor_places_falso.py."""
+    import contextlib
+    import io
+
+    from cache_geocodificacion import CacheGeocodificacion
+    from generar_mapa_filtrado import GeneradorMapaFiltrado
+    from servidor_places_falso import ServidorPlacesFalso
+
+    print(f"\n🌐 Geocodificación ({ubicaciones:,} ubicaciones repartidas en {archivos} archivos, servidor falso)")
+    columnas = ['DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST', 'DESCRIPCION_PARROQUIA_EST']
+    unicas = generar_catalogo_sintetico(ubicaciones * 20)[columnas].drop_duplicates().head(ubicaciones)
+    rng = np.random.default_rng(21)
+    # Cada archivo trae ~60% de las ubicaciones: muchas se repiten entre archivos
+    por_archivo = [[{'provincia': p, 'canton': c, 'parroquia': q}
+                    for p, c, q in unicas.itertuples(index=False) if rng.random() < 0.6]
+                   for _ in range(archivos)]
+
+    def archivo_por_archivo(generador):
+        # Flujo anterior: cada archivo geocodifica sus ubicaciones una tras otra
+        return [[generador.geocodificar_ubicacion(u['provincia'], u['canton'], u['parroquia']) for u in lista]
+                for lista in por_archivo]
+
+    def en_lote(generador):
+        todas = [dict(u) for lista in por_archivo for u in lista]
+        generador.resumen_lote = generador.geocodificar_lote(todas)
+        coordenadas = iter((u['latitud'], u['longitud']) if u['latitud'] is not None else None for u in todas)
+        return [[next(coordenadas) for _ in lista] for lista in por_archivo]
+
+    with ServidorPlacesFalso(latencia=0.05) as servidor, tempfile.TemporaryDirectory() as directorio, \
+            contextlib.redirect_stdout(io.StringIO()):
+        # Cada corrida parte de un cache vacío
+        secuencial = GeneradorMapaFiltrado("AIzaPrueba", qps=qps, base_url=servidor.url, cache_geocodificacion=
+                                           CacheGeocodificacion(os.path.join(directorio, "secuencial.sqlite")))
+        _, t_secuencial = _medir(archivo_por_archivo, secuencial)
+
+        lote = GeneradorMapaFiltrado("AIzaPrueba", qps=qps, hilos=hilos, base_url=servidor.url, cache_geocodificacion=
+                                     CacheGeocodificacion(os.path.join(directorio, "lote.sqlite")))
+        _, t_lote = _medir(en_lote, lote)
+        secuencial.cache_coordenadas.cerrar()
+        lote.cache_coordenadas.cerrar()
+
+    resumen = lote.resumen_lote
+    print(f"   archivo por archivo: {t_secuencial:8.2f} s  ({secuencial.llamadas_api:,} llamadas a la API)")
+    print(f"   lote ({hilos} hilos):     {t_lote:8.2f} s  ({lote.llamadas_api:,} llamadas, máx. {qps:g} consultas/s)")
+    print(f"   Ubicaciones: {resumen['solicitadas']:,} → {resumen['unicas']:,} claves únicas; "
+          f"llamadas ahorradas: {resumen['ahorradas']:,}")
+    print(f"   Aceleración:  {t_secuencial / t_lote:.1f}x")
+
+
+def benchmark_nomenclator(hilos: int = 8, qps: float = 50):
+    """Compara resolver las ubicaciones del nomenclátor con la API (servidor falso) contra el nomenclátor."""
+    import contextlib
+    import io
+
+    from cache_geocodificacion import CacheGeocodificacion
+    from generar_mapa_filtrado import GeneradorMapaFiltrado
+    from nomenclator_ecuador import NomenclatorEcuador
+    from servidor_places_falso import ServidorPlacesFalso
+
+    nomenclator = NomenclatorEcuador()
+    ubicaciones = []
+    for provincia, datos_provincia in nomenclator.datos['provincias'].items():
+        ubicaciones.append({'provincia': provincia, 'canton': None, 'parroquia': None})
+        for canton, datos_canton in datos_provincia.get('cantones', {}).items():
+            ubicaciones.append({'provincia': provincia, 'canton': canton, 'parroquia': None})
+            ubicaciones.extend({'provincia': provincia, 'canton': canton, 'parroquia': parroquia}
+                               for parroquia in datos_canton.get('parroquias', {}))
+    print(f"\n🗂️  Nomenclátor ({len(ubicaciones):,} provincias, cantones y parroquias)")
+
+    with ServidorPlacesFalso(latencia=0.05) as servidor, tempfile.TemporaryDirectory() as directorio, \
+            contextlib.redirect_stdout(io.StringIO()):
+        # Flujo anterior: todo pasa por la API (nomenclátor vacío, cache vacío)
+        api = GeneradorMapaFiltrado("AIzaPrueba", qps=qps, hilos=hilos, base_url=servidor.url,
+                                    nomenclator=NomenclatorEcuador(os.path.join(directorio, "vacio.json")),
+                                    cache_geocodificacion=CacheGeocodificacion(os.path.join(directorio, "api.sqlite")))
+        _, t_api = _medir(api.geocodificar_lote, [dict(u) for u in ubicaciones])
+
+        # Sin API key: solo el nomenclátor
+        local = GeneradorMapaFiltrado(None, nomenclator=nomenclator, cache_geocodificacion=
+                                      CacheGeocodificacion(os.path.join(directorio, "local.sqlite")))
+        resueltas = [dict(u) for u in ubicaciones]
+        resumen, t_local = _medir(local.geocodificar_lote, resueltas)
+        api.cache_coordenadas.cerrar()
+        local.cache_coordenadas.cerrar()
+
+    print(f"   API ({hilos} hilos, {qps:g} consultas/s): {t_api:8.2f} s  ({api.llamadas_api:,} llamadas)")
+    print(f"   nomenclátor local:          {t_local * 1000:8.2f} ms ({local.llamadas_api:,} llamadas, "
+          f"{resumen['en_nomenclator']:,} resueltas)")
+    print(f"   Aceleración:  {t_api / t_local:,.0f}x")
+
+
+def _visitantes(puerto: int, clientes: int, peticiones: int, lento: float) -> tuple:
+    """
+    Simula visitantes que abren el mapa a la vez; uno de ellos tarda `lento` segundos en
+    enviar su petición (conexión lenta).
+
+    Returns:
+        (CRC32 de cada cuerpo descomprimido, latencias en segundos, bytes recibidos, segundos totales)
+    """
+    import gzip
+    import http.client
+    import socket
+    import threading
+    import zlib
+
+    cuerpos, latencias, recibidos = [], [], [0]
+    lock = threading.Lock()
+
+    def cliente_lento():
+        with socket.create_connection(('127.0.0.1', puerto)) as conexion:
+            conexion.sendall(b"GET /mapa.html HTTP/1.1\r\n")
+            time.sleep(lento)
+            conexion.sendall(b"Host: localhost\r\nConnection: close\r\n\r\n")
+            while conexion.recv(1 << 16):
+                pass
+
+    def visitante():
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=120)
+        for _ in range(peticiones):
+            inicio = time.perf_counter()
+            conexion.request('GET', '/mapa.html', headers={'Accept-Encoding': 'gzip'})
+            respuesta = conexion.getresponse()
+            cuerpo = respuesta.read()
+            duracion = time.perf_counter() - inicio
+            if respuesta.getheader('Content-Encoding') == 'gzip':
+                recibido, cuerpo = len(cuerpo), gzip.decompress(cuerpo)
+            else:
+                recibido = len(cuerpo)
+            with lock:
+                cuerpos.append(zlib.crc32(cuerpo))
+                latencias.append(duracion)
+                recibidos[0] += recibido
+        conexion.close()
+
+    hilos = [threading.Thread(target=cliente_lento)]
+    hilos += [threading.Thread(target=visitante) for _ in range(clientes)]
+    inicio = time.perf_counter()
+    hilos[0].start()
+    time.sleep(0.05)  # el cliente lento llega primero
+    for hilo in hilos[1:]:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return cuerpos, latencias, recibidos[0], time.perf_counter() - inicio
+
+
+def benchmark_servidor(clientes: int = 50, peticiones: int = 4, filas: int = 10000, lento: float = 1.0):
+    """Compara el servidor anterior (TCPServer de un hilo) con servidor_local.py bajo visitantes simultáneos."""
+    import functools
+    import http.server
+    import json
+    import socketserver
+    import threading
+
+    from servidor_local import ManejadorMapa, ServidorMapa, precomprimir
+
+    class Silencioso:
+        def log_message(self, *args):
+            pass
+
+    class AnteriorSilencioso(Silencioso, http.server.SimpleHTTPRequestHandler):
+        pass
+
+    class NuevoSilencioso(Silencioso, ManejadorMapa):
+        pass
+
+    with tempfile.TemporaryDirectory() as directorio:
+        # Un mapa con el JSON de marcadores embebido, como mapa_google_maps_filtrado.html
+        marcadores = generar_catalogo_sintetico(filas).astype(str).to_dict('records')
+        contenido = ("<!DOCTYPE html><html><body><script>const marcadores = "
+                     + json.dumps(marcadores, ensure_ascii=False) + ";</script></body></html>").encode('utf-8')
+        with open(os.path.join(directorio, "mapa.html"), 'wb') as f:
+            f.write(contenido)
+        print(f"\n📡 Servidor local ({clientes} visitantes x {peticiones} cargas de un mapa de "
+              f"{len(contenido) / 1e6:.1f} MB, más un cliente que tarda {lento:g} s en pedir)")
+
+        servidores = {
+            'anterior (TCPServer)': socketserver.TCPServer(
+                ('127.0.0.1', 0), functools.partial(AnteriorSilencioso, directory=directorio)),
+            'servidor_local.py   ': ServidorMapa(
+                ('127.0.0.1', 0), functools.partial(NuevoSilencioso, directory=directorio)),
+        }
+        # Igual que main(): los .gz se generan antes de recibir visitantes
+        precomprimir(directorio)
+        for nombre, servidor in servidores.items():
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+            puerto = servidor.server_address[1]
+            cuerpos, latencias, recibidos, segundos = _visitantes(puerto, clientes, peticiones, lento)
+
+            p50, p95 = np.percentile(latencias, [50, 95])
+            print(f"   {nombre}: {segundos:6.2f} s  |  {len(cuerpos) / segundos:7.1f} cargas/s  |  "
+                  f"p50 {p50 * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  |  {recibidos / 1e6:8.1f} MB enviados")
+
+            servidor.shutdown()
+            servidor.server_close()
+
+
+def benchmark_consultas(filas: int, repeticiones: int = 20):
+    """Compara una vista nueva del mapa consultada al catálogo en memoria contra volver a filtrar las filas."""
+    from consultas_catalogo import CatalogoConsultas
+    from filtros_mapa import categoria_estado
+    from normalizacion_sri import normalizar_serie
+
+    print(f"\n⚡ Consultas en vivo ({filas:,} filas sintéticas)")
+    df = generar_catalogo_sintetico(filas)
+    catalogo, t_cargar = _medir(CatalogoConsultas, df)
+    # Coordenadas sintéticas por ubicación (los nombres sintéticos no están en el nomenclátor)
+    rng = np.random.default_rng(5)
+    catalogo.latitud = rng.uniform(-5.0, 1.5, len(catalogo.latitud))
+    catalogo.longitud = rng.uniform(-81.0, -75.0, len(catalogo.longitud))
+
+    vistas = [
+        ('provincia + CIIU', dict(provincia=['PROVINCIA 03'], ciiu=['G4762'])),
+        ('estado + CIIU', dict(ciiu=['G47615'], estado=['ACTIVO'])),
+        ('recuadro del mapa', dict(bbox=(-3.5, -80.2, -2.0, -78.5), estado=['SUSPENDIDO'])),
+    ]
+
+    # Antes: cada vista recorría las filas (normalizar, filtrar y agrupar), sin contar
+    # geocodificar ni escribir el HTML de nuevo
+    def con_pandas(filtros):
+        mascara = pd.Series(True, index=df.index)
+        if 'provincia' in filtros:
+            mascara &= normalizar_serie(df['DESCRIPCION_PROVINCIA_EST']).isin(filtros['provincia'])
+        if 'ciiu' in filtros:
+            mascara &= df['CODIGO_CIIU'].astype(str).str.startswith(tuple(filtros['ciiu']))
+        if 'estado' in filtros:
+            mascara &= df['ESTADO_CONTRIBUYENTE'].map(categoria_estado).isin(filtros['estado'])
+        claves = pd.DataFrame({
+            nivel: normalizar_serie(df[columna]).astype(object).fillna('')
+            for nivel, columna in (('provincia', 'DESCRIPCION_PROVINCIA_EST'), ('canton', 'DESCRIPCION_CANTON_EST'),
+                                   ('parroquia', 'DESCRIPCION_PARROQUIA_EST'))
+        })
+        if 'bbox' in filtros:
+            # Coordenadas de cada fila a partir de las de su ubicación
+            sur, oeste, norte, este = filtros['bbox']
+            latitud = catalogo.latitud[catalogo.codigo_ubicacion]
+            longitud = catalogo.longitud[catalogo.codigo_ubicacion]
+            mascara &= (latitud >= sur) & (latitud <= norte) & (longitud >= oeste) & (longitud <= este)
+        conteo = claves[mascara.to_numpy()].groupby(['provincia', 'canton', 'parroquia']).size()
+        return sorted((clave, int(n)) for clave, n in conteo.items())
+
+    def con_catalogo(filtros):
+        return sorted((tuple(catalogo.claves_ubicacion[nivel][u['id']] for nivel in ('provincia', 'canton', 'parroquia')),
+                       u['cantidad']) for u in catalogo.ubicaciones(**filtros))
+
+    print(f"   Carga e indexado:       {t_cargar:8.2f} s  ({len(catalogo.latitud):,} ubicaciones, una vez)")
+    for nombre, filtros in vistas:
+        _, t_pandas = _medir(con_pandas, filtros)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            obtenido = con_catalogo(filtros)
+        t_catalogo = (time.perf_counter() - inicio) / repeticiones
+        print(f"   {nombre:<22} pandas {t_pandas * 1000:8.1f} ms  |  catálogo {t_catalogo * 1000:6.2f} ms  "
+              f"({t_pandas / t_catalogo:,.0f}x, {len(obtenido):,} ubicaciones)")
+
+    # Agregados y una página de la tabla de detalle
+    _, t_agregado = _medir(catalogo.agregados, 'estado')
+    pagina, t_pagina = _medir(lambda: catalogo.establecimientos(0, 200, provincia=['PROVINCIA 03']))
+    print(f"   Agregado por estado:    {t_agregado * 1000:8.2f} ms  |  página de 200 filas: {t_pagina * 1000:.2f} ms "
+          f"(de {pagina['total']:,})")
+
+
+def benchmark_tabla(filas: int, consultas: tuple = ('PAPELERIA', 'MACHALA', 'LIBRERIA 12', 'QUITO')):
+    """Compara la tabla 'Todas las Librerías' como lista de objetos contra la forma columnar con órdenes."""
+    import json
+
+    from datos_columnares import decodificar_columna
+    from generar_dashboard_completo import tabla_todas_librerias
+    from normalizacion_sri import normalizar_texto
+    from tabla_virtual import FILAS_RESERVA
+
+    print(f"\n📋 Tabla virtual del dashboard ({filas:,} librerías sintéticas)")
+    df = generar_librerias_sinteticas(filas)
+    rng = np.random.default_rng(13)
+    df['NUMERO_RESENAS'] = rng.integers(0, 2000, filas)
+    df['CALIFICACION_GOOGLE'] = np.where(rng.random(filas) < 0.8, rng.uniform(1, 5, filas), np.nan)
+    df['ESTIMACION_VENTA_MENSUAL'] = rng.integers(500, 50000, filas)
+    df['SITIO_WEB'] = np.where(rng.random(filas) < 0.2, 'https://libreria.ec', None)
+    df['URL_GOOGLE_MAPS'] = np.where(rng.random(filas) < 0.7, 'https://maps.google.com/?cid=1', None)
+
+    # Antes: un objeto por fila con iterrows, y una fila del DOM por librería
+    def con_iterrows():
+        datos = []
+        for _, row in df.sort_values('ESTIMACION_VENTA_MENSUAL', ascending=False, kind='stable').iterrows():
+            nombre = row['NOMBRE_FANTASIA_COMERCIAL'] if pd.notna(row['NOMBRE_FANTASIA_COMERCIAL']) else row['RAZON_SOCIAL']
+            datos.append({
+                'ruc': str(row['NUMERO_RUC']), 'nombre': str(nombre), 'canton': str(row['DESCRIPCION_CANTON_EST']),
+                'resenas': int(row['NUMERO_RESENAS']),
+                'calificacion': float(round(row['CALIFICACION_GOOGLE'], 1)) if pd.notna(row['CALIFICACION_GOOGLE']) else 0,
+                'venta_mensual': float(row['ESTIMACION_VENTA_MENSUAL']),
+                'sitio_web': str(row['SITIO_WEB']) if pd.notna(row['SITIO_WEB']) else '',
+                'url': str(row['URL_GOOGLE_MAPS']) if pd.notna(row['URL_GOOGLE_MAPS']) else ''
+            })
+        return datos
+
+    original, t_original = _medir(con_iterrows)
+    tabla, t_columnar = _medir(tabla_todas_librerias, df)
+    columnas = {columna: decodificar_columna(valores) for columna, valores in tabla['columnas'].items()}
+
+    # Filtro: candidatas del trigrama más raro + verificación, igual que la página
+    textos = [normalizar_texto(' '.join(str(columnas[c][i]) for c in tabla['busqueda'])) for i in range(filas)]
+    trigramas = defaultdict(list)
+    for i, texto in enumerate(textos):
+        for trigrama in {texto[j:j + 3] for j in range(len(texto) - 2)}:
+            trigramas[trigrama].append(i)
+    for consulta in consultas:
+        listas = [trigramas.get(consulta[j:j + 3], []) for j in range(len(consulta) - 2)]
+        candidatas = min(listas, key=len)
+        coinciden = sum(consulta in textos[i] for i in candidatas)
+        print(f"   '{consulta}': revisa {len(candidatas):,} filas en lugar de {filas:,} ({coinciden:,} coinciden)")
+
+    tamano_original = len(json.dumps(original, ensure_ascii=False).encode('utf-8'))
+    tamano_columnar = len(json.dumps(tabla, ensure_ascii=False).encode('utf-8'))
+    print(f"   Lista de objetos (iterrows): {t_original:8.2f} s  |  {tamano_original / 1e6:6.2f} MB")
+    print(f"   Columnar + órdenes:          {t_columnar:8.2f} s  |  {tamano_columnar / 1e6:6.2f} MB "
+          f"(órdenes: {sum(len(o) for o in tabla['orden'].values()) / 1e6:.2f} MB)")
+    print(f"   Filas en el DOM: {filas:,} → ~{2 * FILAS_RESERVA + 15} (vista de 70vh más la reserva)")
+
+
+def benchmark_plantillas(filas: int, repeticiones: int = 200):
+    """Bytes escritos y descargados al regenerar el mapa filtrado con plantillas y recursos compartidos."""
+    import contextlib
+    import io
+    import re
+
+    from cache_geocodificacion import CacheGeocodificacion
+    from generar_mapa_filtrado import GeneradorMapaFiltrado
+    from plantillas_html import DIRECTORIO_RECURSOS, cargar_plantilla, leer_archivo_plantilla
+    from servidor_places_falso import ServidorPlacesFalso
+
+    print(f"\n🧩 Plantillas y recursos compartidos ({filas:,} filas sintéticas)")
+    directorio = tempfile.mkdtemp(prefix="bench_plantillas_")
+    archivo_html = os.path.join(directorio, "mapa.html")
+
+    df = generar_catalogo_sintetico(filas)
+    # Regeneración con otros datos: se dan de baja los RUC de un cantón
+    df_cambiado = df[df['DESCRIPCION_CANTON_EST'] != df['DESCRIPCION_CANTON_EST'].iloc[0]]
+
+    escrituras = []
+    with contextlib.redirect_stdout(io.StringIO()), ServidorPlacesFalso(latencia=0) as servidor:
+        generador = GeneradorMapaFiltrado(google_api_key="AIzaPrueba", cache_geocodificacion=CacheGeocodificacion(
+            os.path.join(directorio, "geo.sqlite")), qps=1000, hilos=32, base_url=servidor.url)
+        for datos in (df, df, df_cambiado):
+            ubicaciones = generador.procesar_datos_filtrados(datos)
+            antes = estado_archivos(directorio)
+            _, segundos = _medir(generador.generar_html_google_maps, ubicaciones, archivo_html)
+            despues = estado_archivos(directorio)
+            escritos = [ruta for ruta, info in despues.items()
+                        if antes.get(ruta) != info and not ruta.endswith('.sqlite')]
+            escrituras.append((segundos, escritos, despues))
+    generador.cache_coordenadas.cerrar()
+
+    # Antes: cada regeneración reescribía un HTML con todo el CSS, JS y datos dentro
+    _, _, archivos = escrituras[0]
+    pagina_completa = sum(tamano for ruta, (_, tamano) in archivos.items()
+                          if not ruta.endswith(('.sqlite', '.json')))
+    recursos = sum(tamano for ruta, (_, tamano) in archivos.items()
+                   if os.sep + DIRECTORIO_RECURSOS + os.sep in ruta)
+    for titulo, (segundos, escritos, archivos) in zip(
+            ("Primera generación", "Mismos datos", "Datos cambiados"), escrituras):
+        pagina = [ruta for ruta in escritos if not ruta.endswith('.json')]
+        fragmentos = len(escritos) - len(pagina)
+        nombres = ', '.join(sorted(os.path.basename(ruta).split('.')[0] for ruta in pagina)) or 'nada'
+        print(f"   {titulo:<20} {segundos:5.2f} s  |  página: {sum(archivos[r][1] for r in pagina) / 1e3:7,.1f} KB "
+              f"({nombres})  |  fragmentos: {fragmentos:,}")
+    print(f"   Página completa (antes, en cada regeneración y cada visita): {pagina_completa / 1e3:9,.1f} KB")
+    print(f"   Visita repetida: HTML y datos.js; los recursos ({recursos / 1e3:,.1f} KB) quedan en cache")
+
+    # Plantilla compilada frente a buscar los marcadores en cada render
+    texto = leer_archivo_plantilla('mapa_filtrado.html')
+    plantilla = cargar_plantilla('mapa_filtrado.html')
+    valores = {variable: f"<{variable}>" for variable in plantilla.variables}
+    _, t_compilada = _medir(lambda: [plantilla.renderizar(**valores) for _ in range(repeticiones)])
+    marcador = re.compile(r'{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}')
+    _, t_directa = _medir(lambda: [marcador.sub(lambda m: valores[m.group(1)], texto)
+                                         for _ in range(repeticiones)])
+    print(f"   Render de la plantilla ({repeticiones} veces): compilada {t_compilada * 1000:.1f} ms  |  "
+          f"buscando marcadores {t_directa * 1000:.1f} ms")
+
+
+def benchmark_columnar(filas: int, librerias: int = 50000):
+    """Tamaño y lectura de los datos de mapas y dashboard: lista de objetos contra columnas compactas."""
+    import contextlib
+    import gzip
+    import io
+    import json
+
+    from cache_geocodificacion import CacheGeocodificacion
+    from datos_columnares import codificar_registros, decodificar_registros
+    from detalles_mapa import directorio_detalles
+    from generar_dashboard_completo import tabla_todas_librerias
+    from generar_mapa_filtrado import GeneradorMapaFiltrado
+    from servidor_places_falso import ServidorPlacesFalso
+
+    print(f"\n📦 Datos por columnas ({filas:,} filas sintéticas, {librerias:,} librerías)")
+    directorio = tempfile.mkdtemp(prefix="bench_columnar_")
+    archivo_html = os.path.join(directorio, "mapa.html")
+
+    df = generar_catalogo_sintetico(filas)
+    with contextlib.redirect_stdout(io.StringIO()), ServidorPlacesFalso(latencia=0) as servidor:
+        generador = GeneradorMapaFiltrado(google_api_key="AIzaPrueba", cache_geocodificacion=CacheGeocodificacion(
+            os.path.join(directorio, "geo.sqlite")), qps=1000, hilos=32, base_url=servidor.url)
+        generador.generar_html_google_maps(generador.procesar_datos_filtrados(df), archivo_html)
+    generador.cache_coordenadas.cerrar()
+
+    # Registros tal como los usa la página, leídos de lo que escribió el generador
+    marcadores = marcadores_mapa(archivo_html)
+    fragmentos = []
+    for nombre in sorted(os.listdir(directorio_detalles(archivo_html))):
+        if nombre.endswith('.json'):
+            with open(os.path.join(directorio_detalles(archivo_html), nombre), 'r', encoding='utf-8') as f:
+                fragmentos.append(decodificar_registros(json.load(f)['establecimientos']))
+    df_librerias = generar_librerias_sinteticas(librerias)
+    rng = np.random.default_rng(13)
+    df_librerias['NUMERO_RESENAS'] = rng.integers(0, 2000, librerias)
+    df_librerias['CALIFICACION_GOOGLE'] = np.where(rng.random(librerias) < 0.8, rng.uniform(1, 5, librerias), np.nan)
+    df_librerias['ESTIMACION_VENTA_MENSUAL'] = rng.integers(500, 50000, librerias)
+    df_librerias['SITIO_WEB'] = None
+    df_librerias['URL_GOOGLE_MAPS'] = None
+    tabla = tabla_todas_librerias(df_librerias)
+    filas_tabla = decodificar_registros({'total': tabla['total'], 'columnas': tabla['columnas']})
+
+    for titulo, listas in (("Marcadores del mapa", [marcadores]),
+                           (f"Detalle ({len(fragmentos):,} fragmentos)", fragmentos),
+                           ("Tabla del dashboard", [filas_tabla])):
+        objetos = [json.dumps(lista, ensure_ascii=False, separators=(',', ':')) for lista in listas]
+        columnas = [json.dumps(codificar_registros(lista), ensure_ascii=False, separators=(',', ':'))
+                    for lista in listas]
+        tamano_objetos = sum(len(texto.encode('utf-8')) for texto in objetos)
+        tamano_columnas = sum(len(texto.encode('utf-8')) for texto in columnas)
+        gzip_objetos = sum(len(gzip.compress(texto.encode('utf-8'))) for texto in objetos)
+        gzip_columnas = sum(len(gzip.compress(texto.encode('utf-8'))) for texto in columnas)
+
+        _, t_objetos = _medir(lambda: [json.loads(texto) for texto in objetos])
+        _, t_columnas = _medir(lambda: [json.loads(texto) for texto in columnas])
+        _, t_decodificar = _medir(lambda: [decodificar_registros(json.loads(texto)) for texto in columnas])
+
+        print(f"   {titulo}:")
+        print(f"      Lista de objetos: {tamano_objetos / 1e6:8.2f} MB (gzip {gzip_objetos / 1e6:6.2f} MB)  |  "
+              f"lectura {t_objetos * 1000:8.1f} ms")
+        print(f"      Por columnas:     {tamano_columnas / 1e6:8.2f} MB (gzip {gzip_columnas / 1e6:6.2f} MB)  |  "
+              f"lectura {t_columnas * 1000:8.1f} ms ({t_decodificar * 1000:.1f} ms hasta objetos)  |  "
+              f"{tamano_objetos / tamano_columnas:.1f}x más chico")
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento con datos sintéticos")
+    parser.add_argument('prueba', choices=['agrupacion', 'places', 'estimacion', 'mapa', 'cubo', 'palabras', 'ruc', 'nombres', 'geocodificacion', 'nomenclator', 'servidor', 'consultas', 'tabla', 'plantillas', 'columnar', 'todas'], nargs='?', default='todas')
+    parser.add_argument('--filas', type=int, default=200000, help="Filas del catálogo sintético")
+    parser.add_argument('--consultas', type=int, default=200, help="Librerías (o ubicaciones) a buscar en el servidor falso")
+    parser.add_argument('--hilos', type=int, default=16, help="Hilos para el enriquecimiento concurrente")
+    parser.add_argument('--clientes', type=int, default=50, help="Visitantes simultáneos del servidor local")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️  Benchmarks de rendimiento")
+    print("=" * 60)
+
+    if args.prueba in ('agrupacion', 'todas'):
+        benchmark_agrupacion(args.filas)
+    if args.prueba in ('places', 'todas'):
+        benchmark_places(args.consultas, hilos=args.hilos)
+    if args.prueba in ('estimacion', 'todas'):
+        benchmark_estimacion(args.filas)
+    if args.prueba in ('mapa', 'todas'):
+        benchmark_mapa(args.filas)
+    if args.prueba in ('cubo', 'todas'):
+        benchmark_cubo(args.filas)
+    if args.prueba in ('palabras', 'todas'):
+        benchmark_palabras(args.filas)
+    if args.prueba in ('ruc', 'todas'):
+        benchmark_ruc(args.filas)
+    if args.prueba in ('nombres', 'todas'):
+        benchmark_nombres(args.filas)
+    if args.prueba in ('geocodificacion', 'todas'):
+        benchmark_geocodificacion(args.consultas, hilos=args.hilos)
+    if args.prueba in ('nomenclator', 'todas'):
+        benchmark_nomenclator()
+    if args.prueba in ('servidor', 'todas'):
+        benchmark_servidor(args.clientes)
+    if args.prueba in ('consultas', 'todas'):
+        benchmark_consultas(args.filas)
+    if args.prueba in ('tabla', 'todas'):
+        benchmark_tabla(args.filas)
+    if args.prueba in ('plantillas', 'todas'):
+        benchmark_plantillas(args.filas)
+    if args.prueba in ('columnar', 'todas'):
+        benchmark_columnar(args.filas)
+
+
+if __name__ == "__main__":
+    main()
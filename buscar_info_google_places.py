@@ -4,11 +4,21 @@ Usa la API de Google Places para obtener reseñas, calificaciones, etc.
 """
 
 import pandas as pd
+import argparse
 import os
+import random
+import threading
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 import json
 
+from cache_places import RUTA_CACHE_DEFECTO, CachePlaces
+from diario_places import RUTA_DIARIO_DEFECTO, DiarioEnriquecimiento
+from incremental_sri import claves_establecimiento, imprimir_resumen, procesar_incremental
+from limitador_tasa import LimitadorTasa
+from reglas_estimacion import RUTA_REGLAS_DEFECTO, cargar_modelo
+
 # Intentar importar Google Maps
 try:
     import googlemaps
@@ -21,25 +31,129 @@ except ImportError:
 class BuscadorGooglePlaces:
     """Busca información de librerías usando Google Places API."""
     
-    def __init__(self, google_api_key: Optional[str] = None):
-        """Inicializa el buscador."""
+    def __init__(self, google_api_key: Optional[str] = None, qps: float = 10,
+                 max_reintentos: int = 5, base_url: Optional[str] = None,
+                 cache_places: Optional[CachePlaces] = None,
+                 ruta_reglas: str = RUTA_REGLAS_DEFECTO):
+        """
+        Inicializa el buscador.
+
+        Args:
+            google_api_key: API key de Google con Places API habilitada
+            qps: Consultas por segundo permitidas entre todos los hilos
+            max_reintentos: Reintentos ante OVER_QUERY_LIMIT o errores de red
+            base_url: Servidor alternativo (p. ej. servidor_places_falso.py para pruebas)
+            cache_places: Cache persistente de búsquedas y detalles (por defecto cache/places.sqlite)
+            ruta_reglas: Archivo JSON/YAML de reglas de estimación (sección 'google')
+        """
         self.google_api_key = google_api_key
         self.google_client = None
+        # Resultados ya definitivos de esta ejecución (por clave de establecimiento o texto
+        # de búsqueda) y búsquedas en curso, compartidos entre los hilos de buscar_lote
         self.cache_resultados = {}
+        self._busquedas_en_curso: Dict[str, Future] = {}
+        self._lock_resultados = threading.Lock()
+        self.cache_places = cache_places or CachePlaces()
+        self.limitador = LimitadorTasa(qps)
+        self.max_reintentos = max_reintentos
+        self.llamadas_api = 0
+        self.reintentos = 0
+        self._lock_contadores = threading.Lock()
+        self.modelo_estimacion = cargar_modelo('google', ruta_reglas)
         
         if google_api_key and GOOGLE_MAPS_AVAILABLE:
             try:
-                self.google_client = googlemaps.Client(key=google_api_key)
+                opciones = {'base_url': base_url} if base_url else {}
+                # El ritmo y los reintentos por cuota los maneja self.limitador
+                self.google_client = googlemaps.Client(
+                    key=google_api_key,
+                    queries_per_second=1000,
+                    retry_over_query_limit=False,
+                    **opciones
+                )
                 print("✅ Google Places API configurada")
             except Exception as e:
                 print(f"⚠️  Error al configurar Google Maps: {str(e)}")
         else:
             print("⚠️  No se puede usar Google Places API sin API key")
     
-    def buscar_libreria(self, nombre: str, canton: str, provincia: str) -> Optional[Dict]:
+    def _llamar_api(self, metodo, **parametros) -> Dict:
+        """
+        Llama a la API respetando el limitador de tasa.
+        
+        Reintenta con espera exponencial si Google responde OVER_QUERY_LIMIT
+        o si falla la conexión; cualquier otro error se propaga.
+        """
+        for intento in range(self.max_reintentos + 1):
+            self.limitador.adquirir()
+            try:
+                with self._lock_contadores:
+                    self.llamadas_api += 1
+                respuesta = metodo(**parametros)
+                self.limitador.recuperar()
+                return respuesta
+            except googlemaps.exceptions.ApiError as e:
+                if e.status != 'OVER_QUERY_LIMIT' or intento == self.max_reintentos:
+                    raise
+                self.limitador.reducir()
+            except (googlemaps.exceptions.Timeout, googlemaps.exceptions.TransportError):
+                if intento == self.max_reintentos:
+                    raise
+            
+            with self._lock_contadores:
+                self.reintentos += 1
+            time.sleep(min(30, 0.5 * 2 ** intento) * (0.5 + random.random()))
+    
+    @staticmethod
+    def _es_error_transitorio(error: Exception) -> bool:
+        """Errores de cuota o de red: la librería podría existir, no se debe recordar el fallo."""
+        if getattr(error, 'status', None) == 'OVER_QUERY_LIMIT':
+            return True
+        return GOOGLE_MAPS_AVAILABLE and isinstance(
+            error, (googlemaps.exceptions.Timeout, googlemaps.exceptions.TransportError)
+        )
+    
+    def resultado_definitivo(self, nombre: str, canton: str, provincia: str, clave: str = None) -> bool:
+        """Indica si la última búsqueda terminó (encontrada o no) sin un error transitorio."""
+        with self._lock_resultados:
+            return (clave or f"{nombre} librería {canton} {provincia} Ecuador") in self.cache_resultados
+    
+    def _buscar_place_id(self, nombre: str, canton: str, provincia: str, query: str) -> Optional[str]:
+        """Búsqueda por texto (con y sin la palabra 'librería'); devuelve el place_id o None."""
+        places_result = self._llamar_api(self.google_client.places, query=query)
+        
+        if not places_result.get('results'):
+            # Intentar sin "librería" en el query
+            query2 = f"{nombre} {canton} {provincia} Ecuador"
+            places_result = self._llamar_api(self.google_client.places, query=query2)
+        
+        if not places_result.get('results'):
+            return None
+        
+        # Tomar el primer resultado (más relevante)
+        return places_result['results'][0].get('place_id')
+    
+    def _obtener_detalles(self, place_id: str) -> Dict:
+        """Detalles del lugar: los campos vigentes salen del cache y solo se piden los vencidos."""
+        resultado, vencidos = self.cache_places.obtener_detalles(place_id)
+        
+        if vencidos:
+            place_details = self._llamar_api(self.google_client.place, place_id=place_id, fields=vencidos)
+            nuevos = place_details.get('result', {})
+            self.cache_places.guardar_detalles(place_id, vencidos, nuevos)
+            resultado.update({campo: nuevos[campo] for campo in vencidos if campo in nuevos})
+        
+        return resultado
+    
+    def buscar_libreria(self, nombre: str, canton: str, provincia: str, clave: str = None) -> Optional[Dict]:
         """
         Busca una librería en Google Places.
         
+        Args:
+            nombre, canton, provincia: Datos para la búsqueda por texto
+            clave: Identificador del establecimiento (NUMERO_RUC#n) para el cache persistente;
+                   sin clave se usa el texto de la búsqueda
+        
         Returns:
             Dict con información encontrada o None
         """
@@ -48,36 +162,48 @@ class BuscadorGooglePlaces:
         
         # Crear query de búsqueda
         query = f"{nombre} librería {canton} {provincia} Ecuador"
+        memo = clave or query
         
-        # Verificar cache
-        if query in self.cache_resultados:
-            return self.cache_resultados[query]
+        # Verificar cache; si otro hilo ya está buscando lo mismo, esperar su resultado
+        with self._lock_resultados:
+            if memo in self.cache_resultados:
+                return self.cache_resultados[memo]
+            futuro = self._busquedas_en_curso.get(memo)
+            propia = futuro is None
+            if propia:
+                futuro = self._busquedas_en_curso[memo] = Future()
+        if not propia:
+            return futuro.result()
         
+        info, definitivo = None, False
         try:
-            # Buscar usando Places API
-            places_result = self.google_client.places(query=query)
-            
-            if not places_result.get('results'):
-                # Intentar sin "librería" en el query
-                query2 = f"{nombre} {canton} {provincia} Ecuador"
-                places_result = self.google_client.places(query=query2)
-            
-            if not places_result.get('results'):
-                self.cache_resultados[query] = None
-                return None
-            
-            # Tomar el primer resultado (más relevante)
-            place = places_result['results'][0]
-            place_id = place.get('place_id')
+            info, definitivo = self._buscar(nombre, canton, provincia, query, memo)
+            return info
+        finally:
+            with self._lock_resultados:
+                if definitivo:
+                    self.cache_resultados[memo] = info
+                del self._busquedas_en_curso[memo]
+            futuro.set_result(info)
+    
+    def _buscar(self, nombre: str, canton: str, provincia: str, query: str,
+                clave: str) -> Tuple[Optional[Dict], bool]:
+        """
+        Busca en el cache persistente o en la API.
+        
+        Returns:
+            (información encontrada o None, False si hubo un error transitorio)
+        """
+        try:
+            vigente, place_id = self.cache_places.obtener_busqueda(clave, query)
+            if not vigente:
+                place_id = self._buscar_place_id(nombre, canton, provincia, query)
+                self.cache_places.guardar_busqueda(clave, query, place_id)
             
-            # Obtener detalles completos
-            place_details = self.google_client.place(
-                place_id=place_id,
-                fields=['name', 'rating', 'user_ratings_total', 'formatted_address', 
-                       'website', 'formatted_phone_number', 'photo', 'opening_hours']
-            )
+            if not place_id:
+                return None, True
             
-            resultado = place_details.get('result', {})
+            resultado = self._obtener_detalles(place_id)
             
             # Extraer información relevante
             info = {
@@ -101,92 +227,226 @@ class BuscadorGooglePlaces:
                 info['abierto_ahora'] = opening_hours.get('open_now', None)
                 info['horarios'] = opening_hours.get('weekday_text', [])
             
-            self.cache_resultados[query] = info
-            return info
+            return info, True
             
         except Exception as e:
             print(f"   ⚠️  Error al buscar '{nombre}': {str(e)}")
-            self.cache_resultados[query] = None
-            return None
+            return None, not self._es_error_transitorio(e)
     
-    def calcular_estimacion_mejorada(self, info_google: Dict, registro: pd.Series) -> Dict:
-        """Calcula estimación mejorada basándose en información de Google."""
-        if not info_google or not info_google.get('encontrado'):
-            return {
-                'venta_estimada_mensual': 0,
-                'venta_estimada_anual': 0,
-                'confianza': 'muy_baja',
-                'razon': 'No encontrado en Google Maps'
-            }
+    def buscar_lote(self, consultas: Sequence[Tuple[str, ...]], hilos: int = 8,
+                    al_completar: Optional[Callable[[int, Optional[Dict]], None]] = None) -> List[Optional[Dict]]:
+        """
+        Busca varias librerías en paralelo respetando el límite de QPS.
         
-        # Base según número de reseñas
-        num_resenas = info_google.get('numero_resenas', 0)
-        calificacion = info_google.get('calificacion', 0)
-        tiene_web = bool(info_google.get('sitio_web'))
-        tiene_fotos = info_google.get('tiene_fotos', False)
+        Args:
+            consultas: Tuplas (nombre, canton, provincia) o (nombre, canton, provincia, clave)
+            hilos: Búsquedas simultáneas
+            al_completar: Función llamada con (posición, resultado) a medida que terminan
         
-        # Determinar tamaño base por reseñas
-        if num_resenas == 0:
-            base_ventas = 5000  # USD/mes
-            confianza = 'baja'
-        elif num_resenas < 10:
-            base_ventas = 10000
-            confianza = 'baja'
-        elif num_resenas < 50:
-            base_ventas = 25000
-            confianza = 'media'
-        elif num_resenas < 100:
-            base_ventas = 50000
-            confianza = 'alta'
-        else:
-            base_ventas = 80000
-            confianza = 'alta'
+        Returns:
+            Resultados en el mismo orden que las consultas
+        """
+        resultados = [None] * len(consultas)
         
-        # Ajustes por calificación
-        if calificacion >= 4.5:
-            base_ventas *= 1.3
-        elif calificacion >= 4.0:
-            base_ventas *= 1.1
-        elif calificacion < 3.5:
-            base_ventas *= 0.8
+        executor = ThreadPoolExecutor(max_workers=max(1, hilos))
+        try:
+            futuros = {
+                executor.submit(self.buscar_libreria, *consulta): posicion
+                for posicion, consulta in enumerate(consultas)
+            }
+            for futuro in as_completed(futuros):
+                posicion = futuros[futuro]
+                resultados[posicion] = futuro.result()
+                if al_completar:
+                    al_completar(posicion, resultados[posicion])
+        finally:
+            # Ante Ctrl+C no se lanzan las búsquedas que aún no empezaron
+            executor.shutdown(wait=True, cancel_futures=True)
         
-        # Ajuste por sitio web
-        if tiene_web:
-            base_ventas *= 1.5
-            confianza = 'alta' if confianza != 'muy_baja' else 'media'
+        return resultados
+    
+    def calcular_estimacion_mejorada(self, info_google: Dict, registro: pd.Series) -> Dict:
+        """Calcula estimación mejorada basándose en información de Google."""
+        fila = self.calcular_estimaciones([info_google], registro.to_frame().T).iloc[0]
+        return {
+            'venta_estimada_mensual': fila['venta_estimada_mensual'],
+            'venta_estimada_anual': fila['venta_estimada_anual'],
+            'confianza': fila['confianza'],
+            'razon': fila['razon']
+        }
+    
+    def calcular_estimaciones(self, resultados_google: Sequence[Optional[Dict]], df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula la estimación mejorada de todas las librerías con las reglas compiladas.
         
-        # Ajuste por fotos (más fotos = más actividad)
-        if tiene_fotos:
-            num_fotos = info_google.get('numero_fotos', 0)
-            if num_fotos > 5:
-                base_ventas *= 1.2
+        Args:
+            resultados_google: Resultado de buscar_libreria de cada fila (None o {} si no se encontró)
+            df: Librerías, en el mismo orden que los resultados
         
-        # Ajuste por estado del contribuyente
-        if registro.get('ESTADO_CONTRIBUYENTE') == 'ACTIVO':
-            base_ventas *= 1.2
-        elif 'SUSPENDIDO' in str(registro.get('ESTADO_CONTRIBUYENTE', '')):
-            base_ventas *= 0.3
+        Returns:
+            DataFrame (mismo índice que df) con venta_estimada_mensual, venta_estimada_anual,
+            confianza y razon
+        """
+        # dtype object conserva el tipo de cada valor (p. ej. calificación 0 frente a 4.5)
+        google = pd.DataFrame([r or {} for r in resultados_google], index=df.index, dtype=object)
+        contexto = pd.concat([df, google.drop(columns=df.columns.intersection(google.columns))], axis=1)
+        resultado = self.modelo_estimacion.evaluar(contexto)
+        return resultado[['venta_estimada_mensual', 'venta_estimada_anual', 'confianza', 'razon']]
+
+
+class BusquedaIncompleta(Exception):
+    """La búsqueda se interrumpió o quedaron librerías pendientes para otra ejecución."""
+
+
+def enriquecer_librerias(buscador: BuscadorGooglePlaces, df: pd.DataFrame, claves: pd.Series, hilos: int = 8,
+                         diario: Optional[DiarioEnriquecimiento] = None,
+                         limite: Optional[int] = None) -> pd.DataFrame:
+    """
+    Agrega a df las columnas de Google Places y la estimación mejorada.
+    
+    Args:
+        buscador: Buscador configurado
+        df: Librerías a buscar
+        claves: Clave de establecimiento de cada fila (índice de df)
+        hilos: Búsquedas simultáneas
+        diario: Diario para retomar ejecuciones (opcional)
+        limite: Máximo de librerías a buscar en esta ejecución
+    
+    Raises:
+        BusquedaIncompleta: Si se interrumpe o quedan filas sin resultado definitivo
+    """
+    df_resultado = df.copy()
+    
+    # Preparar las búsquedas
+    consultas = []
+    for _, row in df.iterrows():
+        nombre = str(row.get('RAZON_SOCIAL', ''))
+        fantasia = str(row.get('NOMBRE_FANTASIA_COMERCIAL', ''))
+        canton = str(row.get('DESCRIPCION_CANTON_EST', ''))
+        provincia = str(row.get('DESCRIPCION_PROVINCIA_EST', ''))
         
-        return {
-            'venta_estimada_mensual': round(base_ventas, 2),
-            'venta_estimada_anual': round(base_ventas * 12, 2),
-            'confianza': confianza,
-            'razon': f'Basado en {num_resenas} reseñas, calificación {calificacion}'
-        }
+        # Usar nombre fantasia si existe
+        nombre_busqueda = fantasia if fantasia != 'N/A' and pd.notna(row.get('NOMBRE_FANTASIA_COMERCIAL')) else nombre
+        consultas.append((nombre_busqueda, canton, provincia))
+    
+    total = len(consultas)
+    claves = claves.loc[df.index].tolist()
+    resultados_google = [None] * total
+    pendientes = list(range(total))
+    
+    # Retomar desde el diario
+    if diario:
+        pendientes = []
+        for posicion, (clave, consulta) in enumerate(zip(claves, consultas)):
+            registro = diario.obtener(clave, consulta)
+            if registro:
+                resultados_google[posicion] = registro['resultado']
+            else:
+                pendientes.append(posicion)
+        print(f"📒 Diario {diario.ruta}: {total - len(pendientes):,} ya buscadas, {len(pendientes):,} pendientes")
+    
+    if limite is not None:
+        pendientes = pendientes[:limite]
+    
+    completadas = 0
+    
+    def al_completar(indice: int, info_google: Optional[Dict]):
+        nonlocal completadas
+        completadas += 1
+        posicion = pendientes[indice]
+        nombre_busqueda = consultas[posicion][0]
+        resultados_google[posicion] = info_google
+        
+        if diario and buscador.resultado_definitivo(*consultas[posicion], claves[posicion]):
+            diario.registrar(claves[posicion], consultas[posicion], info_google)
+        
+        if info_google and info_google.get('encontrado'):
+            estado = f"✅ Encontrado ({info_google.get('numero_resenas', 0)} reseñas)"
+        else:
+            estado = "❌ No encontrado"
+        print(f"[{completadas}/{len(pendientes)}] {nombre_busqueda[:50]}... {estado}")
+    
+    # Buscar en Google Places (resultados en el mismo orden que las filas)
+    try:
+        buscador.buscar_lote([consultas[p] + (claves[p],) for p in pendientes], hilos=hilos,
+                             al_completar=al_completar)
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Búsqueda interrumpida tras {completadas:,} librerías")
+        if diario:
+            print("   Los resultados obtenidos están en el diario; vuelve a ejecutar para continuar")
+        raise BusquedaIncompleta()
+    
+    if diario:
+        faltantes = sum(1 for clave, consulta in zip(claves, consultas) if not diario.obtener(clave, consulta))
+        if faltantes:
+            print(f"\n⏸️  Quedan {faltantes:,} librerías sin resultado definitivo (límite o errores de cuota/red)")
+            print("   Vuelve a ejecutar el script para completarlas; el Excel se genera al terminar todas")
+            raise BusquedaIncompleta()
+    
+    resultados_google = [r if r else {} for r in resultados_google]
+    
+    # Calcular estimaciones mejoradas (todas las filas en una sola pasada)
+    estimaciones_mejoradas = buscador.calcular_estimaciones(resultados_google, df)
+    
+    # Crear columnas con información de Google
+    df_resultado['ENCONTRADO_GOOGLE'] = [r.get('encontrado', False) if r else False for r in resultados_google]
+    df_resultado['NOMBRE_GOOGLE'] = [r.get('nombre_google', '') if r else '' for r in resultados_google]
+    df_resultado['CALIFICACION_GOOGLE'] = [r.get('calificacion', 0) if r else 0 for r in resultados_google]
+    df_resultado['NUMERO_RESENAS'] = [r.get('numero_resenas', 0) if r else 0 for r in resultados_google]
+    df_resultado['DIRECCION_GOOGLE'] = [r.get('direccion', '') if r else '' for r in resultados_google]
+    df_resultado['SITIO_WEB'] = [r.get('sitio_web', '') if r else '' for r in resultados_google]
+    df_resultado['TELEFONO_GOOGLE'] = [r.get('telefono', '') if r else '' for r in resultados_google]
+    df_resultado['TIENE_FOTOS'] = [r.get('tiene_fotos', False) if r else False for r in resultados_google]
+    df_resultado['NUMERO_FOTOS'] = [r.get('numero_fotos', 0) if r else 0 for r in resultados_google]
+    df_resultado['URL_GOOGLE_MAPS'] = [r.get('url_google_maps', '') if r else '' for r in resultados_google]
+    
+    # Agregar estimaciones mejoradas
+    df_resultado['ESTIMACION_VENTA_MENSUAL'] = estimaciones_mejoradas['venta_estimada_mensual']
+    df_resultado['ESTIMACION_VENTA_ANUAL'] = estimaciones_mejoradas['venta_estimada_anual']
+    df_resultado['CONFIANZA_ESTIMACION'] = estimaciones_mejoradas['confianza'].tolist()
+    df_resultado['RAZON_ESTIMACION'] = estimaciones_mejoradas['razon'].tolist()
+    
+    return df_resultado
 
 
-def procesar_librerias_con_google():
-    """Procesa librerías y busca información en Google Places."""
+def procesar_librerias_con_google(google_api_key: Optional[str] = None, hilos: int = 8, qps: float = 10,
+                                  base_url: Optional[str] = None, archivo: str = "librerias_detalle.xlsx",
+                                  archivo_salida: str = "librerias_con_info_google.xlsx",
+                                  ruta_diario: Optional[str] = RUTA_DIARIO_DEFECTO, limite: Optional[int] = None,
+                                  ruta_cache: str = RUTA_CACHE_DEFECTO, incremental: bool = False):
+    """
+    Procesa librerías y busca información en Google Places.
+    
+    Con un diario, cada resultado se guarda apenas llega y las librerías ya buscadas
+    en ejecuciones anteriores no se vuelven a consultar.
+    
+    Args:
+        google_api_key: API key (si no se indica, se lee de google_maps_api_key.txt)
+        hilos: Búsquedas simultáneas
+        qps: Consultas por segundo permitidas a la API
+        base_url: Servidor alternativo de la API (pruebas con servidor_places_falso.py)
+        archivo: Excel de librerías generado por analizar_librerias.py
+        archivo_salida: Excel donde se guardan los resultados
+        ruta_diario: Archivo JSONL del diario (None para no usarlo)
+        limite: Máximo de librerías a buscar en esta ejecución (para repartir en varias sesiones;
+            requiere el diario)
+        ruta_cache: Cache SQLite de búsquedas y detalles de Google Places
+        incremental: Reutilizar los resultados de la ejecución anterior para las filas sin cambios
+    """
     print("="*70)
     print("🔍 BUSCADOR AUTOMÁTICO DE INFORMACIÓN EN GOOGLE PLACES")
     print("="*70)
     
     # Cargar API key
-    google_api_key = None
-    if os.path.exists('google_maps_api_key.txt'):
+    if not google_api_key and os.path.exists('google_maps_api_key.txt'):
         with open('google_maps_api_key.txt', 'r') as f:
             google_api_key = f.read().strip()
     
+    # Sin diario, las filas que quedan fuera del límite se escribirían como "no encontradas"
+    if limite is not None and not ruta_diario:
+        print("\n❌ El límite por ejecución necesita el diario para retomar las librerías restantes")
+        return
+    
     if not google_api_key:
         print("\n❌ No se encontró API key de Google Maps")
         print("   Asegúrate de tener el archivo 'google_maps_api_key.txt'")
@@ -200,7 +460,6 @@ def procesar_librerias_con_google():
         return
     
     # Cargar datos
-    archivo = "librerias_detalle.xlsx"
     if not os.path.exists(archivo):
         print(f"\n❌ No se encontró: {archivo}")
         return
@@ -213,85 +472,59 @@ def procesar_librerias_con_google():
     print(f"   Librerías activas: {len(activas):,}")
     
     # Inicializar buscador
-    buscador = BuscadorGooglePlaces(google_api_key)
+    buscador = BuscadorGooglePlaces(google_api_key, qps=qps, base_url=base_url,
+                                    cache_places=CachePlaces(ruta_cache))
     
     if not buscador.google_client:
         print("\n❌ No se pudo inicializar Google Places API")
         print("   Verifica que tu API key tenga habilitada 'Places API'")
         print("   Ve a: https://console.cloud.google.com/apis/library/places-backend.googleapis.com")
+        buscador.cache_places.cerrar()
         return
     
-    print("\n🔍 Buscando información en Google Places...")
+    print(f"\n🔍 Buscando información en Google Places ({hilos} hilos, {qps:g} consultas/s)...")
     print("   (Esto puede tomar varios minutos)")
     print()
     
-    # Procesar cada librería
-    resultados_google = []
-    estimaciones_mejoradas = []
-    
-    total = len(activas)
-    encontrados = 0
+    claves = claves_establecimiento(activas)
+    diario = DiarioEnriquecimiento(ruta_diario) if ruta_diario else None
     
-    for idx, (_, row) in enumerate(activas.iterrows(), 1):
-        nombre = str(row.get('RAZON_SOCIAL', ''))
-        fantasia = str(row.get('NOMBRE_FANTASIA_COMERCIAL', ''))
-        canton = str(row.get('DESCRIPCION_CANTON_EST', ''))
-        provincia = str(row.get('DESCRIPCION_PROVINCIA_EST', ''))
-        
-        # Usar nombre fantasia si existe
-        nombre_busqueda = fantasia if fantasia != 'N/A' and pd.notna(row.get('NOMBRE_FANTASIA_COMERCIAL')) else nombre
-        
-        print(f"[{idx}/{total}] Buscando: {nombre_busqueda[:50]}...", end=' ')
-        
-        # Buscar en Google Places
-        info_google = buscador.buscar_libreria(nombre_busqueda, canton, provincia)
-        
-        if info_google and info_google.get('encontrado'):
-            encontrados += 1
-            print(f"✅ Encontrado ({info_google.get('numero_resenas', 0)} reseñas)")
+    inicio = time.time()
+    try:
+        if incremental:
+            # Solo se buscan las librerías nuevas o con datos distintos a la ejecución anterior
+            activas, resumen = procesar_incremental(
+                activas, "google_places",
+                lambda pendientes: enriquecer_librerias(buscador, pendientes, claves, hilos, diario, limite),
+                # Si cambian las reglas se recalcula todo (las búsquedas salen del diario y el cache)
+                contexto=buscador.modelo_estimacion.huella
+            )
+            imprimir_resumen(resumen, "Librerías activas")
         else:
-            print("❌ No encontrado")
-        
-        resultados_google.append(info_google if info_google else {})
-        
-        # Calcular estimación mejorada
-        estimacion = buscador.calcular_estimacion_mejorada(
-            info_google if info_google else {}, 
-            row
-        )
-        estimaciones_mejoradas.append(estimacion)
-        
-        # Rate limiting (evitar exceder límites de API)
-        time.sleep(0.2)  # 200ms entre búsquedas
+            activas = enriquecer_librerias(buscador, activas, claves, hilos, diario, limite)
+    except BusquedaIncompleta:
+        buscador.cache_places.cerrar()
+        return
+    finally:
+        if diario:
+            diario.cerrar()
+    duracion = time.time() - inicio
     
     # Agregar resultados al DataFrame
     print("\n📊 Procesando resultados...")
-    
-    # Crear columnas con información de Google
-    activas['ENCONTRADO_GOOGLE'] = [r.get('encontrado', False) if r else False for r in resultados_google]
-    activas['NOMBRE_GOOGLE'] = [r.get('nombre_google', '') if r else '' for r in resultados_google]
-    activas['CALIFICACION_GOOGLE'] = [r.get('calificacion', 0) if r else 0 for r in resultados_google]
-    activas['NUMERO_RESENAS'] = [r.get('numero_resenas', 0) if r else 0 for r in resultados_google]
-    activas['DIRECCION_GOOGLE'] = [r.get('direccion', '') if r else '' for r in resultados_google]
-    activas['SITIO_WEB'] = [r.get('sitio_web', '') if r else '' for r in resultados_google]
-    activas['TELEFONO_GOOGLE'] = [r.get('telefono', '') if r else '' for r in resultados_google]
-    activas['TIENE_FOTOS'] = [r.get('tiene_fotos', False) if r else False for r in resultados_google]
-    activas['NUMERO_FOTOS'] = [r.get('numero_fotos', 0) if r else 0 for r in resultados_google]
-    activas['URL_GOOGLE_MAPS'] = [r.get('url_google_maps', '') if r else '' for r in resultados_google]
-    
-    # Agregar estimaciones mejoradas
-    activas['ESTIMACION_VENTA_MENSUAL'] = [e['venta_estimada_mensual'] for e in estimaciones_mejoradas]
-    activas['ESTIMACION_VENTA_ANUAL'] = [e['venta_estimada_anual'] for e in estimaciones_mejoradas]
-    activas['CONFIANZA_ESTIMACION'] = [e['confianza'] for e in estimaciones_mejoradas]
-    activas['RAZON_ESTIMACION'] = [e['razon'] for e in estimaciones_mejoradas]
+    total = len(activas)
+    encontrados = int(activas['ENCONTRADO_GOOGLE'].sum())
     
     # Ordenar por estimación
     activas = activas.sort_values('ESTIMACION_VENTA_MENSUAL', ascending=False)
     
     # Exportar
-    archivo_salida = "librerias_con_info_google.xlsx"
     activas.to_excel(archivo_salida, index=False)
     
+    # La ejecución terminó: el diario ya no hace falta (los resultados quedan en el cache)
+    if ruta_diario and os.path.exists(ruta_diario):
+        os.remove(ruta_diario)
+    
     # Mostrar resumen
     print("\n" + "="*70)
     print("✅ PROCESO COMPLETADO")
@@ -300,6 +533,12 @@ def procesar_librerias_con_google():
     print(f"   Total procesadas: {total}")
     print(f"   Encontradas en Google: {encontrados} ({encontrados/total*100:.1f}%)")
     print(f"   No encontradas: {total - encontrados}")
+    print(f"   Tiempo: {duracion:.1f} s ({buscador.llamadas_api} llamadas a la API, {buscador.reintentos} reintentos)")
+    
+    stats = buscador.cache_places.estadisticas()
+    buscador.cache_places.cerrar()
+    print(f"   Cache: {stats['aciertos_busqueda']} búsquedas reutilizadas, "
+          f"{stats['campos_vigentes']} campos vigentes / {stats['campos_vencidos']} actualizados")
     
     # Estadísticas de reseñas
     encontradas = activas[activas['ENCONTRADO_GOOGLE'] == True]
@@ -319,6 +558,45 @@ def procesar_librerias_con_google():
     print("\n💡 Revisa el archivo Excel para ver toda la información obtenida")
 
 
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Busca información de librerías en Google Places")
+    parser.add_argument('--hilos', type=int, default=8, help="Búsquedas simultáneas")
+    parser.add_argument('--qps', type=float, default=10, help="Consultas por segundo a la API")
+    parser.add_argument('--base-url', help="Servidor alternativo de la API (p. ej. http://localhost:8765)")
+    parser.add_argument('--api-key', help="API key (por defecto, google_maps_api_key.txt)")
+    parser.add_argument('--entrada', default="librerias_detalle.xlsx", help="Excel de librerías")
+    parser.add_argument('--salida', default="librerias_con_info_google.xlsx", help="Excel de resultados")
+    parser.add_argument('--diario', help=f"Diario JSONL para retomar ejecuciones (por defecto {RUTA_DIARIO_DEFECTO})")
+    parser.add_argument('--cache', help=f"Cache SQLite de Google Places (por defecto {RUTA_CACHE_DEFECTO})")
+    parser.add_argument('--sin-diario', action='store_true', help="No guardar ni retomar desde el diario")
+    parser.add_argument('--limite', type=int, help="Máximo de librerías a buscar en esta ejecución")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Buscar solo las librerías nuevas o modificadas desde la ejecución anterior")
+    args = parser.parse_args()
+    
+    if args.sin_diario and args.limite is not None:
+        parser.error("--limite requiere el diario: sin él, las librerías fuera del límite quedarían como no encontradas")
+    
+    # Contra un servidor de pruebas no se mezclan resultados con los de Google
+    sufijo = "_prueba" if args.base_url else ""
+    ruta_diario = args.diario or RUTA_DIARIO_DEFECTO.replace(".jsonl", f"{sufijo}.jsonl")
+    ruta_cache = args.cache or RUTA_CACHE_DEFECTO.replace(".sqlite", f"{sufijo}.sqlite")
+    
+    procesar_librerias_con_google(
+        google_api_key=args.api_key,
+        hilos=args.hilos,
+        qps=args.qps,
+        base_url=args.base_url,
+        archivo=args.entrada,
+        archivo_salida=args.salida,
+        ruta_diario=None if args.sin_diario else ruta_diario,
+        limite=args.limite,
+        ruta_cache=ruta_cache,
+        incremental=args.incremental
+    )
+
+
 if __name__ == "__main__":
-    procesar_librerias_con_google()
+    main()
 
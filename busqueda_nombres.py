@@ -0,0 +1,364 @@
+"""
+Búsqueda aproximada de establecimientos por nombre.
+Un índice de trigramas sobre las claves normalizadas de RAZON_SOCIAL y
+NOMBRE_FANTASIA_COMERCIAL (las `_NORM` de la ingesta) responde "la librería que se
+llama parecido a X en Machala" en milisegundos: cada consulta junta las listas de
+los trigramas que contiene y ordena por la parte de la consulta que aparece en cada
+nombre, sin recorrer el catálogo. El índice se guarda en cache/busqueda/ y se
+rearma solo cuando cambia algún Excel de datos_excel/.
+
+Uso:
+    python3 busqueda_nombres.py "libreria legenda"
+    python3 busqueda_nombres.py "papeleria" --canton machala --limite 20
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from consulta_ruc import normalizar_rucs
+from ingesta_sri import cargar_excel_sri, listar_archivos_excel
+from normalizacion_sri import agregar_columnas_normalizadas, columna_normalizada, normalizar_texto
+
+# Incrementar si cambia el formato del índice
+VERSION_INDICE = 1
+
+RUTA_INDICE_DEFECTO = os.path.join("cache", "busqueda", "nombres.pkl")
+
+# Columnas que se leen de cada Excel (las de nombre son las indexadas)
+COLUMNAS_NOMBRE = ['RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL']
+COLUMNAS_RESULTADO = ['NUMERO_RUC', 'RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL', 'ESTADO_CONTRIBUYENTE',
+                      'CODIGO_CIIU', 'DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST']
+
+# Alfabeto de los trigramas: 0 = separador (espacio, puntuación), 1-26 letras, 27-36 dígitos, 37 otro
+_SEPARADOR = 0
+_OTRO = 37
+TAMANO_ALFABETO = 38
+TOTAL_TRIGRAMAS = TAMANO_ALFABETO ** 3   # cabe en uint16
+
+# Nombres procesados por bloque al armar el índice (acota la matriz de caracteres)
+NOMBRES_POR_BLOQUE = 65536
+
+# Parte mínima de los trigramas de la consulta que debe tener un nombre para aparecer
+COBERTURA_MINIMA = 0.5
+
+
+def _tabla_alfabeto() -> np.ndarray:
+    tabla = np.full(128, _SEPARADOR, dtype=np.uint16)
+    for i, letra in enumerate('ABCDEFGHIJKLMNOPQRSTUVWXYZ'):
+        tabla[ord(letra)] = tabla[ord(letra.lower())] = i + 1
+    for i, digito in enumerate('0123456789'):
+        tabla[ord(digito)] = 27 + i
+    return tabla
+
+
+_ALFABETO = _tabla_alfabeto()
+
+
+def _trigramas_bloque(nombres: List[str]):
+    """
+    Trigramas distintos de cada nombre de un bloque (ya normalizados).
+
+    Returns:
+        (posición del nombre en el bloque, trigrama) como arreglos paralelos, sin repetidos
+    """
+    rellenos = [f" {nombre} " for nombre in nombres]
+    largos = np.fromiter((len(n) for n in rellenos), dtype=np.int64, count=len(rellenos))
+    caracteres = np.array(rellenos, dtype=str)
+    ancho = caracteres.dtype.itemsize // 4
+    puntos = caracteres.view(np.uint32).reshape(len(rellenos), ancho)
+    codigos = np.where(puntos < 128, _ALFABETO[np.minimum(puntos, 127)], _OTRO).astype(np.uint16)
+
+    trigramas = ((codigos[:, :-2] * TAMANO_ALFABETO + codigos[:, 1:-1]) * TAMANO_ALFABETO + codigos[:, 2:])
+    # Solo las ventanas dentro del nombre y que no sean puro separador
+    validos = (np.arange(ancho - 2) < (largos - 2)[:, None]) & (trigramas != 0)
+    filas, _ = np.nonzero(validos)
+    claves = np.unique(filas.astype(np.int64) * TOTAL_TRIGRAMAS + trigramas[validos])
+    return (claves // TOTAL_TRIGRAMAS).astype(np.int32), (claves % TOTAL_TRIGRAMAS).astype(np.uint16)
+
+
+def trigramas_consulta(texto: str) -> np.ndarray:
+    """Trigramas distintos de un texto de consulta (normalizado igual que los nombres)."""
+    clave = normalizar_texto(texto)
+    if not clave:
+        return np.array([], dtype=np.uint16)
+    return _trigramas_bloque([clave])[1]
+
+
+def _desplazamientos(grupos: np.ndarray, total: int) -> np.ndarray:
+    """Inicio de cada grupo en un arreglo ordenado por grupo (tamaño total + 1)."""
+    return np.concatenate([[0], np.cumsum(np.bincount(grupos, minlength=total))]).astype(np.int64)
+
+
+class IndiceNombres:
+    """Índice de trigramas: trigrama → nombres normalizados → filas del catálogo."""
+
+    def __init__(self, nombres: np.ndarray, inicio_trigrama: np.ndarray, nombres_por_trigrama: np.ndarray,
+                 trigramas_por_nombre: np.ndarray, inicio_nombre: np.ndarray, filas_por_nombre: np.ndarray,
+                 filas: pd.DataFrame):
+        """
+        Inicializa el índice (normalmente con construir_indice o cargar_indice).
+
+        Args:
+            nombres: Nombres normalizados distintos
+            inicio_trigrama, nombres_por_trigrama: Lista de nombres de cada trigrama (formato CSR)
+            trigramas_por_nombre: Cantidad de trigramas distintos de cada nombre
+            inicio_nombre, filas_por_nombre: Filas del catálogo de cada nombre (formato CSR)
+            filas: Columnas de resultado más las claves normalizadas de provincia y cantón
+        """
+        self.nombres = nombres
+        self.inicio_trigrama = inicio_trigrama
+        self.nombres_por_trigrama = nombres_por_trigrama
+        self.trigramas_por_nombre = trigramas_por_nombre
+        self.inicio_nombre = inicio_nombre
+        self.filas_por_nombre = filas_por_nombre
+        self.filas = filas
+
+    def _mascara_ubicacion(self, columna: str, valor: Optional[str]) -> Optional[np.ndarray]:
+        """Filas cuya ubicación normalizada coincide con el valor (None = sin filtro)."""
+        if not valor:
+            return None
+        serie = self.filas[columna_normalizada(columna)]
+        codigo = serie.cat.categories.get_indexer([normalizar_texto(valor)])[0]
+        if codigo == -1:
+            # Ubicación desconocida: ninguna fila (el código -1 es el de las filas sin valor)
+            return np.zeros(len(serie), dtype=bool)
+        return serie.cat.codes.to_numpy() == codigo
+
+    def buscar(self, texto: str, provincia: Optional[str] = None, canton: Optional[str] = None,
+               limite: int = 10, cobertura_minima: float = COBERTURA_MINIMA) -> List[Dict]:
+        """
+        Establecimientos con nombre parecido al texto, del más al menos parecido.
+
+        El puntaje es la parte de los trigramas de la consulta presente en el nombre
+        (razón social o nombre comercial, el mejor de los dos); a igual puntaje gana el
+        nombre más parecido en largo (coeficiente de Dice).
+
+        Args:
+            texto: Nombre buscado ('libreria legenda', 'Papelería El Estudiante'...)
+            provincia: Solo establecimientos de esta provincia (sin tildes ni mayúsculas)
+            canton: Solo establecimientos de este cantón
+            limite: Máximo de resultados
+            cobertura_minima: Puntaje mínimo (0-1)
+
+        Returns:
+            [{'ruc', 'razon_social', 'nombre_fantasia', 'provincia', 'canton', 'estado',
+              'codigo_ciiu', 'coincide', 'puntaje'}]
+        """
+        consulta = trigramas_consulta(texto)
+        if len(consulta) == 0:
+            return []
+
+        # Cuántos trigramas de la consulta comparte cada nombre
+        listas = [self.nombres_por_trigrama[self.inicio_trigrama[t]:self.inicio_trigrama[t + 1]]
+                  for t in consulta.astype(np.int64)]
+        compartidos = np.bincount(np.concatenate(listas), minlength=len(self.nombres))
+        minimo = max(1, int(np.ceil(cobertura_minima * len(consulta) - 1e-9)))
+        candidatos = np.flatnonzero(compartidos >= minimo)
+        # Orden: más trigramas compartidos y, a igualdad, menos trigramas propios (Dice)
+        clave = (compartidos[candidatos].astype(np.int64) << 32) - self.trigramas_por_nombre[candidatos]
+
+        # Nombres → filas, con la clave de su nombre
+        inicios, fines = self.inicio_nombre[candidatos], self.inicio_nombre[candidatos + 1]
+        repeticiones = fines - inicios
+        desfase = np.repeat(inicios - np.cumsum(repeticiones) + repeticiones, repeticiones)
+        filas = self.filas_por_nombre[desfase + np.arange(repeticiones.sum())]
+        clave_fila, nombre_fila = np.repeat(clave, repeticiones), np.repeat(candidatos, repeticiones)
+
+        for mascara in (self._mascara_ubicacion('DESCRIPCION_PROVINCIA_EST', provincia),
+                        self._mascara_ubicacion('DESCRIPCION_CANTON_EST', canton)):
+            if mascara is not None:
+                dentro = mascara[filas]
+                filas, clave_fila, nombre_fila = filas[dentro], clave_fila[dentro], nombre_fila[dentro]
+        if len(filas) == 0:
+            return []
+
+        # Mejor nombre de cada fila; las mejores filas (empates por orden del catálogo)
+        mejor = np.zeros(len(self.filas), dtype=np.int64)
+        np.maximum.at(mejor, filas, clave_fila)
+        encontradas = np.flatnonzero(mejor)
+        if len(encontradas) > limite:
+            # Todas las filas por encima del puntaje del último lugar, y de las empatadas las primeras
+            umbral = -np.partition(-mejor[encontradas], limite - 1)[limite - 1]
+            encontradas = np.concatenate([encontradas[mejor[encontradas] > umbral],
+                                          encontradas[mejor[encontradas] == umbral]])
+        elegidas = encontradas[np.lexsort((encontradas, -mejor[encontradas]))][:limite]
+
+        # Nombre que dio el puntaje de cada fila elegida
+        ganadores = np.isin(filas, elegidas) & (clave_fila == mejor[filas])
+        nombre_de_fila = dict(zip(filas[ganadores].tolist(), nombre_fila[ganadores].tolist()))
+
+        datos = self.filas.iloc[elegidas]
+        columnas = {columna: datos[columna].astype(object).tolist() if columna in datos.columns
+                    else [None] * len(elegidas)
+                    for columna in ['RUC'] + COLUMNAS_RESULTADO[1:]}
+        resultado = []
+        for i, fila in enumerate(elegidas.tolist()):
+            resultado.append({
+                'ruc': columnas['RUC'][i],
+                'razon_social': columnas['RAZON_SOCIAL'][i],
+                'nombre_fantasia': columnas['NOMBRE_FANTASIA_COMERCIAL'][i],
+                'provincia': columnas['DESCRIPCION_PROVINCIA_EST'][i],
+                'canton': columnas['DESCRIPCION_CANTON_EST'][i],
+                'estado': columnas['ESTADO_CONTRIBUYENTE'][i],
+                'codigo_ciiu': columnas['CODIGO_CIIU'][i],
+                'coincide': self.nombres[nombre_de_fila[fila]],
+                'puntaje': round(float(-(-mejor[fila] >> 32)) / len(consulta), 3)
+            })
+        return [{campo: (None if isinstance(v, float) and np.isnan(v) else v) for campo, v in r.items()}
+                for r in resultado]
+
+
+def construir_indice(df: pd.DataFrame) -> IndiceNombres:
+    """
+    Arma el índice de trigramas de un catálogo.
+
+    Args:
+        df: Filas con RAZON_SOCIAL y/o NOMBRE_FANTASIA_COMERCIAL (se usan sus claves `_NORM`
+            si ya vienen de la ingesta)
+
+    Returns:
+        IndiceNombres sobre las filas del DataFrame
+    """
+    df = df.reset_index(drop=True)
+    faltantes = [c for c in COLUMNAS_NOMBRE + ['DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST']
+                 if c in df.columns and columna_normalizada(c) not in df.columns]
+    if faltantes:
+        df = agregar_columnas_normalizadas(df.copy())
+
+    # Nombres distintos de ambas columnas y sus filas
+    claves = [df[columna_normalizada(c)].astype(object) for c in COLUMNAS_NOMBRE if c in df.columns]
+    todas = pd.concat(claves, ignore_index=True)
+    codigos, nombres = pd.factorize(todas, use_na_sentinel=True)
+    filas_de_clave = np.tile(np.arange(len(df), dtype=np.int32), len(claves))
+    presentes = codigos >= 0
+    pares = np.unique(codigos[presentes].astype(np.int64) * len(df) + filas_de_clave[presentes])
+    nombre_de_par = (pares // max(len(df), 1)).astype(np.int32)
+    filas_por_nombre = (pares % max(len(df), 1)).astype(np.int32)
+    nombres = np.asarray(nombres, dtype=object)
+
+    # Trigramas por bloques de nombres
+    nombres_trigrama, trigramas = [], []
+    for inicio in range(0, len(nombres), NOMBRES_POR_BLOQUE):
+        posicion, trigrama = _trigramas_bloque([str(n) for n in nombres[inicio:inicio + NOMBRES_POR_BLOQUE]])
+        nombres_trigrama.append(posicion + inicio)
+        trigramas.append(trigrama)
+    nombres_trigrama = np.concatenate(nombres_trigrama) if nombres_trigrama else np.array([], dtype=np.int32)
+    trigramas = np.concatenate(trigramas) if trigramas else np.array([], dtype=np.uint16)
+    orden = np.argsort(trigramas, kind='stable')
+
+    columnas = [c for c in COLUMNAS_RESULTADO if c in df.columns and c != 'NUMERO_RUC']
+    filas = df[columnas + [columna_normalizada(c) for c in ('DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST')
+                           if columna_normalizada(c) in df.columns]].copy()
+    filas.insert(0, 'RUC', normalizar_rucs(df['NUMERO_RUC']).to_numpy() if 'NUMERO_RUC' in df.columns else '')
+    for columna in filas.columns:
+        if columna not in ('RUC', 'RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL'):
+            filas[columna] = filas[columna].astype('category')
+
+    return IndiceNombres(
+        nombres=nombres,
+        inicio_trigrama=_desplazamientos(trigramas, TOTAL_TRIGRAMAS),
+        nombres_por_trigrama=nombres_trigrama[orden],
+        trigramas_por_nombre=np.bincount(nombres_trigrama, minlength=len(nombres)).astype(np.int32),
+        inicio_nombre=_desplazamientos(nombre_de_par, len(nombres)),
+        filas_por_nombre=filas_por_nombre,
+        filas=filas
+    )
+
+
+def _firma(rutas: List[str]) -> List:
+    return [(os.path.abspath(r), os.stat(r).st_size, os.stat(r).st_mtime_ns) for r in sorted(rutas)]
+
+
+def guardar_indice(indice: IndiceNombres, firma: Optional[List] = None, ruta: str = RUTA_INDICE_DEFECTO):
+    """Guarda el índice de forma atómica con la firma de los archivos de origen."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as f:
+        pickle.dump({'version': VERSION_INDICE, 'firma': firma, 'indice': vars(indice)}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+
+
+def leer_indice(firma: Optional[List] = None, ruta: str = RUTA_INDICE_DEFECTO) -> Optional[IndiceNombres]:
+    """Lee el índice guardado; None si no existe, es de otra versión o su origen cambió."""
+    try:
+        with open(ruta, 'rb') as f:
+            datos = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if datos.get('version') != VERSION_INDICE or (firma is not None and datos.get('firma') != firma):
+        return None
+    return IndiceNombres(**datos['indice'])
+
+
+def cargar_indice(directorio: str = "datos_excel", ruta: str = RUTA_INDICE_DEFECTO,
+                  reconstruir: bool = False) -> IndiceNombres:
+    """
+    Devuelve el índice del catálogo de `directorio`, armándolo solo si algún Excel cambió.
+
+    Args:
+        directorio: Carpeta con los Excel del catastro
+        ruta: Archivo del índice guardado
+        reconstruir: Armarlo aunque esté vigente
+
+    Returns:
+        IndiceNombres sobre todas las filas de los Excel
+    """
+    rutas = [os.path.join(directorio, archivo) for archivo in listar_archivos_excel(directorio)]
+    firma = _firma(rutas)
+    indice = None if reconstruir else leer_indice(firma, ruta)
+    if indice is None:
+        print(f"🔧 Armando el índice de nombres ({len(rutas)} archivos)...", file=sys.stderr)
+        partes = [cargar_excel_sri(r, columnas=COLUMNAS_RESULTADO) for r in rutas]
+        df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUMNAS_RESULTADO)
+        indice = construir_indice(df)
+        guardar_indice(indice, firma, ruta)
+    return indice
+
+
+def main():
+    """Busca establecimientos por nombre aproximado."""
+    parser = argparse.ArgumentParser(description="Búsqueda aproximada por razón social o nombre comercial")
+    parser.add_argument('texto', nargs='?', help="Nombre a buscar")
+    parser.add_argument('--provincia', help="Filtrar por provincia")
+    parser.add_argument('--canton', help="Filtrar por cantón")
+    parser.add_argument('--limite', type=int, default=10, help="Máximo de resultados")
+    parser.add_argument('--minimo', type=float, default=COBERTURA_MINIMA, help="Puntaje mínimo (0-1)")
+    parser.add_argument('--directorio', default="datos_excel", help="Carpeta con los Excel del catastro")
+    parser.add_argument('--reconstruir', action='store_true', help="Rearmar el índice aunque esté vigente")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    indice = cargar_indice(args.directorio, reconstruir=args.reconstruir)
+    # A stderr: no se mezcla con la salida --json
+    print(f"📚 Índice: {len(indice.filas):,} establecimientos, {len(indice.nombres):,} nombres "
+          f"({time.perf_counter() - inicio:.2f} s)", file=sys.stderr)
+    if not args.texto:
+        return
+
+    inicio = time.perf_counter()
+    resultados = indice.buscar(args.texto, provincia=args.provincia, canton=args.canton,
+                               limite=args.limite, cobertura_minima=args.minimo)
+    milisegundos = (time.perf_counter() - inicio) * 1000
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+        return
+    print(f"\n🔎 '{args.texto}': {len(resultados)} resultados ({milisegundos:.1f} ms)")
+    for r in resultados:
+        fantasia = f" / {r['nombre_fantasia']}" if r['nombre_fantasia'] else ""
+        print(f"   {r['puntaje']:.2f}  {r['ruc']}  {r['razon_social']}{fantasia}")
+        print(f"         {r['canton']}, {r['provincia']}  ·  {r['estado']}  ·  {r['codigo_ciiu']}")
+
+
+if __name__ == "__main__":
+    main()
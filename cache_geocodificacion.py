@@ -0,0 +1,310 @@
+"""
+Cache persistente de geocodificación compartido por los generadores de mapas.
+Guarda las coordenadas en SQLite para no volver a pagar la Geocoding API
+por las mismas parroquias/cantones/provincias en cada ejecución. Las ubicaciones que
+la API no encontró también se recuerdan (por menos tiempo) para no volver a
+consultarlas en cada corrida.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from normalizacion_sri import normalizar_texto
+
+# Incrementar si cambia el formato de las claves o de la tabla
+VERSION_CACHE = 1
+
+RUTA_CACHE_DEFECTO = os.path.join("cache", "geocodificacion.sqlite")
+TTL_DEFECTO_DIAS = 180
+# Una ubicación sin resultado se vuelve a intentar después de este plazo
+TTL_SIN_RESULTADO_DIAS = 30
+MAX_ENTRADAS_DEFECTO = 100000
+
+
+def normalizar_parte(texto: Optional[str]) -> str:
+    """Normaliza un nombre de ubicación: mayúsculas, sin tildes y espacios colapsados."""
+    return normalizar_texto(texto)
+
+
+def normalizar_clave(provincia: str = None, canton: str = None, parroquia: str = None) -> str:
+    """
+    Genera la clave normalizada 'parroquia|canton|provincia'.
+
+    Returns:
+        Clave normalizada o cadena vacía si no hay ningún dato de ubicación
+    """
+    partes = [normalizar_parte(parroquia), normalizar_parte(canton), normalizar_parte(provincia)]
+    if not any(partes):
+        return ''
+    return '|'.join(partes)
+
+
+class CacheGeocodificacion:
+    """Almacén persistente (SQLite) de coordenadas con expiración y contadores."""
+
+    def __init__(self, ruta: str = RUTA_CACHE_DEFECTO, ttl_dias: float = TTL_DEFECTO_DIAS,
+                 max_entradas: int = MAX_ENTRADAS_DEFECTO, ttl_sin_resultado_dias: float = TTL_SIN_RESULTADO_DIAS):
+        """
+        Inicializa el cache.
+
+        Args:
+            ruta: Archivo SQLite donde se guardan las coordenadas
+            ttl_dias: Días que una coordenada se considera vigente
+            max_entradas: Máximo de entradas antes de descartar las menos usadas (se aplica al cerrar)
+            ttl_sin_resultado_dias: Días que se recuerda que la API no encontró una ubicación
+        """
+        self.ruta = ruta
+        self.ttl_segundos = ttl_dias * 86400
+        self.ttl_sin_resultado_segundos = ttl_sin_resultado_dias * 86400
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._inicializar_esquema()
+
+    def _inicializar_esquema(self):
+        """Crea las tablas y descarta el contenido si la versión no coincide."""
+        cursor = self._conexion.cursor()
+        cursor.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        fila = cursor.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()
+
+        if fila is None or int(fila[0]) != VERSION_CACHE:
+            cursor.execute("DROP TABLE IF EXISTS coordenadas")
+            cursor.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('version', ?)", (str(VERSION_CACHE),))
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS coordenadas (
+                clave TEXT PRIMARY KEY,
+                latitud REAL NOT NULL,
+                longitud REAL NOT NULL,
+                consulta TEXT,
+                creado REAL NOT NULL,
+                usado REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_coordenadas_usado ON coordenadas (usado)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sin_resultado (
+                clave TEXT PRIMARY KEY,
+                consulta TEXT,
+                creado REAL NOT NULL
+            )
+        """)
+        self._conexion.commit()
+
+    def obtener(self, clave: str) -> Optional[Tuple[float, float]]:
+        """Devuelve las coordenadas vigentes de una clave normalizada o None."""
+        if not clave:
+            return None
+
+        ahora = time.time()
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT latitud, longitud, creado FROM coordenadas WHERE clave = ?", (clave,)
+            ).fetchone()
+
+            if fila is None:
+                self.fallos += 1
+                return None
+
+            if ahora - fila[2] > self.ttl_segundos:
+                self._conexion.execute("DELETE FROM coordenadas WHERE clave = ?", (clave,))
+                self.fallos += 1
+                return None
+
+            self._conexion.execute("UPDATE coordenadas SET usado = ? WHERE clave = ?", (ahora, clave))
+            self.aciertos += 1
+            return (fila[0], fila[1])
+
+    def guardar(self, clave: str, coordenadas: Tuple[float, float], consulta: str = None, creado: float = None):
+        """Guarda (o reemplaza) las coordenadas de una clave normalizada."""
+        if not clave or not coordenadas:
+            return
+
+        ahora = time.time()
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO coordenadas (clave, latitud, longitud, consulta, creado, usado) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (clave, float(coordenadas[0]), float(coordenadas[1]), consulta, creado or ahora, ahora)
+            )
+            self._conexion.execute("DELETE FROM sin_resultado WHERE clave = ?", (clave,))
+            self._conexion.commit()
+
+    def guardar_sin_resultado(self, clave: str, consulta: str = None):
+        """Recuerda que la API no encontró una clave (no se vuelve a consultar hasta que venza)."""
+        if not clave:
+            return
+
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO sin_resultado (clave, consulta, creado) VALUES (?, ?, ?)",
+                (clave, consulta, time.time())
+            )
+            self._conexion.commit()
+
+    def sin_resultado(self, clave: str) -> bool:
+        """True si la API no encontró la clave hace menos de ttl_sin_resultado_dias."""
+        if not clave:
+            return False
+
+        with self._lock:
+            fila = self._conexion.execute("SELECT creado FROM sin_resultado WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                return False
+            if time.time() - fila[0] > self.ttl_sin_resultado_segundos:
+                self._conexion.execute("DELETE FROM sin_resultado WHERE clave = ?", (clave,))
+                return False
+            return True
+
+    def purgar(self) -> int:
+        """Elimina entradas vencidas (también las sin resultado) y las menos usadas si se supera el máximo."""
+        ahora = time.time()
+        limite = ahora - self.ttl_segundos
+        with self._lock:
+            eliminadas = self._conexion.execute("DELETE FROM coordenadas WHERE creado < ?", (limite,)).rowcount
+            eliminadas += self._conexion.execute(
+                "DELETE FROM sin_resultado WHERE creado < ?", (ahora - self.ttl_sin_resultado_segundos,)
+            ).rowcount
+
+            total = self._conexion.execute("SELECT COUNT(*) FROM coordenadas").fetchone()[0]
+            if total > self.max_entradas:
+                eliminadas += self._conexion.execute(
+                    "DELETE FROM coordenadas WHERE clave IN "
+                    "(SELECT clave FROM coordenadas ORDER BY usado ASC LIMIT ?)",
+                    (total - self.max_entradas,)
+                ).rowcount
+
+            self._conexion.commit()
+        return eliminadas
+
+    def importar_json(self, archivo: str) -> int:
+        """
+        Precarga el cache desde un JSON exportado previamente (arranque en caliente).
+
+        Acepta {clave: [lat, lng]} o {clave: {"latitud": ..., "longitud": ...}}.
+        Las claves se vuelven a normalizar, así que sirven exportaciones de otras máquinas.
+
+        Returns:
+            Número de entradas importadas
+        """
+        with open(archivo, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+
+        if isinstance(datos.get('coordenadas'), dict):
+            datos = datos['coordenadas']
+
+        importadas = 0
+        for clave, valor in datos.items():
+            partes = (clave.split('|') + ['', '', ''])[:3]
+            clave_normalizada = normalizar_clave(parroquia=partes[0], canton=partes[1], provincia=partes[2])
+
+            if isinstance(valor, dict):
+                coordenadas = (valor.get('latitud'), valor.get('longitud'))
+                creado = valor.get('creado')
+            elif isinstance(valor, (list, tuple)) and len(valor) >= 2:
+                coordenadas = tuple(valor[:2])
+                creado = None
+            else:
+                continue
+
+            if clave_normalizada and None not in coordenadas:
+                self.guardar(clave_normalizada, coordenadas, creado=creado)
+                importadas += 1
+
+        return importadas
+
+    def exportar_json(self, archivo: str) -> int:
+        """Exporta todas las entradas vigentes a JSON para compartirlas o respaldarlas."""
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT clave, latitud, longitud, creado FROM coordenadas"
+            ).fetchall()
+
+        datos = {
+            'version': VERSION_CACHE,
+            'coordenadas': {
+                clave: {'latitud': lat, 'longitud': lng, 'creado': creado}
+                for clave, lat, lng, creado in filas
+            }
+        }
+
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, indent=1)
+
+        return len(filas)
+
+    def entradas(self) -> Dict[str, Tuple[float, float]]:
+        """Devuelve {clave: coordenadas} de todas las entradas vigentes (p. ej. para el nomenclátor)."""
+        limite = time.time() - self.ttl_segundos
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT clave, latitud, longitud FROM coordenadas WHERE creado >= ?", (limite,)
+            ).fetchall()
+        return {clave: (lat, lng) for clave, lat, lng in filas}
+
+    def estadisticas(self) -> Dict:
+        """Devuelve contadores de aciertos/fallos y tamaño del cache."""
+        with self._lock:
+            entradas = self._conexion.execute("SELECT COUNT(*) FROM coordenadas").fetchone()[0]
+            sin_resultado = self._conexion.execute("SELECT COUNT(*) FROM sin_resultado").fetchone()[0]
+
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': entradas,
+            'sin_resultado': sin_resultado,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / consultas * 100, 1) if consultas else 0.0
+        }
+
+    def cerrar(self):
+        """Aplica el vencimiento y el máximo de entradas, confirma los cambios y cierra la base de datos."""
+        self.purgar()
+        with self._lock:
+            self._conexion.commit()
+            self._conexion.close()
+
+
+def main():
+    """Administra el cache de geocodificación desde la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Administra el cache persistente de geocodificación")
+    parser.add_argument('--ruta', default=RUTA_CACHE_DEFECTO, help="Archivo SQLite del cache")
+    parser.add_argument('--importar', metavar='JSON', help="Precarga coordenadas desde un JSON")
+    parser.add_argument('--exportar', metavar='JSON', help="Exporta las coordenadas a un JSON")
+    parser.add_argument('--purgar', action='store_true', help="Elimina entradas vencidas")
+    args = parser.parse_args()
+
+    cache = CacheGeocodificacion(args.ruta)
+
+    if args.importar:
+        importadas = cache.importar_json(args.importar)
+        print(f"✅ Importadas {importadas:,} coordenadas desde {args.importar}")
+
+    if args.purgar:
+        eliminadas = cache.purgar()
+        print(f"🧹 Eliminadas {eliminadas:,} entradas vencidas")
+
+    if args.exportar:
+        exportadas = cache.exportar_json(args.exportar)
+        print(f"✅ Exportadas {exportadas:,} coordenadas a {args.exportar}")
+
+    stats = cache.estadisticas()
+    print(f"📦 Cache de geocodificación: {stats['entradas']:,} ubicaciones "
+          f"({stats['sin_resultado']:,} sin resultado) en {args.ruta}")
+    cache.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Cache persistente de Google Places para buscar_info_google_places.py.
+Guarda por separado el resultado de la búsqueda por texto (clave del establecimiento
+→ place_id) y los detalles de cada place_id campo por campo, cada uno con su propia
+vigencia, para que las actualizaciones periódicas solo paguen lo que está vencido.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Incrementar si cambia el formato de las tablas
+VERSION_CACHE = 1
+
+RUTA_CACHE_DEFECTO = os.path.join("cache", "places.sqlite")
+
+# Días que se confía en una búsqueda que encontró (o no) la librería
+TTL_BUSQUEDA_DIAS = 90
+TTL_NEGATIVO_DIAS = 14
+
+# Días de vigencia de cada campo de Place Details
+FRESCURA_CAMPOS_DIAS = {
+    'rating': 7,
+    'user_ratings_total': 7,
+    'opening_hours': 7,
+    'name': 30,
+    'formatted_address': 30,
+    'formatted_phone_number': 30,
+    'website': 30,
+    'photo': 30
+}
+
+CAMPOS_DETALLES = list(FRESCURA_CAMPOS_DIAS)
+
+
+class CachePlaces:
+    """Almacén persistente (SQLite) de búsquedas y detalles de Google Places."""
+
+    def __init__(self, ruta: str = RUTA_CACHE_DEFECTO, ttl_busqueda_dias: float = TTL_BUSQUEDA_DIAS,
+                 ttl_negativo_dias: float = TTL_NEGATIVO_DIAS, frescura_dias: Dict[str, float] = None):
+        """
+        Inicializa el cache.
+
+        Args:
+            ruta: Archivo SQLite del cache
+            ttl_busqueda_dias: Vigencia de una búsqueda con resultado
+            ttl_negativo_dias: Vigencia de una búsqueda sin resultado
+            frescura_dias: Vigencia de cada campo de detalles
+        """
+        self.ruta = ruta
+        self.ttl_busqueda = ttl_busqueda_dias * 86400
+        self.ttl_negativo = ttl_negativo_dias * 86400
+        self.frescura = {
+            campo: dias * 86400 for campo, dias in (frescura_dias or FRESCURA_CAMPOS_DIAS).items()
+        }
+        self.aciertos_busqueda = 0
+        self.fallos_busqueda = 0
+        self.campos_vigentes = 0
+        self.campos_vencidos = 0
+        self._lock = threading.Lock()
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._inicializar_esquema()
+
+    def _inicializar_esquema(self):
+        """Crea las tablas y descarta el contenido si la versión no coincide."""
+        cursor = self._conexion.cursor()
+        cursor.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        fila = cursor.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()
+
+        if fila is None or int(fila[0]) != VERSION_CACHE:
+            cursor.execute("DROP TABLE IF EXISTS busquedas")
+            cursor.execute("DROP TABLE IF EXISTS detalles")
+            cursor.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('version', ?)", (str(VERSION_CACHE),))
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS busquedas (
+                clave TEXT PRIMARY KEY,
+                consulta TEXT NOT NULL,
+                place_id TEXT,
+                creado REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS detalles (
+                place_id TEXT NOT NULL,
+                campo TEXT NOT NULL,
+                valor TEXT,
+                actualizado REAL NOT NULL,
+                PRIMARY KEY (place_id, campo)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_busquedas_place_id ON busquedas (place_id)")
+        self._conexion.commit()
+
+    def obtener_busqueda(self, clave: str, consulta: str) -> Tuple[bool, Optional[str]]:
+        """
+        Busca el place_id guardado para un establecimiento.
+
+        Returns:
+            (vigente, place_id). place_id es None si la búsqueda vigente no encontró nada.
+            Si la consulta cambió (otro nombre/ubicación) o venció, vigente es False.
+        """
+        ahora = time.time()
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT consulta, place_id, creado FROM busquedas WHERE clave = ?", (clave,)
+            ).fetchone()
+
+            ttl = self.ttl_busqueda if fila and fila[1] else self.ttl_negativo
+            if fila is None or fila[0] != consulta or ahora - fila[2] > ttl:
+                self.fallos_busqueda += 1
+                return False, None
+
+            self.aciertos_busqueda += 1
+            return True, fila[1]
+
+    def guardar_busqueda(self, clave: str, consulta: str, place_id: Optional[str]):
+        """Guarda el resultado de una búsqueda por texto (place_id None = no encontrada)."""
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO busquedas (clave, consulta, place_id, creado) VALUES (?, ?, ?, ?)",
+                (clave, consulta, place_id, time.time())
+            )
+            self._conexion.commit()
+
+    def obtener_detalles(self, place_id: str, campos: Sequence[str] = CAMPOS_DETALLES) -> Tuple[Dict, List[str]]:
+        """
+        Devuelve los campos vigentes de un lugar y la lista de campos que hay que pedir a la API.
+
+        Returns:
+            (detalles, campos_vencidos). Los campos que Google no devolvió se omiten de detalles.
+        """
+        ahora = time.time()
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT campo, valor, actualizado FROM detalles WHERE place_id = ?", (place_id,)
+            ).fetchall()
+
+        guardados = {campo: (valor, actualizado) for campo, valor, actualizado in filas}
+        detalles = {}
+        vencidos = []
+        for campo in campos:
+            if campo not in guardados or ahora - guardados[campo][1] > self.frescura.get(campo, 0):
+                vencidos.append(campo)
+                continue
+            valor = json.loads(guardados[campo][0])
+            if valor is not None:
+                detalles[campo] = valor
+
+        with self._lock:
+            self.campos_vigentes += len(campos) - len(vencidos)
+            self.campos_vencidos += len(vencidos)
+        return detalles, vencidos
+
+    def guardar_detalles(self, place_id: str, campos: Sequence[str], resultado: Dict):
+        """Guarda los campos pedidos a Place Details (también los ausentes, como null)."""
+        ahora = time.time()
+        with self._lock:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO detalles (place_id, campo, valor, actualizado) VALUES (?, ?, ?, ?)",
+                [(place_id, campo, json.dumps(resultado.get(campo), ensure_ascii=False), ahora) for campo in campos]
+            )
+            self._conexion.commit()
+
+    def purgar(self) -> int:
+        """Elimina búsquedas vencidas y detalles de lugares que ya nadie referencia."""
+        ahora = time.time()
+        with self._lock:
+            eliminadas = self._conexion.execute(
+                "DELETE FROM busquedas WHERE (place_id IS NULL AND creado < ?) OR creado < ?",
+                (ahora - self.ttl_negativo, ahora - self.ttl_busqueda)
+            ).rowcount
+            eliminadas += self._conexion.execute(
+                "DELETE FROM detalles WHERE place_id NOT IN "
+                "(SELECT place_id FROM busquedas WHERE place_id IS NOT NULL)"
+            ).rowcount
+            self._conexion.commit()
+        return eliminadas
+
+    def estadisticas(self) -> Dict:
+        """Devuelve contadores de uso y tamaño del cache."""
+        with self._lock:
+            busquedas = self._conexion.execute("SELECT COUNT(*) FROM busquedas").fetchone()[0]
+            lugares = self._conexion.execute("SELECT COUNT(DISTINCT place_id) FROM detalles").fetchone()[0]
+
+        return {
+            'busquedas': busquedas,
+            'lugares': lugares,
+            'aciertos_busqueda': self.aciertos_busqueda,
+            'fallos_busqueda': self.fallos_busqueda,
+            'campos_vigentes': self.campos_vigentes,
+            'campos_vencidos': self.campos_vencidos
+        }
+
+    def cerrar(self):
+        """Confirma los cambios pendientes y cierra la base de datos."""
+        with self._lock:
+            self._conexion.commit()
+            self._conexion.close()
+
+
+def main():
+    """Administra el cache de Google Places desde la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Administra el cache persistente de Google Places")
+    parser.add_argument('--ruta', default=RUTA_CACHE_DEFECTO, help="Archivo SQLite del cache")
+    parser.add_argument('--purgar', action='store_true', help="Elimina búsquedas vencidas y detalles huérfanos")
+    args = parser.parse_args()
+
+    cache = CachePlaces(args.ruta)
+
+    if args.purgar:
+        eliminadas = cache.purgar()
+        print(f"🧹 Eliminadas {eliminadas:,} entradas vencidas")
+
+    stats = cache.estadisticas()
+    print(f"📦 Cache de Google Places: {stats['busquedas']:,} búsquedas y {stats['lugares']:,} lugares en {args.ruta}")
+    cache.cerrar()
+
+
+if __name__ == "__main__":
+    main()
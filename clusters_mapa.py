@@ -0,0 +1,91 @@
+"""
+Agrupación (clustering) de marcadores de los mapas.
+Python precalcula un índice jerárquico de clusters por nivel de zoom (grilla en
+píxeles Web Mercator) y la página solo crea marcadores para los clusters que caen
+en la vista actual, en lugar de un google.maps.Marker por ubicación.
+"""
+
+import math
+from typing import Dict, List
+
+import numpy as np
+
+ZOOM_MIN_DEFECTO = 3
+ZOOM_MAX_DEFECTO = 14
+RADIO_PX_DEFECTO = 60
+
+
+def _proyectar(latitudes: np.ndarray, longitudes: np.ndarray):
+    """Coordenadas Web Mercator normalizadas a [0, 1) (mundo de zoom 0)."""
+    seno = np.sin(np.radians(np.clip(latitudes, -85.0, 85.0)))
+    x = (longitudes + 180.0) / 360.0
+    y = 0.5 - np.log((1 + seno) / (1 - seno)) / (4 * math.pi)
+    return np.clip(x, 0.0, 1.0 - 1e-12), np.clip(y, 0.0, 1.0 - 1e-12)
+
+
+def construir_indice_clusters(ubicaciones: List[Dict],
+                              zoom_min: int = ZOOM_MIN_DEFECTO,
+                              zoom_max: int = ZOOM_MAX_DEFECTO,
+                              radio_px: int = RADIO_PX_DEFECTO) -> Dict:
+    """
+    Construye el índice jerárquico de clusters de una lista de ubicaciones.
+
+    En cada zoom las ubicaciones se agrupan en celdas de `radio_px` píxeles. Como la
+    grilla de un zoom es exactamente la mitad de fina que la del siguiente, cada
+    cluster está contenido en uno solo del nivel anterior (jerarquía sin cortes).
+
+    Args:
+        ubicaciones: Lista con 'lat', 'lng' y 'cantidad' (en el orden de los marcadores)
+        zoom_min: Zoom más alejado con clusters (por debajo se usa este nivel)
+        zoom_max: Último zoom con clusters (por encima se ven las ubicaciones sueltas)
+        radio_px: Tamaño de la celda de agrupación en píxeles de pantalla
+
+    Returns:
+        {'zoom_min', 'zoom_max', 'radio_px', 'niveles'}; niveles[k] (zoom = zoom_min + k)
+        trae el centro ('lat', 'lng') de cada cluster, su 'expansion' (zoom al que se
+        divide) y 'padre': el cluster de este nivel al que pertenece cada cluster del
+        nivel siguiente (o cada ubicación, en el nivel de zoom_max).
+    """
+    latitudes = np.array([u['lat'] for u in ubicaciones], dtype=float)
+    longitudes = np.array([u['lng'] for u in ubicaciones], dtype=float)
+    pesos = np.array([max(u.get('cantidad', 1), 1) for u in ubicaciones], dtype=float)
+    x, y = _proyectar(latitudes, longitudes)
+
+    niveles = []
+    asignacion_siguiente = np.arange(len(ubicaciones))
+    expansion_siguiente = np.full(len(ubicaciones), zoom_max + 1)
+    for zoom in range(zoom_max, zoom_min - 1, -1):
+        celdas = 256 * 2 ** zoom / radio_px
+        claves = np.floor(x * celdas).astype(np.int64) * (int(celdas) + 1) + np.floor(y * celdas).astype(np.int64)
+        _, asignacion = np.unique(claves, return_inverse=True)
+        asignacion = asignacion.ravel()
+        total = int(asignacion.max()) + 1 if len(asignacion) else 0
+
+        # Padre de cada elemento del nivel siguiente (todos sus puntos caen en la misma celda)
+        padre = np.zeros(len(expansion_siguiente), dtype=np.int64)
+        padre[asignacion_siguiente] = asignacion
+
+        # Un cluster con un solo hijo se divide recién donde se divide ese hijo
+        hijos = np.bincount(padre, minlength=total)
+        expansion = np.full(total, zoom + 1)
+        unicos = hijos[padre] == 1
+        expansion[padre[unicos]] = expansion_siguiente[unicos]
+
+        peso_total = np.bincount(asignacion, weights=pesos, minlength=total)
+        niveles.append({
+            'zoom': zoom,
+            'lat': np.round(np.bincount(asignacion, weights=latitudes * pesos, minlength=total) / peso_total, 6).tolist(),
+            'lng': np.round(np.bincount(asignacion, weights=longitudes * pesos, minlength=total) / peso_total, 6).tolist(),
+            'expansion': expansion.tolist(),
+            'padre': padre.tolist()
+        })
+        asignacion_siguiente = asignacion
+        expansion_siguiente = expansion
+
+    niveles.reverse()
+    return {
+        'zoom_min': zoom_min,
+        'zoom_max': zoom_max,
+        'radio_px': radio_px,
+        'niveles': niveles
+    }
@@ -0,0 +1,374 @@
+"""
+Consulta rápida de RUCs sobre el catastro ingerido y sus enriquecimientos.
+Las filas del catastro (datos_excel/) y de los archivos de librerías (estimaciones,
+Google Places) se guardan en SQLite con índice por RUC, así una consulta por RUC
+o por prefijo de RUC responde en milisegundos sin volver a abrir ningún Excel.
+
+Uso:
+    python3 consulta_ruc.py --actualizar                 # (re)carga las fuentes que cambiaron
+    python3 consulta_ruc.py 0790012345001 2090001234001  # uno o varios RUCs
+    python3 consulta_ruc.py --prefijo 07900              # RUCs que empiezan así
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from ingesta_sri import cargar_excel_sri, listar_archivos_excel
+from normalizacion_sri import es_columna_normalizada
+
+# Incrementar si cambia el formato de las tablas
+VERSION_ALMACEN = 1
+
+RUTA_ALMACEN_DEFECTO = os.path.join("cache", "ruc.sqlite")
+
+# Archivos de enriquecimiento del flujo de librerías: fuente → archivo
+FUENTES_ENRIQUECIMIENTO = {
+    'detalle': "librerias_detalle.xlsx",
+    'estimaciones': "librerias_con_estimaciones.xlsx",
+    'estimaciones_online': "librerias_con_estimaciones_online.xlsx",
+    'google': "librerias_con_info_google.xlsx"
+}
+
+# Largo de un RUC (el Excel lo guarda como número y pierde los ceros a la izquierda)
+DIGITOS_RUC = 13
+
+
+def normalizar_ruc(ruc) -> str:
+    """RUC como texto de 13 dígitos ('702616095001' o 702616095001 → '0702616095001')."""
+    if isinstance(ruc, float) and ruc.is_integer():
+        ruc = int(ruc)
+    texto = ''.join(c for c in str(ruc).strip() if c.isdigit())
+    return texto.zfill(DIGITOS_RUC) if texto else ''
+
+
+def normalizar_rucs(serie: pd.Series) -> pd.Series:
+    """normalizar_ruc sobre una columna (vectorizado para columnas numéricas)."""
+    if pd.api.types.is_numeric_dtype(serie):
+        validos = serie.notna()
+        texto = pd.Series('', index=serie.index, dtype=object)
+        texto[validos] = serie[validos].astype('int64').astype(str).str.zfill(DIGITOS_RUC)
+        return texto
+    return serie.map(lambda valor: normalizar_ruc(valor) if pd.notna(valor) else '')
+
+
+def _siguiente_prefijo(prefijo: str) -> str:
+    """Menor texto mayor que todos los que empiezan con el prefijo (para un rango del índice)."""
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+class AlmacenRUC:
+    """Almacén SQLite de filas por RUC (catastro y enriquecimientos) con índice por RUC."""
+
+    def __init__(self, ruta: str = RUTA_ALMACEN_DEFECTO):
+        """
+        Abre (o crea) el almacén.
+
+        Args:
+            ruta: Archivo SQLite del almacén
+        """
+        self.ruta = ruta
+        self._lock = threading.Lock()
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._inicializar_esquema()
+
+    def _inicializar_esquema(self):
+        """Crea las tablas y descarta el contenido si la versión no coincide."""
+        cursor = self._conexion.cursor()
+        cursor.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        fila = cursor.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()
+
+        if fila is None or int(fila[0]) != VERSION_ALMACEN:
+            cursor.execute("DROP TABLE IF EXISTS filas")
+            cursor.execute("DROP TABLE IF EXISTS fuentes")
+            cursor.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('version', ?)", (str(VERSION_ALMACEN),))
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fuentes (
+                fuente TEXT PRIMARY KEY,
+                origen TEXT NOT NULL,
+                tamano INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                filas INTEGER NOT NULL,
+                actualizado REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS filas (
+                ruc TEXT NOT NULL,
+                fuente TEXT NOT NULL,
+                posicion INTEGER NOT NULL,
+                nombre TEXT,
+                estado TEXT,
+                provincia TEXT,
+                canton TEXT,
+                datos TEXT NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_filas_ruc ON filas (ruc, fuente, posicion)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_filas_fuente ON filas (fuente)")
+        self._conexion.commit()
+
+    def fuentes(self) -> Dict[str, Dict]:
+        """Fuentes cargadas: {fuente: {'origen', 'filas', 'actualizado'}}."""
+        with self._lock:
+            filas = self._conexion.execute("SELECT fuente, origen, filas, actualizado FROM fuentes").fetchall()
+        return {fuente: {'origen': origen, 'filas': total, 'actualizado': actualizado}
+                for fuente, origen, total, actualizado in filas}
+
+    def cargar_fuente(self, fuente: str, ruta_excel: str, forzar: bool = False) -> Optional[int]:
+        """
+        Carga (o reemplaza) las filas de un Excel si cambió desde la última carga.
+
+        Args:
+            fuente: Nombre de la fuente ('catastro:SRI_RUC_Galapagos', 'google'...)
+            ruta_excel: Archivo de origen
+            forzar: Recargar aunque el archivo no haya cambiado
+
+        Returns:
+            Filas cargadas, o None si la fuente ya estaba al día
+        """
+        estado = os.stat(ruta_excel)
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT tamano, mtime_ns FROM fuentes WHERE fuente = ?", (fuente,)
+            ).fetchone()
+        if not forzar and fila == (estado.st_size, estado.st_mtime_ns):
+            return None
+
+        df = cargar_excel_sri(ruta_excel)
+        return self.cargar_dataframe(fuente, df, os.path.abspath(ruta_excel), estado.st_size, estado.st_mtime_ns)
+
+    def cargar_dataframe(self, fuente: str, df: pd.DataFrame, origen: str = '',
+                         tamano: int = 0, mtime_ns: int = 0) -> int:
+        """
+        Reemplaza las filas de una fuente por las de un DataFrame.
+
+        Args:
+            fuente: Nombre de la fuente
+            df: Filas con NUMERO_RUC (las claves `_NORM` no se guardan)
+            origen, tamano, mtime_ns: Firma del archivo de origen (para detectar cambios)
+
+        Returns:
+            Filas cargadas
+        """
+        df = df[[col for col in df.columns if not es_columna_normalizada(col)]]
+        if 'NUMERO_RUC' not in df.columns:
+            raise ValueError(f"La fuente {fuente} no tiene la columna NUMERO_RUC")
+
+        def texto(columna: str) -> List[Optional[str]]:
+            if columna not in df.columns:
+                return [None] * len(df)
+            return [None if pd.isna(v) else str(v) for v in df[columna].astype(object)]
+
+        # Una línea JSON por fila (fechas en ISO, vacíos como null)
+        datos = df.to_json(orient='records', lines=True, date_format='iso', force_ascii=False).splitlines()
+        registros = zip(
+            normalizar_rucs(df['NUMERO_RUC']).tolist(), [fuente] * len(df), range(len(df)),
+            texto('RAZON_SOCIAL'), texto('ESTADO_CONTRIBUYENTE'),
+            texto('DESCRIPCION_PROVINCIA_EST'), texto('DESCRIPCION_CANTON_EST'), datos
+        )
+
+        with self._lock:
+            with self._conexion:
+                self._conexion.execute("DELETE FROM filas WHERE fuente = ?", (fuente,))
+                self._conexion.executemany(
+                    "INSERT INTO filas (ruc, fuente, posicion, nombre, estado, provincia, canton, datos) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", registros
+                )
+                self._conexion.execute(
+                    "INSERT OR REPLACE INTO fuentes (fuente, origen, tamano, mtime_ns, filas, actualizado) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (fuente, origen, tamano, mtime_ns, len(df), time.time())
+                )
+        return len(df)
+
+    def eliminar_fuente(self, fuente: str):
+        """Quita del almacén las filas y la firma de una fuente."""
+        with self._lock:
+            with self._conexion:
+                self._conexion.execute("DELETE FROM filas WHERE fuente = ?", (fuente,))
+                self._conexion.execute("DELETE FROM fuentes WHERE fuente = ?", (fuente,))
+
+    def actualizar(self, directorio: str = "datos_excel", forzar: bool = False) -> Dict[str, Optional[int]]:
+        """
+        Carga el catastro de `directorio` y los archivos de librerías que existan.
+
+        Las fuentes cargadas antes cuyo archivo ya no existe se eliminan del almacén.
+
+        Returns:
+            {fuente: filas cargadas, o None si ya estaba al día} de las fuentes vigentes
+        """
+        rutas = {f"catastro:{os.path.splitext(archivo)[0]}": os.path.join(directorio, archivo)
+                 for archivo in listar_archivos_excel(directorio)}
+        rutas.update({fuente: archivo for fuente, archivo in FUENTES_ENRIQUECIMIENTO.items()
+                      if os.path.exists(archivo)})
+        for fuente in self.fuentes():
+            if fuente not in rutas:
+                self.eliminar_fuente(fuente)
+        return {fuente: self.cargar_fuente(fuente, ruta, forzar) for fuente, ruta in rutas.items()}
+
+    def buscar(self, rucs: Iterable) -> Dict[str, Dict[str, List[Dict]]]:
+        """
+        Filas de uno o varios RUCs agrupadas por fuente.
+
+        Args:
+            rucs: RUCs (texto o número; se completan los ceros a la izquierda)
+
+        Returns:
+            {ruc: {fuente: [filas]}} en el orden pedido; los RUCs sin filas traen {}
+        """
+        resultado = {normalizar_ruc(ruc): {} for ruc in rucs}
+        claves = [ruc for ruc in resultado if ruc]
+        with self._lock:
+            for inicio in range(0, len(claves), 500):
+                lote = claves[inicio:inicio + 500]
+                filas = self._conexion.execute(
+                    f"SELECT ruc, fuente, datos FROM filas WHERE ruc IN ({','.join('?' * len(lote))}) "
+                    "ORDER BY ruc, fuente, posicion", lote
+                ).fetchall()
+                for ruc, fuente, datos in filas:
+                    resultado[ruc].setdefault(fuente, []).append(json.loads(datos))
+        return resultado
+
+    def buscar_prefijo(self, prefijo: str, limite: int = 20) -> List[Dict]:
+        """
+        RUCs que empiezan con un prefijo (rango sobre el índice), con un resumen de cada uno.
+
+        Returns:
+            [{'ruc', 'nombre', 'estado', 'provincia', 'canton', 'fuentes'}] ordenados por RUC
+        """
+        prefijo = ''.join(c for c in str(prefijo) if c.isdigit())
+        if not prefijo:
+            return []
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT ruc, MAX(nombre), MAX(estado), MAX(provincia), MAX(canton), GROUP_CONCAT(DISTINCT fuente) "
+                "FROM filas WHERE ruc >= ? AND ruc < ? GROUP BY ruc ORDER BY ruc LIMIT ?",
+                (prefijo, _siguiente_prefijo(prefijo), limite)
+            ).fetchall()
+        return [{'ruc': ruc, 'nombre': nombre, 'estado': estado, 'provincia': provincia,
+                 'canton': canton, 'fuentes': sorted(fuentes.split(','))}
+                for ruc, nombre, estado, provincia, canton, fuentes in filas]
+
+    def listar(self, fuente: Optional[str] = None, estado: Optional[str] = None,
+               limite: Optional[int] = 20) -> List[Dict]:
+        """Primeras filas de una fuente (y estado), en el orden del archivo (limite=None: todas)."""
+        condiciones, parametros = [], []
+        if fuente:
+            condiciones.append("fuente = ?")
+            parametros.append(fuente)
+        if estado:
+            condiciones.append("estado = ?")
+            parametros.append(estado)
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        with self._lock:
+            filas = self._conexion.execute(
+                f"SELECT datos FROM filas {donde} ORDER BY fuente, posicion LIMIT ?",
+                (*parametros, -1 if limite is None else limite)
+            ).fetchall()
+        return [json.loads(datos) for (datos,) in filas]
+
+    def cerrar(self):
+        """Cierra la conexión."""
+        with self._lock:
+            self._conexion.close()
+
+
+def abrir_almacen(ruta: str = RUTA_ALMACEN_DEFECTO, directorio: str = "datos_excel") -> AlmacenRUC:
+    """Abre el almacén y recarga solo las fuentes cuyo archivo cambió (un stat por archivo)."""
+    almacen = AlmacenRUC(ruta)
+    anteriores = set(almacen.fuentes())
+    resultado = almacen.actualizar(directorio)
+    cambios = [f"{f} ({n:,})" for f, n in resultado.items() if n is not None]
+    cambios += [f"{f} (eliminada)" for f in sorted(anteriores - set(resultado))]
+    if cambios:
+        # A stderr: no se mezcla con la salida --json de quien consulta
+        print(f"📦 Almacén de RUCs actualizado: {', '.join(cambios)}", file=sys.stderr)
+    return almacen
+
+
+def _imprimir_ruc(ruc: str, fuentes: Dict[str, List[Dict]]):
+    """Muestra las filas de un RUC por fuente."""
+    if not fuentes:
+        print(f"\n❌ {ruc}: no está en el almacén")
+        return
+    print(f"\n🔎 RUC {ruc}")
+    for fuente, filas in fuentes.items():
+        for fila in filas:
+            print(f"   [{fuente}]")
+            for campo, valor in fila.items():
+                if valor is not None and campo != 'NUMERO_RUC':
+                    print(f"      {campo}: {valor}")
+
+
+def main():
+    """Consulta uno o varios RUCs (o un prefijo) en el almacén."""
+    parser = argparse.ArgumentParser(description="Consulta rápida de RUCs del catastro SRI")
+    parser.add_argument('rucs', nargs='*', help="RUCs a consultar")
+    parser.add_argument('--prefijo', help="Listar los RUCs que empiezan con este prefijo")
+    parser.add_argument('--limite', type=int, default=20, help="Máximo de RUCs con --prefijo")
+    parser.add_argument('--actualizar', action='store_true', help="Cargar las fuentes que cambiaron")
+    parser.add_argument('--forzar', action='store_true', help="Con --actualizar, recargar todas las fuentes")
+    parser.add_argument('--directorio', default="datos_excel", help="Carpeta con los Excel del catastro")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    parser.add_argument('--almacen', default=RUTA_ALMACEN_DEFECTO, help="Archivo SQLite del almacén")
+    args = parser.parse_args()
+
+    # Con --json, los mensajes de avance van a stderr para no romper el JSON
+    avance = sys.stderr if args.json else sys.stdout
+    if args.actualizar:
+        almacen = AlmacenRUC(args.almacen)
+        print("📦 Actualizando el almacén de RUCs...", file=avance)
+        anteriores = set(almacen.fuentes())
+        resultado = almacen.actualizar(args.directorio, forzar=args.forzar)
+        for fuente, filas in resultado.items():
+            print(f"   {'✅' if filas is not None else '⏭️ '} {fuente}: "
+                  f"{f'{filas:,} filas cargadas' if filas is not None else 'sin cambios'}", file=avance)
+        for fuente in sorted(anteriores - set(resultado)):
+            print(f"   🗑️  {fuente}: eliminada (ya no existe el archivo)", file=avance)
+    else:
+        almacen = abrir_almacen(args.almacen, args.directorio)
+
+    try:
+
+        if args.prefijo:
+            inicio = time.perf_counter()
+            resultados = almacen.buscar_prefijo(args.prefijo, args.limite)
+            milisegundos = (time.perf_counter() - inicio) * 1000
+            if args.json:
+                print(json.dumps(resultados, ensure_ascii=False, indent=2))
+            else:
+                print(f"\n🔎 {len(resultados)} RUCs con prefijo {args.prefijo} ({milisegundos:.1f} ms)")
+                for r in resultados:
+                    print(f"   {r['ruc']}  {r['nombre'] or ''}  ({r['canton'] or ''}, {r['provincia'] or ''})"
+                          f"  [{', '.join(r['fuentes'])}]")
+
+        if args.rucs:
+            inicio = time.perf_counter()
+            resultados = almacen.buscar(args.rucs)
+            milisegundos = (time.perf_counter() - inicio) * 1000
+            if args.json:
+                print(json.dumps(resultados, ensure_ascii=False, indent=2))
+            else:
+                for ruc, fuentes in resultados.items():
+                    _imprimir_ruc(ruc, fuentes)
+                print(f"\n⏱️  {len(resultados)} RUCs en {milisegundos:.1f} ms")
+    finally:
+        almacen.cerrar()
+
+
+if __name__ == "__main__":
+    main()
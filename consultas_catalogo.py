@@ -0,0 +1,362 @@
+"""
+Consultas en vivo sobre el catálogo completo para servidor_local.py.
+Todos los Excel de datos_excel/ se cargan una sola vez en memoria como columnas de
+códigos enteros (ubicación, CIIU, estado): cada filtro es una máscara numpy, el
+recuadro del mapa se evalúa sobre las ubicaciones (unos miles) en lugar de las filas
+y cada agregado es un bincount. Una vista nueva del mapa (otra provincia, otro CIIU,
+otro estado) es una consulta de milisegundos en lugar de editar main() y regenerar
+el HTML.
+
+Uso:
+    python3 consultas_catalogo.py --provincia "El Oro" --ciiu G4761 --por canton
+    python3 consultas_catalogo.py --bbox -3.5,-80.2,-3.1,-79.8 --estado ACTIVO
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cache_geocodificacion import RUTA_CACHE_DEFECTO, CacheGeocodificacion, normalizar_clave
+from consulta_ruc import normalizar_rucs
+from filtros_mapa import ESTADOS_TABLA, categoria_estado
+from ingesta_sri import COLUMNAS_MAPA, cargar_excel_sri, listar_archivos_excel
+from nomenclator_ecuador import NomenclatorEcuador
+from normalizacion_sri import columna_normalizada, normalizar_serie, normalizar_texto
+from ubicaciones_sri import detectar_columnas
+
+# Niveles por los que se puede agregar
+DIMENSIONES = ('provincia', 'canton', 'parroquia', 'ciiu', 'estado')
+
+# Filtros que acepta CatalogoConsultas.mascara (y la API, como parámetros de la URL)
+FILTROS = ('provincia', 'canton', 'parroquia', 'ciiu', 'estado', 'bbox', 'ubicacion')
+
+# Máximo de establecimientos por página
+LIMITE_MAXIMO = 1000
+
+_NIVELES_UBICACION = {'provincia': 1, 'canton': 2, 'parroquia': 3}
+
+
+def _claves_ubicacion(df: pd.DataFrame, columna: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(código por fila, -1 si vacío; claves normalizadas) de una columna de ubicación."""
+    if columna is None:
+        return np.full(len(df), -1, dtype=np.int64), np.array([], dtype=object)
+    normalizada = columna_normalizada(columna)
+    serie = df[normalizada] if normalizada in df.columns else normalizar_serie(df[columna])
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype('category')
+    return serie.cat.codes.to_numpy().astype(np.int64), serie.cat.categories.to_numpy(dtype=object)
+
+
+def _texto(df: pd.DataFrame, columna: Optional[str]) -> np.ndarray:
+    """Columna como arreglo de textos recortados (None donde está vacía)."""
+    if columna is None:
+        return np.full(len(df), None, dtype=object)
+    serie = df[columna]
+    valores = serie.astype(str).str.strip().to_numpy(dtype=object)
+    valores[serie.isna().to_numpy()] = None
+    return valores
+
+
+def leer_filtros(parametros: Dict[str, List[str]]) -> Dict:
+    """
+    Filtros de una consulta a partir de los parámetros de la URL (parse_qs).
+
+    Cada filtro acepta varios valores separados por coma o repitiendo el parámetro;
+    bbox es 'sur,oeste,norte,este' y ubicacion el 'id' que devuelve ubicaciones().
+
+    Raises:
+        ValueError: Si bbox no son cuatro números o ubicacion no es un entero
+    """
+    filtros = {}
+    for nombre in FILTROS:
+        valores = [v.strip() for valor in parametros.get(nombre, []) for v in valor.split(',') if v.strip()]
+        if not valores:
+            continue
+        if nombre == 'bbox':
+            try:
+                bbox = tuple(float(v) for v in valores)
+            except ValueError:
+                bbox = ()
+            if len(bbox) != 4:
+                raise ValueError("bbox debe ser 'sur,oeste,norte,este'")
+            filtros['bbox'] = bbox
+        elif nombre == 'ubicacion':
+            try:
+                filtros['ubicacion'] = [int(v) for v in valores]
+            except ValueError:
+                raise ValueError("ubicacion debe ser el id entero de una ubicación")
+        else:
+            filtros[nombre] = valores
+    return filtros
+
+
+class CatalogoConsultas:
+    """Catálogo del SRI en memoria, indexado por ubicación, CIIU y estado."""
+
+    def __init__(self, df: pd.DataFrame, nomenclator: Optional[NomenclatorEcuador] = None,
+                 cache_geocodificacion: Optional[CacheGeocodificacion] = None):
+        """
+        Indexa el catálogo (normalmente con cargar_catalogo).
+
+        Args:
+            df: Establecimientos con las columnas de COLUMNAS_MAPA (y sus claves _NORM)
+            nomenclator: Coordenadas de provincias/cantones/parroquias (sin red)
+            cache_geocodificacion: Cache de coordenadas para lo que no esté en el nomenclátor
+        """
+        columnas = detectar_columnas(df)
+        self.total = len(df)
+
+        # Ubicación de cada fila: (provincia, cantón, parroquia) normalizados → código de ubicación
+        codigos, claves = zip(*(_claves_ubicacion(df, columnas[nivel]) for nivel in _NIVELES_UBICACION))
+        tamanos = [len(c) + 1 for c in claves]
+        combinado = ((codigos[0] + 1) * tamanos[1] + codigos[1] + 1) * tamanos[2] + codigos[2] + 1
+        unicos, primera, self.codigo_ubicacion = np.unique(combinado, return_index=True, return_inverse=True)
+        self.codigo_ubicacion = self.codigo_ubicacion.astype(np.int32)
+
+        partes = [(unicos // (tamanos[1] * tamanos[2])) - 1, (unicos // tamanos[2]) % tamanos[1] - 1,
+                  unicos % tamanos[2] - 1]
+        # Claves normalizadas de cada ubicación ('' si falta el dato)
+        self.claves_ubicacion = {
+            nivel: np.append(claves[i], '')[partes[i]]
+            for i, nivel in enumerate(_NIVELES_UBICACION)
+        }
+        # Nombres tal como vienen en el Excel (primera aparición)
+        self.nombres_ubicacion = {
+            nivel: _texto(df.iloc[primera], columnas[nivel]) for nivel in _NIVELES_UBICACION
+        }
+
+        # Grupos de cada nivel para los agregados: código de grupo por ubicación
+        self._grupos = {}
+        for nivel, profundidad in _NIVELES_UBICACION.items():
+            llaves = list(zip(*(self.claves_ubicacion[n] for n in list(_NIVELES_UBICACION)[:profundidad])))
+            codigos_grupo, _ = pd.factorize(pd.Series(llaves, dtype=object))
+            # Ubicación representante de cada grupo (la primera), para los nombres
+            self._grupos[nivel] = (codigos_grupo, np.unique(codigos_grupo, return_index=True)[1])
+
+        self.latitud, self.longitud = self._coordenadas(nomenclator, cache_geocodificacion)
+
+        # CIIU y estado como códigos (los filtros se resuelven sobre las categorías)
+        ciiu = _texto(df, columnas['codigo_ciiu'])
+        codigos_ciiu, self.valores_ciiu = pd.factorize(pd.Series(ciiu, dtype=object))
+        self.codigo_ciiu = codigos_ciiu.astype(np.int32)
+        self.valores_ciiu = np.asarray(self.valores_ciiu, dtype=object)
+
+        estados = _texto(df, columnas['estado'])
+        codigos_estado, valores_estado = pd.factorize(pd.Series(estados, dtype=object), use_na_sentinel=False)
+        categoria = np.array([ESTADOS_TABLA.index(categoria_estado(v)) for v in valores_estado], dtype=np.int8)
+        self.codigo_estado = categoria[codigos_estado]
+
+        # Campos que se devuelven por establecimiento
+        ruc = df[columnas['ruc']] if columnas['ruc'] else pd.Series([None] * len(df), dtype=object)
+        self.filas = {
+            'ruc': normalizar_rucs(ruc).to_numpy(dtype=object),
+            'nombre': _texto(df, columnas['nombre']),
+            'codigo_ciiu': ciiu,
+            'actividad': _texto(df, columnas['actividad']),
+            'estado': estados,
+        }
+
+    def _coordenadas(self, nomenclator: Optional[NomenclatorEcuador],
+                     cache: Optional[CacheGeocodificacion]) -> Tuple[np.ndarray, np.ndarray]:
+        """Coordenadas de cada ubicación: nomenclátor exacto, cache y luego el nivel superior conocido."""
+        latitud = np.full(len(self.claves_ubicacion['provincia']), np.nan)
+        longitud = np.full_like(latitud, np.nan)
+        for u in range(len(latitud)):
+            provincia, canton, parroquia = (self.claves_ubicacion[n][u] for n in _NIVELES_UBICACION)
+            coordenadas = nomenclator.resolver(provincia, canton, parroquia) if nomenclator is not None else None
+            if coordenadas is None and cache is not None:
+                coordenadas = cache.obtener(normalizar_clave(provincia, canton, parroquia))
+            if coordenadas is None and nomenclator is not None:
+                coordenadas = nomenclator.aproximar(provincia, canton, parroquia)
+            if coordenadas:
+                latitud[u], longitud[u] = coordenadas
+        return latitud, longitud
+
+    def __len__(self) -> int:
+        return self.total
+
+    def mascara(self, provincia: Sequence[str] = None, canton: Sequence[str] = None,
+                parroquia: Sequence[str] = None, ciiu: Sequence[str] = None,
+                estado: Sequence[str] = None, bbox: Tuple[float, float, float, float] = None,
+                ubicacion: Sequence[int] = None) -> np.ndarray:
+        """
+        Filas que cumplen todos los filtros (cada filtro admite varios valores).
+
+        Args:
+            provincia, canton, parroquia: Nombres (sin importar tildes ni mayúsculas)
+            ciiu: Códigos o prefijos ('G4761' incluye G476101...G476104)
+            estado: ACTIVO, PASIVO, SUSPENDIDO o N/A
+            bbox: (sur, oeste, norte, este) en grados
+            ubicacion: 'id' de ubicaciones() (válido mientras el catálogo siga cargado)
+
+        Returns:
+            Arreglo booleano con una posición por establecimiento
+        """
+        ubicaciones = np.ones(len(self.latitud), dtype=bool)
+        filtrar_ubicacion = False
+        for nivel, valores in (('provincia', provincia), ('canton', canton), ('parroquia', parroquia)):
+            if valores:
+                ubicaciones &= np.isin(self.claves_ubicacion[nivel], [normalizar_texto(v) for v in valores])
+                filtrar_ubicacion = True
+        if bbox:
+            sur, oeste, norte, este = bbox
+            with np.errstate(invalid='ignore'):
+                ubicaciones &= ((self.latitud >= sur) & (self.latitud <= norte)
+                                & (self.longitud >= oeste) & (self.longitud <= este))
+            filtrar_ubicacion = True
+        if ubicacion:
+            elegidas = np.zeros(len(self.latitud), dtype=bool)
+            ids = np.asarray(ubicacion, dtype=np.int64)
+            elegidas[ids[(ids >= 0) & (ids < len(elegidas))]] = True
+            ubicaciones &= elegidas
+            filtrar_ubicacion = True
+
+        mascara = ubicaciones[self.codigo_ubicacion] if filtrar_ubicacion else np.ones(self.total, dtype=bool)
+        if ciiu:
+            prefijos = tuple(str(c).upper().strip() for c in ciiu)
+            codigos = [i for i, valor in enumerate(self.valores_ciiu) if str(valor).upper().startswith(prefijos)]
+            mascara &= np.isin(self.codigo_ciiu, codigos)
+        if estado:
+            indices = [ESTADOS_TABLA.index(categoria_estado(e)) for e in estado]
+            mascara &= np.isin(self.codigo_estado, indices)
+        return mascara
+
+    def ubicaciones(self, **filtros) -> List[Dict]:
+        """
+        Marcadores de las ubicaciones con establecimientos que cumplen los filtros.
+
+        Returns:
+            [{id, provincia, canton, parroquia, lat, lng, cantidad, estados: {estado: n}}],
+            de mayor a menor cantidad
+        """
+        mascara = self.mascara(**filtros)
+        total_ubicaciones = len(self.latitud)
+        conteo = np.bincount(self.codigo_ubicacion[mascara].astype(np.int64) * len(ESTADOS_TABLA)
+                             + self.codigo_estado[mascara], minlength=total_ubicaciones * len(ESTADOS_TABLA))
+        conteo = conteo.reshape(total_ubicaciones, len(ESTADOS_TABLA))
+        cantidades = conteo.sum(axis=1)
+
+        resultado = []
+        for u in np.flatnonzero(cantidades)[np.argsort(-cantidades[cantidades > 0], kind='stable')]:
+            resultado.append({
+                'id': int(u),
+                **{nivel: self.nombres_ubicacion[nivel][u] for nivel in _NIVELES_UBICACION},
+                'lat': None if np.isnan(self.latitud[u]) else float(self.latitud[u]),
+                'lng': None if np.isnan(self.longitud[u]) else float(self.longitud[u]),
+                'cantidad': int(cantidades[u]),
+                'estados': {ESTADOS_TABLA[e]: int(n) for e, n in enumerate(conteo[u]) if n}
+            })
+        return resultado
+
+    def establecimientos(self, desde: int = 0, limite: int = 100, **filtros) -> Dict:
+        """
+        Página de establecimientos que cumplen los filtros, en el orden del catálogo.
+
+        Returns:
+            {'total': filas que cumplen, 'desde': desde, 'establecimientos': [...]}
+        """
+        if desde < 0 or limite < 0:
+            raise ValueError("desde y limite no pueden ser negativos")
+        filas = np.flatnonzero(self.mascara(**filtros))
+        pagina = filas[desde:desde + min(limite, LIMITE_MAXIMO)]
+        ubicaciones = self.codigo_ubicacion[pagina]
+        establecimientos = []
+        for fila, u in zip(pagina, ubicaciones):
+            establecimiento = {campo: valores[fila] for campo, valores in self.filas.items()}
+            establecimiento.update({nivel: self.nombres_ubicacion[nivel][u] for nivel in _NIVELES_UBICACION})
+            establecimientos.append(establecimiento)
+        return {'total': int(len(filas)), 'desde': int(desde), 'establecimientos': establecimientos}
+
+    def agregados(self, por: str = 'provincia', **filtros) -> Dict:
+        """
+        Establecimientos que cumplen los filtros contados por provincia, cantón, parroquia, CIIU o estado.
+
+        Returns:
+            {'por': por, 'total': n, 'grupos': [{<nivel(es)>: valor, 'cantidad': n}]} de mayor a menor
+        """
+        if por not in DIMENSIONES:
+            raise ValueError(f"por debe ser uno de: {', '.join(DIMENSIONES)}")
+        mascara = self.mascara(**filtros)
+
+        if por in self._grupos:
+            codigos_grupo, representantes = self._grupos[por]
+            conteo = np.bincount(codigos_grupo[self.codigo_ubicacion[mascara]], minlength=len(representantes))
+            niveles = list(_NIVELES_UBICACION)[:_NIVELES_UBICACION[por]]
+            etiquetas = [{nivel: self.nombres_ubicacion[nivel][u] for nivel in niveles} for u in representantes]
+        elif por == 'ciiu':
+            conteo = np.bincount(self.codigo_ciiu[mascara] + 1, minlength=len(self.valores_ciiu) + 1)
+            etiquetas = [{'ciiu': None}] + [{'ciiu': valor} for valor in self.valores_ciiu]
+        else:
+            conteo = np.bincount(self.codigo_estado[mascara], minlength=len(ESTADOS_TABLA))
+            etiquetas = [{'estado': estado} for estado in ESTADOS_TABLA]
+
+        orden = np.argsort(-conteo, kind='stable')
+        grupos = [{**etiquetas[g], 'cantidad': int(conteo[g])} for g in orden if conteo[g]]
+        return {'por': por, 'total': int(mascara.sum()), 'grupos': grupos}
+
+
+def cargar_catalogo(directorio: str = "datos_excel", nomenclator: Optional[NomenclatorEcuador] = None,
+                    ruta_cache: str = RUTA_CACHE_DEFECTO) -> CatalogoConsultas:
+    """
+    Carga todos los Excel del directorio (desde el cache columnar de la ingesta) y los indexa.
+
+    Args:
+        directorio: Carpeta con los Excel del catastro
+        nomenclator: Nomenclátor de coordenadas (por defecto el incluido en el repositorio)
+        ruta_cache: Cache de geocodificación para las ubicaciones que no estén en el nomenclátor
+    """
+    rutas = [os.path.join(directorio, archivo) for archivo in listar_archivos_excel(directorio)]
+    partes = [cargar_excel_sri(ruta, columnas=COLUMNAS_MAPA) for ruta in rutas]
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUMNAS_MAPA)
+
+    cache = CacheGeocodificacion(ruta_cache) if os.path.exists(ruta_cache) else None
+    catalogo = CatalogoConsultas(df, nomenclator if nomenclator is not None else NomenclatorEcuador(), cache)
+    if cache is not None:
+        cache.cerrar()
+    return catalogo
+
+
+def main():
+    """Consulta el catálogo desde la línea de comandos (lo mismo que responde la API del servidor)."""
+    parser = argparse.ArgumentParser(description="Consultas sobre el catálogo completo en memoria")
+    for nombre in ('provincia', 'canton', 'parroquia', 'ciiu', 'estado'):
+        parser.add_argument(f'--{nombre}', action='append', help="Uno o varios valores separados por coma")
+    parser.add_argument('--bbox', help="Recuadro 'sur,oeste,norte,este'")
+    parser.add_argument('--por', choices=DIMENSIONES, help="Agregar por este nivel")
+    parser.add_argument('--limite', type=int, default=10, help="Establecimientos o grupos a mostrar")
+    parser.add_argument('--directorio', default="datos_excel", help="Carpeta con los Excel del catastro")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    catalogo = cargar_catalogo(args.directorio)
+    print(f"📚 Catálogo: {len(catalogo):,} establecimientos en {len(catalogo.latitud):,} ubicaciones "
+          f"({time.perf_counter() - inicio:.2f} s)")
+
+    parametros = {nombre: valores for nombre in FILTROS if (valores := getattr(args, nombre, None)) is not None}
+    if isinstance(parametros.get('bbox'), str):
+        parametros['bbox'] = [parametros['bbox']]
+    try:
+        filtros = leer_filtros(parametros)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    inicio = time.perf_counter()
+    if args.por:
+        resultado = catalogo.agregados(args.por, **filtros)
+        resultado['grupos'] = resultado['grupos'][:args.limite]
+    else:
+        resultado = catalogo.establecimientos(limite=args.limite, **filtros)
+    milisegundos = (time.perf_counter() - inicio) * 1000
+
+    print(json.dumps(resultado, ensure_ascii=False, indent=1))
+    print(f"⏱️  {resultado['total']:,} establecimientos en {milisegundos:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
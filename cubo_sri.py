@@ -0,0 +1,281 @@
+"""
+Cubo de agregados del catastro SRI.
+Guarda los roll-ups que leen los reportes (por provincia, cantón, CIIU, estado y rango
+de reseñas, cada uno separado por encontradas en Google cuando el archivo lo indica)
+con sus conteos y sumas de ventas estimadas. Cruzar todas las dimensiones dejaba casi
+una celda por fila; así el cubo pesa unos pocos KB. Se guarda en disco y los reportes,
+dashboards y el análisis de librerías lo leen en lugar de volver a agrupar el Excel
+completo.
+"""
+
+import argparse
+import os
+import pickle
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ingesta_sri import cargar_excel_sri
+
+# Incrementar si cambian las dimensiones o medidas del cubo
+VERSION_CUBO = 2
+
+DIRECTORIO_CUBOS = os.path.join("cache", "cubos")
+
+# Dimensión del cubo → columna del Excel (las que no estén en el archivo se omiten)
+DIMENSIONES = {
+    'provincia': 'DESCRIPCION_PROVINCIA_EST',
+    'canton': 'DESCRIPCION_CANTON_EST',
+    'ciiu': 'CODIGO_CIIU',
+    'estado': 'ESTADO_CONTRIBUYENTE',
+    'encontrado': 'ENCONTRADO_GOOGLE',
+    'rango_resenas': 'NUMERO_RESENAS'
+}
+
+# Roll-ups guardados (los que consultan los reportes); 'encontrado' se agrega a todos
+# para poder filtrar las librerías encontradas en Google
+VISTAS = [(), ('provincia',), ('canton',), ('ciiu',), ('estado',), ('rango_resenas',)]
+DIMENSIONES_COMUNES = ('encontrado',)
+
+# Columnas de venta mensual estimada según el script que generó el archivo
+COLUMNAS_VENTA = ['ESTIMACION_VENTA_MENSUAL', 'ESTIMACION_VENTAS_MENSUAL_USD', 'ESTIMACION_VENTA_MENSUAL_USD']
+
+# Rangos de reseñas de los dashboards: (etiqueta, mínimo exclusivo, máximo inclusivo)
+RANGOS_RESENAS = [('0-10', -1, 10), ('11-50', 10, 50), ('51-100', 50, 100), ('100+', 100, np.inf)]
+
+# Filas guardadas junto al cubo para los rankings (top N por cada columna)
+FILAS_DESTACADAS = 20
+
+
+def _rango_resenas(resenas: pd.Series) -> pd.Series:
+    """Etiqueta de rango de cada número de reseñas (None si falta o es negativo)."""
+    etiquetas = [etiqueta for etiqueta, _, _ in RANGOS_RESENAS]
+    limites = [RANGOS_RESENAS[0][1]] + [maximo for _, _, maximo in RANGOS_RESENAS]
+    return pd.cut(pd.to_numeric(resenas, errors='coerce'), bins=limites, labels=etiquetas)
+
+
+def _columna_venta(df: pd.DataFrame) -> Optional[str]:
+    return next((c for c in COLUMNAS_VENTA if c in df.columns), None)
+
+
+class CuboSRI:
+    """Roll-ups de agregados por dimensión, con consultas de total, promedio y filtro."""
+
+    def __init__(self, vistas: Dict[Tuple[str, ...], pd.DataFrame], destacadas: Optional[pd.DataFrame] = None):
+        """
+        Inicializa el cubo.
+
+        Args:
+            vistas: Por cada combinación de dimensiones guardada, una fila por valor con sus
+                medidas (todas suman las mismas filas de origen)
+            destacadas: Filas originales de los rankings (top N por reseñas y ventas)
+        """
+        self.vistas = vistas
+        self.dimensiones = list(dict.fromkeys(d for dimensiones in vistas for d in dimensiones))
+        self.destacadas = destacadas if destacadas is not None else pd.DataFrame()
+
+    @property
+    def celdas(self) -> int:
+        """Filas guardadas entre todas las vistas."""
+        return sum(len(agregados) for agregados in self.vistas.values())
+
+    def _vista(self, dimensiones: Sequence[str] = ()) -> pd.DataFrame:
+        """La vista más chica que tiene todas las dimensiones pedidas."""
+        candidatas = [clave for clave in self.vistas if set(dimensiones) <= set(clave)]
+        if not candidatas:
+            raise KeyError(f"Dimensión no disponible en el cubo: {', '.join(dimensiones)}")
+        return self.vistas[min(candidatas, key=lambda clave: len(self.vistas[clave]))]
+
+    def filtrar(self, **condiciones) -> 'CuboSRI':
+        """
+        Cubo restringido a ciertos valores, p. ej. filtrar(encontrado=True, provincia=['EL ORO']).
+
+        Solo quedan las vistas que tienen todas las dimensiones filtradas.
+        """
+        for dimension in condiciones:
+            if dimension not in self.dimensiones:
+                raise KeyError(f"Dimensión no disponible en el cubo: {dimension}")
+        vistas = {}
+        for clave, agregados in self.vistas.items():
+            if not set(condiciones) <= set(clave):
+                continue
+            mascara = np.ones(len(agregados), dtype=bool)
+            for dimension, valores in condiciones.items():
+                if not isinstance(valores, (list, tuple, set)):
+                    valores = [valores]
+                mascara &= agregados[dimension].isin(list(valores)).to_numpy()
+            vistas[clave] = agregados[mascara]
+        return CuboSRI(vistas, self.destacadas)
+
+    def total(self, medida: str = 'cantidad') -> float:
+        """Suma de una medida en todo el cubo (o en el cubo filtrado)."""
+        return self._vista()[medida].sum()
+
+    def promedio(self, medida: str) -> float:
+        """Promedio de una medida por fila original, sin contar las vacías (como Series.mean)."""
+        agregados = self._vista()
+        n = agregados[f'{medida}_n'].sum()
+        return agregados[medida].sum() / n if n else np.nan
+
+    def por(self, dimensiones: Union[str, Sequence[str]]) -> pd.DataFrame:
+        """
+        Medidas agregadas por una o más dimensiones (índice = dimensiones).
+
+        Los promedios se derivan de las sumas: `<medida>_promedio` = suma / filas con valor.
+        """
+        if isinstance(dimensiones, str):
+            dimensiones = [dimensiones]
+        agregados = self._vista(dimensiones)
+        medidas = [c for c in agregados.columns if c not in self.dimensiones]
+        resultado = agregados.groupby(list(dimensiones), observed=True, dropna=True)[medidas].sum()
+        for medida in [c[:-2] for c in medidas if c.endswith('_n')]:
+            resultado[f'{medida}_promedio'] = resultado[medida] / resultado[f'{medida}_n'].replace(0, np.nan)
+        return resultado
+
+    def conteo(self, dimension: str) -> pd.Series:
+        """Cantidad de filas por valor de una dimensión, de mayor a menor (como value_counts)."""
+        return self.por(dimension)['cantidad'].sort_values(ascending=False, kind='stable')
+
+
+def construir_cubo(df: pd.DataFrame) -> CuboSRI:
+    """
+    Agrupa el DataFrame en los roll-ups de VISTAS cuyas dimensiones estén en el archivo.
+
+    Args:
+        df: Filas del catastro (o de los archivos de librerías ya enriquecidos)
+
+    Returns:
+        CuboSRI con las medidas: cantidad, con_fantasia, agentes_retencion y, si existen
+        las columnas, venta_mensual, resenas y calificacion (cada una con su `_n`)
+    """
+    columnas = {}
+    for dimension, columna in DIMENSIONES.items():
+        if columna not in df.columns:
+            continue
+        if dimension == 'encontrado':
+            columnas[dimension] = df[columna] == True  # noqa: E712 (mismo criterio que los reportes)
+        elif dimension == 'rango_resenas':
+            columnas[dimension] = _rango_resenas(df[columna])
+        else:
+            columnas[dimension] = df[columna]
+
+    base = pd.DataFrame(columnas, index=df.index)
+    base['cantidad'] = 1
+    base['con_fantasia'] = df['NOMBRE_FANTASIA_COMERCIAL'].notna().astype(int) if 'NOMBRE_FANTASIA_COMERCIAL' in df.columns else 0
+    base['agentes_retencion'] = df['AGENTE_RETENCION'].notna().astype(int) if 'AGENTE_RETENCION' in df.columns else 0
+
+    for medida, columna in (('venta_mensual', _columna_venta(df)),
+                            ('resenas', 'NUMERO_RESENAS' if 'NUMERO_RESENAS' in df.columns else None),
+                            ('calificacion', 'CALIFICACION_GOOGLE' if 'CALIFICACION_GOOGLE' in df.columns else None)):
+        if columna is None:
+            continue
+        valores = pd.to_numeric(df[columna], errors='coerce')
+        base[medida] = valores.fillna(0.0)
+        base[f'{medida}_n'] = valores.notna().astype(int)
+
+    medidas = [c for c in base.columns if c not in columnas]
+    comunes = tuple(d for d in DIMENSIONES_COMUNES if d in columnas)
+    vistas = {}
+    for vista in VISTAS:
+        if not all(d in columnas for d in vista):
+            continue
+        dimensiones = list(vista) + list(comunes)
+        if dimensiones:
+            agregados = base.groupby(dimensiones, observed=True, dropna=False, sort=True)[medidas].sum().reset_index()
+            # Dimensiones de texto como categorías: el cubo pesa menos y los roll-ups agrupan por códigos
+            for dimension in dimensiones:
+                if agregados[dimension].dtype != bool:
+                    agregados[dimension] = agregados[dimension].astype('category')
+        else:
+            agregados = base[medidas].sum().to_frame().T
+        vistas[tuple(dimensiones)] = agregados
+
+    # Filas de los rankings: top N por reseñas y por ventas (en todo el archivo y entre
+    # las encontradas en Google), en su orden original
+    indices = set()
+    subconjuntos = [df.index]
+    if 'encontrado' in columnas:
+        subconjuntos.append(df.index[columnas['encontrado'].to_numpy()])
+    for columna in ('NUMERO_RESENAS', _columna_venta(df)):
+        if columna and columna in df.columns:
+            valores = pd.to_numeric(df[columna], errors='coerce')
+            for filas in subconjuntos:
+                indices.update(valores.loc[filas].nlargest(FILAS_DESTACADAS).index)
+    destacadas = df.loc[[i for i in df.index if i in indices]]
+
+    return CuboSRI(vistas, destacadas)
+
+
+def _ruta_cubo(nombre: str, directorio: str) -> str:
+    return os.path.join(directorio, f"{nombre}.pkl")
+
+
+def _firma(ruta_excel: str) -> Dict:
+    estado = os.stat(ruta_excel)
+    return {'origen': os.path.abspath(ruta_excel), 'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+
+def guardar_cubo(cubo: CuboSRI, nombre: str, firma: Optional[Dict] = None, directorio: str = DIRECTORIO_CUBOS):
+    """Guarda el cubo de forma atómica con la firma del archivo de origen."""
+    os.makedirs(directorio, exist_ok=True)
+    ruta = _ruta_cubo(nombre, directorio)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as f:
+        pickle.dump({'version': VERSION_CUBO, 'firma': firma, 'vistas': cubo.vistas,
+                     'destacadas': cubo.destacadas}, f)
+    os.replace(temporal, ruta)
+
+
+def leer_cubo(nombre: str, firma: Optional[Dict] = None, directorio: str = DIRECTORIO_CUBOS) -> Optional[CuboSRI]:
+    """Lee un cubo guardado; None si no existe, es de otra versión o su origen cambió."""
+    try:
+        with open(_ruta_cubo(nombre, directorio), 'rb') as f:
+            datos = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if datos.get('version') != VERSION_CUBO or (firma is not None and datos.get('firma') != firma):
+        return None
+    return CuboSRI(datos['vistas'], datos['destacadas'])
+
+
+def cargar_cubo(ruta_excel: str, directorio: str = DIRECTORIO_CUBOS) -> CuboSRI:
+    """
+    Devuelve el cubo de un Excel, construyéndolo solo si el archivo cambió.
+
+    Args:
+        ruta_excel: Archivo de origen (p. ej. librerias_con_info_google.xlsx)
+        directorio: Carpeta de los cubos guardados
+
+    Returns:
+        CuboSRI del archivo
+    """
+    nombre = os.path.splitext(os.path.basename(ruta_excel))[0]
+    firma = _firma(ruta_excel)
+    cubo = leer_cubo(nombre, firma, directorio)
+    if cubo is None:
+        cubo = construir_cubo(cargar_excel_sri(ruta_excel))
+        guardar_cubo(cubo, nombre, firma, directorio)
+    return cubo
+
+
+def main():
+    """Construye (o actualiza) el cubo de un Excel y muestra un resumen."""
+    parser = argparse.ArgumentParser(description="Cubo de agregados del catastro SRI")
+    parser.add_argument('excel', nargs='?', default="librerias_con_info_google.xlsx", help="Archivo de origen")
+    parser.add_argument('--por', default='provincia', help="Dimensión para el resumen (provincia, canton, ciiu, estado...)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.excel):
+        print(f"❌ No se encontró: {args.excel}")
+        return
+
+    cubo = cargar_cubo(args.excel)
+    print(f"🧊 Cubo de {args.excel}: {cubo.celdas:,} celdas, dimensiones: {', '.join(cubo.dimensiones)}")
+    print(f"   Filas de origen: {int(cubo.total()):,}")
+    if args.por in cubo.dimensiones:
+        print(cubo.por(args.por).sort_values('cantidad', ascending=False, kind='stable').to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Datos compactos por columnas para los mapas y dashboards.
+En lugar de una lista de objetos que repite las claves ('provincia', 'canton',
+'actividad', ...) en cada fila, los generadores guardan cada columna una sola vez:
+los números como arreglos tipados (base64 de sus bytes) y los textos repetidos
+(provincia, cantón, CIIU, actividad, estado) como un diccionario de valores más un
+arreglo de índices. Las columnas de diccionarios (el conteo por CIIU de cada
+marcador) guardan sus claves una vez y los valores seguidos, con dónde termina cada
+fila. La página decodifica con plantillas/datos_columnares.js.
+
+Uso:
+    python3 datos_columnares.py mapa_google_maps_filtrado_datos/datos.js   # tamaño por columna
+"""
+
+import argparse
+import base64
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+# Tipo de cada arreglo (mismo nombre que usa la página) → dtype little-endian
+TIPOS = {
+    'u1': '<u1', 'u2': '<u2', 'u4': '<u4',
+    'i1': '<i1', 'i2': '<i2', 'i4': '<i4',
+    'f8': '<f8'
+}
+
+# Enteros: el tipo más chico que contiene todos los valores
+_TIPOS_ENTEROS = ('u1', 'i1', 'u2', 'i2', 'u4', 'i4')
+
+
+def _arreglo(tipo: str, valores) -> Dict:
+    """Arreglo tipado en base64."""
+    datos = np.asarray(valores, dtype=TIPOS[tipo])
+    return {'tipo': tipo, 'datos': base64.b64encode(datos.tobytes()).decode('ascii')}
+
+
+def _tipo_entero(minimo: int, maximo: int):
+    """Tipo entero más chico para el rango, o None si no entra en 32 bits."""
+    for tipo in _TIPOS_ENTEROS:
+        limites = np.iinfo(TIPOS[tipo])
+        if limites.min <= minimo and maximo <= limites.max:
+            return tipo
+    return None
+
+
+def _codificar_mapas(valores: List[Dict]) -> Dict:
+    """Columna de diccionarios: claves compartidas, índice de clave y valor de cada entrada, y fin de cada fila."""
+    posiciones = {}
+    claves, contenidos, fin = [], [], []
+    for valor in valores:
+        for clave, contenido in valor.items():
+            claves.append(posiciones.setdefault(clave, len(posiciones)))
+            contenidos.append(contenido)
+        fin.append(len(claves))
+    return {
+        'claves': list(posiciones),
+        'fin': _arreglo(_tipo_entero(0, fin[-1]), fin),
+        'clave': _arreglo(_tipo_entero(0, max(len(posiciones) - 1, 0)), claves),
+        'valores': codificar_columna(contenidos)
+    }
+
+
+def codificar_columna(valores: List) -> object:
+    """
+    Codifica una columna eligiendo la forma más compacta.
+
+    - Números (sin vacíos): arreglo tipado; enteros en el tipo más chico, el resto en float64
+    - Diccionarios (todas las filas): claves compartidas + valores seguidos + fin de cada fila
+    - Valores repetidos (la mitad o menos son distintos): diccionario + índices
+    - Lo demás (textos únicos, listas): la lista tal cual
+
+    Returns:
+        Lista, {'tipo', 'datos'}, {'dic', 'tipo', 'datos'} o {'claves', 'fin', 'clave', 'valores'}
+    """
+    if valores and all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool)
+                       for v in valores):
+        if all(isinstance(v, (int, np.integer)) for v in valores):
+            tipo = _tipo_entero(min(valores), max(valores))
+            if tipo:
+                return _arreglo(tipo, valores)
+        else:
+            return _arreglo('f8', valores)
+
+    if valores and all(isinstance(v, dict) for v in valores):
+        return _codificar_mapas(valores)
+
+    try:
+        posiciones = {}
+        indices = [posiciones.setdefault(v, len(posiciones)) for v in valores]
+    except TypeError:
+        # Valores no hashables (listas, o diccionarios mezclados con vacíos)
+        return list(valores)
+    if len(valores) < 2 or len(posiciones) > len(valores) // 2:
+        return list(valores)
+    columna = _arreglo(_tipo_entero(0, len(posiciones) - 1), indices)
+    columna['dic'] = list(posiciones)
+    return columna
+
+
+def codificar_registros(registros: List[Dict], columnas: List[str] = None) -> Dict:
+    """
+    Lista de objetos → columnas codificadas.
+
+    Args:
+        registros: Filas como diccionarios (las claves que falten quedan en None)
+        columnas: Columnas a guardar (por defecto, todas las claves en orden de aparición)
+
+    Returns:
+        {'total': filas, 'columnas': {columna: columna codificada}}
+    """
+    if columnas is None:
+        columnas = list(dict.fromkeys(clave for registro in registros for clave in registro))
+    return {
+        'total': len(registros),
+        'columnas': {columna: codificar_columna([registro.get(columna) for registro in registros])
+                     for columna in columnas}
+    }
+
+
+def decodificar_columna(columna: object) -> List:
+    """Columna codificada → lista de valores."""
+    if isinstance(columna, list):
+        return columna
+    if 'claves' in columna:
+        fin = decodificar_columna(columna['fin'])
+        claves = decodificar_columna(columna['clave'])
+        contenidos = decodificar_columna(columna['valores'])
+        filas, inicio = [], 0
+        for final in fin:
+            filas.append({columna['claves'][claves[j]]: contenidos[j] for j in range(inicio, final)})
+            inicio = final
+        return filas
+    valores = np.frombuffer(base64.b64decode(columna['datos']), dtype=TIPOS[columna['tipo']]).tolist()
+    if 'dic' in columna:
+        return [columna['dic'][i] for i in valores]
+    return valores
+
+
+def decodificar_registros(datos: Dict) -> List[Dict]:
+    """Columnas codificadas → lista de objetos (sin las claves en None, como en la página)."""
+    columnas = {nombre: decodificar_columna(columna) for nombre, columna in datos['columnas'].items()}
+    return [{nombre: valores[i] for nombre, valores in columnas.items() if valores[i] is not None}
+            for i in range(datos['total'])]
+
+
+def _buscar_columnares(valor, ruta: str = ''):
+    """Recorre un dato y devuelve (ruta, datos columnares) de cada bloque {'total', 'columnas'}."""
+    if isinstance(valor, dict):
+        if 'total' in valor and isinstance(valor.get('columnas'), dict):
+            yield ruta, valor
+            return
+        for clave, contenido in valor.items():
+            yield from _buscar_columnares(contenido, f"{ruta}.{clave}" if ruta else clave)
+
+
+def main():
+    """Muestra el tamaño de cada columna de un datos.js o de un fragmento de detalle."""
+    parser = argparse.ArgumentParser(description="Tamaño de los datos por columnas de una página")
+    parser.add_argument('archivo', help="datos.js de una página (<pagina>_datos/) o un fragmento .json")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archivo):
+        print(f"❌ No existe '{args.archivo}'")
+        return
+
+    with open(args.archivo, 'r', encoding='utf-8') as f:
+        texto = f.read()
+    if args.archivo.endswith('.json'):
+        datos = {os.path.basename(args.archivo): json.loads(texto)}
+    else:
+        # datos.js: una línea 'const nombre = <JSON>;' por dato
+        datos = {}
+        for linea in texto.splitlines():
+            if linea.startswith('const '):
+                nombre, _, valor = linea[len('const '):].partition(' = ')
+                datos[nombre] = json.loads(valor.rstrip(';'))
+
+    for ruta, bloque in _buscar_columnares(datos):
+        columnar = len(json.dumps(bloque, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        objetos = len(json.dumps(decodificar_registros(bloque), ensure_ascii=False,
+                                 separators=(',', ':')).encode('utf-8'))
+        print(f"\n📦 {ruta}: {bloque['total']:,} filas, {columnar / 1e3:,.1f} KB "
+              f"(como lista de objetos: {objetos / 1e3:,.1f} KB)")
+        for nombre, columna in bloque['columnas'].items():
+            forma = ('lista' if isinstance(columna, list) else
+                     f"diccionarios ({len(columna['claves']):,} claves)" if 'claves' in columna else
+                     f"diccionario de {len(columna['dic']):,} ({columna['tipo']})" if 'dic' in columna else
+                     f"arreglo {columna['tipo']}")
+            tamano = len(json.dumps(columna, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            print(f"   {nombre:<20} {forma:<28} {tamano / 1e3:10,.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Datos sintéticos y referencias fila por fila para las pruebas (tests/) y los benchmarks.
+Los catálogos imitan la cardinalidad del catastro nacional del SRI; las referencias son
+las implementaciones originales con iterrows, contra las que se comparan las vectorizadas.
+"""
+
+import json
+import os
+import random
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from datos_columnares import decodificar_registros
+from plantillas_html import directorio_datos
+
+ESTADOS = ['ACTIVO', 'PASIVO', 'SUSPENDIDO', 'SUSPENDIDO ', ' ACTIVO']
+
+
+def generar_catalogo_sintetico(filas: int, semilla: int = 42) -> pd.DataFrame:
+    """Genera un catálogo RUC sintético con la cardinalidad aproximada del catastro nacional."""
+    rng = np.random.default_rng(semilla)
+
+    provincias = np.array([f"PROVINCIA {i:02d}" for i in range(24)], dtype=object)
+    cantones = np.array([f"CANTON {i:03d}" for i in range(221)], dtype=object)
+    parroquias = np.array([f"PARROQUIA {i:04d}" for i in range(1040)], dtype=object)
+    codigos = np.array([f"G{476100 + i}" for i in range(600)], dtype=object)
+
+    idx_parroquia = rng.integers(0, len(parroquias), filas)
+    idx_canton = idx_parroquia % len(cantones)
+    idx_provincia = idx_canton % len(provincias)
+
+    df = pd.DataFrame({
+        'NUMERO_RUC': rng.integers(10 ** 11, 10 ** 12, filas),
+        'RAZON_SOCIAL': np.char.add('ESTABLECIMIENTO ', rng.integers(0, filas, filas).astype(str)).astype(object),
+        'CODIGO_CIIU': codigos[rng.integers(0, len(codigos), filas)],
+        'ACTIVIDAD_ECONOMICA': 'VENTA AL POR MENOR',
+        'ESTADO_CONTRIBUYENTE': np.array(ESTADOS, dtype=object)[rng.integers(0, len(ESTADOS), filas)],
+        'DESCRIPCION_PROVINCIA_EST': provincias[idx_provincia],
+        'DESCRIPCION_CANTON_EST': cantones[idx_canton],
+        'DESCRIPCION_PARROQUIA_EST': parroquias[idx_parroquia]
+    })
+
+    # Algunos vacíos para ejercitar las claves de respaldo
+    vacios = rng.random(filas)
+    df.loc[vacios < 0.02, 'DESCRIPCION_PARROQUIA_EST'] = None
+    df.loc[vacios < 0.005, 'DESCRIPCION_CANTON_EST'] = None
+    df.loc[vacios < 0.001, 'DESCRIPCION_PROVINCIA_EST'] = None
+    return df
+
+
+def agrupar_con_iterrows(df: pd.DataFrame) -> dict:
+    """Implementación original de procesar_datos_filtrados (referencia para el benchmark)."""
+    col_ruc = next((col for col in df.columns if 'ruc' in col.lower()), None)
+    col_nombre = next((col for col in df.columns if any(x in col.lower() for x in ['razon', 'nombre'])), None)
+    col_provincia = next((col for col in df.columns if 'provincia' in col.lower()), None)
+    col_canton = next((col for col in df.columns if 'canton' in col.lower()), None)
+    col_parroquia = next((col for col in df.columns if 'parroquia' in col.lower()), None)
+    col_ciiu = next((col for col in df.columns if 'ciiu' in col.lower()), None)
+    col_actividad = next((col for col in df.columns if 'actividad' in col.lower()), None)
+    col_estado = next((col for col in df.columns if 'estado_contribuyente' in col.lower()), None)
+
+    grupos = defaultdict(list)
+    for idx, row in df.iterrows():
+        provincia = str(row[col_provincia]).strip() if col_provincia and not pd.isna(row[col_provincia]) else None
+        canton = str(row[col_canton]).strip() if col_canton and not pd.isna(row[col_canton]) else None
+        parroquia = str(row[col_parroquia]).strip() if col_parroquia and not pd.isna(row[col_parroquia]) else None
+
+        if parroquia and canton and provincia:
+            clave = f"{parroquia}, {canton}, {provincia}"
+        elif canton and provincia:
+            clave = f"{canton}, {provincia}"
+        elif provincia:
+            clave = provincia
+        else:
+            continue
+
+        grupos[clave].append({
+            'ruc': str(row[col_ruc]) if col_ruc and not pd.isna(row[col_ruc]) else None,
+            'nombre': str(row[col_nombre]) if col_nombre and not pd.isna(row[col_nombre]) else None,
+            'provincia': provincia,
+            'canton': canton,
+            'parroquia': parroquia,
+            'codigo_ciiu': str(row[col_ciiu]) if col_ciiu and not pd.isna(row[col_ciiu]) else None,
+            'actividad': str(row[col_actividad]) if col_actividad and not pd.isna(row[col_actividad]) else None,
+            'estado': str(row[col_estado]).strip() if col_estado and not pd.isna(row[col_estado]) else None
+        })
+    return dict(grupos)
+
+
+def generar_librerias_sinteticas(filas: int, semilla: int = 7) -> pd.DataFrame:
+    """Genera un librerias_detalle.xlsx sintético con vacíos y casos borde de los estimadores."""
+    rng = np.random.default_rng(semilla)
+    cantones = np.array(['MACHALA', 'GUAYAQUIL', 'QUITO', 'CUENCA', 'AMBATO', 'SALINAS', 'PASAJE',
+                         'SANTA ROSA', 'LOJA', 'PUERTO AYORA', 'quito', None], dtype=object)
+    estados = np.array(['ACTIVO', 'PASIVO', 'SUSPENDIDO', 'INACTIVO', ' ACTIVO', None], dtype=object)
+
+    fechas = pd.Timestamp('1980-01-01') + pd.to_timedelta(rng.integers(0, 16000, filas), unit='D')
+    fechas = pd.Series(fechas).where(rng.random(filas) > 0.05)
+
+    return pd.DataFrame({
+        'NUMERO_RUC': rng.integers(10 ** 11, 10 ** 12, filas),
+        'RAZON_SOCIAL': np.char.add('LIBRERIA ', rng.integers(0, filas, filas).astype(str)).astype(object),
+        'NOMBRE_FANTASIA_COMERCIAL': np.where(rng.random(filas) < 0.5, 'PAPELERIA CENTRAL', None),
+        'ESTADO_CONTRIBUYENTE': estados[rng.integers(0, len(estados), filas)],
+        'DESCRIPCION_PROVINCIA_EST': 'EL ORO',
+        'DESCRIPCION_CANTON_EST': cantones[rng.integers(0, len(cantones), filas)],
+        'AGENTE_RETENCION': np.array(['N', 'S', None], dtype=object)[rng.integers(0, 3, filas)],
+        'FECHA_INICIO_ACTIVIDADES': fechas
+    })
+
+
+def clasificar_libreria_original(registro: pd.Series) -> str:
+    """Reglas de tamaño tal como estaban escritas en EstimadorVentasLibrerias (referencia)."""
+    indicadores_grande = 0
+    indicadores_mediana = 0
+    if pd.notna(registro.get('AGENTE_RETENCION')):
+        indicadores_grande += 2
+    estado = str(registro.get('ESTADO_CONTRIBUYENTE', '')).upper()
+    if 'ACTIVO' in estado:
+        indicadores_mediana += 1
+    elif 'SUSPENDIDO' in estado:
+        return 'pequena'
+    if pd.notna(registro.get('NOMBRE_FANTASIA_COMERCIAL')):
+        indicadores_mediana += 1
+    canton = str(registro.get('DESCRIPCION_CANTON_EST', '')).upper()
+    if any(c in canton for c in ['MACHALA', 'GUAYAQUIL', 'QUITO', 'CUENCA', 'AMBATO']):
+        indicadores_grande += 1
+
+    if indicadores_grande >= 2:
+        return 'grande'
+    elif indicadores_mediana >= 1 or indicadores_grande >= 1:
+        return 'mediana'
+    return 'pequena'
+
+
+def estimar_por_indicadores_original(registro: pd.Series) -> dict:
+    """Reglas de EstimadorVentasOnline.estimar_por_indicadores tal como estaban escritas (referencia)."""
+    base_ventas = {'pequena': 8000, 'mediana': 25000, 'grande': 60000}
+    factores = []
+    multiplicador = 1.0
+
+    if 'CLASIFICACION_TAMANO' in registro.index:
+        tamano = registro['CLASIFICACION_TAMANO']
+    elif pd.notna(registro.get('AGENTE_RETENCION')):
+        tamano = 'grande'
+    elif registro.get('ESTADO_CONTRIBUYENTE') == 'ACTIVO':
+        tamano = 'mediana'
+    else:
+        tamano = 'pequena'
+    base = base_ventas.get(tamano, 8000)
+
+    if pd.notna(registro.get('AGENTE_RETENCION')):
+        multiplicador *= 1.5
+        factores.append('Agente de retención (+50%)')
+    if registro.get('ESTADO_CONTRIBUYENTE') == 'ACTIVO':
+        multiplicador *= 1.2
+        factores.append('Estado activo (+20%)')
+    elif 'SUSPENDIDO' in str(registro.get('ESTADO_CONTRIBUYENTE', '')):
+        multiplicador *= 0.3
+        factores.append('Estado suspendido (-70%)')
+    canton = str(registro.get('DESCRIPCION_CANTON_EST', '')).upper()
+    if any(c in canton for c in ['MACHALA', 'GUAYAQUIL', 'QUITO', 'CUENCA', 'AMBATO', 'SALINAS']):
+        multiplicador *= 1.3
+        factores.append(f'Cantón grande ({canton}) (+30%)')
+    if 'FECHA_INICIO_ACTIVIDADES' in registro.index and pd.notna(registro.get('FECHA_INICIO_ACTIVIDADES')):
+        try:
+            años = (datetime.now() - pd.to_datetime(registro['FECHA_INICIO_ACTIVIDADES'])).days / 365
+            if años >= 10:
+                multiplicador *= 1.3
+                factores.append(f'Antigüedad {años:.1f} años (+30%)')
+            elif años >= 5:
+                multiplicador *= 1.1
+                factores.append(f'Antigüedad {años:.1f} años (+10%)')
+        except Exception:
+            pass
+    if pd.notna(registro.get('NOMBRE_FANTASIA_COMERCIAL')):
+        multiplicador *= 1.2
+        factores.append('Nombre fantasia (+20%)')
+
+    mensual = base * multiplicador
+    confianza = 'alta' if len(factores) >= 4 else 'media' if len(factores) >= 2 else 'baja'
+    return {'venta_estimada_mensual': mensual, 'venta_estimada_anual': mensual * 12,
+            'confianza': confianza, 'factores_aplicados': factores}
+
+
+def estimacion_google_original(info_google: dict, registro: pd.Series) -> dict:
+    """Reglas de BuscadorGooglePlaces.calcular_estimacion_mejorada tal como estaban escritas (referencia)."""
+    if not info_google or not info_google.get('encontrado'):
+        return {'venta_estimada_mensual': 0, 'venta_estimada_anual': 0,
+                'confianza': 'muy_baja', 'razon': 'No encontrado en Google Maps'}
+
+    num_resenas = info_google.get('numero_resenas', 0)
+    calificacion = info_google.get('calificacion', 0)
+    if num_resenas == 0:
+        base_ventas, confianza = 5000, 'baja'
+    elif num_resenas < 10:
+        base_ventas, confianza = 10000, 'baja'
+    elif num_resenas < 50:
+        base_ventas, confianza = 25000, 'media'
+    elif num_resenas < 100:
+        base_ventas, confianza = 50000, 'alta'
+    else:
+        base_ventas, confianza = 80000, 'alta'
+
+    if calificacion >= 4.5:
+        base_ventas *= 1.3
+    elif calificacion >= 4.0:
+        base_ventas *= 1.1
+    elif calificacion < 3.5:
+        base_ventas *= 0.8
+    if info_google.get('sitio_web'):
+        base_ventas *= 1.5
+        confianza = 'alta'
+    if info_google.get('tiene_fotos', False) and info_google.get('numero_fotos', 0) > 5:
+        base_ventas *= 1.2
+    if registro.get('ESTADO_CONTRIBUYENTE') == 'ACTIVO':
+        base_ventas *= 1.2
+    elif 'SUSPENDIDO' in str(registro.get('ESTADO_CONTRIBUYENTE', '')):
+        base_ventas *= 0.3
+
+    return {'venta_estimada_mensual': round(base_ventas, 2), 'venta_estimada_anual': round(base_ventas * 12, 2),
+            'confianza': confianza, 'razon': f'Basado en {num_resenas} reseñas, calificación {calificacion}'}
+
+
+def generar_resultados_google(filas: int, semilla: int = 11) -> list:
+    """Genera resultados de Google Places sintéticos (con y sin reseñas, web y fotos)."""
+    rng = random.Random(semilla)
+    resultados = []
+    for _ in range(filas):
+        if rng.random() < 0.2:
+            resultados.append(rng.choice([None, {}]))
+            continue
+        resultados.append({
+            'encontrado': True,
+            'calificacion': rng.choice([0, 3, 3.4, 3.5, 3.9, 4.0, 4.2, 4.5, 4.8, 5]),
+            'numero_resenas': rng.choice([0, 0, 3, 9, 10, 49, 50, 99, 100, 350]),
+            'sitio_web': rng.choice(['', 'https://ejemplo.ec']),
+            'tiene_fotos': rng.random() < 0.5,
+            'numero_fotos': rng.choice([0, 1, 8])
+        })
+    return resultados
+
+
+def estimar_ventas_con_iterrows(estimador, df: pd.DataFrame) -> pd.DataFrame:
+    """EstimadorVentasLibrerias.estimar_ventas fila por fila con las reglas originales (referencia)."""
+    df_resultado = df.copy()
+    clasificaciones = [clasificar_libreria_original(row) for _, row in df.iterrows()]
+    rangos = estimador.rangos_ventas
+
+    df_resultado['CLASIFICACION_TAMANO'] = clasificaciones
+    df_resultado['ESTIMACION_VENTAS_MENSUAL_USD'] = [rangos[c]['promedio'] for c in clasificaciones]
+    df_resultado['ESTIMACION_VENTAS_ANUAL_USD'] = [rangos[c]['promedio'] * 12 for c in clasificaciones]
+    df_resultado['ESTIMACION_MIN_MENSUAL_USD'] = [rangos[c]['min'] for c in clasificaciones]
+    df_resultado['ESTIMACION_MAX_MENSUAL_USD'] = [rangos[c]['max'] for c in clasificaciones]
+    return df_resultado
+
+
+def procesar_online_con_iterrows(estimador, df: pd.DataFrame) -> pd.DataFrame:
+    """EstimadorVentasOnline.procesar_librerias fila por fila con las reglas originales (referencia)."""
+    df_resultado = df.copy()
+    estimaciones = [estimar_por_indicadores_original(row) for _, row in df_resultado.iterrows()]
+
+    df_resultado['ESTIMACION_VENTA_MENSUAL_USD'] = [e['venta_estimada_mensual'] for e in estimaciones]
+    df_resultado['ESTIMACION_VENTA_ANUAL_USD'] = [e['venta_estimada_anual'] for e in estimaciones]
+    df_resultado['CONFIANZA_ESTIMACION'] = [e['confianza'] for e in estimaciones]
+    df_resultado['FACTORES_APLICADOS'] = [', '.join(e['factores_aplicados']) for e in estimaciones]
+
+    urls_google_maps = []
+    urls_google_busqueda = []
+    for _, row in df_resultado.iterrows():
+        nombre = str(row.get('RAZON_SOCIAL', ''))
+        fantasia = str(row.get('NOMBRE_FANTASIA_COMERCIAL', ''))
+        canton = str(row.get('DESCRIPCION_CANTON_EST', ''))
+        provincia = str(row.get('DESCRIPCION_PROVINCIA_EST', ''))
+        nombre_busqueda = fantasia if fantasia != 'N/A' and pd.notna(row.get('NOMBRE_FANTASIA_COMERCIAL')) else nombre
+        urls_google_maps.append(estimador.buscar_google_maps_url(nombre_busqueda, canton, provincia))
+        query = f"{nombre_busqueda} {canton} {provincia} librería"
+        urls_google_busqueda.append(f"https://www.google.com/search?q={query.replace(' ', '+')}")
+
+    df_resultado['URL_GOOGLE_MAPS'] = urls_google_maps
+    df_resultado['URL_GOOGLE_BUSQUEDA'] = urls_google_busqueda
+    return df_resultado
+
+
+def reportes_con_groupby(df: pd.DataFrame) -> dict:
+    """Agrupaciones de los reportes tal como se hacían antes del cubo (un recorrido cada una)."""
+    return {
+        'provincia': df.groupby('DESCRIPCION_PROVINCIA_EST', observed=True).agg({
+            'NUMERO_RUC': 'count', 'ESTIMACION_VENTA_MENSUAL': 'sum'}).round(2),
+        'canton': df.groupby('DESCRIPCION_CANTON_EST', observed=True).agg({
+            'NUMERO_RUC': 'count', 'ESTIMACION_VENTA_MENSUAL': 'sum'}).round(2),
+        'ciiu': df['CODIGO_CIIU'].value_counts(),
+        'estado': df['ESTADO_CONTRIBUYENTE'].value_counts()
+    }
+
+
+def reportes_con_cubo(cubo) -> dict:
+    """Las mismas agrupaciones leídas del cubo."""
+    return {
+        'provincia': cubo.por('provincia')[['cantidad', 'venta_mensual']].round(2),
+        'canton': cubo.por('canton')[['cantidad', 'venta_mensual']].round(2),
+        'ciiu': cubo.conteo('ciiu'),
+        'estado': cubo.conteo('estado')
+    }
+
+
+def marcadores_mapa(archivo_html: str) -> list:
+    """Lee la lista de marcadores de un mapa generado (de su datos.js, o del HTML si es anterior)."""
+    ruta_datos = os.path.join(directorio_datos(archivo_html), "datos.js")
+    if os.path.exists(ruta_datos):
+        with open(ruta_datos, 'r', encoding='utf-8') as f:
+            datos = f.read()
+        inicio = datos.index('const datosMapa = ') + len('const datosMapa = ')
+        marcadores = json.JSONDecoder().raw_decode(datos[inicio:])[0]['marcadores']
+        # Desde datos_columnares.py los marcadores van por columnas
+        return decodificar_registros(marcadores) if isinstance(marcadores, dict) else marcadores
+
+    with open(archivo_html, 'r', encoding='utf-8') as f:
+        html = f.read()
+    inicio = html.index('const marcadores = [') + len('const marcadores = ')
+    return json.JSONDecoder().raw_decode(html[inicio:])[0]
+
+
+def estado_archivos(directorio: str) -> dict:
+    """{ruta: (mtime_ns, tamaño)} de todos los archivos bajo un directorio."""
+    estado = {}
+    for raiz, _, nombres in os.walk(directorio):
+        for nombre in nombres:
+            ruta = os.path.join(raiz, nombre)
+            info = os.stat(ruta)
+            estado[ruta] = (info.st_mtime_ns, info.st_size)
+    return estado
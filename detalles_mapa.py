@@ -0,0 +1,59 @@
+"""
+Fragmentos de detalle de los mapas.
+El HTML del mapa solo lleva el índice liviano de marcadores; la lista completa de
+establecimientos de cada ubicación se guarda en un JSON aparte que la página
+descarga al hacer clic en el marcador. Al regenerar solo se reescriben los fragmentos
+que cambiaron.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List
+from urllib.parse import quote
+
+from plantillas_html import directorio_datos, escribir_si_cambio
+
+
+def directorio_detalles(archivo_html: str) -> str:
+    """Carpeta de los fragmentos de un mapa (p. ej. mapa_google_maps_filtrado_datos/)."""
+    return directorio_datos(archivo_html)
+
+
+def nombre_fragmento(clave: str) -> str:
+    """Nombre estable del fragmento de una ubicación (no cambia entre ejecuciones)."""
+    return hashlib.sha1(clave.encode('utf-8')).hexdigest()[:16] + ".json"
+
+
+def escribir_fragmentos(detalles: Dict[str, List[Dict]], archivo_html: str) -> Dict[str, str]:
+    """
+    Escribe un JSON por ubicación junto al HTML del mapa.
+
+    Los fragmentos de ubicaciones que ya no están en el mapa se eliminan, con sus versiones comprimidas.
+
+    Args:
+        detalles: {clave_ubicacion: [establecimientos]}
+        archivo_html: Ruta del HTML del mapa
+
+    Returns:
+        {clave_ubicacion: URL del fragmento relativa al HTML}
+    """
+    directorio = directorio_detalles(archivo_html)
+    os.makedirs(directorio, exist_ok=True)
+
+    urls = {}
+    escritos = set()
+    for clave, establecimientos in detalles.items():
+        nombre = nombre_fragmento(clave)
+        escribir_si_cambio(os.path.join(directorio, nombre),
+                           json.dumps(establecimientos, ensure_ascii=False, separators=(',', ':')))
+        escritos.add(nombre)
+        urls[clave] = f"{quote(os.path.basename(directorio))}/{nombre}"
+
+    # Con el fragmento viejo se van sus hermanos .gz/.br que crea servidor_local.py
+    for nombre in os.listdir(directorio):
+        fragmento = nombre[:-3] if nombre.endswith(('.json.gz', '.json.br')) else nombre
+        if fragmento.endswith('.json') and fragmento not in escritos:
+            os.remove(os.path.join(directorio, nombre))
+
+    return urls
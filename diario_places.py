@@ -0,0 +1,85 @@
+"""
+Diario (checkpoint) del enriquecimiento con Google Places.
+Cada resultado se agrega a un archivo JSONL apenas se obtiene, así una ejecución
+interrumpida se retoma sin repetir llamadas pagadas a la API.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+RUTA_DIARIO_DEFECTO = os.path.join("cache", "enriquecimiento_places.jsonl")
+
+
+class DiarioEnriquecimiento:
+    """Registro append-only (JSONL) de resultados de Google Places por establecimiento."""
+
+    def __init__(self, ruta: str = RUTA_DIARIO_DEFECTO):
+        """
+        Inicializa el diario y carga los resultados ya registrados.
+
+        Args:
+            ruta: Archivo JSONL del diario
+        """
+        self.ruta = ruta
+        self.registros = {}
+        self._lock = threading.Lock()
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self._cargar()
+        self._archivo = open(ruta, 'a', encoding='utf-8')
+
+    def _cargar(self):
+        """Lee el diario; una última línea incompleta (corte a mitad de escritura) se ignora."""
+        if not os.path.exists(self.ruta):
+            return
+
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                self.registros[registro['clave']] = registro
+
+        # Si el archivo no termina en salto de línea, la próxima escritura empieza limpia
+        if os.path.getsize(self.ruta) > 0:
+            with open(self.ruta, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+
+    def obtener(self, clave: str, consulta: Sequence[str]) -> Optional[Dict]:
+        """
+        Devuelve el registro de una clave si se buscó con la misma consulta.
+
+        Si el nombre o la ubicación cambiaron desde entonces, se considera pendiente.
+        """
+        registro = self.registros.get(clave)
+        if registro is None or registro['consulta'] != list(consulta):
+            return None
+        return registro
+
+    def registrar(self, clave: str, consulta: Sequence[str], resultado: Optional[Dict]):
+        """Agrega un resultado al diario y lo fuerza a disco."""
+        registro = {
+            'clave': clave,
+            'consulta': list(consulta),
+            'resultado': resultado,
+            'fecha': time.time()
+        }
+        with self._lock:
+            self._archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            self.registros[clave] = registro
+
+    def cerrar(self):
+        """Cierra el archivo del diario."""
+        with self._lock:
+            self._archivo.close()
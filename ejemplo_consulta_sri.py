@@ -5,14 +5,16 @@ para facilitar la consulta manual en el SRI
 
 import pandas as pd
 
+from consulta_ruc import FUENTES_ENRIQUECIMIENTO, AlmacenRUC, normalizar_ruc
+
 def generar_lista_consulta_sri():
     """Genera una lista de librerías activas para consultar en el SRI."""
     
-    # Cargar datos
-    df = pd.read_excel('librerias_detalle.xlsx')
-    
-    # Filtrar solo activas
-    activas = df[df['ESTADO_CONTRIBUYENTE'] == 'ACTIVO'].copy()
+    # Librerías activas desde el almacén de RUCs (solo se recarga el Excel de detalle si cambió)
+    almacen = AlmacenRUC()
+    almacen.cargar_fuente('detalle', FUENTES_ENRIQUECIMIENTO['detalle'])
+    activas = pd.DataFrame(almacen.listar(fuente='detalle', estado='ACTIVO', limite=None))
+    almacen.cerrar()
     
     # Ordenar por tamaño (si tienen estimaciones)
     if 'CLASIFICACION_TAMANO' in activas.columns:
@@ -30,7 +32,7 @@ def generar_lista_consulta_sri():
     lista_consulta = []
     
     for idx, (_, row) in enumerate(activas.iterrows(), 1):
-        ruc = str(row['NUMERO_RUC'])
+        ruc = normalizar_ruc(row['NUMERO_RUC'])
         nombre = str(row['RAZON_SOCIAL'])
         fantasia = str(row.get('NOMBRE_FANTASIA_COMERCIAL', 'N/A'))
         provincia = str(row['DESCRIPCION_PROVINCIA_EST'])
@@ -3,103 +3,57 @@ Estimador de Ventas para Librerías
 Proporciona estimaciones de ventas basadas en indicadores disponibles.
 """
 
+import numpy as np
 import pandas as pd
+import argparse
+import json
 import os
-from typing import Dict, List
+from typing import Dict
+
+from incremental_sri import imprimir_resumen, procesar_incremental
+from reglas_estimacion import RUTA_REGLAS_DEFECTO, ModeloEstimacion, cargar_seccion
 
 class EstimadorVentasLibrerias:
     """Estima ventas de librerías basándose en indicadores."""
     
-    def __init__(self):
+    def __init__(self, ruta_reglas: str = RUTA_REGLAS_DEFECTO):
+        """
+        Inicializa el estimador con las reglas del archivo de reglas.
+        
+        Args:
+            ruta_reglas: Archivo JSON/YAML de reglas (sección 'librerias')
+        """
         # Rangos de estimación basados en estudios del sector
-        # Estos son valores aproximados que pueden ajustarse
-        self.rangos_ventas = {
-            'pequena': {
-                'min': 5000,  # USD/mes
-                'max': 15000,
-                'promedio': 10000,
-                'descripcion': 'Librería pequeña (local pequeño, pocos empleados)'
-            },
-            'mediana': {
-                'min': 15000,
-                'max': 50000,
-                'promedio': 30000,
-                'descripcion': 'Librería mediana (local mediano, varios empleados)'
-            },
-            'grande': {
-                'min': 50000,
-                'max': 150000,
-                'promedio': 80000,
-                'descripcion': 'Librería grande (local grande, cadena, centro comercial)'
-            }
-        }
+        # Son valores aproximados que se ajustan en el archivo de reglas
+        seccion = cargar_seccion('librerias', ruta_reglas)
+        self.rangos_ventas = seccion['rangos']
+        self.modelo = ModeloEstimacion(seccion['reglas'], 'librerias')
     
     def clasificar_libreria(self, registro: pd.Series) -> str:
         """Clasifica una librería en pequeña, mediana o grande basándose en indicadores."""
-        # Indicadores que sugieren librería grande
-        indicadores_grande = 0
-        indicadores_mediana = 0
-        
-        # Agente de retención (indica mayor volumen de operaciones)
-        if pd.notna(registro.get('AGENTE_RETENCION')):
-            indicadores_grande += 2
-        
-        # Estado activo (operando actualmente)
-        estado = str(registro.get('ESTADO_CONTRIBUYENTE', '')).upper()
-        if 'ACTIVO' in estado:
-            indicadores_mediana += 1
-        elif 'SUSPENDIDO' in estado:
-            return 'pequena'  # Si está suspendida, probablemente pequeña o cerrada
-        
-        # Nombre fantasia (indica marca establecida)
-        if pd.notna(registro.get('NOMBRE_FANTASIA_COMERCIAL')):
-            indicadores_mediana += 1
-        
-        # Ubicación en cantones grandes (más población = más ventas potenciales)
-        canton = str(registro.get('DESCRIPCION_CANTON_EST', '')).upper()
-        cantones_grandes = ['MACHALA', 'GUAYAQUIL', 'QUITO', 'CUENCA', 'AMBATO']
-        if any(c in canton for c in cantones_grandes):
-            indicadores_grande += 1
-        
-        # Clasificación
-        if indicadores_grande >= 2:
-            return 'grande'
-        elif indicadores_mediana >= 1 or indicadores_grande >= 1:
-            return 'mediana'
-        else:
-            return 'pequena'
+        return self.clasificar_librerias(registro.to_frame().T)[0]
+    
+    def clasificar_librerias(self, df: pd.DataFrame) -> np.ndarray:
+        """Clasifica todas las librerías a la vez con las reglas compiladas."""
+        return self.modelo.evaluar(df)['tamano'].to_numpy(dtype=object)
     
     def estimar_ventas(self, df: pd.DataFrame) -> pd.DataFrame:
         """Agrega estimaciones de ventas al DataFrame."""
         df_resultado = df.copy()
         
-        # Clasificar cada librería
-        clasificaciones = []
-        estimaciones_mensuales = []
-        estimaciones_anuales = []
+        # Clasificar todas las librerías en una sola pasada
+        clasificaciones = pd.Series(self.clasificar_librerias(df), index=df.index).astype(str)
         
-        for idx, row in df.iterrows():
-            clasificacion = self.clasificar_libreria(row)
-            clasificaciones.append(clasificacion)
-            
-            rango = self.rangos_ventas[clasificacion]
-            estimaciones_mensuales.append(rango['promedio'])
-            estimaciones_anuales.append(rango['promedio'] * 12)
+        def valor_rango(campo: str) -> pd.Series:
+            return clasificaciones.map({tamano: rango[campo] for tamano, rango in self.rangos_ventas.items()})
         
         df_resultado['CLASIFICACION_TAMANO'] = clasificaciones
-        df_resultado['ESTIMACION_VENTAS_MENSUAL_USD'] = estimaciones_mensuales
-        df_resultado['ESTIMACION_VENTAS_ANUAL_USD'] = estimaciones_anuales
+        df_resultado['ESTIMACION_VENTAS_MENSUAL_USD'] = valor_rango('promedio')
+        df_resultado['ESTIMACION_VENTAS_ANUAL_USD'] = valor_rango('promedio') * 12
         
         # Agregar rangos
-        rangos_min_mensual = []
-        rangos_max_mensual = []
-        for clasif in clasificaciones:
-            rango = self.rangos_ventas[clasif]
-            rangos_min_mensual.append(rango['min'])
-            rangos_max_mensual.append(rango['max'])
-        
-        df_resultado['ESTIMACION_MIN_MENSUAL_USD'] = rangos_min_mensual
-        df_resultado['ESTIMACION_MAX_MENSUAL_USD'] = rangos_max_mensual
+        df_resultado['ESTIMACION_MIN_MENSUAL_USD'] = valor_rango('min')
+        df_resultado['ESTIMACION_MAX_MENSUAL_USD'] = valor_rango('max')
         
         return df_resultado
     
@@ -139,9 +93,22 @@ class EstimadorVentasLibrerias:
         
         return resumen
     
-    def exportar_con_estimaciones(self, df: pd.DataFrame, archivo_salida: str = "librerias_con_estimaciones.xlsx"):
-        """Exporta los datos con estimaciones de ventas."""
-        df_con_estimaciones = self.estimar_ventas(df)
+    def exportar_con_estimaciones(self, df: pd.DataFrame, archivo_salida: str = "librerias_con_estimaciones.xlsx",
+                                  incremental: bool = False):
+        """
+        Exporta los datos con estimaciones de ventas.
+        
+        Con incremental=True solo se estiman las filas nuevas o modificadas desde la
+        ejecución anterior; si cambian las reglas o los rangos de ventas se recalcula todo.
+        """
+        if incremental:
+            df_con_estimaciones, resumen = procesar_incremental(
+                df, "estimacion_librerias", self.estimar_ventas,
+                contexto=json.dumps(self.rangos_ventas, sort_keys=True) + self.modelo.huella
+            )
+            imprimir_resumen(resumen, "Librerías")
+        else:
+            df_con_estimaciones = self.estimar_ventas(df)
         
         # Ordenar por estimación de ventas (mayor a menor)
         df_con_estimaciones = df_con_estimaciones.sort_values(
@@ -156,6 +123,12 @@ class EstimadorVentasLibrerias:
 
 def main():
     """Función principal."""
+    parser = argparse.ArgumentParser(description="Estima ventas de las librerías de librerias_detalle.xlsx")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Estimar solo las librerías nuevas o modificadas desde la ejecución anterior")
+    parser.add_argument('--reglas', default=RUTA_REGLAS_DEFECTO, help="Archivo JSON/YAML de reglas de estimación")
+    args = parser.parse_args()
+    
     print("\n" + "="*70)
     print("💰 ESTIMADOR DE VENTAS PARA LIBRERÍAS")
     print("="*70)
@@ -173,9 +146,9 @@ def main():
     print(f"   Total de librerías: {len(df):,}")
     
     # Estimar ventas
-    estimador = EstimadorVentasLibrerias()
+    estimador = EstimadorVentasLibrerias(args.reglas)
     print("\n📊 Generando estimaciones de ventas...")
-    df_con_estimaciones = estimador.exportar_con_estimaciones(df)
+    df_con_estimaciones = estimador.exportar_con_estimaciones(df, incremental=args.incremental)
     
     # Generar resumen
     print("\n📈 Generando resumen de estimaciones...")
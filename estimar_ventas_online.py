@@ -6,48 +6,26 @@ y calcula estimaciones basadas en indicadores online.
 
 import pandas as pd
 import os
-from typing import Dict, List
-import time
+from typing import Dict
+
+from reglas_estimacion import RUTA_REGLAS_DEFECTO, ModeloEstimacion, cargar_seccion
 
 class EstimadorVentasOnline:
     """Estima ventas basándose en información online disponible."""
     
-    def __init__(self):
-        # Factores de estimación basados en indicadores online
-        self.factores = {
-            'reseñas_google': {
-                'sin_resenas': 0.5,  # Multiplicador si no hay reseñas
-                'pocas_1_10': 1.0,    # 1-10 reseñas
-                'moderadas_11_50': 1.5,  # 11-50 reseñas
-                'muchas_51_100': 2.0,    # 51-100 reseñas
-                'muy_muchas_100+': 3.0   # 100+ reseñas
-            },
-            'presencia_online': {
-                'sin_web': 0.8,
-                'con_web': 1.5,
-                'con_redes_sociales': 2.0,
-                'con_ecommerce': 2.5
-            },
-            'ubicacion': {
-                'centro_comercial': 2.0,
-                'zona_comercial': 1.5,
-                'zona_residencial': 1.0,
-                'zona_remota': 0.7
-            },
-            'antiguedad': {
-                'nueva_0_2': 0.8,      # 0-2 años
-                'joven_3_5': 1.0,      # 3-5 años
-                'establecida_6_10': 1.3,  # 6-10 años
-                'antigua_10+': 1.5     # 10+ años
-            }
-        }
+    def __init__(self, ruta_reglas: str = RUTA_REGLAS_DEFECTO):
+        """
+        Inicializa el estimador con las reglas del archivo de reglas.
+        
+        Args:
+            ruta_reglas: Archivo JSON/YAML de reglas (sección 'online')
+        """
+        seccion = cargar_seccion('online', ruta_reglas)
+        self.modelo = ModeloEstimacion(seccion['reglas'], 'online')
         
         # Base de estimación por tamaño (en USD/mes)
-        self.base_ventas = {
-            'pequena': 8000,
-            'mediana': 25000,
-            'grande': 60000
-        }
+        base = seccion['reglas']['base']
+        self.base_ventas = dict(base.get('valores', {}))
     
     def buscar_google_maps_url(self, nombre: str, canton: str, provincia: str) -> str:
         """Genera URL de búsqueda en Google Maps."""
@@ -57,112 +35,53 @@ class EstimadorVentasOnline:
     
     def estimar_por_indicadores(self, registro: pd.Series) -> Dict:
         """Estima ventas basándose en indicadores disponibles."""
-        estimacion = {
-            'base': 0,
-            'factores_aplicados': [],
-            'multiplicador_total': 1.0,
-            'venta_estimada_mensual': 0,
-            'venta_estimada_anual': 0,
-            'confianza': 'baja'  # baja, media, alta
+        fila = self.modelo.evaluar(registro.to_frame().T).iloc[0]
+        factores = fila['factores_aplicados']
+        return {
+            'base': fila['base'],
+            'factores_aplicados': factores.split(', ') if factores else [],
+            'multiplicador_total': fila['multiplicador'],
+            'venta_estimada_mensual': fila['venta_estimada_mensual'],
+            'venta_estimada_anual': fila['venta_estimada_anual'],
+            'confianza': fila['confianza']
         }
-        
-        # Determinar tamaño base
-        if 'CLASIFICACION_TAMANO' in registro.index:
-            tamano = registro['CLASIFICACION_TAMANO']
-        else:
-            # Clasificar por indicadores
-            if pd.notna(registro.get('AGENTE_RETENCION')):
-                tamano = 'grande'
-            elif registro.get('ESTADO_CONTRIBUYENTE') == 'ACTIVO':
-                tamano = 'mediana'
-            else:
-                tamano = 'pequena'
-        
-        estimacion['base'] = self.base_ventas.get(tamano, 8000)
-        
-        # Factor 1: Agente de retención
-        if pd.notna(registro.get('AGENTE_RETENCION')):
-            estimacion['multiplicador_total'] *= 1.5
-            estimacion['factores_aplicados'].append('Agente de retención (+50%)')
-        
-        # Factor 2: Estado activo
-        if registro.get('ESTADO_CONTRIBUYENTE') == 'ACTIVO':
-            estimacion['multiplicador_total'] *= 1.2
-            estimacion['factores_aplicados'].append('Estado activo (+20%)')
-        elif 'SUSPENDIDO' in str(registro.get('ESTADO_CONTRIBUYENTE', '')):
-            estimacion['multiplicador_total'] *= 0.3
-            estimacion['factores_aplicados'].append('Estado suspendido (-70%)')
-        
-        # Factor 3: Ubicación (cantones grandes)
-        canton = str(registro.get('DESCRIPCION_CANTON_EST', '')).upper()
-        cantones_grandes = ['MACHALA', 'GUAYAQUIL', 'QUITO', 'CUENCA', 'AMBATO', 'SALINAS']
-        if any(c in canton for c in cantones_grandes):
-            estimacion['multiplicador_total'] *= 1.3
-            estimacion['factores_aplicados'].append(f'Cantón grande ({canton}) (+30%)')
-        
-        # Factor 4: Antigüedad (si hay fecha de inicio)
-        if 'FECHA_INICIO_ACTIVIDADES' in registro.index and pd.notna(registro.get('FECHA_INICIO_ACTIVIDADES')):
-            try:
-                from datetime import datetime
-                fecha_inicio = pd.to_datetime(registro['FECHA_INICIO_ACTIVIDADES'])
-                años_operacion = (datetime.now() - fecha_inicio).days / 365
-                
-                if años_operacion >= 10:
-                    estimacion['multiplicador_total'] *= 1.3
-                    estimacion['factores_aplicados'].append(f'Antigüedad {años_operacion:.1f} años (+30%)')
-                elif años_operacion >= 5:
-                    estimacion['multiplicador_total'] *= 1.1
-                    estimacion['factores_aplicados'].append(f'Antigüedad {años_operacion:.1f} años (+10%)')
-            except:
-                pass
-        
-        # Factor 5: Nombre fantasia (marca establecida)
-        if pd.notna(registro.get('NOMBRE_FANTASIA_COMERCIAL')):
-            estimacion['multiplicador_total'] *= 1.2
-            estimacion['factores_aplicados'].append('Nombre fantasia (+20%)')
-        
-        # Calcular venta estimada
-        estimacion['venta_estimada_mensual'] = estimacion['base'] * estimacion['multiplicador_total']
-        estimacion['venta_estimada_anual'] = estimacion['venta_estimada_mensual'] * 12
-        
-        # Determinar confianza
-        num_factores = len(estimacion['factores_aplicados'])
-        if num_factores >= 4:
-            estimacion['confianza'] = 'alta'
-        elif num_factores >= 2:
-            estimacion['confianza'] = 'media'
-        else:
-            estimacion['confianza'] = 'baja'
-        
-        return estimacion
+    
+    def estimar_indicadores(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Estima todas las librerías a la vez con las reglas compiladas.
+        
+        Returns:
+            DataFrame (mismo índice que df) con venta_estimada_mensual, venta_estimada_anual,
+            confianza y factores_aplicados (texto separado por comas)
+        """
+        resultado = self.modelo.evaluar(df)
+        return resultado[['venta_estimada_mensual', 'venta_estimada_anual', 'confianza', 'factores_aplicados']]
     
     def generar_urls_busqueda(self, df: pd.DataFrame) -> pd.DataFrame:
         """Genera URLs de búsqueda para cada librería."""
         df_resultado = df.copy()
         
-        urls_google_maps = []
-        urls_google_busqueda = []
+        def texto(columna: str) -> pd.Series:
+            if columna not in df.columns:
+                return pd.Series('', index=df.index)
+            return df[columna].astype(object).map(str)
+        
+        nombre = texto('RAZON_SOCIAL')
+        fantasia = texto('NOMBRE_FANTASIA_COMERCIAL')
+        canton = texto('DESCRIPCION_CANTON_EST')
+        provincia = texto('DESCRIPCION_PROVINCIA_EST')
+        
+        # Usar nombre fantasia si existe, sino razón social
+        tiene_fantasia = (fantasia != 'N/A') & df.get('NOMBRE_FANTASIA_COMERCIAL', pd.Series(None, index=df.index)).notna()
+        nombre_busqueda = fantasia.where(tiene_fantasia, nombre)
         
-        for idx, row in df.iterrows():
-            nombre = str(row.get('RAZON_SOCIAL', ''))
-            fantasia = str(row.get('NOMBRE_FANTASIA_COMERCIAL', ''))
-            canton = str(row.get('DESCRIPCION_CANTON_EST', ''))
-            provincia = str(row.get('DESCRIPCION_PROVINCIA_EST', ''))
-            
-            # Usar nombre fantasia si existe, sino razón social
-            nombre_busqueda = fantasia if fantasia != 'N/A' and pd.notna(row.get('NOMBRE_FANTASIA_COMERCIAL')) else nombre
-            
-            # URL Google Maps
-            url_maps = self.buscar_google_maps_url(nombre_busqueda, canton, provincia)
-            urls_google_maps.append(url_maps)
-            
-            # URL Google Búsqueda
-            query = f"{nombre_busqueda} {canton} {provincia} librería"
-            url_google = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-            urls_google_busqueda.append(url_google)
+        # URL Google Maps
+        consulta_maps = (nombre_busqueda + ' ' + canton + ' ' + provincia + ' Ecuador').str.replace(' ', '+', regex=False)
+        df_resultado['URL_GOOGLE_MAPS'] = ('https://www.google.com/maps/search/?api=1&query=' + consulta_maps).tolist()
         
-        df_resultado['URL_GOOGLE_MAPS'] = urls_google_maps
-        df_resultado['URL_GOOGLE_BUSQUEDA'] = urls_google_busqueda
+        # URL Google Búsqueda
+        consulta = (nombre_busqueda + ' ' + canton + ' ' + provincia + ' librería').str.replace(' ', '+', regex=False)
+        df_resultado['URL_GOOGLE_BUSQUEDA'] = ('https://www.google.com/search?q=' + consulta).tolist()
         
         return df_resultado
     
@@ -172,17 +91,14 @@ class EstimadorVentasOnline:
         
         df_resultado = df.copy()
         
-        # Generar estimaciones
-        estimaciones = []
-        for idx, row in df_resultado.iterrows():
-            estimacion = self.estimar_por_indicadores(row)
-            estimaciones.append(estimacion)
+        # Generar estimaciones (todas las filas en una sola pasada)
+        estimaciones = self.estimar_indicadores(df_resultado)
         
         # Agregar columnas de estimación
-        df_resultado['ESTIMACION_VENTA_MENSUAL_USD'] = [e['venta_estimada_mensual'] for e in estimaciones]
-        df_resultado['ESTIMACION_VENTA_ANUAL_USD'] = [e['venta_estimada_anual'] for e in estimaciones]
-        df_resultado['CONFIANZA_ESTIMACION'] = [e['confianza'] for e in estimaciones]
-        df_resultado['FACTORES_APLICADOS'] = [', '.join(e['factores_aplicados']) for e in estimaciones]
+        df_resultado['ESTIMACION_VENTA_MENSUAL_USD'] = estimaciones['venta_estimada_mensual']
+        df_resultado['ESTIMACION_VENTA_ANUAL_USD'] = estimaciones['venta_estimada_anual']
+        df_resultado['CONFIANZA_ESTIMACION'] = estimaciones['confianza'].tolist()
+        df_resultado['FACTORES_APLICADOS'] = estimaciones['factores_aplicados'].tolist()
         
         # Generar URLs de búsqueda
         df_resultado = self.generar_urls_busqueda(df_resultado)
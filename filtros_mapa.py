@@ -0,0 +1,96 @@
+"""
+Índices de filtros del mapa filtrado.
+El generador precalcula conjuntos de bits por provincia, código CIIU y estado, más
+los conteos agregados, para que cada clic en un filtro sea un AND/OR de bits y las
+estadísticas una suma de unos pocos totales, sin recorrer marcadores ni establecimientos.
+"""
+
+import base64
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from datos_columnares import codificar_registros
+
+# Estados con los que se filtra la tabla de detalle (cualquier otro valor cuenta como N/A)
+ESTADOS_TABLA = ['ACTIVO', 'PASIVO', 'SUSPENDIDO', 'N/A']
+
+
+def categoria_estado(estado) -> str:
+    """Categoría de filtro de un estado del contribuyente (ACTIVO, PASIVO, SUSPENDIDO o N/A)."""
+    estado_upper = str(estado or '').upper().strip()
+    if 'SUSPENDIDO' in estado_upper:
+        return 'SUSPENDIDO'
+    if estado_upper in ('ACTIVO', 'PASIVO'):
+        return estado_upper
+    return 'N/A'
+
+
+def clase_estado(estado: str) -> str:
+    """Sufijo de la clase CSS que oculta las filas de un estado (ocultar-N_A, ocultar-ACTIVO...)."""
+    return ''.join(c if c.isalnum() else '_' for c in estado)
+
+
+def codificar_bits(indices: Iterable[int], total: int) -> str:
+    """Conjunto de bits (palabras uint32 little-endian) en base64; el bit i marca el elemento i."""
+    palabras = np.zeros((total + 31) // 32, dtype='<u4')
+    posiciones = np.fromiter(indices, dtype=np.int64)
+    np.bitwise_or.at(palabras, posiciones >> 5, (np.uint32(1) << (posiciones & 31).astype(np.uint32)))
+    return base64.b64encode(palabras.tobytes()).decode('ascii')
+
+
+def _bits_por_valor(pares: Iterable[Tuple[int, str]], total: int) -> Dict[str, str]:
+    """{valor: bits de los elementos con ese valor} a partir de pares (elemento, valor)."""
+    grupos = defaultdict(list)
+    for indice, valor in pares:
+        grupos[valor].append(indice)
+    return {valor: codificar_bits(indices, total) for valor, indices in sorted(grupos.items())}
+
+
+def construir_indice_filtros(marcadores: List[Dict]) -> Dict:
+    """
+    Índice de los filtros de provincia y CIIU sobre las ubicaciones del mapa.
+
+    Args:
+        marcadores: Marcadores del mapa con 'provincia' y 'conteo_ciiu'
+
+    Returns:
+        {'total': ubicaciones, 'provincias': {provincia: bits}, 'ciiu': {codigo: bits},
+         'establecimientos': {provincia: {codigo: establecimientos}}}
+    """
+    total = len(marcadores)
+    establecimientos = defaultdict(lambda: defaultdict(int))
+    for marcador in marcadores:
+        for codigo, cantidad in marcador['conteo_ciiu'].items():
+            establecimientos[str(marcador['provincia'])][codigo] += cantidad
+
+    return {
+        'total': total,
+        'provincias': _bits_por_valor(
+            ((i, str(m['provincia'])) for i, m in enumerate(marcadores)), total),
+        'ciiu': _bits_por_valor(
+            ((i, codigo) for i, m in enumerate(marcadores) for codigo in m['conteo_ciiu']), total),
+        'establecimientos': {provincia: dict(conteo) for provincia, conteo in sorted(establecimientos.items())}
+    }
+
+
+def construir_detalle(establecimientos: List[Dict]) -> Dict:
+    """
+    Fragmento de detalle de una ubicación con su índice de estados.
+
+    Los bits por CIIU de las filas no se guardan: dentro de una ubicación los códigos
+    son dispersos y la página los arma una sola vez al descargar el fragmento.
+
+    Args:
+        establecimientos: Filas de la tabla ('codigo_ciiu', 'estado', ...)
+
+    Returns:
+        {'establecimientos': filas por columnas (datos_columnares.py), 'estados': {estado: bits}}
+    """
+    total = len(establecimientos)
+    estados = [categoria_estado(est['estado']) for est in establecimientos]
+    return {
+        'establecimientos': codificar_registros(establecimientos),
+        'estados': _bits_por_valor(enumerate(estados), total)
+    }
@@ -4,10 +4,24 @@ Filtra los datos de Excel antes de generar el mapa.
 """
 
 import pandas as pd
-import json
 import os
+import threading
+from collections import Counter
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+
+from cache_geocodificacion import CacheGeocodificacion, normalizar_clave
+from clusters_mapa import construir_indice_clusters
+from datos_columnares import codificar_registros
+from detalles_mapa import directorio_detalles, escribir_fragmentos
+from filtros_mapa import ESTADOS_TABLA, clase_estado, construir_detalle, construir_indice_filtros
+from geocodificacion_lote import (HILOS_DEFECTO, QPS_DEFECTO, consulta_geocodificacion, geocodificar_lote,
+                                  imprimir_resumen)
+from ingesta_sri import COLUMNAS_MAPA, leer_excel_filtrado
+from limitador_tasa import LimitadorTasa
+from nomenclator_ecuador import NomenclatorEcuador
+from normalizacion_sri import normalizar_texto
+from plantillas_html import cargar_plantilla, escribir_pagina, imprimir_escritura, leer_archivo_plantilla
+from ubicaciones_sri import agrupar_por_ubicacion
 
 # Intentar importar Google Maps para geocodificación
 try:
@@ -21,7 +35,10 @@ except ImportError:
 class GeneradorMapaFiltrado:
     """Genera mapa filtrando por códigos CIIU y/o provincias."""
     
-    def __init__(self, google_api_key: Optional[str] = None, codigos_ciiu: List[str] = None, provincias: List[str] = None):
+    def __init__(self, google_api_key: Optional[str] = None, codigos_ciiu: List[str] = None, provincias: List[str] = None,
+                 cache_geocodificacion: Optional[CacheGeocodificacion] = None, qps: float = QPS_DEFECTO,
+                 hilos: int = HILOS_DEFECTO, base_url: Optional[str] = None,
+                 nomenclator: Optional[NomenclatorEcuador] = None):
         """
         Inicializa el generador.
         
@@ -29,53 +46,97 @@ class GeneradorMapaFiltrado:
             google_api_key: API key de Google Maps
             codigos_ciiu: Lista de códigos CIIU para filtrar (opcional)
             provincias: Lista de provincias para filtrar (opcional)
+            cache_geocodificacion: Cache persistente de coordenadas (opcional, se crea uno por defecto)
+            qps: Consultas por segundo a la Geocoding API entre todos los hilos
+            hilos: Consultas simultáneas al geocodificar en lote
+            base_url: Servidor alternativo (p. ej. servidor_places_falso.py para pruebas)
+            nomenclator: Nomenclátor local de provincias/cantones/parroquias (opcional, se carga
+                el incluido en el repositorio)
         """
         self.google_api_key = google_api_key
         self.google_client = None
-        self.cache_coordenadas = {}
+        self.cache_coordenadas = cache_geocodificacion or CacheGeocodificacion()
+        self.nomenclator = nomenclator if nomenclator is not None else NomenclatorEcuador()
+        self.limitador = LimitadorTasa(qps)
+        self.hilos = hilos
+        self.llamadas_api = 0
+        self._lock_contadores = threading.Lock()
         self.codigos_ciiu = codigos_ciiu or []
         self.provincias = provincias or []
         
         if google_api_key and GOOGLE_MAPS_AVAILABLE:
             try:
-                self.google_client = googlemaps.Client(key=google_api_key)
+                opciones = {'base_url': base_url} if base_url else {}
+                # El ritmo de las consultas lo maneja self.limitador
+                self.google_client = googlemaps.Client(key=google_api_key, queries_per_second=1000, **opciones)
                 print("✅ Google Maps API configurada")
             except Exception as e:
                 print(f"⚠️  Error al configurar Google Maps: {str(e)}")
     
     def geocodificar_ubicacion(self, provincia: str = None, canton: str = None, parroquia: str = None) -> Optional[Tuple[float, float]]:
         """Geocodifica usando Google Maps API con Parroquia + Cantón + Provincia para mayor precisión."""
-        if not self.google_client:
+        # Clave normalizada 'parroquia|canton|provincia' compartida con generar_mapa_google.py
+        clave = normalizar_clave(provincia, canton, parroquia)
+        if not clave:
             return None
         
-        # Crear clave de cache incluyendo parroquia si está disponible
-        clave = f"{parroquia or ''}|{canton or ''}|{provincia or ''}".strip('|')
-        if not clave or clave in self.cache_coordenadas:
-            return self.cache_coordenadas.get(clave)
+        # Primero el nomenclátor local (sin red), luego el cache y por último la API
+        coords = self.nomenclator.resolver(provincia, canton, parroquia) or self.cache_coordenadas.obtener(clave)
+        if not coords and self.google_client and not self.cache_coordenadas.sin_resultado(clave):
+            coords = self.consultar_api(provincia, canton, parroquia)
+        
+        return coords or self.nomenclator.aproximar(provincia, canton, parroquia)
+    
+    def consultar_api(self, provincia: str = None, canton: str = None, parroquia: str = None) -> Optional[Tuple[float, float]]:
+        """Consulta la Geocoding API (sin mirar el cache) y guarda el resultado, o que no lo hubo; seguro entre hilos."""
+        # Construir query con parroquia si está disponible para mayor precisión
+        query = consulta_geocodificacion(provincia, canton, parroquia)
+        if not query or not self.google_client:
+            return None
         
         try:
-            # Construir query con parroquia si está disponible para mayor precisión
-            if parroquia and canton and provincia:
-                query = f"{parroquia}, {canton}, {provincia}, Ecuador"
-            elif canton and provincia:
-                query = f"{canton}, {provincia}, Ecuador"
-            elif provincia:
-                query = f"{provincia}, Ecuador"
-            else:
-                return None
-                
+            self.limitador.adquirir()
+            with self._lock_contadores:
+                self.llamadas_api += 1
             result = self.google_client.geocode(query)
             
             if result and len(result) > 0:
                 location = result[0]['geometry']['location']
                 coords = (location['lat'], location['lng'])
-                self.cache_coordenadas[clave] = coords
+                self.cache_coordenadas.guardar(normalizar_clave(provincia, canton, parroquia), coords, consulta=query)
                 return coords
+            # La API respondió sin resultados: no volver a consultarla hasta que venza
+            self.cache_coordenadas.guardar_sin_resultado(normalizar_clave(provincia, canton, parroquia), consulta=query)
         except Exception:
+            # Errores de red o de cuota no se recuerdan: se reintenta en la próxima corrida
             pass
         
         return None
     
+    def geocodificar_lote(self, ubicaciones: List[Dict]) -> Dict:
+        """
+        Completa latitud/longitud de muchas ubicaciones (de uno o varios archivos) en un solo lote.
+        
+        Cada clave única se busca una vez en el nomenclátor local y en el cache, y solo las
+        que faltan se consultan a la API, en paralelo.
+        
+        Returns:
+            Resumen de geocodificar_lote (llamadas hechas y ahorradas)
+        """
+        coordenadas, resumen = geocodificar_lote(
+            ((u.get('provincia'), u.get('canton'), u.get('parroquia')) for u in ubicaciones),
+            self.cache_coordenadas,
+            self.consultar_api if self.google_client else None,
+            hilos=self.hilos,
+            nomenclator=self.nomenclator
+        )
+        for ubicacion in ubicaciones:
+            coords = coordenadas.get(normalizar_clave(ubicacion.get('provincia'), ubicacion.get('canton'),
+                                                      ubicacion.get('parroquia')))
+            ubicacion['latitud'] = coords[0] if coords else None
+            ubicacion['longitud'] = coords[1] if coords else None
+        return resumen
+    
     def filtrar_excel(self, archivo_excel: str, codigos_ciiu: List[str] = None, provincias: List[str] = None, estados: List[str] = None) -> pd.DataFrame:
         """
         Lee y filtra un archivo Excel por códigos CIIU y/o provincias.
@@ -84,51 +145,39 @@ class GeneradorMapaFiltrado:
             archivo_excel: Ruta al archivo Excel
             codigos_ciiu: Lista de códigos CIIU a filtrar (opcional)
             provincias: Lista de provincias a filtrar (opcional)
+            estados: Lista de estados del contribuyente a filtrar (opcional)
             
         Returns:
             DataFrame filtrado
         """
         try:
             print(f"\n📄 Leyendo: {os.path.basename(archivo_excel)}")
-            df = pd.read_excel(archivo_excel)
-            
-            print(f"   Total de filas antes del filtro: {len(df):,}")
-            
-            # Detectar columna de provincia
-            col_provincia = next((col for col in df.columns if 'provincia' in col.lower()), None)
-            
-            # Aplicar filtros
-            df_filtrado = df.copy()
-            
-            # Filtrar por códigos CIIU si se especifican
-            if codigos_ciiu:
-                if 'CODIGO_CIIU' not in df.columns:
-                    print(f"   ⚠️  No se encontró la columna CODIGO_CIIU")
-                    return pd.DataFrame()
-                df_filtrado = df_filtrado[df_filtrado['CODIGO_CIIU'].isin(codigos_ciiu)]
-                print(f"   Después de filtrar por CIIU: {len(df_filtrado):,} filas")
             
-            # Filtrar por provincias si se especifican
-            if provincias and col_provincia:
-                # Normalizar nombres de provincias (mayúsculas, sin espacios extra)
-                provincias_normalizadas = [p.upper().strip() for p in provincias]
-                df_filtrado = df_filtrado[
-                    df_filtrado[col_provincia].str.upper().str.strip().isin(provincias_normalizadas)
-                ]
-                print(f"   Después de filtrar por provincia: {len(df_filtrado):,} filas")
-            
-            # Filtrar por estados si se especifican
-            if estados:
-                col_estado = next((col for col in df_filtrado.columns if 'estado_contribuyente' in col.lower()), None)
-                if col_estado:
-                    estados_normalizados = [e.upper().strip() for e in estados]
-                    df_filtrado = df_filtrado[
-                        df_filtrado[col_estado].astype(str).str.upper().str.strip().isin(estados_normalizados)
-                    ]
-                    print(f"   Después de filtrar por estado: {len(df_filtrado):,} filas")
+            # Los filtros se aplican mientras se lee: solo se materializan las filas que cumplen
+            try:
+                df_filtrado, conteos = leer_excel_filtrado(
+                    archivo_excel,
+                    codigos_ciiu=codigos_ciiu,
+                    provincias=provincias,
+                    estados=estados,
+                    columnas=COLUMNAS_MAPA
+                )
+            except ValueError as e:
+                print(f"   ⚠️  {str(e)}")
+                return pd.DataFrame()
+            
+            print(f"   Total de filas antes del filtro: {conteos['total']:,}")
+            if 'ciiu' in conteos:
+                print(f"   Después de filtrar por CIIU: {conteos['ciiu']:,} filas")
+            if 'provincia' in conteos:
+                print(f"   Después de filtrar por provincia: {conteos['provincia']:,} filas")
+            if 'estado' in conteos:
+                print(f"   Después de filtrar por estado: {conteos['estado']:,} filas")
             
             print(f"   ✅ Filas después de todos los filtros: {len(df_filtrado):,}")
             
+            col_provincia = next((col for col in df_filtrado.columns if 'provincia' in col.lower()), None)
+            
             # Mostrar distribución por código CIIU si hay filtro
             if codigos_ciiu and len(df_filtrado) > 0 and 'CODIGO_CIIU' in df_filtrado.columns:
                 print(f"\n   Distribución por código CIIU:")
@@ -149,83 +198,40 @@ class GeneradorMapaFiltrado:
             print(f"   ❌ Error al leer archivo: {str(e)}")
             return pd.DataFrame()
     
-    def procesar_datos_filtrados(self, df: pd.DataFrame) -> List[Dict]:
-        """Procesa datos filtrados y agrupa por ubicación."""
+    def procesar_datos_filtrados(self, df: pd.DataFrame, geocodificar: bool = True) -> List[Dict]:
+        """
+        Procesa datos filtrados y agrupa por ubicación.
+        
+        Args:
+            df: Filas filtradas de un archivo
+            geocodificar: False para dejar las coordenadas vacías y resolverlas después con
+                geocodificar_lote junto con las de los demás archivos
+        """
         if df.empty:
             return []
         
-        # Detectar columnas
-        col_ruc = next((col for col in df.columns if 'ruc' in col.lower()), None)
-        col_nombre = next((col for col in df.columns if any(x in col.lower() for x in ['razon', 'nombre'])), None)
-        col_provincia = next((col for col in df.columns if 'provincia' in col.lower()), None)
-        col_canton = next((col for col in df.columns if 'canton' in col.lower()), None)
-        col_parroquia = next((col for col in df.columns if 'parroquia' in col.lower()), None)
-        col_ciiu = next((col for col in df.columns if 'ciiu' in col.lower()), None)
-        col_actividad = next((col for col in df.columns if 'actividad' in col.lower()), None)
-        col_estado = next((col for col in df.columns if 'estado_contribuyente' in col.lower()), None)
-        
         # Agrupar por ubicación (usando parroquia si está disponible para mayor precisión)
-        grupos = defaultdict(list)
-        
-        for idx, row in df.iterrows():
-            provincia = str(row[col_provincia]).strip() if col_provincia and not pd.isna(row[col_provincia]) else None
-            canton = str(row[col_canton]).strip() if col_canton and not pd.isna(row[col_canton]) else None
-            parroquia = str(row[col_parroquia]).strip() if col_parroquia and not pd.isna(row[col_parroquia]) else None
-            
-            # Crear clave de agrupación: usar parroquia si está disponible para mayor precisión
-            if parroquia and canton and provincia:
-                clave = f"{parroquia}, {canton}, {provincia}"
-            elif canton and provincia:
-                clave = f"{canton}, {provincia}"
-            elif provincia:
-                clave = provincia
-            else:
-                continue
-            
-            grupos[clave].append({
-                'ruc': str(row[col_ruc]) if col_ruc and not pd.isna(row[col_ruc]) else None,
-                'nombre': str(row[col_nombre]) if col_nombre and not pd.isna(row[col_nombre]) else None,
-                'provincia': provincia,
-                'canton': canton,
-                'parroquia': parroquia,
-                'codigo_ciiu': str(row[col_ciiu]) if col_ciiu and not pd.isna(row[col_ciiu]) else None,
-                'actividad': str(row[col_actividad]) if col_actividad and not pd.isna(row[col_actividad]) else None,
-                'estado': str(row[col_estado]).strip() if col_estado and not pd.isna(row[col_estado]) else None
-            })
+        grupos = agrupar_por_ubicacion(df)
         
         print(f"\n   Ubicaciones únicas encontradas: {len(grupos)}")
         
-        # Geocodificar cada ubicación única
         ubicaciones = []
-        total = len(grupos)
-        
-        for i, (clave, establecimientos) in enumerate(grupos.items(), 1):
-            if i % 10 == 0 or i == 1:
-                print(f"   Geocodificando {i}/{total}: {clave}")
-            
-            provincia = establecimientos[0].get('provincia')
-            canton = establecimientos[0].get('canton')
-            parroquia = establecimientos[0].get('parroquia')
-            
-            # Geocodificar usando parroquia si está disponible para mayor precisión
-            coordenadas = self.geocodificar_ubicacion(provincia, canton, parroquia)
-            
+        for clave, establecimientos in grupos.items():
             ubicaciones.append({
                 'ubicacion': clave,
-                'provincia': provincia,
-                'canton': canton,
-                'parroquia': parroquia,
-                    'latitud': coordenadas[0] if coordenadas else None,
-                    'longitud': coordenadas[1] if coordenadas else None,
-                    'cantidad': len(establecimientos),
-                    'establecimientos': establecimientos[:10],  # Solo primeros 10 para el popup
-                    'establecimientos_todos': establecimientos,  # TODOS para la tabla
-                    'codigos_ciiu': list(set([e.get('codigo_ciiu') for e in establecimientos if e.get('codigo_ciiu')]))
-                })
-            
-            if self.google_client:
-                import time
-                time.sleep(0.1)
+                'provincia': establecimientos[0].get('provincia'),
+                'canton': establecimientos[0].get('canton'),
+                'parroquia': establecimientos[0].get('parroquia'),
+                'latitud': None,
+                'longitud': None,
+                'cantidad': len(establecimientos),
+                'establecimientos': establecimientos[:10],  # Solo primeros 10 para el popup
+                'establecimientos_todos': establecimientos,  # TODOS para la tabla
+                'codigos_ciiu': list(set([e.get('codigo_ciiu') for e in establecimientos if e.get('codigo_ciiu')]))
+            })
+        
+        if geocodificar:
+            imprimir_resumen(self.geocodificar_lote(ubicaciones))
         
         return ubicaciones
     
@@ -247,8 +253,9 @@ class GeneradorMapaFiltrado:
         lat_centro = sum(u['latitud'] for u in ubicaciones_validas) / len(ubicaciones_validas)
         lon_centro = sum(u['longitud'] for u in ubicaciones_validas) / len(ubicaciones_validas)
         
-        # Preparar datos para JavaScript
+        # Preparar datos para JavaScript: el índice va en la página y el detalle en fragmentos JSON
         marcadores_js = []
+        detalles = {}
         for ubicacion in ubicaciones_validas:
             establecimientos_texto = '<br>'.join([
                 f"• {est.get('nombre', est.get('ruc', 'N/A'))}" 
@@ -273,8 +280,6 @@ class GeneradorMapaFiltrado:
                 color = '#00FF00'
                 icon_url = 'http://maps.google.com/mapfiles/ms/icons/green-dot.png'
             
-            codigos_texto = ', '.join(ubicacion.get('codigos_ciiu', []))
-            
             # Preparar datos completos de establecimientos para la tabla (TODOS los establecimientos)
             establecimientos_completos = []
             # Usar establecimientos_todos si existe, sino usar todos los disponibles
@@ -298,12 +303,12 @@ class GeneradorMapaFiltrado:
                     'estado': estado_display
                 })
             
-            # Obtener códigos CIIU únicos de esta ubicación
-            codigos_ciiu_unicos = list(set([
-                est.get('codigo_ciiu') 
-                for est in establecimientos_para_tabla 
-                if est.get('codigo_ciiu') and est.get('codigo_ciiu') != 'N/A'
-            ]))
+            # Conteo por CIIU: alimenta filtros, popup y estadísticas sin descargar el detalle
+            conteo_ciiu = Counter(est['codigo_ciiu'] or '' for est in establecimientos_completos)
+            
+            # Ubicaciones con la misma clave (p. ej. de dos archivos) van en fragmentos distintos
+            clave_detalle = f"{ubicacion['ubicacion']}#{len(detalles)}"
+            detalles[clave_detalle] = construir_detalle(establecimientos_completos)
             
             marcadores_js.append({
                 'lat': ubicacion['latitud'],
@@ -313,14 +318,24 @@ class GeneradorMapaFiltrado:
                 'provincia': ubicacion.get('provincia', 'N/A'),
                 'canton': ubicacion.get('canton', 'N/A'),
                 'parroquia': ubicacion.get('parroquia'),  # Parroquia si está disponible
-                'codigos_ciiu': codigos_texto,
-                'codigos_ciiu_lista': codigos_ciiu_unicos,  # Lista para filtrar
                 'establecimientos': establecimientos_texto,
-                'establecimientos_completos': establecimientos_completos,
+                'conteo_ciiu': dict(sorted(conteo_ciiu.items())),
+                'detalle': clave_detalle,
                 'color': color,
                 'icon_url': icon_url
             })
         
+        urls_detalle = escribir_fragmentos(detalles, archivo_salida)
+        for marcador in marcadores_js:
+            marcador['detalle'] = urls_detalle[marcador['detalle']]
+        
+        indice_clusters = construir_indice_clusters(marcadores_js)
+        indice_filtros = construir_indice_filtros(marcadores_js)
+        css_estados_ocultos = ',\n'.join(
+            f'.tabla-establecimientos.ocultar-{clase_estado(estado)} tbody tr[data-estado="{estado}"]'
+            for estado in ESTADOS_TABLA
+        )
+        
         # Obtener lista única de provincias
         provincias_disponibles = sorted(list(set([u.get('provincia') for u in ubicaciones_validas if u.get('provincia')])))
         
@@ -335,968 +350,86 @@ class GeneradorMapaFiltrado:
         # Obtener lista única de códigos CIIU de todos los marcadores
         codigos_ciiu_disponibles = set()
         for marcador in marcadores_js:
-            for codigo in marcador.get('codigos_ciiu_lista', []):
-                codigos_ciiu_disponibles.add(codigo)
+            for codigo in marcador['conteo_ciiu']:
+                if codigo and codigo != 'N/A':
+                    codigos_ciiu_disponibles.add(codigo)
         codigos_ciiu_disponibles = sorted(list(codigos_ciiu_disponibles))
         
-        # Obtener lista única de estados de todos los establecimientos
-        estados_disponibles = set()
-        for ubicacion in ubicaciones_validas:
-            for est in ubicacion.get('establecimientos_todos', ubicacion.get('establecimientos', [])):
-                estado = est.get('estado')
-                if estado and estado != 'N/A':
-                    # Normalizar estado
-                    estado_upper = estado.upper().strip()
-                    if 'SUSPENDIDO' in estado_upper:
-                        estados_disponibles.add('SUSPENDIDO')
-                    elif estado_upper == 'ACTIVO' or estado_upper == 'PASIVO':
-                        estados_disponibles.add(estado_upper)
-                    else:
-                        estados_disponibles.add(estado)
-        estados_disponibles = sorted(list(estados_disponibles))
-        
-        # Generar HTML del filtro de CIIU
-        html_filtro_ciiu = ''
-        if codigos_ciiu_disponibles:
-            ciiu_checkboxes = []
-            for codigo in codigos_ciiu_disponibles:
-                if codigo in descripciones_ciiu:
-                    descripcion = descripciones_ciiu[codigo]
-                    descripcion_corta = descripcion[:50] + '...' if len(descripcion) > 50 else descripcion
-                    ciiu_checkboxes.append(f'''
-                <div class="checkbox-provincia activa" data-ciiu="{codigo}" title="{descripcion}" style="min-width: 200px; max-width: 280px;">
-                    <input type="checkbox" id="ciiu_{codigo}" checked onchange="aplicarFiltros()">
-                    <label for="ciiu_{codigo}"><strong>{codigo}</strong><span style="font-size: 11px; opacity: 0.9; display: block; margin-top: 2px;">{descripcion_corta}</span></label>
-                </div>''')
-            html_filtro_ciiu = f'''
-        <div class="filtro-izquierda" style="margin-top: 10px; padding-top: 10px; border-top: 1px solid rgba(255,255,255,0.2);">
-            <h3 style="color: white; margin: 0 0 8px 0; font-size: 13px;">📋 Códigos CIIU:</h3>
-            <div class="filtro-provincias">
-                {''.join(ciiu_checkboxes)}
-            </div>
-        </div>'''
-        
-        # Generar HTML
-        html_template = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Mapa de Establecimientos - Filtrado por CIIU</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            margin: 0;
-            padding: 0;
-            overflow-x: hidden;
-        }}
-        
-        #header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 15px 20px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            flex-wrap: wrap;
-            position: sticky;
-            top: 0;
-            z-index: 100;
-        }}
-        
-        #header h1 {{
-            font-size: 20px;
-            margin: 0;
-            margin-right: 20px;
-        }}
-        
-        #header p {{
-            font-size: 12px;
-            opacity: 0.9;
-            margin: 0;
-        }}
-        
-        #map {{
-            width: 100%;
-            height: 70vh;
-            min-height: 500px;
-        }}
-        
-        .info-window {{
-            max-width: 300px;
-            max-height: 400px;
-            overflow-y: auto;
-        }}
-        
-        .info-window h3 {{
-            margin: 0 0 10px 0;
-            color: #333;
-            font-size: 18px;
-        }}
-        
-        .info-window p {{
-            margin: 5px 0;
-            color: #666;
-            font-size: 14px;
-        }}
-        
-        .info-window hr {{
-            margin: 10px 0;
-            border: none;
-            border-top: 1px solid #eee;
-        }}
-        
-        .info-window .establecimientos {{
-            margin-top: 10px;
-            font-size: 13px;
-        }}
-        
-        #stats {{
-            background: white;
-            padding: 15px 20px;
-            border-top: 1px solid #eee;
-            display: flex;
-            justify-content: space-around;
-            flex-wrap: wrap;
-            box-shadow: 0 -2px 10px rgba(0,0,0,0.05);
-        }}
-        
-        .stat-item {{
-            text-align: center;
-            margin: 5px 15px;
-        }}
-        
-        .stat-item .number {{
-            font-size: 24px;
-            font-weight: bold;
-            color: #667eea;
-        }}
-        
-        .stat-item .label {{
-            font-size: 12px;
-            color: #666;
-            text-transform: uppercase;
-        }}
-        
-        #tabla-detalle {{
-            background: white;
-            padding: 0;
-            border-top: 3px solid #667eea;
-            max-height: 0;
-            overflow: hidden;
-            transition: max-height 0.4s ease-in-out, padding 0.4s ease-in-out;
-            box-shadow: 0 -2px 10px rgba(0,0,0,0.1);
-            width: 100%;
-        }}
-        
-        #tabla-detalle.visible {{
-            max-height: none;
-            padding: 20px;
-            overflow-y: visible;
-        }}
-        
-        #contenido-tabla {{
-            max-height: 60vh;
-            overflow-y: auto;
-        }}
-        
-        #tabla-detalle h3 {{
-            margin: 0 0 15px 0;
-            color: #333;
-            font-size: 18px;
-        }}
-        
-        #tabla-detalle .info-ubicacion {{
-            background: #f5f5f5;
-            padding: 15px;
-            border-radius: 5px;
-            margin-bottom: 15px;
-        }}
-        
-        #tabla-detalle .info-ubicacion p {{
-            margin: 5px 0;
-            color: #666;
-        }}
-        
-        .tabla-establecimientos {{
-            width: 100%;
-            border-collapse: collapse;
-            font-size: 13px;
-        }}
-        
-        .tabla-establecimientos thead {{
-            background: #667eea;
-            color: white;
-            position: sticky;
-            top: 0;
-            z-index: 10;
-        }}
-        
-        .tabla-establecimientos th {{
-            padding: 12px;
-            text-align: left;
-            font-weight: 600;
-        }}
-        
-        .tabla-establecimientos td {{
-            padding: 10px 12px;
-            border-bottom: 1px solid #eee;
-        }}
-        
-        .tabla-establecimientos tbody tr:hover {{
-            background: #f9f9f9;
-        }}
-        
-        .tabla-establecimientos tbody tr:nth-child(even) {{
-            background: #fafafa;
-        }}
-        
-        .cerrar-tabla {{
-            float: right;
-            background: #dc3545;
-            color: white;
-            border: none;
-            padding: 8px 15px;
-            border-radius: 5px;
-            cursor: pointer;
-            font-size: 14px;
-            margin-bottom: 15px;
-        }}
-        
-        .cerrar-tabla:hover {{
-            background: #c82333;
-        }}
-        
-        .tabla-header {{
-            margin-bottom: 15px;
-            padding-bottom: 15px;
-            border-bottom: 2px solid #eee;
-        }}
-        
-        .tabla-header h3 {{
-            margin: 0;
-            color: #333;
-            font-size: 18px;
-        }}
-        
-        .filtro-estado-tabla {{
-            margin-bottom: 15px;
-            padding: 12px;
-            background: #f8f9fa;
-            border-radius: 5px;
-            border: 1px solid #dee2e6;
-        }}
-        
-        .filtro-estado-tabla h4 {{
-            margin: 0 0 10px 0;
-            font-size: 14px;
-            color: #495057;
-            font-weight: 600;
-        }}
-        
-        .filtro-estado-opciones {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-            align-items: center;
-        }}
-        
-        .checkbox-estado-tabla {{
-            display: flex;
-            align-items: center;
-            gap: 6px;
-            padding: 6px 12px;
-            background: white;
-            border: 1px solid #ced4da;
-            border-radius: 4px;
-            cursor: pointer;
-            transition: all 0.2s;
-        }}
-        
-        .checkbox-estado-tabla:hover {{
-            border-color: #667eea;
-            background: #f0f4ff;
-        }}
-        
-        .checkbox-estado-tabla input[type="checkbox"] {{
-            cursor: pointer;
-            margin: 0;
-        }}
-        
-        .checkbox-estado-tabla label {{
-            cursor: pointer;
-            margin: 0;
-            font-size: 13px;
-            color: #495057;
-            user-select: none;
-        }}
-        
-        .checkbox-estado-tabla.activa {{
-            background: #667eea;
-            border-color: #667eea;
-            color: white;
-        }}
-        
-        .checkbox-estado-tabla.activa label {{
-            color: white;
-        }}
-        
-        .tabla-establecimientos tbody tr.filtrado-oculto {{
-            display: none;
-        }}
-        
-        #filtros {{
-            background: white;
-            padding: 10px 20px;
-            border-bottom: 1px solid #eee;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            flex-wrap: wrap;
-            gap: 10px;
-        }}
-        
-        .filtro-izquierda {{
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            flex-wrap: wrap;
-        }}
-        
-        .filtro-izquierda h3 {{
-            margin: 0;
-            font-size: 14px;
-            color: #333;
-            font-weight: 600;
-        }}
-        
-        .filtro-provincias {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 8px;
-            align-items: center;
-        }}
-        
-        .checkbox-provincia {{
-            display: flex;
-            align-items: center;
-            padding: 6px 12px;
-            background: #f5f5f5;
-            border-radius: 20px;
-            cursor: pointer;
-            transition: all 0.3s;
-            border: 2px solid transparent;
-        }}
-        
-        .checkbox-provincia:hover {{
-            background: #e8e8e8;
-        }}
-        
-        .checkbox-provincia input[type="checkbox"] {{
-            margin-right: 6px;
-            cursor: pointer;
-            width: 16px;
-            height: 16px;
-        }}
-        
-        .checkbox-provincia label {{
-            cursor: pointer;
-            font-size: 13px;
-            color: #333;
-            margin: 0;
-            line-height: 1.4;
-        }}
-        
-        .checkbox-provincia label strong {{
-            display: block;
-            margin-bottom: 2px;
-        }}
-        
-        .checkbox-provincia label span {{
-            display: block;
-            font-weight: normal;
-            font-size: 11px;
-        }}
-        
-        .checkbox-provincia.activa {{
-            background: #667eea;
-            color: white;
-            border-color: #667eea;
-        }}
-        
-        .checkbox-provincia.activa label {{
-            color: white;
-        }}
-        
-        .botones-filtro {{
-            display: flex;
-            gap: 8px;
-        }}
-        
-        .btn-filtro {{
-            padding: 6px 15px;
-            background: #667eea;
-            color: white;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-            font-size: 12px;
-            transition: background 0.3s;
-            white-space: nowrap;
-        }}
-        
-        .btn-filtro:hover {{
-            background: #5568d3;
-        }}
-        
-        .btn-filtro:active {{
-            background: #4457c2;
-        }}
-    </style>
-</head>
-<body>
-    <div id="header">
-        <div>
-            <h1>📍 Mapa de Establecimientos - Filtrado</h1>
-            <p>
-                {f"Códigos CIIU: {', '.join(self.codigos_ciiu)}" if self.codigos_ciiu else "Códigos CIIU: Todos"}
-            </p>
-        </div>
-        <div id="filtros">
-            <div class="filtro-izquierda">
-                <h3>🔍 Provincias:</h3>
-                <div class="filtro-provincias">
-                    {''.join([f'''
-                    <div class="checkbox-provincia activa" data-provincia="{prov}">
-                        <input type="checkbox" id="prov_{prov.replace(' ', '_')}" checked onchange="aplicarFiltros()">
-                        <label for="prov_{prov.replace(' ', '_')}">{prov}</label>
-                    </div>''' for prov in provincias_disponibles])}
-                </div>
-            </div>
-            <div class="botones-filtro">
-                <button class="btn-filtro" onclick="seleccionarTodas()">✅ Todas</button>
-                <button class="btn-filtro" onclick="deseleccionarTodas()">❌ Ninguna</button>
-            </div>
-        </div>
-        {html_filtro_ciiu}
-    </div>
-    
-    <div id="map"></div>
-    
-    <div id="stats">
-        <div class="stat-item">
-            <div class="number">{len(ubicaciones_validas)}</div>
-            <div class="label">Ubicaciones</div>
-        </div>
-        <div class="stat-item">
-            <div class="number">{sum(u['cantidad'] for u in ubicaciones_validas):,}</div>
-            <div class="label">Establecimientos</div>
-        </div>
-    </div>
-    
-    <div id="tabla-detalle">
-        <button class="cerrar-tabla" onclick="cerrarTabla()" title="Cerrar tabla">✕</button>
-        <div class="tabla-header">
-            <h3 id="titulo-tabla">Detalle de Establecimientos</h3>
-        </div>
-        <div id="contenido-tabla"></div>
-    </div>
-    
-    <script>
-        let map;
-        let todosLosMarcadores = [];
-        let marcadoresVisibles = [];
-        let marcadorTablaActual = null; // Guardar referencia al marcador de la tabla abierta
-        const provinciasDisponibles = {json.dumps(provincias_disponibles)};
-        
-        function initMap() {{
-            const centro = {{ lat: {lat_centro}, lng: {lon_centro} }};
-            
-            map = new google.maps.Map(document.getElementById('map'), {{
-                zoom: 7,
-                center: centro,
-                mapTypeId: 'roadmap'
-            }});
-            
-            const marcadores = {json.dumps(marcadores_js)};
-            
-            // Crear todos los marcadores
-            marcadores.forEach(marcador => {{
-                const marker = new google.maps.Marker({{
-                    position: {{ lat: marcador.lat, lng: marcador.lng }},
-                    map: map,
-                    title: marcador.titulo + ' (' + marcador.cantidad.toLocaleString() + ' establecimientos)',
-                    icon: {{
-                        url: marcador.icon_url,
-                        scaledSize: new google.maps.Size(32, 32)
-                    }},
-                    provincia: marcador.provincia,
-                    codigos_ciiu_lista: marcador.codigos_ciiu_lista || [],
-                    titulo: marcador.titulo,
-                    cantidad: marcador.cantidad,
-                    canton: marcador.canton,
-                    parroquia: marcador.parroquia || null,
-                    codigos_ciiu: marcador.codigos_ciiu,
-                    establecimientos: marcador.establecimientos,
-                    establecimientos_completos: marcador.establecimientos_completos
-                }});
-                
-                const infoWindow = new google.maps.InfoWindow({{
-                    content: `
-                        <div class="info-window">
-                            <h3>${{marcador.titulo}}</h3>
-                            <p><strong>📍 Establecimientos:</strong> ${{marcador.cantidad.toLocaleString()}}</p>
-                            <p><strong>Provincia:</strong> ${{marcador.provincia}}</p>
-                            <p><strong>Cantón:</strong> ${{marcador.canton}}</p>
-                            ${{marcador.parroquia ? `<p><strong>Parroquia:</strong> ${{marcador.parroquia}}</p>` : ''}}
-                            <p><strong>Códigos CIIU:</strong> ${{marcador.codigos_ciiu}}</p>
-                            <hr>
-                            <p><strong>Ejemplos:</strong></p>
-                            <div class="establecimientos">${{marcador.establecimientos}}</div>
-                        </div>
-                    `
-                }});
-                
-                marker.addListener('click', () => {{
-                    infoWindow.open(map, marker);
-                    mostrarTablaDetalle(marcador);
-                }});
-                
-                todosLosMarcadores.push(marker);
-                marcadoresVisibles.push(marker);
-            }});
-            
-            actualizarEstadisticas();
-        }}
-        
-        function aplicarFiltros() {{
-            // Obtener provincias seleccionadas
-            const provinciasSeleccionadas = [];
-            provinciasDisponibles.forEach(prov => {{
-                const checkbox = document.getElementById('prov_' + prov.replace(' ', '_'));
-                const div = checkbox.closest('.checkbox-provincia');
-                if (checkbox && checkbox.checked) {{
-                    provinciasSeleccionadas.push(prov);
-                    div.classList.add('activa');
-                }} else if (div) {{
-                    div.classList.remove('activa');
-                }}
-            }});
-            
-            // Obtener códigos CIIU seleccionados
-            const codigosCIIUSeleccionados = [];
-            const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
-            checkboxesCIIU.forEach(checkbox => {{
-                const div = checkbox.closest('.checkbox-provincia');
-                if (checkbox.checked) {{
-                    const codigo = div.getAttribute('data-ciiu');
-                    codigosCIIUSeleccionados.push(codigo);
-                    div.classList.add('activa');
-                }} else if (div) {{
-                    div.classList.remove('activa');
-                }}
-            }});
-            
-            // Ocultar todos los marcadores primero
-            todosLosMarcadores.forEach(marker => {{
-                marker.setMap(null);
-            }});
-            
-            // Mostrar solo los que cumplen los filtros
-            marcadoresVisibles = [];
-            todosLosMarcadores.forEach(marker => {{
-                // Verificar provincia
-                const provinciaVisible = provinciasSeleccionadas.length === 0 || provinciasSeleccionadas.includes(marker.provincia);
-                
-                // Verificar CIIU
-                // Si no hay códigos CIIU seleccionados, no mostrar nada
-                let ciiuVisible = false;
-                if (codigosCIIUSeleccionados.length > 0) {{
-                    const codigosMarcador = marker.codigos_ciiu_lista || [];
-                    // Verificar si el marcador tiene al menos uno de los códigos CIIU seleccionados
-                    ciiuVisible = codigosMarcador.some(codigo => codigosCIIUSeleccionados.includes(codigo));
-                }}
-                
-                if (provinciaVisible && ciiuVisible) {{
-                    marker.setMap(map);
-                    marcadoresVisibles.push(marker);
-                }}
-            }});
-            
-            actualizarEstadisticas();
-            
-            // Si hay una tabla abierta, actualizarla con los nuevos filtros
-            if (marcadorTablaActual) {{
-                mostrarTablaDetalle(marcadorTablaActual);
-            }}
-        }}
-        
-        function seleccionarTodas() {{
-            provinciasDisponibles.forEach(prov => {{
-                const checkbox = document.getElementById('prov_' + prov.replace(' ', '_'));
-                if (checkbox && !checkbox.checked) {{
-                    checkbox.checked = true;
-                }}
-            }});
-            
-            // Seleccionar todos los CIIU también
-            const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
-            checkboxesCIIU.forEach(checkbox => {{
-                if (!checkbox.checked) {{
-                    checkbox.checked = true;
-                }}
-            }});
-            
-            aplicarFiltros();
-        }}
-        
-        function deseleccionarTodas() {{
-            provinciasDisponibles.forEach(prov => {{
-                const checkbox = document.getElementById('prov_' + prov.replace(' ', '_'));
-                if (checkbox && checkbox.checked) {{
-                    checkbox.checked = false;
-                }}
-            }});
-            
-            // Deseleccionar todos los CIIU también
-            const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
-            checkboxesCIIU.forEach(checkbox => {{
-                if (checkbox.checked) {{
-                    checkbox.checked = false;
-                }}
-            }});
-            
-            aplicarFiltros();
-        }}
-        
-        function actualizarEstadisticas() {{
-            // Obtener códigos CIIU seleccionados
-            const codigosCIIUSeleccionados = [];
-            const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
-            checkboxesCIIU.forEach(checkbox => {{
-                if (checkbox.checked) {{
-                    const div = checkbox.closest('.checkbox-provincia');
-                    const codigo = div.getAttribute('data-ciiu');
-                    codigosCIIUSeleccionados.push(codigo);
-                }}
-            }});
-            
-            // Contar ubicaciones (marcadores visibles)
-            const ubicaciones = marcadoresVisibles.length;
-            
-            // Contar establecimientos que coinciden con los códigos CIIU seleccionados
-            let establecimientos = 0;
-            marcadoresVisibles.forEach(marker => {{
-                const establecimientosCompletos = marker.establecimientos_completos || [];
-                if (codigosCIIUSeleccionados.length > 0) {{
-                    // Filtrar establecimientos por código CIIU seleccionado
-                    const establecimientosFiltrados = establecimientosCompletos.filter(est => {{
-                        const codigoCIIU = est.codigo_ciiu || '';
-                        return codigosCIIUSeleccionados.includes(codigoCIIU);
-                    }});
-                    establecimientos += establecimientosFiltrados.length;
-                }} else {{
-                    // Si no hay códigos seleccionados, no contar nada
-                    establecimientos += 0;
-                }}
-            }});
-            
-            document.querySelector('.stat-item .number').textContent = ubicaciones;
-            document.querySelectorAll('.stat-item .number')[1].textContent = establecimientos.toLocaleString();
-        }}
-        
-        function mostrarTablaDetalle(marcador) {{
-            // Guardar referencia al marcador actual
-            marcadorTablaActual = marcador;
-            
-            const tablaDetalle = document.getElementById('tabla-detalle');
-            const tituloTabla = document.getElementById('titulo-tabla');
-            const contenidoTabla = document.getElementById('contenido-tabla');
-            
-            tituloTabla.textContent = `Detalle de Establecimientos - ${{marcador.titulo}}`;
-            
-            // Obtener códigos CIIU seleccionados del header
-            const codigosCIIUSeleccionados = [];
-            const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
-            checkboxesCIIU.forEach(checkbox => {{
-                if (checkbox.checked) {{
-                    const div = checkbox.closest('.checkbox-provincia');
-                    const codigo = div.getAttribute('data-ciiu');
-                    codigosCIIUSeleccionados.push(codigo);
-                }}
-            }});
-            
-            // Filtrar establecimientos por código CIIU seleccionado
-            let establecimientosParaMostrar = marcador.establecimientos_completos || [];
-            if (codigosCIIUSeleccionados.length > 0) {{
-                establecimientosParaMostrar = establecimientosParaMostrar.filter(est => {{
-                    const codigoCIIU = est.codigo_ciiu || '';
-                    return codigosCIIUSeleccionados.includes(codigoCIIU);
-                }});
-            }} else {{
-                // Si no hay códigos seleccionados, no mostrar nada
-                establecimientosParaMostrar = [];
-            }}
-            
-            // Obtener estados únicos de los establecimientos filtrados
-            const estadosEnTabla = new Set();
-            establecimientosParaMostrar.forEach(est => {{
-                const estado = est.estado || 'N/A';
-                if (estado !== 'N/A') {{
-                    const estadoUpper = estado.toUpperCase().trim();
-                    if (estadoUpper.includes('SUSPENDIDO')) {{
-                        estadosEnTabla.add('SUSPENDIDO');
-                    }} else if (estadoUpper === 'ACTIVO' || estadoUpper === 'PASIVO') {{
-                        estadosEnTabla.add(estadoUpper);
-                    }} else {{
-                        estadosEnTabla.add(estado);
-                    }}
-                }} else {{
-                    estadosEnTabla.add('N/A');
-                }}
-            }});
-            
-            const estadosArray = Array.from(estadosEnTabla).sort();
-            
-            // Generar HTML del filtro de estado
-            let filtroEstadosHtml = '';
-            if (estadosArray.length > 0) {{
-                const checkboxesEstados = estadosArray.map(estado => {{
-                    const estadoId = estado.replace(/[^a-zA-Z0-9]/g, '_');
-                    return `
-                        <div class="checkbox-estado-tabla activa" data-estado-tabla="${{estado}}">
-                            <input type="checkbox" id="filtro_estado_${{estadoId}}" checked onchange="filtrarTablaPorEstado()">
-                            <label for="filtro_estado_${{estadoId}}">${{estado}}</label>
-                        </div>`;
-                }}).join('');
-                
-                filtroEstadosHtml = `
-                <div class="filtro-estado-tabla">
-                    <h4>🔍 Filtrar por Estado:</h4>
-                    <div class="filtro-estado-opciones">
-                        ${{checkboxesEstados}}
-                    </div>
-                </div>`;
-            }}
-            
-            // Guardar el total original y el filtrado
-            const totalOriginal = marcador.cantidad;
-            const totalFiltrado = establecimientosParaMostrar.length;
-            const mostrarFiltrado = codigosCIIUSeleccionados.length > 0 && totalFiltrado < totalOriginal;
-            
-            // Obtener códigos CIIU únicos de los establecimientos filtrados
-            const codigosCIIUFiltrados = [...new Set(establecimientosParaMostrar.map(est => est.codigo_ciiu).filter(c => c && c !== 'N/A'))].join(', ');
-            
-            let html = `
-                <div class="info-ubicacion">
-                    <p><strong>📍 Ubicación:</strong> ${{marcador.titulo}}</p>
-                    <p><strong>Provincia:</strong> ${{marcador.provincia}}</p>
-                    <p><strong>Cantón:</strong> ${{marcador.canton}}</p>
-                    ${{marcador.parroquia ? `<p><strong>Parroquia:</strong> ${{marcador.parroquia}}</p>` : ''}}
-                    <p><strong>Total Establecimientos:</strong> <span id="contador-establecimientos">${{totalFiltrado.toLocaleString()}}</span>${{mostrarFiltrado ? ` <span id="contador-filtrado" style="color: #667eea; font-weight: normal;">(de ${{totalOriginal.toLocaleString()}} total)</span>` : ''}}</p>
-                    <p><strong>Códigos CIIU:</strong> ${{codigosCIIUFiltrados || marcador.codigos_ciiu}}</p>
-                </div>
-                ${{filtroEstadosHtml}}
-                <table class="tabla-establecimientos">
-                    <thead>
-                        <tr>
-                            <th>RUC</th>
-                            <th>Nombre / Razón Social</th>
-                            <th>Código CIIU</th>
-                            <th>Estado</th>
-                            <th>Actividad Económica</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-            `;
-            
-            establecimientosParaMostrar.forEach(est => {{
-                // Determinar color del estado
-                const estado = est.estado || 'N/A';
-                let estadoClass = '';
-                let estadoColor = '#666';
-                let estadoNormalizado = estado;
-                
-                // Normalizar estado para el filtro
-                const estadoUpper = estado.toUpperCase().trim();
-                if (estadoUpper.includes('SUSPENDIDO')) {{
-                    estadoClass = 'estado-suspendido';
-                    estadoColor = '#dc3545';
-                    estadoNormalizado = 'SUSPENDIDO';
-                }} else if (estadoUpper === 'ACTIVO' || estadoUpper === 'PASIVO') {{
-                    estadoClass = 'estado-activo';
-                    estadoColor = '#28a745';
-                    estadoNormalizado = estadoUpper;
-                }} else {{
-                    estadoNormalizado = 'N/A';
-                }}
-                
-                html += `
-                    <tr data-estado="${{estadoNormalizado}}">
-                        <td>${{est.ruc}}</td>
-                        <td>${{est.nombre}}</td>
-                        <td>${{est.codigo_ciiu}}</td>
-                        <td style="color: ${{estadoColor}}; font-weight: 600;">${{estado}}</td>
-                        <td>${{est.actividad}}</td>
-                    </tr>
-                `;
-            }});
-            
-            html += `
-                    </tbody>
-                </table>
-            `;
-            
-            contenidoTabla.innerHTML = html;
-            tablaDetalle.classList.add('visible');
-            
-            // Aplicar filtro inicial
-            filtrarTablaPorEstado();
-        }}
-        
-        function filtrarTablaPorEstado() {{
-            // Obtener estados seleccionados
-            const checkboxes = document.querySelectorAll('.checkbox-estado-tabla input[type="checkbox"]');
-            const estadosSeleccionados = [];
-            
-            checkboxes.forEach(checkbox => {{
-                const div = checkbox.closest('.checkbox-estado-tabla');
-                if (checkbox.checked) {{
-                    estadosSeleccionados.push(div.getAttribute('data-estado-tabla'));
-                    div.classList.add('activa');
-                }} else {{
-                    div.classList.remove('activa');
-                }}
-            }});
-            
-            // Filtrar filas de la tabla
-            const filas = document.querySelectorAll('.tabla-establecimientos tbody tr');
-            let filasVisibles = 0;
-            
-            filas.forEach(fila => {{
-                const estadoFila = fila.getAttribute('data-estado');
-                if (estadosSeleccionados.includes(estadoFila)) {{
-                    fila.classList.remove('filtrado-oculto');
-                    filasVisibles++;
-                }} else {{
-                    fila.classList.add('filtrado-oculto');
-                }}
-            }});
-            
-            // Actualizar contador de establecimientos visibles
-            const contadorEstablecimientos = document.getElementById('contador-establecimientos');
-            const contadorFiltrado = document.getElementById('contador-filtrado');
-            const infoUbicacion = document.querySelector('.info-ubicacion');
-            
-            if (contadorEstablecimientos && infoUbicacion) {{
-                // Obtener el total original del texto
-                const totalP = infoUbicacion.querySelector('p:nth-child(4)');
-                if (totalP) {{
-                    // Extraer el número original si existe un atributo data-total
-                    // Si no, usar el número de filas totales
-                    const totalFilas = document.querySelectorAll('.tabla-establecimientos tbody tr').length;
-                    
-                    // Actualizar el contador con el número de filas visibles
-                    contadorEstablecimientos.textContent = filasVisibles.toLocaleString();
-                    
-                    // Mostrar información adicional si hay filtro activo
-                    if (filasVisibles < totalFilas) {{
-                        contadorFiltrado.textContent = `(de ${{totalFilas.toLocaleString()}} total)`;
-                        contadorFiltrado.style.display = 'inline';
-                    }} else {{
-                        contadorFiltrado.textContent = '';
-                        contadorFiltrado.style.display = 'none';
-                    }}
-                }}
-            }}
-        }}
-        
-        function cerrarTabla() {{
-            const tablaDetalle = document.getElementById('tabla-detalle');
-            tablaDetalle.classList.remove('visible');
-            marcadorTablaActual = null; // Limpiar referencia
-        }}
-        
-        // Función global para llamar desde el popup
-        window.mostrarTablaDetalle = mostrarTablaDetalle;
-        window.filtrarTablaPorEstado = filtrarTablaPorEstado;
-    </script>
-    
-    <script async defer
-        src="https://maps.googleapis.com/maps/api/js?key={self.google_api_key}&callback=initMap">
-    </script>
-</body>
-</html>
-"""
-        
-        with open(archivo_salida, 'w', encoding='utf-8') as f:
-            f.write(html_template)
+        # Casillas de CIIU (las de los códigos con descripción conocida; plantillas/mapa_filtrado.html)
+        ciiu_disponibles = [{'codigo': codigo, 'descripcion': descripciones_ciiu[codigo]}
+                            for codigo in codigos_ciiu_disponibles if codigo in descripciones_ciiu]
+        
+        # Página (plantillas/mapa_filtrado.*), recursos compartidos y datos por separado
+        css_pagina = cargar_plantilla('mapa_filtrado.css').renderizar(selectores_estados_ocultos=css_estados_ocultos)
+        escritos = escribir_pagina(
+            archivo_salida, 'mapa_filtrado.html',
+            valores={
+                'texto_ciiu': f"Códigos CIIU: {', '.join(self.codigos_ciiu)}" if self.codigos_ciiu else "Códigos CIIU: Todos",
+                'opciones_estado': ''.join(f'<option value="{estado}">{estado}</option>' for estado in ESTADOS_TABLA),
+                'total_ubicaciones': len(ubicaciones_validas),
+                'total_establecimientos': f"{sum(u['cantidad'] for u in ubicaciones_validas):,}",
+                'google_api_key': self.google_api_key
+            },
+            estilos=[('mapa_filtrado', css_pagina)],
+            scripts=[
+                ('datos_columnares', leer_archivo_plantilla('datos_columnares.js')),
+                ('filtros_mapa', leer_archivo_plantilla('filtros_mapa.js')),
+                ('clusters_mapa', leer_archivo_plantilla('clusters_mapa.js')),
+                ('escapar_html', leer_archivo_plantilla('escapar_html.js')),
+                ('consultas_catalogo', leer_archivo_plantilla('consultas_catalogo.js')),
+                ('mapa_filtrado', leer_archivo_plantilla('mapa_filtrado.js'))
+            ],
+            datos={
+                'provinciasDisponibles': provincias_disponibles,
+                'ciiuDisponibles': ciiu_disponibles,
+                'ESTADOS_TABLA': ESTADOS_TABLA,
+                'datosMapa': {
+                    'centro': {'lat': lat_centro, 'lng': lon_centro},
+                    'marcadores': codificar_registros(marcadores_js),
+                    'indiceClusters': indice_clusters,
+                    'filtros': indice_filtros
+                }
+            }
+        )
         
         print(f"✅ Mapa generado: {archivo_salida}")
+        imprimir_escritura(archivo_salida, escritos)
+        print(f"   Detalle por ubicación en: {directorio_detalles(archivo_salida)}/ ({len(detalles):,} fragmentos)")
+
+
+# Fragmento del nombre del archivo (sin tildes) → provincia; gana el primero que aparece
+PROVINCIAS_POR_ARCHIVO = [
+    ('ORO', 'EL ORO'),
+    ('GALAPAGOS', 'GALAPAGOS'),
+    ('PICHINCHA', 'PICHINCHA'),
+    ('GUAYAS', 'GUAYAS'),
+    ('MANABI', 'MANABI'),
+    ('AZUAY', 'AZUAY'),
+    ('LOJA', 'LOJA'),
+    ('TUNGURAHUA', 'TUNGURAHUA'),
+    ('IMBABURA', 'IMBABURA'),
+    ('ESMERALDAS', 'ESMERALDAS'),
+    ('LOS RIOS', 'LOS RIOS'),
+    ('BOLIVAR', 'BOLIVAR'),
+    ('COTOPAXI', 'COTOPAXI'),
+    ('CHIMBORAZO', 'CHIMBORAZO'),
+    ('CANAR', 'CAÑAR'),
+    ('MORONA SANTIAGO', 'MORONA SANTIAGO'),
+    ('NAPO', 'NAPO'),
+    ('ORELLANA', 'ORELLANA'),
+    ('PASTAZA', 'PASTAZA'),
+    ('SUCUMBIOS', 'SUCUMBIOS'),
+    ('ZAMORA CHINCHIPE', 'ZAMORA CHINCHIPE'),
+    ('SANTA ELENA', 'SANTA ELENA'),
+    ('SANTO DOMINGO', 'SANTO DOMINGO DE LOS TSACHILAS'),
+    ('CARCHI', 'CARCHI'),
+]
 
 
 def detectar_provincia_archivo(nombre_archivo: str) -> Optional[str]:
-    """Detecta la provincia basándose en el nombre del archivo."""
-    nombre_upper = nombre_archivo.upper()
-    
-    if 'ORO' in nombre_upper:
-        return 'EL ORO'
-    elif 'GALAPAGOS' in nombre_upper or 'GALÁPAGOS' in nombre_upper:
-        return 'GALAPAGOS'
-    elif 'PICHINCHA' in nombre_upper:
-        return 'PICHINCHA'
-    elif 'GUAYAS' in nombre_upper:
-        return 'GUAYAS'
-    elif 'MANABI' in nombre_upper or 'MANABÍ' in nombre_upper:
-        return 'MANABI'
-    elif 'AZUAY' in nombre_upper:
-        return 'AZUAY'
-    elif 'LOJA' in nombre_upper:
-        return 'LOJA'
-    elif 'TUNGURAHUA' in nombre_upper:
-        return 'TUNGURAHUA'
-    elif 'IMBABURA' in nombre_upper:
-        return 'IMBABURA'
-    elif 'ESMERALDAS' in nombre_upper:
-        return 'ESMERALDAS'
-    elif 'LOS RIOS' in nombre_upper or 'LOS RÍOS' in nombre_upper:
-        return 'LOS RIOS'
-    elif 'BOLIVAR' in nombre_upper or 'BOLÍVAR' in nombre_upper:
-        return 'BOLIVAR'
-    elif 'COTOPAXI' in nombre_upper:
-        return 'COTOPAXI'
-    elif 'CHIMBORAZO' in nombre_upper:
-        return 'CHIMBORAZO'
-    elif 'CAÑAR' in nombre_upper or 'CANAR' in nombre_upper:
-        return 'CAÑAR'
-    elif 'MORONA SANTIAGO' in nombre_upper:
-        return 'MORONA SANTIAGO'
-    elif 'NAPO' in nombre_upper:
-        return 'NAPO'
-    elif 'ORELLANA' in nombre_upper:
-        return 'ORELLANA'
-    elif 'PASTAZA' in nombre_upper:
-        return 'PASTAZA'
-    elif 'SUCUMBIOS' in nombre_upper:
-        return 'SUCUMBIOS'
-    elif 'ZAMORA CHINCHIPE' in nombre_upper:
-        return 'ZAMORA CHINCHIPE'
-    elif 'SANTA ELENA' in nombre_upper:
-        return 'SANTA ELENA'
-    elif 'SANTO DOMINGO' in nombre_upper:
-        return 'SANTO DOMINGO DE LOS TSACHILAS'
-    elif 'CARCHI' in nombre_upper:
-        return 'CARCHI'
-    
-    return None
+    """Detecta la provincia basándose en el nombre del archivo (sin distinguir tildes)."""
+    nombre = normalizar_texto(nombre_archivo)
+    return next((provincia for fragmento, provincia in PROVINCIAS_POR_ARCHIVO if fragmento in nombre), None)
 
 
 def main():
@@ -1414,20 +547,25 @@ def main():
         )
         
         if not df_filtrado.empty:
-            # Procesar datos filtrados
-            ubicaciones = generador.procesar_datos_filtrados(df_filtrado)
+            # Agrupar por ubicación; las coordenadas se resuelven después para todos los archivos
+            ubicaciones = generador.procesar_datos_filtrados(df_filtrado, geocodificar=False)
             todas_ubicaciones.extend(ubicaciones)
     
     # Filtrar por provincias a visualizar si se especificaron
     if PROVINCIAS_A_VISUALIZAR and todas_ubicaciones:
         print(f"\n🔍 Filtrando ubicaciones para visualizar solo: {', '.join(PROVINCIAS_A_VISUALIZAR)}")
-        provincias_normalizadas = [p.upper().strip() for p in PROVINCIAS_A_VISUALIZAR]
+        provincias_normalizadas = {normalizar_texto(p) for p in PROVINCIAS_A_VISUALIZAR}
         todas_ubicaciones = [
             u for u in todas_ubicaciones 
-            if u.get('provincia', '').upper().strip() in provincias_normalizadas
+            if normalizar_texto(u.get('provincia', '')) in provincias_normalizadas
         ]
         print(f"   Ubicaciones después del filtro de visualización: {len(todas_ubicaciones)}")
     
+    # Geocodificar de una vez las ubicaciones de todos los archivos (cada clave única una sola vez;
+    # las provincias que no se visualizan ya se descartaron)
+    if todas_ubicaciones:
+        imprimir_resumen(generador.geocodificar_lote(todas_ubicaciones))
+    
     if todas_ubicaciones:
         # Actualizar códigos CIIU y provincias para el título del mapa
         generador.codigos_ciiu = CODIGOS_CIIU if CODIGOS_CIIU else []
@@ -1441,9 +579,16 @@ def main():
         ubicaciones_con_coords = [u for u in todas_ubicaciones if u.get('latitud')]
         print(f"📍 Ubicaciones: {len(ubicaciones_con_coords)}/{len(todas_ubicaciones)}")
         print(f"📊 Total establecimientos filtrados: {sum(u['cantidad'] for u in todas_ubicaciones):,}")
-        print(f"\n🌐 Abre 'mapa_google_maps_filtrado.html' en tu navegador")
+        stats_cache = generador.cache_coordenadas.estadisticas()
+        print(f"🗂️  Cache de geocodificación: {stats_cache['aciertos']:,} aciertos, "
+              f"{stats_cache['fallos']:,} fallos, {generador.llamadas_api:,} llamadas a la API")
+        # La consulta en vivo y el detalle por marcador se piden al servidor: no sirve abrir el archivo
+        print("\n🌐 Ejecuta: python3 servidor_local.py [--puerto N]")
+        print("   Y abre mapa_google_maps_filtrado.html en la dirección que muestra el servidor")
     else:
         print("\n❌ No se encontraron establecimientos con los códigos CIIU especificados")
+    
+    generador.cache_coordenadas.cerrar()
 
 
 if __name__ == "__main__":
@@ -3,11 +3,20 @@ Genera un mapa usando Google Maps JavaScript API directamente.
 Solo necesitas la API key de Google Maps (la misma que usaste para geocodificación).
 """
 
-import pandas as pd
-import json
 import os
+import threading
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+
+from cache_geocodificacion import CacheGeocodificacion, normalizar_clave
+from clusters_mapa import construir_indice_clusters
+from datos_columnares import codificar_registros
+from geocodificacion_lote import (HILOS_DEFECTO, QPS_DEFECTO, consulta_geocodificacion, geocodificar_lote,
+                                  imprimir_resumen)
+from ingesta_sri import COLUMNAS_MAPA, cargar_excel_sri
+from limitador_tasa import LimitadorTasa
+from nomenclator_ecuador import NomenclatorEcuador
+from plantillas_html import escribir_pagina, imprimir_escritura, leer_archivo_plantilla
+from ubicaciones_sri import agrupar_por_ubicacion
 
 # Intentar importar Google Maps para geocodificación
 try:
@@ -22,112 +31,136 @@ except ImportError:
 class GeneradorMapaGoogle:
     """Genera mapa usando Google Maps JavaScript API."""
     
-    def __init__(self, google_api_key: Optional[str] = None):
+    def __init__(self, google_api_key: Optional[str] = None, cache_geocodificacion: Optional[CacheGeocodificacion] = None,
+                 qps: float = QPS_DEFECTO, hilos: int = HILOS_DEFECTO, base_url: Optional[str] = None,
+                 nomenclator: Optional[NomenclatorEcuador] = None):
         """
         Inicializa el generador.
         
         Args:
             google_api_key: API key de Google Maps (para geocodificación y mapa)
+            cache_geocodificacion: Cache persistente de coordenadas (opcional, se crea uno por defecto)
+            qps: Consultas por segundo a la Geocoding API entre todos los hilos
+            hilos: Consultas simultáneas al geocodificar en lote
+            base_url: Servidor alternativo (p. ej. servidor_places_falso.py para pruebas)
+            nomenclator: Nomenclátor local de provincias/cantones/parroquias (opcional, se carga
+                el incluido en el repositorio)
         """
         self.google_api_key = google_api_key
         self.google_client = None
-        self.cache_coordenadas = {}
+        self.cache_coordenadas = cache_geocodificacion or CacheGeocodificacion()
+        self.nomenclator = nomenclator if nomenclator is not None else NomenclatorEcuador()
+        self.limitador = LimitadorTasa(qps)
+        self.hilos = hilos
+        self.llamadas_api = 0
+        self._lock_contadores = threading.Lock()
         
         if google_api_key and GOOGLE_MAPS_AVAILABLE:
             try:
-                self.google_client = googlemaps.Client(key=google_api_key)
+                opciones = {'base_url': base_url} if base_url else {}
+                # El ritmo de las consultas lo maneja self.limitador
+                self.google_client = googlemaps.Client(key=google_api_key, queries_per_second=1000, **opciones)
                 print("✅ Google Maps API configurada")
             except Exception as e:
                 print(f"⚠️  Error al configurar Google Maps: {str(e)}")
         elif not google_api_key:
-            print("⚠️  No se proporcionó API key. El mapa funcionará pero sin geocodificación.")
+            print("⚠️  No se proporcionó API key. Solo se ubicará lo que esté en el nomenclátor local.")
     
     def geocodificar_ubicacion(self, provincia: str = None, canton: str = None) -> Optional[Tuple[float, float]]:
         """Geocodifica usando Google Maps API."""
-        if not self.google_client:
+        # Misma clave normalizada que generar_mapa_filtrado.py (sin parroquia)
+        clave = normalizar_clave(provincia, canton)
+        if not clave:
             return None
         
-        clave = f"{canton or ''}|{provincia or ''}".strip('|')
-        if not clave or clave in self.cache_coordenadas:
-            return self.cache_coordenadas.get(clave)
+        # Primero el nomenclátor local (sin red), luego el cache y por último la API
+        coords = self.nomenclator.resolver(provincia, canton) or self.cache_coordenadas.obtener(clave)
+        if not coords and self.google_client and not self.cache_coordenadas.sin_resultado(clave):
+            coords = self.consultar_api(provincia, canton)
+        
+        return coords or self.nomenclator.aproximar(provincia, canton)
+    
+    def consultar_api(self, provincia: str = None, canton: str = None, parroquia: str = None) -> Optional[Tuple[float, float]]:
+        """Consulta la Geocoding API (sin mirar el cache) y guarda el resultado, o que no lo hubo; seguro entre hilos."""
+        query = consulta_geocodificacion(provincia, canton)
+        if not query or not self.google_client:
+            return None
         
         try:
-            query = f"{canton}, {provincia}, Ecuador" if canton and provincia else f"{provincia}, Ecuador"
+            self.limitador.adquirir()
+            with self._lock_contadores:
+                self.llamadas_api += 1
             result = self.google_client.geocode(query)
             
             if result and len(result) > 0:
                 location = result[0]['geometry']['location']
                 coords = (location['lat'], location['lng'])
-                self.cache_coordenadas[clave] = coords
+                self.cache_coordenadas.guardar(normalizar_clave(provincia, canton), coords, consulta=query)
                 return coords
+            # La API respondió sin resultados: no volver a consultarla hasta que venza
+            self.cache_coordenadas.guardar_sin_resultado(normalizar_clave(provincia, canton), consulta=query)
         except Exception:
+            # Errores de red o de cuota no se recuerdan: se reintenta en la próxima corrida
             pass
         
         return None
     
-    def procesar_excel(self, archivo_excel: str) -> List[Dict]:
-        """Procesa Excel y agrupa por ubicación."""
+    def geocodificar_lote(self, ubicaciones: List[Dict]) -> Dict:
+        """
+        Completa latitud/longitud de las ubicaciones de todos los archivos en un solo lote.
+        
+        Returns:
+            Resumen de geocodificar_lote (llamadas hechas y ahorradas)
+        """
+        coordenadas, resumen = geocodificar_lote(
+            ((u.get('provincia'), u.get('canton'), None) for u in ubicaciones),
+            self.cache_coordenadas,
+            self.consultar_api if self.google_client else None,
+            hilos=self.hilos,
+            nomenclator=self.nomenclator
+        )
+        for ubicacion in ubicaciones:
+            coords = coordenadas.get(normalizar_clave(ubicacion.get('provincia'), ubicacion.get('canton')))
+            ubicacion['latitud'] = coords[0] if coords else None
+            ubicacion['longitud'] = coords[1] if coords else None
+        return resumen
+    
+    def procesar_excel(self, archivo_excel: str, geocodificar: bool = True) -> List[Dict]:
+        """
+        Procesa Excel y agrupa por ubicación.
+        
+        Args:
+            archivo_excel: Ruta al archivo Excel
+            geocodificar: False para dejar las coordenadas vacías y resolverlas después con
+                geocodificar_lote junto con las de los demás archivos
+        """
         try:
-            df = pd.read_excel(archivo_excel)
+            df = cargar_excel_sri(archivo_excel, columnas=COLUMNAS_MAPA)
             
             print(f"\n📄 Archivo: {os.path.basename(archivo_excel)}")
             print(f"   Total de filas: {len(df):,}")
             
-            # Detectar columnas
-            col_ruc = next((col for col in df.columns if 'ruc' in col.lower()), None)
-            col_nombre = next((col for col in df.columns if any(x in col.lower() for x in ['razon', 'nombre'])), None)
-            col_provincia = next((col for col in df.columns if 'provincia' in col.lower()), None)
-            col_canton = next((col for col in df.columns if 'canton' in col.lower()), None)
-            
-            # Agrupar por ubicación
-            grupos = defaultdict(list)
-            
-            for idx, row in df.iterrows():
-                provincia = str(row[col_provincia]).strip() if col_provincia and not pd.isna(row[col_provincia]) else None
-                canton = str(row[col_canton]).strip() if col_canton and not pd.isna(row[col_canton]) else None
-                
-                if canton and provincia:
-                    clave = f"{canton}, {provincia}"
-                elif provincia:
-                    clave = provincia
-                else:
-                    continue
-                
-                grupos[clave].append({
-                    'ruc': str(row[col_ruc]) if col_ruc and not pd.isna(row[col_ruc]) else None,
-                    'nombre': str(row[col_nombre]) if col_nombre and not pd.isna(row[col_nombre]) else None,
-                    'provincia': provincia,
-                    'canton': canton
-                })
+            # Agrupar por ubicación (cantón y provincia)
+            grupos = agrupar_por_ubicacion(
+                df, campos=('ruc', 'nombre', 'provincia', 'canton'), usar_parroquia=False
+            )
             
             print(f"   Ubicaciones únicas: {len(grupos)}")
             
-            # Geocodificar cada ubicación única
             ubicaciones = []
-            total = len(grupos)
-            
-            for i, (clave, establecimientos) in enumerate(grupos.items(), 1):
-                if i % 10 == 0 or i == 1:
-                    print(f"   Geocodificando {i}/{total}: {clave}")
-                
-                provincia = establecimientos[0].get('provincia')
-                canton = establecimientos[0].get('canton')
-                
-                coordenadas = self.geocodificar_ubicacion(provincia, canton)
-                
+            for clave, establecimientos in grupos.items():
                 ubicaciones.append({
                     'ubicacion': clave,
-                    'provincia': provincia,
-                    'canton': canton,
-                    'latitud': coordenadas[0] if coordenadas else None,
-                    'longitud': coordenadas[1] if coordenadas else None,
+                    'provincia': establecimientos[0].get('provincia'),
+                    'canton': establecimientos[0].get('canton'),
+                    'latitud': None,
+                    'longitud': None,
                     'cantidad': len(establecimientos),
                     'establecimientos': establecimientos[:10]
                 })
-                
-                if self.google_client:
-                    import time
-                    time.sleep(0.1)  # Rate limiting para Google API
+            
+            if geocodificar:
+                imprimir_resumen(self.geocodificar_lote(ubicaciones))
             
             return ubicaciones
             
@@ -192,200 +225,31 @@ class GeneradorMapaGoogle:
                 'icon_url': icon_url
             })
         
-        # Generar HTML
-        html_template = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Mapa de Establecimientos - SRI Ecuador</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            height: 100vh;
-            display: flex;
-            flex-direction: column;
-        }}
-        
-        #header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 20px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        
-        #header h1 {{
-            font-size: 24px;
-            margin-bottom: 10px;
-        }}
-        
-        #header p {{
-            font-size: 14px;
-            opacity: 0.9;
-        }}
-        
-        #map {{
-            flex: 1;
-            width: 100%;
-        }}
+        indice_clusters = construir_indice_clusters(marcadores_js)
         
-        .info-window {{
-            max-width: 300px;
-            max-height: 400px;
-            overflow-y: auto;
-        }}
-        
-        .info-window h3 {{
-            margin: 0 0 10px 0;
-            color: #333;
-            font-size: 18px;
-        }}
-        
-        .info-window p {{
-            margin: 5px 0;
-            color: #666;
-            font-size: 14px;
-        }}
-        
-        .info-window hr {{
-            margin: 10px 0;
-            border: none;
-            border-top: 1px solid #eee;
-        }}
-        
-        .info-window .establecimientos {{
-            margin-top: 10px;
-            font-size: 13px;
-        }}
-        
-        #stats {{
-            background: white;
-            padding: 15px 20px;
-            border-top: 1px solid #eee;
-            display: flex;
-            justify-content: space-around;
-            flex-wrap: wrap;
-            box-shadow: 0 -2px 10px rgba(0,0,0,0.05);
-        }}
-        
-        .stat-item {{
-            text-align: center;
-            margin: 5px 15px;
-        }}
-        
-        .stat-item .number {{
-            font-size: 24px;
-            font-weight: bold;
-            color: #667eea;
-        }}
-        
-        .stat-item .label {{
-            font-size: 12px;
-            color: #666;
-            text-transform: uppercase;
-        }}
-    </style>
-</head>
-<body>
-    <div id="header">
-        <h1>📍 Mapa de Establecimientos - SRI Ecuador</h1>
-        <p>Visualización interactiva de ubicaciones de establecimientos registrados</p>
-    </div>
-    
-    <div id="map"></div>
-    
-    <div id="stats">
-        <div class="stat-item">
-            <div class="number">{len(ubicaciones_validas)}</div>
-            <div class="label">Ubicaciones</div>
-        </div>
-        <div class="stat-item">
-            <div class="number">{sum(u['cantidad'] for u in ubicaciones_validas):,}</div>
-            <div class="label">Establecimientos</div>
-        </div>
-    </div>
-    
-    <script>
-        // Inicializar mapa
-        function initMap() {{
-            const centro = {{ lat: {lat_centro}, lng: {lon_centro} }};
-            
-            const map = new google.maps.Map(document.getElementById('map'), {{
-                zoom: 7,
-                center: centro,
-                mapTypeId: 'roadmap',
-                styles: [
-                    {{
-                        featureType: 'poi',
-                        elementType: 'labels',
-                        stylers: [{{ visibility: 'off' }}]
-                    }}
-                ]
-            }});
-            
-            // Agregar marcadores
-            const marcadores = {json.dumps(marcadores_js)};
-            
-            marcadores.forEach(marcador => {{
-                const marker = new google.maps.Marker({{
-                    position: {{ lat: marcador.lat, lng: marcador.lng }},
-                    map: map,
-                    title: marcador.titulo + ' (' + marcador.cantidad.toLocaleString() + ' establecimientos)',
-                    icon: {{
-                        url: marcador.icon_url,
-                        scaledSize: new google.maps.Size(32, 32)
-                    }}
-                }});
-                
-                const infoWindow = new google.maps.InfoWindow({{
-                    content: `
-                        <div class="info-window">
-                            <h3>${{marcador.titulo}}</h3>
-                            <p><strong>📍 Establecimientos:</strong> ${{marcador.cantidad.toLocaleString()}}</p>
-                            <p><strong>Provincia:</strong> ${{marcador.provincia}}</p>
-                            <p><strong>Cantón:</strong> ${{marcador.canton}}</p>
-                            <hr>
-                            <p><strong>Ejemplos:</strong></p>
-                            <div class="establecimientos">${{marcador.establecimientos}}</div>
-                        </div>
-                    `
-                }});
-                
-                marker.addListener('click', () => {{
-                    infoWindow.open(map, marker);
-                }});
-            }});
-            
-            // Agregar control de tipo de mapa
-            map.setOptions({{
-                mapTypeControl: true,
-                mapTypeControlOptions: {{
-                    style: google.maps.MapTypeControlStyle.HORIZONTAL_BAR,
-                    position: google.maps.ControlPosition.TOP_RIGHT,
-                    mapTypeIds: ['roadmap', 'satellite', 'hybrid', 'terrain']
-                }}
-            }});
-        }}
-    </script>
-    
-    <script async defer
-        src="https://maps.googleapis.com/maps/api/js?key={self.google_api_key}&callback=initMap">
-    </script>
-</body>
-</html>
-"""
-        
-        # Guardar archivo
-        with open(archivo_salida, 'w', encoding='utf-8') as f:
-            f.write(html_template)
+        # Página (plantillas/mapa_google.*), recursos compartidos y datos por separado
+        escritos = escribir_pagina(
+            archivo_salida, 'mapa_google.html',
+            valores={
+                'total_ubicaciones': len(ubicaciones_validas),
+                'total_establecimientos': f"{sum(u['cantidad'] for u in ubicaciones_validas):,}",
+                'google_api_key': self.google_api_key
+            },
+            estilos=[('mapa_google', leer_archivo_plantilla('mapa_google.css'))],
+            scripts=[
+                ('datos_columnares', leer_archivo_plantilla('datos_columnares.js')),
+                ('clusters_mapa', leer_archivo_plantilla('clusters_mapa.js')),
+                ('mapa_google', leer_archivo_plantilla('mapa_google.js'))
+            ],
+            datos={'datosMapa': {
+                'centro': {'lat': lat_centro, 'lng': lon_centro},
+                'marcadores': codificar_registros(marcadores_js),
+                'indiceClusters': indice_clusters
+            }}
+        )
         
         print(f"✅ Mapa Google Maps generado: {archivo_salida}")
+        imprimir_escritura(archivo_salida, escritos)
         print(f"   Abre el archivo en tu navegador para ver el mapa interactivo")
 
 
@@ -427,9 +291,13 @@ def main():
     
     for archivo_excel in archivos_excel:
         ruta_completa = os.path.join(directorio_datos, archivo_excel)
-        ubicaciones = generador.procesar_excel(ruta_completa)
+        ubicaciones = generador.procesar_excel(ruta_completa, geocodificar=False)
         todas_ubicaciones.extend(ubicaciones)
     
+    # Geocodificar de una vez las ubicaciones de todos los archivos (cada clave única una sola vez)
+    if todas_ubicaciones:
+        imprimir_resumen(generador.geocodificar_lote(todas_ubicaciones))
+    
     if todas_ubicaciones:
         generador.generar_html_google_maps(todas_ubicaciones, "mapa_google_maps.html")
         
@@ -439,9 +307,14 @@ def main():
         ubicaciones_con_coords = [u for u in todas_ubicaciones if u.get('latitud')]
         print(f"📍 Ubicaciones: {len(ubicaciones_con_coords)}/{len(todas_ubicaciones)}")
         print(f"📊 Total establecimientos: {sum(u['cantidad'] for u in todas_ubicaciones):,}")
+        stats_cache = generador.cache_coordenadas.estadisticas()
+        print(f"🗂️  Cache de geocodificación: {stats_cache['aciertos']:,} aciertos, "
+              f"{stats_cache['fallos']:,} fallos, {generador.llamadas_api:,} llamadas a la API")
         print(f"\n🌐 Abre 'mapa_google_maps.html' en tu navegador")
     else:
         print("❌ No se procesaron ubicaciones")
+    
+    generador.cache_coordenadas.cerrar()
 
 
 if __name__ == "__main__":
@@ -7,6 +7,9 @@ import pandas as pd
 import os
 from datetime import datetime
 
+from cubo_sri import cargar_cubo
+from ingesta_sri import cargar_excel_sri
+
 def generar_resumen_ejecutivo():
     """Genera un resumen ejecutivo en formato texto y HTML."""
     
@@ -16,46 +19,40 @@ def generar_resumen_ejecutivo():
         print(f"❌ No se encontró: {archivo}")
         return
     
-    df = pd.read_excel(archivo)
+    cubo = cargar_cubo(archivo)
     
     # Filtrar encontradas
-    encontradas = df[df['ENCONTRADO_GOOGLE'] == True]
-    no_encontradas = df[df['ENCONTRADO_GOOGLE'] != True]
+    encontradas = cubo.filtrar(encontrado=True)
+    no_encontradas = cubo.filtrar(encontrado=False)
     
     # Calcular estadísticas
-    total_librerias = len(df)
-    total_encontradas = len(encontradas)
+    total_librerias = int(cubo.total())
+    total_encontradas = int(encontradas.total())
     porcentaje_encontradas = (total_encontradas / total_librerias) * 100
     
     # Estadísticas de reseñas
-    promedio_resenas = encontradas['NUMERO_RESENAS'].mean()
-    total_resenas = encontradas['NUMERO_RESENAS'].sum()
-    promedio_calificacion = encontradas['CALIFICACION_GOOGLE'].mean()
+    promedio_resenas = encontradas.promedio('resenas')
+    total_resenas = encontradas.total('resenas')
+    promedio_calificacion = encontradas.promedio('calificacion')
     
     # Estadísticas de ventas
-    venta_total_mensual = df['ESTIMACION_VENTA_MENSUAL'].sum()
+    venta_total_mensual = cubo.total('venta_mensual')
     venta_total_anual = venta_total_mensual * 12
     
     # Top librerías
-    top_10_resenas = encontradas.nlargest(10, 'NUMERO_RESENAS')[
+    destacadas = cubo.destacadas
+    top_10_resenas = destacadas[destacadas['ENCONTRADO_GOOGLE'] == True].nlargest(10, 'NUMERO_RESENAS')[
         ['RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL', 'NUMERO_RESENAS', 
          'CALIFICACION_GOOGLE', 'ESTIMACION_VENTA_MENSUAL', 'DESCRIPCION_CANTON_EST']
     ]
     
     # Por provincia
-    por_provincia = df.groupby('DESCRIPCION_PROVINCIA_EST').agg({
-        'NUMERO_RUC': 'count',
-        'ESTIMACION_VENTA_MENSUAL': 'sum',
-        'NUMERO_RESENAS': 'sum'
-    }).round(2)
+    por_provincia = cubo.por('provincia')[['cantidad', 'venta_mensual', 'resenas']].round(2)
     por_provincia.columns = ['Cantidad', 'Venta_Mensual_USD', 'Total_Resenas']
     por_provincia = por_provincia.sort_values('Venta_Mensual_USD', ascending=False)
     
     # Por cantón
-    por_canton = df.groupby('DESCRIPCION_CANTON_EST').agg({
-        'NUMERO_RUC': 'count',
-        'ESTIMACION_VENTA_MENSUAL': 'sum'
-    }).round(2)
+    por_canton = cubo.por('canton')[['cantidad', 'venta_mensual']].round(2)
     por_canton.columns = ['Cantidad', 'Venta_Mensual_USD']
     por_canton = por_canton.sort_values('Venta_Mensual_USD', ascending=False).head(10)
     
@@ -73,7 +70,7 @@ Fecha: {fecha}
 {'-'*80}
 Total de librerías analizadas: {total_librerias}
 Librerías encontradas en Google Maps: {total_encontradas} ({porcentaje_encontradas:.1f}%)
-Librerías no encontradas: {len(no_encontradas)}
+Librerías no encontradas: {int(no_encontradas.total())}
 
 📈 ESTADÍSTICAS DE GOOGLE MAPS
 {'-'*80}
@@ -148,7 +145,8 @@ def generar_tablas_resumen():
         print(f"❌ No se encontró: {archivo}")
         return
     
-    df = pd.read_excel(archivo)
+    cubo = cargar_cubo(archivo)
+    encontradas = cubo.filtrar(encontrado=True)
     
     # Crear Excel con múltiples hojas
     archivo_salida = "PRESENTACION_LIBRERIAS.xlsx"
@@ -168,20 +166,20 @@ def generar_tablas_resumen():
                 'Venta anual estimada (USD)'
             ],
             'Valor': [
-                len(df),
-                df['ENCONTRADO_GOOGLE'].sum(),
-                len(df) - df['ENCONTRADO_GOOGLE'].sum(),
-                int(df['NUMERO_RESENAS'].sum()),
-                f"{df[df['ENCONTRADO_GOOGLE']==True]['NUMERO_RESENAS'].mean():.1f}",
-                f"{df[df['ENCONTRADO_GOOGLE']==True]['CALIFICACION_GOOGLE'].mean():.2f}",
-                f"${df['ESTIMACION_VENTA_MENSUAL'].sum():,.2f}",
-                f"${df['ESTIMACION_VENTA_MENSUAL'].sum() * 12:,.2f}"
+                cubo.total(),
+                encontradas.total(),
+                cubo.total() - encontradas.total(),
+                int(cubo.total('resenas')),
+                f"{encontradas.promedio('resenas'):.1f}",
+                f"{encontradas.promedio('calificacion'):.2f}",
+                f"${cubo.total('venta_mensual'):,.2f}",
+                f"${cubo.total('venta_mensual') * 12:,.2f}"
             ]
         })
         resumen_general.to_excel(writer, sheet_name='Resumen General', index=False)
         
         # Hoja 2: Top 20 Librerías
-        top_20 = df.nlargest(20, 'ESTIMACION_VENTA_MENSUAL')[
+        top_20 = cubo.destacadas.nlargest(20, 'ESTIMACION_VENTA_MENSUAL')[
             ['RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL', 'DESCRIPCION_CANTON_EST',
              'NUMERO_RESENAS', 'CALIFICACION_GOOGLE', 'ESTIMACION_VENTA_MENSUAL',
              'ESTIMACION_VENTA_ANUAL', 'SITIO_WEB', 'URL_GOOGLE_MAPS']
@@ -192,27 +190,23 @@ def generar_tablas_resumen():
         top_20.to_excel(writer, sheet_name='Top 20 Librerías', index=False)
         
         # Hoja 3: Por Provincia
-        por_provincia = df.groupby('DESCRIPCION_PROVINCIA_EST').agg({
-            'NUMERO_RUC': 'count',
-            'ESTIMACION_VENTA_MENSUAL': 'sum',
-            'NUMERO_RESENAS': 'sum',
-            'CALIFICACION_GOOGLE': 'mean'
-        }).round(2)
+        por_provincia = cubo.por('provincia')[
+            ['cantidad', 'venta_mensual', 'resenas', 'calificacion_promedio']
+        ].round(2).rename_axis('DESCRIPCION_PROVINCIA_EST')
         por_provincia.columns = ['Cantidad', 'Venta Mensual (USD)', 'Total Reseñas', 'Calificación Promedio']
         por_provincia = por_provincia.sort_values('Venta Mensual (USD)', ascending=False)
         por_provincia.to_excel(writer, sheet_name='Por Provincia')
         
         # Hoja 4: Por Cantón
-        por_canton = df.groupby('DESCRIPCION_CANTON_EST').agg({
-            'NUMERO_RUC': 'count',
-            'ESTIMACION_VENTA_MENSUAL': 'sum',
-            'NUMERO_RESENAS': 'sum'
-        }).round(2)
+        por_canton = cubo.por('canton')[
+            ['cantidad', 'venta_mensual', 'resenas']
+        ].round(2).rename_axis('DESCRIPCION_CANTON_EST')
         por_canton.columns = ['Cantidad', 'Venta Mensual (USD)', 'Total Reseñas']
         por_canton = por_canton.sort_values('Venta Mensual (USD)', ascending=False)
         por_canton.to_excel(writer, sheet_name='Por Cantón')
         
-        # Hoja 5: Todas las Librerías (simplificado)
+        # Hoja 5: Todas las Librerías (la única que necesita todas las filas)
+        df = cargar_excel_sri(archivo)
         todas = df[[
             'NUMERO_RUC', 'RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL',
             'DESCRIPCION_CANTON_EST', 'NUMERO_RESENAS', 'CALIFICACION_GOOGLE',
@@ -0,0 +1,121 @@
+"""
+Geocodificación en lote para los generadores de mapas.
+Primero se juntan las ubicaciones de todos los archivos y se reducen a claves
+normalizadas únicas; luego se resuelven con el nomenclátor local y el cache, y solo
+las que faltan (y que la API no dejó antes sin resultado) se consultan a la API, en paralelo y con el limitador de tasa
+compartido. Al final se informa cuántas llamadas se ahorraron frente a geocodificar
+archivo por archivo.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from cache_geocodificacion import CacheGeocodificacion, normalizar_clave
+from nomenclator_ecuador import NomenclatorEcuador
+
+Coordenadas = Tuple[float, float]
+
+# Consultas simultáneas a la Geocoding API (el ritmo lo fija el limitador de tasa)
+HILOS_DEFECTO = 8
+
+# Consultas por segundo a la Geocoding API (antes: una pausa de 0.1 s entre llamadas)
+QPS_DEFECTO = 10
+
+
+def consulta_geocodificacion(provincia: str = None, canton: str = None, parroquia: str = None) -> Optional[str]:
+    """Texto que se envía a la API: 'parroquia, cantón, provincia, Ecuador' con lo que haya."""
+    if parroquia and canton and provincia:
+        return f"{parroquia}, {canton}, {provincia}, Ecuador"
+    if canton and provincia:
+        return f"{canton}, {provincia}, Ecuador"
+    if provincia:
+        return f"{provincia}, Ecuador"
+    return None
+
+
+def geocodificar_lote(ubicaciones: Iterable[Tuple[Optional[str], Optional[str], Optional[str]]],
+                      cache: CacheGeocodificacion,
+                      consultar_api: Optional[Callable[[str, str, str], Optional[Coordenadas]]] = None,
+                      hilos: int = HILOS_DEFECTO,
+                      nomenclator: Optional[NomenclatorEcuador] = None) -> Tuple[Dict[str, Optional[Coordenadas]], Dict]:
+    """
+    Resuelve muchas ubicaciones consultando cada clave única una sola vez.
+
+    Args:
+        ubicaciones: Tuplas (provincia, cantón, parroquia), una por ubicación de cada archivo
+            (las repetidas entre archivos se resuelven una vez)
+        cache: Cache persistente de coordenadas
+        consultar_api: Función (provincia, cantón, parroquia) → coordenadas que llama a la API
+            y guarda el resultado en el cache; None para usar solo el cache
+        hilos: Consultas simultáneas a la API
+        nomenclator: Nomenclátor local que se consulta antes que el cache; también aporta
+            las coordenadas del cantón o la provincia de lo que la API no resolvió
+
+    Returns:
+        ({clave normalizada: coordenadas o None}, resumen con 'solicitadas', 'unicas',
+         'en_nomenclator', 'en_cache', 'omitidas' (sin resultado de la API en una corrida anterior),
+         'llamadas_api', 'aproximadas', 'sin_resultado' y 'ahorradas')
+    """
+    # Plan: claves únicas (conservando los textos originales de la primera aparición)
+    unicas = {}
+    solicitadas = 0
+    for provincia, canton, parroquia in ubicaciones:
+        solicitadas += 1
+        clave = normalizar_clave(provincia, canton, parroquia)
+        if clave and clave not in unicas:
+            unicas[clave] = (provincia, canton, parroquia)
+
+    coordenadas = {clave: nomenclator.resolver(*unicas[clave]) if nomenclator is not None else None
+                   for clave in unicas}
+    en_nomenclator = sum(1 for coords in coordenadas.values() if coords is not None)
+    for clave, coords in coordenadas.items():
+        if coords is None:
+            coordenadas[clave] = cache.obtener(clave)
+    faltantes = [clave for clave, coords in coordenadas.items() if coords is None]
+    en_cache = len(unicas) - en_nomenclator - len(faltantes)
+    # Las que la API ya no encontró (cache negativo vigente) no se vuelven a consultar
+    pendientes = [clave for clave in faltantes if not cache.sin_resultado(clave)]
+    omitidas = len(faltantes) - len(pendientes)
+
+    if pendientes and consultar_api:
+        with ThreadPoolExecutor(max_workers=max(1, hilos)) as executor:
+            resultados = executor.map(lambda clave: consultar_api(*unicas[clave]), pendientes)
+            for clave, coords in zip(pendientes, resultados):
+                coordenadas[clave] = coords
+        llamadas = len(pendientes)
+    else:
+        llamadas = 0
+
+    # Sin resultado de la API (o sin conexión): cantón o provincia según el nomenclátor
+    aproximadas = 0
+    if nomenclator is not None:
+        for clave in faltantes:
+            if coordenadas[clave] is None:
+                coordenadas[clave] = nomenclator.aproximar(*unicas[clave])
+                aproximadas += coordenadas[clave] is not None
+
+    resumen = {
+        'solicitadas': solicitadas,
+        'unicas': len(unicas),
+        'en_nomenclator': en_nomenclator,
+        'en_cache': en_cache,
+        'omitidas': omitidas,
+        'llamadas_api': llamadas,
+        'aproximadas': aproximadas,
+        'sin_resultado': sum(1 for coords in coordenadas.values() if coords is None),
+        'ahorradas': solicitadas - llamadas
+    }
+    return coordenadas, resumen
+
+
+def imprimir_resumen(resumen: Dict):
+    """Muestra el resultado de una geocodificación en lote."""
+    print(f"\n🌐 Geocodificación en lote: {resumen['solicitadas']:,} ubicaciones → "
+          f"{resumen['unicas']:,} claves únicas")
+    print(f"   En nomenclátor: {resumen['en_nomenclator']:,}  |  En cache: {resumen['en_cache']:,}  |  "
+          f"Sin resultado antes: {resumen['omitidas']:,}  |  Llamadas a la API: {resumen['llamadas_api']:,}")
+    print(f"   Aproximadas al cantón/provincia: {resumen['aproximadas']:,}  |  "
+          f"Sin coordenadas: {resumen['sin_resultado']:,}")
+    print(f"   Llamadas ahorradas: {resumen['ahorradas']:,} "
+          f"({resumen['solicitadas'] - resumen['unicas']:,} repetidas entre archivos, "
+          f"{resumen['en_nomenclator']:,} en el nomenclátor, {resumen['en_cache']:,} ya en cache)")
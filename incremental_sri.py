@@ -0,0 +1,254 @@
+"""
+Procesamiento incremental entre descargas del catastro RUC del SRI.
+Compara cada fila con la huella guardada en la ejecución anterior (por NUMERO_RUC y
+establecimiento) y permite que cada etapa procese solo las filas agregadas o
+modificadas, combinando el resultado con la salida anterior.
+
+Uso:
+    python3 incremental_sri.py                 # cambios de cada Excel de datos_excel/
+    python3 incremental_sri.py --actualizar    # además guarda la foto actual como referencia
+"""
+
+import argparse
+import os
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ingesta_sri import cargar_excel_sri, listar_archivos_excel
+from normalizacion_sri import es_columna_normalizada
+
+# Incrementar si cambia la forma de calcular claves o huellas
+VERSION_INCREMENTAL = 1
+
+DIRECTORIO_INCREMENTAL = os.path.join("cache", "incremental")
+
+
+def claves_establecimiento(df: pd.DataFrame) -> pd.Series:
+    """
+    Genera una clave estable por establecimiento.
+
+    Con NUMERO_ESTABLECIMIENTO (catastro completo) la clave es 'NUMERO_RUC/establecimiento'.
+    Sin esa columna (p. ej. librerias_detalle.xlsx) es 'NUMERO_RUC#n', donde n es el
+    número de aparición del RUC dentro del archivo (0, 1, 2...).
+    """
+    ruc = df['NUMERO_RUC'].astype(str)
+    if 'NUMERO_ESTABLECIMIENTO' not in df.columns:
+        return ruc + '#' + df.groupby(ruc, sort=False).cumcount().astype(str)
+
+    claves = ruc + '/' + df['NUMERO_ESTABLECIMIENTO'].astype(str)
+    if claves.duplicated().any():
+        # Filas repetidas en la descarga: se distinguen por orden de aparición
+        claves = claves + '#' + df.groupby(claves, sort=False).cumcount().astype(str)
+    return claves
+
+
+def calcular_huellas(df: pd.DataFrame, columnas: Optional[List[str]] = None, contexto: str = '') -> np.ndarray:
+    """
+    Calcula una huella (uint64) del contenido de cada fila.
+
+    Las columnas categóricas se comparan por su valor, así da igual si el Excel se leyó
+    desde el cache o directamente. Las claves normalizadas de la ingesta (`*_NORM`) se
+    derivan de otras columnas y no cuentan. El contexto (versión de reglas, parámetros) se
+    mezcla en todas las huellas: si cambia, todas las filas cuentan como modificadas.
+    """
+    columnas = [col for col in (columnas or df.columns) if col in df.columns and not es_columna_normalizada(col)]
+    datos = df[columnas].copy()
+    for col in columnas:
+        if isinstance(datos[col].dtype, pd.CategoricalDtype):
+            datos[col] = datos[col].astype(object)
+
+    huellas = pd.util.hash_pandas_object(datos, index=False).to_numpy()
+    sal = zlib.crc32(f"{VERSION_INCREMENTAL}|{contexto}".encode('utf-8'))
+    return huellas ^ np.uint64(sal)
+
+
+class DiferenciasSRI:
+    """Resultado de comparar un DataFrame con la foto anterior."""
+
+    def __init__(self, claves: pd.Series, huellas: np.ndarray, anterior: Optional[pd.DataFrame]):
+        """
+        Compara las claves y huellas actuales con las de la foto anterior.
+
+        Args:
+            claves: Clave de cada fila actual (mismo índice que el DataFrame)
+            huellas: Huella de cada fila actual
+            anterior: Foto anterior con columnas 'clave' y 'huella' (None si no hay)
+        """
+        self.claves = claves
+        self.huellas = huellas
+        self.hay_anterior = anterior is not None
+
+        if anterior is None:
+            anterior = pd.DataFrame({'clave': pd.Series(dtype=object), 'huella': pd.Series(dtype=np.uint64)})
+
+        # get_indexer en vez de map: map pasaría las huellas uint64 a float y perdería precisión
+        posiciones = pd.Index(anterior['clave']).get_indexer(claves)
+        existia = posiciones >= 0
+        igual = existia.copy()
+        igual[existia] = anterior['huella'].to_numpy()[posiciones[existia]] == huellas[existia]
+
+        self.mascara_agregados = ~existia
+        self.mascara_modificados = existia & ~igual
+        self.mascara_sin_cambios = igual
+        self.eliminados = set(anterior['clave']) - set(claves)
+
+    @property
+    def mascara_pendientes(self) -> np.ndarray:
+        """Filas que hay que (re)procesar: agregadas o modificadas."""
+        return self.mascara_agregados | self.mascara_modificados
+
+    def resumen(self) -> Dict[str, int]:
+        """Conteos de filas agregadas, eliminadas, modificadas y sin cambios."""
+        return {
+            'agregados': int(self.mascara_agregados.sum()),
+            'eliminados': len(self.eliminados),
+            'modificados': int(self.mascara_modificados.sum()),
+            'sin_cambios': int(self.mascara_sin_cambios.sum())
+        }
+
+    def foto(self) -> pd.DataFrame:
+        """Foto actual (clave, huella) para guardar como referencia de la próxima ejecución."""
+        return pd.DataFrame({'clave': self.claves.to_numpy(), 'huella': self.huellas})
+
+
+def _ruta(etapa: str, parte: str, directorio: str) -> str:
+    return os.path.join(directorio, f"{etapa}.{parte}.pkl")
+
+
+def _leer(ruta: str) -> Optional[pd.DataFrame]:
+    """Lee una tabla guardada; None si no existe o está dañada."""
+    if not os.path.exists(ruta):
+        return None
+    try:
+        return pd.read_pickle(ruta)
+    except Exception:
+        return None
+
+
+def _guardar(df: pd.DataFrame, ruta: str):
+    """Guarda una tabla de forma atómica (pickle conserva los tipos exactos)."""
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    temporal = ruta + '.tmp'
+    df.to_pickle(temporal)
+    os.replace(temporal, ruta)
+
+
+def comparar_con_anterior(df: pd.DataFrame, etapa: str, columnas: Optional[List[str]] = None,
+                          contexto: str = '', directorio: str = DIRECTORIO_INCREMENTAL) -> DiferenciasSRI:
+    """Compara un DataFrame con la foto guardada de una etapa (sin modificar la foto)."""
+    claves = claves_establecimiento(df)
+    huellas = calcular_huellas(df, columnas, contexto)
+    return DiferenciasSRI(claves, huellas, _leer(_ruta(etapa, 'entrada', directorio)))
+
+
+def guardar_foto(diferencias: DiferenciasSRI, etapa: str, directorio: str = DIRECTORIO_INCREMENTAL):
+    """Guarda la foto actual como referencia para la próxima comparación."""
+    _guardar(diferencias.foto(), _ruta(etapa, 'entrada', directorio))
+
+
+def procesar_incremental(df: pd.DataFrame, etapa: str, procesar: Callable[[pd.DataFrame], pd.DataFrame],
+                         columnas: Optional[List[str]] = None, contexto: str = '',
+                         directorio: str = DIRECTORIO_INCREMENTAL) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Ejecuta una etapa fila por fila solo sobre las filas agregadas o modificadas.
+
+    La función procesar recibe un subconjunto de df y debe devolver sus filas
+    conservando el índice (puede descartar filas, no inventarlas). El resultado
+    combina lo procesado ahora con la salida guardada de las filas sin cambios,
+    en el orden de df, y es igual al de procesar(df) completo.
+
+    Args:
+        df: Entrada completa de la etapa
+        etapa: Nombre de la etapa (nombre de los archivos en cache/incremental/)
+        procesar: Función que procesa un DataFrame
+        columnas: Columnas que, si cambian, obligan a reprocesar la fila (por defecto, todas)
+        contexto: Texto con la versión de las reglas de la etapa; si cambia, se reprocesa todo
+        directorio: Carpeta donde se guardan fotos y salidas
+
+    Returns:
+        (resultado, resumen de diferencias)
+    """
+    diferencias = comparar_con_anterior(df, etapa, columnas, contexto, directorio)
+    salida_anterior = _leer(_ruta(etapa, 'salida', directorio))
+
+    pendientes = diferencias.mascara_pendientes
+    if salida_anterior is None or not diferencias.hay_anterior:
+        pendientes = np.ones(len(df), dtype=bool)
+
+    partes = []
+    if salida_anterior is not None and diferencias.hay_anterior:
+        sin_cambios = set(diferencias.claves[~pendientes])
+        partes.append(salida_anterior[salida_anterior['_CLAVE'].isin(sin_cambios)])
+
+    if pendientes.any():
+        procesado = procesar(df[pendientes]).copy()
+        procesado['_CLAVE'] = diferencias.claves.loc[procesado.index].to_numpy()
+        partes.append(procesado)
+
+    if not partes:
+        # Entrada vacía: no hay nada que combinar
+        return procesar(df), {**diferencias.resumen(), 'procesados': 0}
+    salida = pd.concat(partes) if len(partes) > 1 else partes[0]
+
+    # Orden e índice de la entrada actual
+    posiciones = pd.Series(np.arange(len(df)), index=diferencias.claves.to_numpy())
+    orden = posiciones.loc[salida['_CLAVE']].to_numpy()
+    salida = salida.iloc[np.argsort(orden, kind='stable')]
+    salida.index = df.index[np.sort(orden)]
+
+    _guardar(salida, _ruta(etapa, 'salida', directorio))
+    guardar_foto(diferencias, etapa, directorio)
+
+    resumen = diferencias.resumen()
+    resumen['procesados'] = int(pendientes.sum())
+    return salida.drop(columns='_CLAVE'), resumen
+
+
+def imprimir_resumen(resumen: Dict[str, int], etapa: str):
+    """Muestra los conteos de un procesamiento incremental."""
+    print(f"🔁 {etapa}: +{resumen['agregados']:,} agregadas, -{resumen['eliminados']:,} eliminadas, "
+          f"~{resumen['modificados']:,} modificadas, {resumen['sin_cambios']:,} sin cambios"
+          + (f" → {resumen['procesados']:,} procesadas" if 'procesados' in resumen else ""))
+
+
+def main():
+    """Muestra qué cambió en cada Excel del catastro desde la última foto."""
+    parser = argparse.ArgumentParser(description="Compara los Excel del SRI con la descarga anterior")
+    parser.add_argument('--directorio', default="datos_excel", help="Carpeta con los Excel del SRI")
+    parser.add_argument('--actualizar', action='store_true', help="Guarda la foto actual como referencia")
+    parser.add_argument('--exportar-delta', metavar='XLSX', help="Exporta las filas agregadas y modificadas")
+    args = parser.parse_args()
+
+    deltas = []
+    for archivo in listar_archivos_excel(args.directorio):
+        ruta = os.path.join(args.directorio, archivo)
+        etapa = "catastro_" + os.path.splitext(archivo)[0]
+        df = cargar_excel_sri(ruta)
+        diferencias = comparar_con_anterior(df, etapa)
+
+        if not diferencias.hay_anterior:
+            print(f"🆕 {os.path.basename(ruta)}: sin foto anterior ({len(df):,} filas)")
+        else:
+            imprimir_resumen(diferencias.resumen(), os.path.basename(ruta))
+
+        if args.exportar_delta:
+            delta = df.loc[diferencias.mascara_pendientes,
+                           [col for col in df.columns if not es_columna_normalizada(col)]].copy()
+            delta['CAMBIO'] = np.where(diferencias.mascara_agregados[diferencias.mascara_pendientes],
+                                       'AGREGADO', 'MODIFICADO')
+            deltas.append(delta)
+        if args.actualizar:
+            guardar_foto(diferencias, etapa)
+
+    if args.exportar_delta and deltas:
+        pd.concat(deltas, ignore_index=True).to_excel(args.exportar_delta, index=False)
+        print(f"✅ Delta exportado a: {args.exportar_delta}")
+    if args.actualizar:
+        print(f"📸 Fotos guardadas en {DIRECTORIO_INCREMENTAL}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+Ingesta de archivos Excel del catastro RUC del SRI con cache columnar.
+Cada Excel se convierte una sola vez a Parquet (o pickle si pyarrow no está
+instalado); las ejecuciones siguientes leen solo las columnas necesarias
+desde el cache en lugar de volver a parsear el Excel completo.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from normalizacion_sri import (agregar_columnas_normalizadas, columna_normalizada, con_normalizadas,
+                               normalizar_serie, normalizar_texto)
+
+# Parquet requiere pyarrow; sin él se usa pickle (igual de rápido, pero sin lectura por columnas)
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+# Incrementar si cambia la forma en que se convierte el Excel (tipos, columnas, etc.)
+VERSION_INGESTA = 2
+
+DIRECTORIO_CACHE_INGESTA = os.path.join("cache", "ingesta")
+
+# Columnas de baja cardinalidad que se guardan como categóricas
+COLUMNAS_CATEGORICAS = [
+    'DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST', 'DESCRIPCION_PARROQUIA_EST',
+    'CODIGO_CIIU', 'ACTIVIDAD_ECONOMICA',
+    'ESTADO_CONTRIBUYENTE', 'ESTADO_ESTABLECIMIENTO',
+    'CODIGO_JURISDICCION', 'CLASE_CONTRIBUYENTE', 'TIPO_CONTRIBUYENTE',
+    'OBLIGADO', 'AGENTE_RETENCION', 'ESPECIAL'
+]
+
+# Columnas que usan los generadores de mapas
+COLUMNAS_MAPA = [
+    'NUMERO_RUC', 'RAZON_SOCIAL', 'CODIGO_CIIU', 'ACTIVIDAD_ECONOMICA', 'ESTADO_CONTRIBUYENTE',
+    'DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST', 'DESCRIPCION_PARROQUIA_EST'
+]
+
+# Columnas que usa el análisis de librerías
+COLUMNAS_LIBRERIAS = [
+    'NUMERO_RUC', 'NUMERO_ESTABLECIMIENTO', 'RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL',
+    'CODIGO_CIIU', 'ACTIVIDAD_ECONOMICA',
+    'ESTADO_CONTRIBUYENTE', 'ESTADO_ESTABLECIMIENTO',
+    'DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST', 'DESCRIPCION_PARROQUIA_EST',
+    'AGENTE_RETENCION', 'FECHA_INICIO_ACTIVIDADES'
+]
+
+# Textos que pd.read_excel interpreta como vacíos (se replican al leer en streaming)
+VALORES_VACIOS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+
+
+def listar_archivos_excel(directorio: str = "datos_excel") -> List[str]:
+    """Devuelve los nombres de los archivos Excel de un directorio (sin temporales de Office)."""
+    if not os.path.exists(directorio):
+        return []
+    return sorted(f for f in os.listdir(directorio)
+                  if f.endswith(('.xlsx', '.xls')) and not f.startswith('~'))
+
+
+def _hash_archivo(ruta: str) -> str:
+    """Calcula el SHA-1 del archivo leyendo por bloques."""
+    sha1 = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(bloque)
+    return sha1.hexdigest()
+
+
+def _ruta_base_cache(ruta_excel: str, directorio_cache: str) -> str:
+    """Ruta (sin extensión) del cache de un Excel; incluye un hash de la ruta para evitar choques."""
+    ruta_absoluta = os.path.abspath(ruta_excel)
+    sufijo = hashlib.sha1(ruta_absoluta.encode('utf-8')).hexdigest()[:10]
+    nombre = os.path.splitext(os.path.basename(ruta_excel))[0]
+    return os.path.join(directorio_cache, f"{nombre}.{sufijo}")
+
+
+def _leer_meta_vigente(ruta_excel: str, ruta_meta: str) -> Optional[dict]:
+    """Devuelve los metadatos del cache si corresponden a la versión actual del Excel."""
+    try:
+        with open(ruta_meta, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get('version') != VERSION_INGESTA:
+        return None
+
+    ruta_datos = os.path.join(os.path.dirname(ruta_meta), meta.get('archivo', ''))
+    if not os.path.isfile(ruta_datos):
+        return None
+
+    estado = os.stat(ruta_excel)
+    if estado.st_size != meta.get('tamano'):
+        return None
+
+    if estado.st_mtime_ns == meta.get('mtime_ns'):
+        return meta
+
+    # Mismo tamaño pero distinta fecha (copia, checkout de git...): confirmar por contenido
+    if _hash_archivo(ruta_excel) == meta.get('sha1'):
+        meta['mtime_ns'] = estado.st_mtime_ns
+        with open(ruta_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return meta
+
+    return None
+
+
+def optimizar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte a categóricas las columnas de baja cardinalidad y agrega las claves normalizadas."""
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns and not isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].astype('category')
+    return agregar_columnas_normalizadas(df)
+
+
+def quitar_categorias_sin_uso(df: pd.DataFrame) -> pd.DataFrame:
+    """Elimina categorías vacías tras filtrar, para que value_counts/groupby no las listen."""
+    for columna in df.columns:
+        if isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].cat.remove_unused_categories()
+    return df
+
+
+def convertir_excel(ruta_excel: str, directorio_cache: str = DIRECTORIO_CACHE_INGESTA) -> pd.DataFrame:
+    """Lee el Excel completo una vez y guarda su versión columnar en el cache."""
+    base = _ruta_base_cache(ruta_excel, directorio_cache)
+    os.makedirs(directorio_cache, exist_ok=True)
+
+    df = optimizar_tipos(pd.read_excel(ruta_excel))
+
+    formato = 'pickle'
+    ruta_datos = base + '.pkl'
+    if PARQUET_DISPONIBLE:
+        try:
+            df.to_parquet(base + '.parquet', index=False)
+            formato = 'parquet'
+            ruta_datos = base + '.parquet'
+        except Exception:
+            # Columnas con tipos mezclados que Arrow no acepta: se guarda como pickle
+            pass
+    if formato == 'pickle':
+        df.to_pickle(ruta_datos)
+
+    estado = os.stat(ruta_excel)
+    meta = {
+        'version': VERSION_INGESTA,
+        'origen': os.path.abspath(ruta_excel),
+        'tamano': estado.st_size,
+        'mtime_ns': estado.st_mtime_ns,
+        'sha1': _hash_archivo(ruta_excel),
+        'formato': formato,
+        'archivo': os.path.basename(ruta_datos),
+        'filas': len(df),
+        'columnas': list(df.columns)
+    }
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    return df
+
+
+def cargar_excel_sri(ruta_excel: str, columnas: Optional[List[str]] = None, usar_cache: bool = True,
+                     directorio_cache: str = DIRECTORIO_CACHE_INGESTA) -> pd.DataFrame:
+    """
+    Carga un Excel del SRI usando el cache columnar cuando está vigente.
+
+    Args:
+        ruta_excel: Ruta al archivo Excel
+        columnas: Columnas a cargar (opcional). Si al archivo le falta alguna de ellas
+                  (formato distinto al estándar del SRI) se cargan todas para que la
+                  detección flexible de columnas siga funcionando.
+        usar_cache: False para forzar la lectura directa del Excel
+        directorio_cache: Carpeta donde se guardan los archivos convertidos
+
+    Returns:
+        DataFrame con tipos optimizados (categóricas para provincia, cantón, CIIU, estado...)
+    """
+    if not usar_cache:
+        return _seleccionar_columnas(optimizar_tipos(pd.read_excel(ruta_excel)), columnas)
+
+    base = _ruta_base_cache(ruta_excel, directorio_cache)
+    meta = _leer_meta_vigente(ruta_excel, base + '.json')
+
+    if meta is None:
+        return _seleccionar_columnas(convertir_excel(ruta_excel, directorio_cache), columnas)
+
+    ruta_datos = os.path.join(directorio_cache, meta['archivo'])
+    if meta.get('formato') == 'parquet':
+        if columnas and all(c in meta.get('columnas', []) for c in columnas):
+            return pd.read_parquet(ruta_datos, columns=con_normalizadas(columnas, meta['columnas']))
+        return pd.read_parquet(ruta_datos)
+
+    return _seleccionar_columnas(pd.read_pickle(ruta_datos), columnas)
+
+
+def _seleccionar_columnas(df: pd.DataFrame, columnas: Optional[List[str]]) -> pd.DataFrame:
+    """Recorta el DataFrame a las columnas pedidas (y sus claves normalizadas) si todas existen."""
+    if columnas and all(c in df.columns for c in columnas):
+        return df[con_normalizadas(columnas, list(df.columns))]
+    return df
+
+
+def cache_vigente(ruta_excel: str, directorio_cache: str = DIRECTORIO_CACHE_INGESTA) -> bool:
+    """Indica si el Excel ya tiene una copia columnar vigente en el cache."""
+    base = _ruta_base_cache(ruta_excel, directorio_cache)
+    return _leer_meta_vigente(ruta_excel, base + '.json') is not None
+
+
+def _normalizar_valores(valores: Optional[List[str]]) -> Optional[set]:
+    """Normaliza los valores de un filtro (mayúsculas, sin espacios extra)."""
+    if not valores:
+        return None
+    return {str(v).upper().strip() for v in valores}
+
+
+def _normalizar_ubicaciones(valores: Optional[List[str]]) -> Optional[set]:
+    """Claves de un filtro de ubicación (mayúsculas, sin tildes: 'Galápagos' = 'GALAPAGOS')."""
+    if not valores:
+        return None
+    return {normalizar_texto(v) for v in valores}
+
+
+def _detectar_columnas_filtro(columnas: List[str]) -> Dict[str, Optional[str]]:
+    """Detecta las columnas sobre las que se aplican los filtros de CIIU, provincia y estado."""
+    return {
+        'ciiu': 'CODIGO_CIIU' if 'CODIGO_CIIU' in columnas else None,
+        'provincia': next((c for c in columnas if 'provincia' in c.lower()), None),
+        'estado': next((c for c in columnas if 'estado_contribuyente' in c.lower()), None)
+    }
+
+
+def _mascara_normalizada(serie: pd.Series, valores: set) -> pd.Series:
+    """Compara una columna normalizada contra un conjunto; en categóricas solo se normalizan las categorías."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        coinciden = categorias[pd.Series(categorias).astype(str).str.upper().str.strip().isin(valores).values]
+        return serie.isin(coinciden)
+    return serie.astype(str).str.upper().str.strip().isin(valores)
+
+
+def _mascara_ubicacion(df: pd.DataFrame, columna: str, claves: set) -> pd.Series:
+    """Filtro de ubicación sobre la clave normalizada guardada en la ingesta (búsqueda exacta)."""
+    normalizada = columna_normalizada(columna)
+    serie = df[normalizada] if normalizada in df.columns else normalizar_serie(df[columna])
+    return serie.isin(claves)
+
+
+def _filtrar_desde_cache(ruta_excel: str, codigos_ciiu, provincias, estados, columnas,
+                         directorio_cache: str) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Aplica los filtros sobre la copia columnar (solo lee las columnas necesarias)."""
+    df = cargar_excel_sri(ruta_excel, columnas=columnas, directorio_cache=directorio_cache)
+    cols = _detectar_columnas_filtro(list(df.columns))
+    conteos = {'total': len(df)}
+
+    if codigos_ciiu:
+        if not cols['ciiu']:
+            raise ValueError("No se encontró la columna CODIGO_CIIU")
+        df = df[df[cols['ciiu']].isin(codigos_ciiu)]
+        conteos['ciiu'] = len(df)
+
+    provincias_norm = _normalizar_ubicaciones(provincias)
+    if provincias_norm and cols['provincia']:
+        df = df[_mascara_ubicacion(df, cols['provincia'], provincias_norm)]
+        conteos['provincia'] = len(df)
+
+    estados_norm = _normalizar_valores(estados)
+    if estados_norm and cols['estado']:
+        df = df[_mascara_normalizada(df[cols['estado']], estados_norm)]
+        conteos['estado'] = len(df)
+
+    return quitar_categorias_sin_uso(df.copy()), conteos
+
+
+def _filtrar_en_streaming(ruta_excel: str, codigos_ciiu, provincias, estados,
+                          columnas) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Recorre el Excel fila por fila (openpyxl en modo solo lectura) y guarda solo las
+    filas que cumplen los filtros, así la memoria depende de las coincidencias y no
+    del tamaño del archivo.
+    """
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta_excel, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return pd.DataFrame(), {'total': 0}
+
+        nombres = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(encabezado)]
+        cols = _detectar_columnas_filtro(nombres)
+
+        if codigos_ciiu and not cols['ciiu']:
+            raise ValueError("No se encontró la columna CODIGO_CIIU")
+
+        # Columnas a conservar (todas si el archivo no tiene el formato estándar)
+        if columnas and all(c in nombres for c in columnas):
+            conservar = [nombres.index(c) for c in columnas]
+        else:
+            conservar = list(range(len(nombres)))
+
+        idx_ciiu = nombres.index(cols['ciiu']) if codigos_ciiu else None
+        codigos = set(codigos_ciiu) if codigos_ciiu else None
+        provincias_norm = _normalizar_ubicaciones(provincias)
+        idx_provincia = nombres.index(cols['provincia']) if provincias_norm and cols['provincia'] else None
+        estados_norm = _normalizar_valores(estados)
+        idx_estado = nombres.index(cols['estado']) if estados_norm and cols['estado'] else None
+
+        conteos = {'total': 0}
+        if idx_ciiu is not None:
+            conteos['ciiu'] = 0
+        if idx_provincia is not None:
+            conteos['provincia'] = 0
+        if idx_estado is not None:
+            conteos['estado'] = 0
+
+        seleccion = []
+        for fila in filas:
+            if fila is None:
+                continue
+            fila = tuple(None if isinstance(v, str) and v in VALORES_VACIOS else v for v in fila)
+            if all(v is None for v in fila):
+                continue
+            conteos['total'] += 1
+
+            if idx_ciiu is not None:
+                if fila[idx_ciiu] not in codigos:
+                    continue
+                conteos['ciiu'] += 1
+
+            if idx_provincia is not None:
+                valor = fila[idx_provincia]
+                if valor is None or normalizar_texto(valor) not in provincias_norm:
+                    continue
+                conteos['provincia'] += 1
+
+            if idx_estado is not None:
+                if str(fila[idx_estado]).upper().strip() not in estados_norm:
+                    continue
+                conteos['estado'] += 1
+
+            seleccion.append(tuple(fila[i] if i < len(fila) else None for i in conservar))
+    finally:
+        libro.close()
+
+    df = pd.DataFrame.from_records(seleccion, columns=[nombres[i] for i in conservar])
+    return optimizar_tipos(df), conteos
+
+
+def leer_excel_filtrado(ruta_excel: str, codigos_ciiu: Optional[List[str]] = None,
+                        provincias: Optional[List[str]] = None, estados: Optional[List[str]] = None,
+                        columnas: Optional[List[str]] = None,
+                        directorio_cache: str = DIRECTORIO_CACHE_INGESTA) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Lee un Excel del SRI aplicando los filtros de CIIU, provincia y estado mientras se lee.
+
+    Si el archivo ya tiene copia columnar vigente se filtra sobre ella; si no, se recorre
+    el Excel en streaming y solo se materializan las filas que cumplen los filtros.
+
+    Args:
+        ruta_excel: Ruta al archivo Excel
+        codigos_ciiu: Códigos CIIU a conservar (coincidencia exacta)
+        provincias: Provincias a conservar (sin distinguir mayúsculas ni tildes)
+        estados: Estados del contribuyente a conservar (sin distinguir mayúsculas)
+        columnas: Columnas a devolver (todas si al archivo le falta alguna)
+        directorio_cache: Carpeta del cache columnar
+
+    Returns:
+        (DataFrame filtrado, conteos de filas: total y después de cada filtro aplicado)
+
+    Raises:
+        ValueError: si se filtra por CIIU y el archivo no tiene la columna CODIGO_CIIU
+    """
+    if cache_vigente(ruta_excel, directorio_cache) or not ruta_excel.endswith('.xlsx'):
+        return _filtrar_desde_cache(ruta_excel, codigos_ciiu, provincias, estados, columnas, directorio_cache)
+    return _filtrar_en_streaming(ruta_excel, codigos_ciiu, provincias, estados, columnas)
+
+
+def main():
+    """Convierte (o verifica) el cache de todos los Excel de datos_excel/."""
+    directorio = "datos_excel"
+    archivos = listar_archivos_excel(directorio)
+
+    if not archivos:
+        print(f"❌ No se encontraron archivos Excel en '{directorio}'")
+        return
+
+    print("=" * 60)
+    print("📦 Ingesta de archivos SRI RUC")
+    print("=" * 60)
+    print(f"Formato de cache: {'Parquet' if PARQUET_DISPONIBLE else 'pickle (instala pyarrow para Parquet)'}")
+
+    for archivo in archivos:
+        ruta = os.path.join(directorio, archivo)
+        inicio = time.perf_counter()
+        df = cargar_excel_sri(ruta)
+        segundos = time.perf_counter() - inicio
+        print(f"✅ {archivo}: {len(df):,} filas en {segundos:.2f} s")
+
+    print(f"\n📁 Cache en: {DIRECTORIO_CACHE_INGESTA}/")
+
+
+if __name__ == "__main__":
+    main()
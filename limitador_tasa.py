@@ -0,0 +1,72 @@
+"""
+Limitador de tasa (token bucket) compartido por los hilos que llaman a las APIs de Google.
+Reduce la tasa a la mitad cuando la API responde OVER_QUERY_LIMIT y la recupera
+poco a poco con cada respuesta correcta.
+"""
+
+import threading
+import time
+
+
+class LimitadorTasa:
+    """Token bucket seguro entre hilos con tasa adaptativa."""
+
+    def __init__(self, qps: float, rafaga: int = None, qps_minimo: float = 0.5):
+        """
+        Inicializa el limitador.
+
+        Args:
+            qps: Consultas por segundo permitidas (tasa objetivo)
+            rafaga: Máximo de consultas seguidas sin esperar (por defecto, una por QPS)
+            qps_minimo: Tasa mínima a la que puede bajar tras errores de cuota
+        """
+        if qps <= 0:
+            raise ValueError("qps debe ser mayor que 0")
+
+        self.qps_objetivo = float(qps)
+        self.qps_minimo = min(float(qps_minimo), self.qps_objetivo)
+        self.qps = self.qps_objetivo
+        self.capacidad = float(rafaga or max(1, int(qps)))
+        self.tokens = self.capacidad
+        self.ultimo = time.monotonic()
+        self.esperas = 0
+        self.reducciones = 0
+        self._ultima_reduccion = 0.0
+        self._lock = threading.Lock()
+
+    def _rellenar(self, ahora: float):
+        """Agrega los tokens acumulados desde la última consulta."""
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.qps)
+        self.ultimo = ahora
+
+    def adquirir(self):
+        """Bloquea el hilo actual hasta que haya un token disponible."""
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._rellenar(ahora)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                espera = (1 - self.tokens) / self.qps
+                self.esperas += 1
+            time.sleep(espera)
+
+    def reducir(self, factor: float = 0.5):
+        """Baja la tasa tras un OVER_QUERY_LIMIT y vacía el bucket."""
+        with self._lock:
+            ahora = time.monotonic()
+            self._rellenar(ahora)
+            self.tokens = 0
+            # Varios hilos reciben el mismo rechazo a la vez: se reduce una sola vez por segundo
+            if ahora - self._ultima_reduccion >= 1.0:
+                self.qps = max(self.qps_minimo, self.qps * factor)
+                self.reducciones += 1
+                self._ultima_reduccion = ahora
+
+    def recuperar(self, factor: float = 1.02):
+        """Sube la tasa gradualmente hacia la objetivo tras una respuesta correcta."""
+        with self._lock:
+            if self.qps < self.qps_objetivo:
+                self._rellenar(time.monotonic())
+                self.qps = min(self.qps_objetivo, self.qps * factor)
@@ -0,0 +1,232 @@
+"""
+Nomenclátor local de la división político-administrativa (DPA) del Ecuador.
+Guarda coordenadas de provincias, cantones y parroquias con sus nombres normalizados
+y alias en nomenclator_ecuador.json (incluido en el repositorio), para resolver las
+ubicaciones de los mapas sin conexión y consultar la Geocoding API solo por las que
+no estén en el nomenclátor.
+
+Las provincias usan las coordenadas de su cabecera provincial.
+
+Uso:
+    python3 nomenclator_ecuador.py                       # resumen de cobertura
+    python3 nomenclator_ecuador.py --buscar "El Oro" Machala "La Providencia"
+    python3 nomenclator_ecuador.py --importar-cache      # agrega lo ya geocodificado
+    python3 nomenclator_ecuador.py --importar-csv dpa.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from cache_geocodificacion import RUTA_CACHE_DEFECTO, CacheGeocodificacion, normalizar_clave
+from normalizacion_sri import normalizar_texto
+
+Coordenadas = Tuple[float, float]
+
+# Incrementar si cambia la estructura del archivo
+VERSION_NOMENCLATOR = 1
+
+RUTA_NOMENCLATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nomenclator_ecuador.json")
+
+
+class NomenclatorEcuador:
+    """Coordenadas de provincias, cantones y parroquias resueltas en memoria, sin red."""
+
+    def __init__(self, ruta: str = RUTA_NOMENCLATOR):
+        """
+        Carga el nomenclátor.
+
+        Args:
+            ruta: Archivo JSON del nomenclátor (por defecto el incluido junto a este módulo)
+        """
+        self.ruta = ruta
+        self.datos = {'version': VERSION_NOMENCLATOR, 'alias_provincias': {}, 'provincias': {}}
+
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if datos.get('version') == VERSION_NOMENCLATOR:
+                self.datos = datos
+            else:
+                print(f"⚠️  Versión de {ruta} no soportada; se geocodificará con la API")
+        else:
+            print(f"⚠️  No se encontró el nomenclátor {ruta}; se geocodificará con la API")
+
+        self._indexar()
+
+    def _indexar(self):
+        """Arma el diccionario plano {clave normalizada: coordenadas} y las tablas de alias."""
+        self._coordenadas: Dict[str, Coordenadas] = {}
+        self._alias_provincias = {normalizar_texto(alias): normalizar_texto(nombre)
+                                  for alias, nombre in self.datos.get('alias_provincias', {}).items()}
+        self._alias_cantones: Dict[str, Dict[str, str]] = {}
+
+        for provincia, datos_provincia in self.datos.get('provincias', {}).items():
+            if datos_provincia.get('coordenadas'):
+                self._coordenadas[normalizar_clave(provincia)] = tuple(datos_provincia['coordenadas'])
+            self._alias_cantones[provincia] = {normalizar_texto(alias): normalizar_texto(nombre)
+                                               for alias, nombre in datos_provincia.get('alias_cantones', {}).items()}
+
+            for canton, datos_canton in datos_provincia.get('cantones', {}).items():
+                if datos_canton.get('coordenadas'):
+                    self._coordenadas[normalizar_clave(provincia, canton)] = tuple(datos_canton['coordenadas'])
+                for parroquia, coordenadas in datos_canton.get('parroquias', {}).items():
+                    self._coordenadas[normalizar_clave(provincia, canton, parroquia)] = tuple(coordenadas)
+
+    def __len__(self) -> int:
+        return len(self._coordenadas)
+
+    def nombres(self, provincia: str = None, canton: str = None,
+                parroquia: str = None) -> Tuple[str, str, str]:
+        """Normaliza los nombres y reemplaza los alias ('STO DOMINGO', 'PUYO'...) por el nombre oficial."""
+        provincia = normalizar_texto(provincia)
+        provincia = self._alias_provincias.get(provincia, provincia)
+        canton = normalizar_texto(canton)
+        canton = self._alias_cantones.get(provincia, {}).get(canton, canton)
+        return provincia, canton, normalizar_texto(parroquia)
+
+    def resolver(self, provincia: str = None, canton: str = None,
+                 parroquia: str = None) -> Optional[Coordenadas]:
+        """Coordenadas exactas del nivel pedido (parroquia, cantón o provincia) o None si no está."""
+        provincia, canton, parroquia = self.nombres(provincia, canton, parroquia)
+        return self._coordenadas.get(normalizar_clave(provincia, canton, parroquia))
+
+    def aproximar(self, provincia: str = None, canton: str = None,
+                  parroquia: str = None) -> Optional[Coordenadas]:
+        """
+        Coordenadas del nivel más preciso conocido: parroquia, luego cantón y luego provincia.
+
+        Se usa cuando ni el cache ni la API resolvieron la ubicación (p. ej. sin conexión).
+        """
+        provincia, canton, parroquia = self.nombres(provincia, canton, parroquia)
+        for clave in (normalizar_clave(provincia, canton, parroquia), normalizar_clave(provincia, canton),
+                      normalizar_clave(provincia)):
+            if clave in self._coordenadas:
+                return self._coordenadas[clave]
+        return None
+
+    def agregar(self, provincia: str, canton: str = None, parroquia: str = None,
+                coordenadas: Coordenadas = None, reemplazar: bool = False) -> bool:
+        """
+        Agrega (o reemplaza) una entrada. Las parroquias sin cantón no se pueden ubicar y se ignoran.
+
+        Returns:
+            True si el nomenclátor cambió
+        """
+        provincia, canton, parroquia = self.nombres(provincia, canton, parroquia)
+        if not provincia or not coordenadas or (parroquia and not canton):
+            return False
+        clave = normalizar_clave(provincia, canton, parroquia)
+        if clave in self._coordenadas and not reemplazar:
+            return False
+
+        valor = [float(coordenadas[0]), float(coordenadas[1])]
+        datos_provincia = self.datos['provincias'].setdefault(provincia, {'cantones': {}})
+        if not canton:
+            datos_provincia['coordenadas'] = valor
+        else:
+            datos_canton = datos_provincia.setdefault('cantones', {}).setdefault(canton, {})
+            if parroquia:
+                datos_canton.setdefault('parroquias', {})[parroquia] = valor
+            else:
+                datos_canton['coordenadas'] = valor
+
+        self._coordenadas[clave] = tuple(valor)
+        return True
+
+    def importar_cache(self, cache: CacheGeocodificacion, reemplazar: bool = False) -> int:
+        """
+        Agrega las coordenadas ya pagadas a la Geocoding API que guarda el cache.
+
+        Returns:
+            Número de entradas agregadas
+        """
+        agregadas = 0
+        for clave, coordenadas in cache.entradas().items():
+            parroquia, canton, provincia = (clave.split('|') + ['', '', ''])[:3]
+            agregadas += self.agregar(provincia, canton, parroquia, coordenadas, reemplazar=reemplazar)
+        return agregadas
+
+    def importar_csv(self, archivo: str, reemplazar: bool = False) -> int:
+        """
+        Agrega centroides desde un CSV (p. ej. la DPA del INEC) con las columnas
+        provincia, canton, parroquia (opcional), latitud y longitud.
+
+        Returns:
+            Número de entradas agregadas
+        """
+        agregadas = 0
+        with open(archivo, 'r', encoding='utf-8-sig', newline='') as f:
+            for fila in csv.DictReader(f):
+                fila = {normalizar_texto(columna).lower(): valor for columna, valor in fila.items() if columna}
+                try:
+                    coordenadas = (float(fila['latitud']), float(fila['longitud']))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                agregadas += self.agregar(fila.get('provincia'), fila.get('canton'), fila.get('parroquia'),
+                                          coordenadas, reemplazar=reemplazar)
+        return agregadas
+
+    def guardar(self, ruta: str = None):
+        """Escribe el nomenclátor ordenado alfabéticamente (diffs legibles en el repositorio)."""
+        with open(ruta or self.ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.datos, f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.write('\n')
+
+    def resumen(self) -> Dict[str, int]:
+        """Cantidad de entradas por nivel."""
+        niveles = {'provincias': 0, 'cantones': 0, 'parroquias': 0}
+        for clave in self._coordenadas:
+            parroquia, canton, _ = clave.split('|')
+            niveles['parroquias' if parroquia else 'cantones' if canton else 'provincias'] += 1
+        return niveles
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Nomenclátor local de provincias, cantones y parroquias")
+    parser.add_argument('--buscar', nargs='+', metavar='NOMBRE', help="Provincia [cantón [parroquia]]")
+    parser.add_argument('--importar-cache', nargs='?', const=RUTA_CACHE_DEFECTO, metavar='SQLITE',
+                        help="Agregar las coordenadas del cache de geocodificación")
+    parser.add_argument('--importar-csv', metavar='CSV', help="Agregar centroides desde un CSV")
+    parser.add_argument('--reemplazar', action='store_true', help="Sobrescribir entradas existentes al importar")
+    parser.add_argument('--nomenclator', default=RUTA_NOMENCLATOR, help="Archivo JSON del nomenclátor")
+    args = parser.parse_args()
+
+    nomenclator = NomenclatorEcuador(args.nomenclator)
+
+    if args.buscar:
+        partes = (args.buscar + [None, None])[:3]
+        exactas = nomenclator.resolver(*partes)
+        coordenadas = exactas or nomenclator.aproximar(*partes)
+        nombres = ' | '.join(nombre for nombre in nomenclator.nombres(*partes) if nombre)
+        if coordenadas:
+            nivel = "exacta" if exactas else "aproximada (nivel superior)"
+            print(f"📍 {nombres}: {coordenadas[0]:.6f}, {coordenadas[1]:.6f}  ({nivel})")
+        else:
+            print(f"❌ {nombres}: no está en el nomenclátor")
+        return
+
+    agregadas = 0
+    if args.importar_cache:
+        if not os.path.exists(args.importar_cache):
+            print(f"❌ No existe el cache {args.importar_cache}")
+            return
+        cache = CacheGeocodificacion(args.importar_cache)
+        agregadas += nomenclator.importar_cache(cache, reemplazar=args.reemplazar)
+        cache.cerrar()
+    if args.importar_csv:
+        agregadas += nomenclator.importar_csv(args.importar_csv, reemplazar=args.reemplazar)
+    if args.importar_cache or args.importar_csv:
+        nomenclator.guardar()
+        print(f"✅ {agregadas:,} entradas agregadas a {nomenclator.ruta}")
+
+    niveles = nomenclator.resumen()
+    print(f"🗂️  Nomenclátor: {niveles['provincias']:,} provincias, {niveles['cantones']:,} cantones, "
+          f"{niveles['parroquias']:,} parroquias")
+
+
+if __name__ == "__main__":
+    main()
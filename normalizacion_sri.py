@@ -0,0 +1,76 @@
+"""
+Normalización de nombres y ubicaciones del catastro SRI.
+Las claves plegadas (mayúsculas, sin tildes, espacios colapsados) se calculan una
+sola vez al ingerir cada Excel y se guardan como columnas categóricas `<COLUMNA>_NORM`;
+los filtros y cruces comparan esas claves de forma exacta en lugar de repetir
+.upper().strip() en cada llamada.
+"""
+
+import unicodedata
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columnas de texto que llevan su clave normalizada
+COLUMNAS_NORMALIZADAS = [
+    'RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL',
+    'DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST', 'DESCRIPCION_PARROQUIA_EST'
+]
+
+SUFIJO_NORMALIZADA = '_NORM'
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Mayúsculas, sin tildes y espacios colapsados: ' Galápagos ' → 'GALAPAGOS' ('' si está vacío)."""
+    if texto is None or (isinstance(texto, float) and np.isnan(texto)):
+        return ''
+    texto = str(texto).strip()
+    if not texto or texto.lower() == 'nan':
+        return ''
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.upper().split())
+
+
+def columna_normalizada(columna: str) -> str:
+    """Nombre de la columna con la clave normalizada (DESCRIPCION_PROVINCIA_EST → ..._NORM)."""
+    return columna + SUFIJO_NORMALIZADA
+
+
+def es_columna_normalizada(columna: str) -> bool:
+    """True si la columna es una clave derivada (no viene del Excel)."""
+    return str(columna).endswith(SUFIJO_NORMALIZADA)
+
+
+def con_normalizadas(columnas: List[str], disponibles: List[str]) -> List[str]:
+    """Agrega a una lista de columnas las claves normalizadas de las que estén disponibles."""
+    extra = [columna_normalizada(c) for c in columnas
+             if c in COLUMNAS_NORMALIZADAS and columna_normalizada(c) in disponibles]
+    return list(columnas) + [c for c in extra if c not in columnas]
+
+
+def normalizar_serie(serie: pd.Series) -> pd.Series:
+    """
+    Clave normalizada de cada valor, como categórica (NaN donde el texto está vacío).
+
+    Cada valor distinto se normaliza una sola vez (en categóricas, solo las categorías).
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, unicos = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+
+    claves_unicas = [normalizar_texto(valor) for valor in unicos]
+    codigos_claves, categorias = pd.factorize(pd.Series(claves_unicas, dtype=object).replace('', None))
+    # -1 (vacío o sin clave) se mantiene como -1 al reindexar
+    nuevos = np.append(codigos_claves, -1)[codigos]
+    return pd.Series(pd.Categorical.from_codes(nuevos, categories=categorias.astype(object)), index=serie.index)
+
+
+def agregar_columnas_normalizadas(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega (o recalcula) `<COLUMNA>_NORM` para cada columna de COLUMNAS_NORMALIZADAS presente."""
+    for columna in COLUMNAS_NORMALIZADAS:
+        if columna in df.columns:
+            df[columna_normalizada(columna)] = normalizar_serie(df[columna])
+    return df
@@ -1,23 +1,25 @@
 """Script rápido para obtener ejemplos de librerías activas"""
-import pandas as pd
+from consulta_ruc import FUENTES_ENRIQUECIMIENTO, AlmacenRUC, normalizar_ruc
 
-df = pd.read_excel('librerias_detalle.xlsx')
-activas = df[df['ESTADO_CONTRIBUYENTE'] == 'ACTIVO'].head(5)
+# Solo la fuente de detalle (se recarga si cambió el Excel); el catastro no hace falta
+almacen = AlmacenRUC()
+almacen.cargar_fuente('detalle', FUENTES_ENRIQUECIMIENTO['detalle'])
+activas = almacen.listar(fuente='detalle', estado='ACTIVO', limite=5)
+almacen.cerrar()
 
 print('='*70)
 print('EJEMPLOS DE LIBRERÍAS ACTIVAS PARA CONSULTAR EN SRI')
 print('='*70)
 
-for idx, row in activas.iterrows():
+for idx, row in enumerate(activas):
     print(f'\n📚 Ejemplo {idx + 1}:')
-    print(f'   RUC: {row["NUMERO_RUC"]}')
+    print(f'   RUC: {normalizar_ruc(row["NUMERO_RUC"])}')
     print(f'   Nombre: {row["RAZON_SOCIAL"]}')
     print(f'   Provincia: {row["DESCRIPCION_PROVINCIA_EST"]}')
     print(f'   Cantón: {row["DESCRIPCION_CANTON_EST"]}')
     print(f'   Código CIIU: {row["CODIGO_CIIU"]}')
-    if pd.notna(row.get('NOMBRE_FANTASIA_COMERCIAL')):
+    if row.get('NOMBRE_FANTASIA_COMERCIAL') is not None:
         print(f'   Nombre Fantasía: {row["NOMBRE_FANTASIA_COMERCIAL"]}')
     print('-'*70)
 
 print('\n✅ Usa cualquiera de estos RUCs para el ejemplo en la guía')
-
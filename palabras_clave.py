@@ -0,0 +1,153 @@
+"""
+Búsqueda de palabras clave en nombres de establecimientos.
+Todas las palabras se buscan en una sola pasada con un autómata Aho–Corasick que
+avanza carácter a carácter sobre todos los nombres a la vez (numpy). Los nombres se
+comparan sin tildes y en minúsculas, así 'librería' y 'libreria' son la misma
+palabra y agregar palabras no agrega recorridos de la columna.
+"""
+
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+# Los caracteres hasta aquí (Latin-1, Latin extendido y diacríticos) se pliegan con
+# una tabla; los demás no pueden formar parte de una palabra clave
+LIMITE_TABLA = 0x0370
+
+# Nombres procesados por bloque (acota la memoria de la matriz de caracteres)
+FILAS_POR_BLOQUE = 65536
+
+_OTRO = 0      # carácter que no aparece en ninguna palabra: vuelve a la raíz
+_IGNORAR = 1   # marca diacrítica suelta (texto en NFD): no cambia el estado
+
+
+def plegar_palabra(texto: str) -> str:
+    """Minúsculas y sin tildes (NFKD sin marcas diacríticas): 'Librería' → 'libreria'."""
+    texto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def plegar_texto(textos: pd.Series) -> pd.Series:
+    """plegar_palabra sobre una columna (los valores repetidos se pliegan una vez)."""
+    codigos, unicos = pd.factorize(textos.astype(str))
+    plegados = np.array([plegar_palabra(t) for t in unicos], dtype=object)
+    return pd.Series(plegados[codigos], index=textos.index, dtype=object)
+
+
+class BuscadorPalabras:
+    """Marca qué palabras clave aparecen en cada texto, con un solo recorrido."""
+
+    def __init__(self, palabras: Iterable[str]):
+        """
+        Compila el autómata.
+
+        Args:
+            palabras: Palabras o fragmentos a buscar (se comparan sin tildes ni mayúsculas;
+                las variantes con y sin tilde se unifican)
+        """
+        self.palabras: List[str] = list(dict.fromkeys(plegar_palabra(p) for p in palabras if p))
+        if not self.palabras:
+            raise ValueError("Se necesita al menos una palabra clave")
+
+        # Clase de cada carácter: 0 = otro, 1 = ignorar, 2.. = letras de las palabras
+        alfabeto = sorted(set(''.join(self.palabras)))
+        clase_letra = {letra: i + 2 for i, letra in enumerate(alfabeto)}
+        self._clases = np.zeros(LIMITE_TABLA, dtype=np.int32)
+        for punto in range(LIMITE_TABLA):
+            caracter = chr(punto)
+            if unicodedata.combining(caracter):
+                self._clases[punto] = _IGNORAR
+            else:
+                plegado = plegar_palabra(caracter)
+                if len(plegado) == 1 and plegado in clase_letra:
+                    self._clases[punto] = clase_letra[plegado]
+        self._transiciones, self._salidas = self._compilar(clase_letra, len(alfabeto) + 2)
+
+    def _compilar(self, clase_letra: Dict[str, int], total_clases: int):
+        """Trie + enlaces de falla → tabla completa de transiciones y bits de salida por estado."""
+        bloques = (len(self.palabras) + 63) // 64
+        hijos = [{}]
+        salidas = [np.zeros(bloques, dtype=np.uint64)]
+        for k, palabra in enumerate(self.palabras):
+            estado = 0
+            for letra in palabra:
+                clase = clase_letra[letra]
+                if clase not in hijos[estado]:
+                    hijos.append({})
+                    salidas.append(np.zeros(bloques, dtype=np.uint64))
+                    hijos[estado][clase] = len(hijos) - 1
+                estado = hijos[estado][clase]
+            salidas[estado][k // 64] |= np.uint64(1) << np.uint64(k % 64)
+
+        transiciones = np.zeros((len(hijos), total_clases), dtype=np.int32)
+        transiciones[:, _IGNORAR] = np.arange(len(hijos))
+        falla = [0] * len(hijos)
+        cola = deque()
+        for clase, hijo in hijos[0].items():
+            transiciones[0, clase] = hijo
+            cola.append(hijo)
+        # Recorrido por niveles: cada estado hereda las transiciones y salidas de su falla
+        while cola:
+            estado = cola.popleft()
+            salidas[estado] |= salidas[falla[estado]]
+            for clase in range(2, total_clases):
+                hijo = hijos[estado].get(clase)
+                if hijo is None:
+                    transiciones[estado, clase] = transiciones[falla[estado], clase]
+                else:
+                    falla[hijo] = transiciones[falla[estado], clase] if estado else 0
+                    transiciones[estado, clase] = hijo
+                    cola.append(hijo)
+        return transiciones, np.array(salidas, dtype=np.uint64)
+
+    def _buscar_bloque(self, textos: List[str]) -> np.ndarray:
+        """Bits de salida (filas × bloques de 64 palabras) de un bloque de textos."""
+        encontrados = np.zeros((len(textos), self._salidas.shape[1]), dtype=np.uint64)
+        caracteres = np.array(textos, dtype=str)
+        ancho = caracteres.dtype.itemsize // 4
+        if ancho == 0:
+            return encontrados
+        # Una fila por posición de carácter: el autómata avanza en todas las filas a la vez
+        puntos = caracteres.view(np.uint32).reshape(len(textos), ancho).T
+        clases = np.where(puntos < LIMITE_TABLA, self._clases[np.minimum(puntos, LIMITE_TABLA - 1)], _OTRO)
+
+        estado = np.zeros(len(textos), dtype=np.int32)
+        for columna in clases:
+            estado = self._transiciones[estado, columna]
+            encontrados |= self._salidas[estado]
+        return encontrados
+
+    def coincidencias(self, textos: pd.Series) -> pd.DataFrame:
+        """
+        Matriz booleana texto × palabra (True si la palabra aparece en el texto).
+
+        Los textos repetidos se buscan una sola vez.
+
+        Args:
+            textos: Nombres (razón social, nombre comercial...); los vacíos no coinciden
+
+        Returns:
+            DataFrame con el índice de `textos` y una columna por palabra
+        """
+        codigos, unicos = pd.factorize(textos, use_na_sentinel=True)
+        unicos = np.asarray(unicos, dtype=object)
+        bits = np.zeros((len(unicos), self._salidas.shape[1]), dtype=np.uint64)
+        for inicio in range(0, len(unicos), FILAS_POR_BLOQUE):
+            bloque = [str(t) for t in unicos[inicio:inicio + FILAS_POR_BLOQUE]]
+            bits[inicio:inicio + len(bloque)] = self._buscar_bloque(bloque)
+
+        columnas = {}
+        presentes = codigos >= 0
+        for k, palabra in enumerate(self.palabras):
+            unico = ((bits[:, k // 64] >> np.uint64(k % 64)) & np.uint64(1)).astype(bool)
+            columna = np.zeros(len(textos), dtype=bool)
+            columna[presentes] = unico[codigos[presentes]]
+            columnas[palabra] = columna
+        return pd.DataFrame(columnas, index=textos.index)
+
+    def contar(self, textos: pd.Series) -> Dict[str, int]:
+        """Cantidad de textos que contienen cada palabra."""
+        return {palabra: int(total) for palabra, total in self.coincidencias(textos).sum().items()}
@@ -0,0 +1,169 @@
+// Capa de clusters de los mapas: usa el índice jerárquico precalculado en Python
+// (clusters_mapa.py) y solo mantiene en el mapa los marcadores de los clusters que
+// están a la vista. Necesita google.maps.
+class CapaClusters {
+    constructor(map, indice, puntos, crearMarcadorPunto) {
+        this.map = map;
+        this.indice = indice;
+        this.puntos = puntos;
+        this.crearMarcadorPunto = crearMarcadorPunto;
+        this.visibles = new Uint32Array((puntos.length + 31) >>> 5).fill(0xFFFFFFFF);
+        this.pesos = puntos.map(punto => punto.cantidad);
+        this.asignaciones = new Map();        // nivel → cluster de cada ubicación
+        this.conteos = new Map();             // nivel → conteos con el filtro actual
+        this.marcadoresPunto = new Map();     // ubicación → su marcador (se crea al verse)
+        this.marcadoresCluster = new Map();   // 'nivel:cluster' → marcador
+        this.enMapa = new Map();              // clave → marcador mostrado ahora
+        map.addListener('idle', () => this.renderizar());
+    }
+
+    nivel(zoom) {
+        // null = más cerca que zoom_max: se ven las ubicaciones sueltas
+        const z = Math.round(zoom);
+        if (z > this.indice.zoom_max) {
+            return null;
+        }
+        return Math.max(z, this.indice.zoom_min) - this.indice.zoom_min;
+    }
+
+    asignacion(k) {
+        if (!this.asignaciones.has(k)) {
+            const padre = this.indice.niveles[k].padre;
+            const ultimo = k === this.indice.niveles.length - 1;
+            const siguiente = ultimo ? null : this.asignacion(k + 1);
+            const asignacion = new Int32Array(this.puntos.length);
+            for (let i = 0; i < asignacion.length; i++) {
+                asignacion[i] = padre[ultimo ? i : siguiente[i]];
+            }
+            this.asignaciones.set(k, asignacion);
+        }
+        return this.asignaciones.get(k);
+    }
+
+    conteo(k) {
+        // Una pasada por las ubicaciones (sin tocar el DOM) por nivel y filtro
+        if (!this.conteos.has(k)) {
+            const total = this.indice.niveles[k].lat.length;
+            const asignacion = this.asignacion(k);
+            const conteo = {
+                ubicaciones: new Int32Array(total),
+                establecimientos: new Float64Array(total),
+                ultima: new Int32Array(total)
+            };
+            for (let i = 0; i < this.puntos.length; i++) {
+                if (this.visible(i)) {
+                    const c = asignacion[i];
+                    conteo.ubicaciones[c]++;
+                    conteo.establecimientos[c] += this.pesos[i];
+                    conteo.ultima[c] = i;
+                }
+            }
+            this.conteos.set(k, conteo);
+        }
+        return this.conteos.get(k);
+    }
+
+    visible(i) {
+        return (this.visibles[i >>> 5] >>> (i & 31)) & 1;
+    }
+
+    filtrar(visibles, pesos) {
+        // visibles: bits (Uint32Array) de las ubicaciones que cumplen los filtros;
+        // pesos[i]: establecimientos de la ubicación i que se cuentan en los clusters
+        this.visibles = visibles;
+        this.pesos = pesos || this.puntos.map(punto => punto.cantidad);
+        this.conteos.clear();
+        this.renderizar();
+    }
+
+    renderizar() {
+        const k = this.nivel(this.map.getZoom());
+        const limites = this.map.getBounds();
+        const aLaVista = (lat, lng) => !limites || limites.contains({ lat: lat, lng: lng });
+        const deseados = new Map();
+
+        if (k === null) {
+            this.puntos.forEach((punto, i) => {
+                if (this.visible(i) && aLaVista(punto.lat, punto.lng)) {
+                    deseados.set('p' + i, () => this.marcadorPunto(i));
+                }
+            });
+        } else {
+            const nivel = this.indice.niveles[k];
+            const conteo = this.conteo(k);
+            for (let c = 0; c < nivel.lat.length; c++) {
+                const ubicaciones = conteo.ubicaciones[c];
+                if (ubicaciones === 1) {
+                    // Cluster con una sola ubicación visible: se muestra la ubicación
+                    const i = conteo.ultima[c];
+                    if (aLaVista(this.puntos[i].lat, this.puntos[i].lng)) {
+                        deseados.set('p' + i, () => this.marcadorPunto(i));
+                    }
+                } else if (ubicaciones > 1 && aLaVista(nivel.lat[c], nivel.lng[c])) {
+                    deseados.set(k + ':' + c, () => this.marcadorCluster(k, c, ubicaciones, conteo.establecimientos[c]));
+                }
+            }
+        }
+
+        // Solo se agregan o quitan los marcadores que cambiaron
+        this.enMapa.forEach((marker, clave) => {
+            if (!deseados.has(clave)) {
+                marker.setMap(null);
+                this.enMapa.delete(clave);
+            }
+        });
+        deseados.forEach((obtener, clave) => {
+            const marker = obtener();
+            if (!this.enMapa.has(clave)) {
+                marker.setMap(this.map);
+                this.enMapa.set(clave, marker);
+            }
+        });
+    }
+
+    marcadorPunto(i) {
+        if (!this.marcadoresPunto.has(i)) {
+            this.marcadoresPunto.set(i, this.crearMarcadorPunto(this.puntos[i], i));
+        }
+        return this.marcadoresPunto.get(i);
+    }
+
+    marcadorCluster(k, c, ubicaciones, establecimientos) {
+        const clave = k + ':' + c;
+        const nivel = this.indice.niveles[k];
+        let marker = this.marcadoresCluster.get(clave);
+        if (!marker) {
+            const centro = { lat: nivel.lat[c], lng: nivel.lng[c] };
+            marker = new google.maps.Marker({ position: centro, zIndex: 1000 });
+            marker.addListener('click', () => {
+                this.map.setCenter(centro);
+                this.map.setZoom(Math.max(nivel.expansion[c], this.map.getZoom() + 1));
+            });
+            this.marcadoresCluster.set(clave, marker);
+        }
+
+        // Los conteos dependen del filtro, así que se actualizan en cada render
+        let color = '#00AA00';
+        if (establecimientos > 1000) {
+            color = '#FF0000';
+        } else if (establecimientos > 500) {
+            color = '#FF8800';
+        } else if (establecimientos > 100) {
+            color = '#0000FF';
+        }
+        const texto = establecimientos >= 10000
+            ? Math.round(establecimientos / 1000) + 'k'
+            : establecimientos.toLocaleString();
+        marker.setIcon({
+            path: google.maps.SymbolPath.CIRCLE,
+            scale: 14 + 3 * Math.log10(Math.max(establecimientos, 1)),
+            fillColor: color,
+            fillOpacity: 0.8,
+            strokeColor: '#FFFFFF',
+            strokeWeight: 2
+        });
+        marker.setLabel({ text: texto, color: '#FFFFFF', fontSize: '12px', fontWeight: 'bold' });
+        marker.setTitle(ubicaciones.toLocaleString() + ' ubicaciones (' + establecimientos.toLocaleString() + ' establecimientos) - clic para acercar');
+        return marker;
+    }
+}
@@ -0,0 +1,196 @@
+// Consulta en vivo del mapa filtrado: servida por servidor_local.py (consultas_catalogo.py),
+// la página pide al catálogo completo las ubicaciones de cualquier combinación de filtros
+// sin regenerar el HTML. Usa map, capaClusters, bitsVisibles, filtroActual,
+// marcadorTablaActual, pesosEstablecimientos y actualizarEstadisticas de la página, y
+// escaparHTML (escapar_html.js) para los textos del catálogo.
+const consultaVivo = { activa: false, marcadores: [], numero: 0, parametros: null };
+const FILAS_POR_PAGINA_VIVO = 200;
+
+function iniciarConsultaVivo() {
+    // Abierto como archivo (file://) no hay API: el panel queda oculto
+    if (!location.protocol.startsWith('http')) {
+        return;
+    }
+    fetch('/api/agregados?por=estado').then(respuesta => {
+        if (respuesta.ok) {
+            document.getElementById('consulta-vivo').style.display = 'flex';
+        }
+    }).catch(() => {});
+    map.addListener('idle', () => {
+        if (consultaVivo.activa && document.getElementById('vivo-vista').checked) {
+            consultarEnVivo();
+        }
+    });
+}
+
+function parametrosConsultaVivo() {
+    const parametros = new URLSearchParams();
+    filtroActual.provincias.forEach(provincia => parametros.append('provincia', provincia));
+    // CIIU escrito (códigos o prefijos) o, si no, los seleccionados en el header
+    const ciiu = document.getElementById('vivo-ciiu').value.trim();
+    if (ciiu) {
+        parametros.append('ciiu', ciiu);
+    } else if (filtroActual.codigos.length > 0) {
+        parametros.append('ciiu', filtroActual.codigos.join(','));
+    }
+    const estado = document.getElementById('vivo-estado').value;
+    if (estado) {
+        parametros.append('estado', estado);
+    }
+    const limites = map.getBounds();
+    if (document.getElementById('vivo-vista').checked && limites) {
+        const sw = limites.getSouthWest();
+        const ne = limites.getNorthEast();
+        parametros.append('bbox', [sw.lat(), sw.lng(), ne.lat(), ne.lng()].map(v => v.toFixed(5)).join(','));
+    }
+    return parametros;
+}
+
+function pedirJSON(url) {
+    return fetch(url).then(respuesta => respuesta.json().then(datos => {
+        if (!respuesta.ok) {
+            throw new Error(datos.error || 'HTTP ' + respuesta.status);
+        }
+        return datos;
+    }));
+}
+
+function consultarEnVivo() {
+    const parametros = parametrosConsultaVivo();
+    const numero = ++consultaVivo.numero;
+    const resultado = document.getElementById('vivo-resultado');
+    resultado.textContent = '⏳ Consultando...';
+
+    pedirJSON('/api/ubicaciones?' + parametros).then(datos => {
+        // Si mientras tanto salió otra consulta, esta respuesta ya no sirve
+        if (numero !== consultaVivo.numero) {
+            return;
+        }
+        if (!consultaVivo.activa) {
+            // Se ocultan los clusters del mapa generado (ninguna ubicación visible)
+            consultaVivo.activa = true;
+            capaClusters.filtrar(new Uint32Array(bitsVisibles.length));
+        }
+        consultaVivo.parametros = parametros;
+        dibujarUbicacionesVivo(datos.ubicaciones);
+
+        const conCoordenadas = datos.ubicaciones.filter(u => u.lat !== null).length;
+        document.querySelector('.stat-item .number').textContent = conCoordenadas;
+        document.querySelectorAll('.stat-item .number')[1].textContent = datos.total.toLocaleString();
+        resultado.textContent = `⚡ ${datos.total.toLocaleString()} establecimientos en ` +
+            `${datos.ubicaciones.length.toLocaleString()} ubicaciones (${datos.milisegundos} ms)`;
+    }).catch(error => {
+        if (numero === consultaVivo.numero) {
+            resultado.textContent = '❌ ' + error.message;
+        }
+    });
+}
+
+function dibujarUbicacionesVivo(ubicaciones) {
+    consultaVivo.marcadores.forEach(marker => marker.setMap(null));
+    consultaVivo.marcadores = [];
+    ubicaciones.forEach(ubicacion => {
+        if (ubicacion.lat === null) {
+            return;
+        }
+        // Mismos colores que los marcadores del mapa generado
+        let color = 'green';
+        if (ubicacion.cantidad > 1000) {
+            color = 'red';
+        } else if (ubicacion.cantidad > 500) {
+            color = 'orange';
+        } else if (ubicacion.cantidad > 100) {
+            color = 'blue';
+        }
+        const titulo = [ubicacion.parroquia, ubicacion.canton, ubicacion.provincia].filter(n => n).join(', ');
+        const marker = new google.maps.Marker({
+            position: { lat: ubicacion.lat, lng: ubicacion.lng },
+            map: map,
+            title: titulo + ' (' + ubicacion.cantidad.toLocaleString() + ' establecimientos)',
+            icon: {
+                url: 'http://maps.google.com/mapfiles/ms/icons/' + color + '-dot.png',
+                scaledSize: new google.maps.Size(32, 32)
+            }
+        });
+        marker.addListener('click', () => mostrarEstablecimientosVivo(ubicacion, titulo, 0));
+        consultaVivo.marcadores.push(marker);
+    });
+}
+
+function mostrarEstablecimientosVivo(ubicacion, titulo, desde) {
+    // La tabla pasa a ser de la consulta en vivo (los filtros del mapa generado no la tocan)
+    marcadorTablaActual = null;
+    detalleTablaActual = null;
+    const tablaDetalle = document.getElementById('tabla-detalle');
+    const contenidoTabla = document.getElementById('contenido-tabla');
+    document.getElementById('titulo-tabla').textContent = `Detalle de Establecimientos - ${titulo}`;
+    if (desde === 0) {
+        contenidoTabla.innerHTML = '<p style="color: #666;">⏳ Cargando establecimientos...</p>';
+        tablaDetalle.classList.add('visible');
+    }
+
+    const parametros = new URLSearchParams(consultaVivo.parametros);
+    ['provincia', 'bbox'].forEach(nombre => parametros.delete(nombre));
+    parametros.set('ubicacion', ubicacion.id);
+    parametros.set('desde', desde);
+    parametros.set('limite', FILAS_POR_PAGINA_VIVO);
+
+    pedirJSON('/api/establecimientos?' + parametros).then(datos => {
+        const filas = datos.establecimientos.map(est => `
+            <tr>
+                <td>${escaparHTML(est.ruc)}</td>
+                <td>${escaparHTML(est.nombre || 'N/A')}</td>
+                <td>${escaparHTML(est.codigo_ciiu || 'N/A')}</td>
+                <td style="color: ${est.estado === 'SUSPENDIDO' ? '#dc3545' : est.estado === 'N/A' ? '#666' : '#28a745'}; font-weight: 600;">${escaparHTML(est.estado)}</td>
+                <td>${escaparHTML(est.actividad || 'N/A')}</td>
+            </tr>`).join('');
+
+        if (desde === 0) {
+            const estados = Object.entries(ubicacion.estados).map(([estado, n]) => `${escaparHTML(estado)}: ${n.toLocaleString()}`).join(' · ');
+            contenidoTabla.innerHTML = `
+                <div class="info-ubicacion">
+                    <p><strong>📍 Ubicación:</strong> ${escaparHTML(titulo)}</p>
+                    <p><strong>Total Establecimientos:</strong> ${datos.total.toLocaleString()} (${estados})</p>
+                    <p><strong>Consulta:</strong> ${datos.milisegundos} ms en el servidor</p>
+                </div>
+                <table class="tabla-establecimientos">
+                    <thead>
+                        <tr>
+                            <th>RUC</th>
+                            <th>Nombre / Razón Social</th>
+                            <th>Código CIIU</th>
+                            <th>Estado</th>
+                            <th>Actividad Económica</th>
+                        </tr>
+                    </thead>
+                    <tbody id="filas-vivo"></tbody>
+                </table>
+                <p id="mas-vivo"></p>`;
+        }
+        document.getElementById('filas-vivo').insertAdjacentHTML('beforeend', filas);
+
+        // Paginado: las filas siguientes se piden solo si se quieren ver
+        const siguiente = desde + datos.establecimientos.length;
+        const mas = document.getElementById('mas-vivo');
+        mas.innerHTML = '';
+        if (siguiente < datos.total) {
+            const boton = document.createElement('button');
+            boton.className = 'btn-filtro';
+            boton.textContent = `⬇️ Ver más (${siguiente.toLocaleString()} de ${datos.total.toLocaleString()})`;
+            boton.onclick = () => mostrarEstablecimientosVivo(ubicacion, titulo, siguiente);
+            mas.appendChild(boton);
+        }
+    }).catch(error => {
+        contenidoTabla.innerHTML = `<p style="color: #dc3545;">❌ ${escaparHTML(error.message)}</p>`;
+    });
+}
+
+function volverAlMapaGenerado() {
+    consultaVivo.activa = false;
+    consultaVivo.numero++;
+    consultaVivo.marcadores.forEach(marker => marker.setMap(null));
+    consultaVivo.marcadores = [];
+    document.getElementById('vivo-resultado').textContent = '';
+    capaClusters.filtrar(bitsVisibles, pesosEstablecimientos(filtroActual.codigos));
+    actualizarEstadisticas();
+}
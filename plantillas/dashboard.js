@@ -0,0 +1,134 @@
+// Dashboard de librerías (generar_dashboard.py). Los datos (provinciasData, top10Data,
+// distribucionResenas) llegan antes en dashboard_librerias_datos/datos.js.
+
+// Colores
+const colors = ['#667eea', '#764ba2', '#f093fb', '#4facfe', '#00f2fe', '#43e97b', '#fa709a'];
+
+// Gráfico de Ventas por Provincia
+const ctxProvincias = document.getElementById('chartProvincias').getContext('2d');
+new Chart(ctxProvincias, {
+    type: 'bar',
+    data: {
+        labels: provinciasData.map(p => p.provincia),
+        datasets: [{
+            label: 'Venta Mensual (USD)',
+            data: provinciasData.map(p => p.venta_mensual),
+            backgroundColor: colors[0],
+            borderColor: colors[0],
+            borderWidth: 2
+        }]
+    },
+    options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        plugins: {
+            legend: { display: false },
+            tooltip: {
+                callbacks: {
+                    label: function(context) {
+                        return '$' + context.parsed.y.toLocaleString('es-ES', {maximumFractionDigits: 0}) + ' USD';
+                    }
+                }
+            }
+        },
+        scales: {
+            y: {
+                beginAtZero: true,
+                ticks: {
+                    callback: function(value) {
+                        return '$' + value.toLocaleString('es-ES', {maximumFractionDigits: 0});
+                    }
+                }
+            }
+        }
+    }
+});
+
+// Gráfico de Distribución de Reseñas
+const ctxResenas = document.getElementById('chartResenas').getContext('2d');
+new Chart(ctxResenas, {
+    type: 'doughnut',
+    data: {
+        labels: Object.keys(distribucionResenas),
+        datasets: [{
+            data: Object.values(distribucionResenas),
+            backgroundColor: colors.slice(0, 4),
+            borderWidth: 2,
+            borderColor: '#fff'
+        }]
+    },
+    options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        plugins: {
+            legend: {
+                position: 'bottom'
+            }
+        }
+    }
+});
+
+// Gráfico de Cantidad por Provincia
+const ctxCantidad = document.getElementById('chartCantidad').getContext('2d');
+new Chart(ctxCantidad, {
+    type: 'pie',
+    data: {
+        labels: provinciasData.map(p => p.provincia),
+        datasets: [{
+            data: provinciasData.map(p => p.cantidad),
+            backgroundColor: colors,
+            borderWidth: 2,
+            borderColor: '#fff'
+        }]
+    },
+    options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        plugins: {
+            legend: {
+                position: 'bottom'
+            }
+        }
+    }
+});
+
+// Gráfico Top 10
+const ctxTop10 = document.getElementById('chartTop10').getContext('2d');
+new Chart(ctxTop10, {
+    type: 'bar',
+    data: {
+        labels: top10Data.map(l => l.nombre.substring(0, 20) + '...'),
+        datasets: [{
+            label: 'Reseñas',
+            data: top10Data.map(l => l.resenas),
+            backgroundColor: colors[1],
+            borderColor: colors[1],
+            borderWidth: 2
+        }]
+    },
+    options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        indexAxis: 'y',
+        plugins: {
+            legend: { display: false }
+        },
+        scales: {
+            x: {
+                beginAtZero: true
+            }
+        }
+    }
+});
+
+// Llenar tabla
+const tabla = document.getElementById('tablaTop10');
+top10Data.forEach((lib, index) => {
+    const row = tabla.insertRow();
+    row.insertCell(0).textContent = index + 1;
+    row.insertCell(1).textContent = lib.nombre;
+    row.insertCell(2).textContent = lib.resenas.toLocaleString();
+    row.insertCell(3).innerHTML = '⭐ ' + lib.calificacion;
+    row.insertCell(4).textContent = '$' + lib.venta_mensual.toLocaleString('es-ES', {maximumFractionDigits: 0});
+    row.insertCell(5).textContent = lib.canton;
+});
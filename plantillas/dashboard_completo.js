@@ -0,0 +1,244 @@
+// Dashboard completo (generar_dashboard_completo.py). Los datos (provinciasData, top10Data,
+// top20VentasData, todasLibreriasData, distribucionResenas) llegan antes en
+// dashboard_completo_datos/datos.js y TablaVirtual en su propio recurso (tabla_virtual.py).
+let tablaTodas;
+
+// Navegación de pestañas
+function mostrarTab(tabId) {
+    // Ocultar todas las pestañas
+    document.querySelectorAll('.tab-content').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    
+    // Remover active de todos los botones
+    document.querySelectorAll('.tab-button').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    
+    // Mostrar la pestaña seleccionada
+    document.getElementById(tabId).classList.add('active');
+    
+    // Activar el botón correspondiente
+    event.target.classList.add('active');
+    
+    // Inicializar gráficos si es necesario
+    if (tabId === 'graficos') {
+        inicializarGraficos();
+    }
+    
+    // La tabla virtual se dibuja según la altura visible, que oculta era cero
+    if (tabId === 'todas-librerias') {
+        tablaTodas.renderizar();
+    }
+}
+
+// Inicializar gráficos
+let charts = {};
+function inicializarGraficos() {
+    if (charts.provincias) return; // Ya están inicializados
+    
+    const colors = ['#667eea', '#764ba2', '#f093fb', '#4facfe', '#00f2fe', '#43e97b', '#fa709a'];
+    
+    // Gráfico de Ventas por Provincia
+    const ctxProvincias = document.getElementById('chartProvincias').getContext('2d');
+    charts.provincias = new Chart(ctxProvincias, {
+        type: 'bar',
+        data: {
+            labels: provinciasData.map(p => p.provincia),
+            datasets: [{
+                label: 'Venta Mensual (USD)',
+                data: provinciasData.map(p => p.venta_mensual),
+                backgroundColor: colors[0],
+                borderColor: colors[0],
+                borderWidth: 2
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { display: false },
+                tooltip: {
+                    callbacks: {
+                        label: function(context) {
+                            return '$' + context.parsed.y.toLocaleString('es-ES', {maximumFractionDigits: 0}) + ' USD';
+                        }
+                    }
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    ticks: {
+                        callback: function(value) {
+                            return '$' + value.toLocaleString('es-ES', {maximumFractionDigits: 0});
+                        }
+                    }
+                }
+            }
+        }
+    });
+    
+    // Gráfico de Distribución de Reseñas
+    const ctxResenas = document.getElementById('chartResenas').getContext('2d');
+    charts.resenas = new Chart(ctxResenas, {
+        type: 'doughnut',
+        data: {
+            labels: Object.keys(distribucionResenas),
+            datasets: [{
+                data: Object.values(distribucionResenas),
+                backgroundColor: colors.slice(0, 4),
+                borderWidth: 2,
+                borderColor: '#fff'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { position: 'bottom' }
+            }
+        }
+    });
+    
+    // Gráfico de Cantidad por Provincia
+    const ctxCantidad = document.getElementById('chartCantidad').getContext('2d');
+    charts.cantidad = new Chart(ctxCantidad, {
+        type: 'pie',
+        data: {
+            labels: provinciasData.map(p => p.provincia),
+            datasets: [{
+                data: provinciasData.map(p => p.cantidad),
+                backgroundColor: colors,
+                borderWidth: 2,
+                borderColor: '#fff'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { position: 'bottom' }
+            }
+        }
+    });
+    
+    // Gráfico Top 10
+    const ctxTop10 = document.getElementById('chartTop10').getContext('2d');
+    charts.top10 = new Chart(ctxTop10, {
+        type: 'bar',
+        data: {
+            labels: top10Data.map(l => l.nombre.substring(0, 20) + '...'),
+            datasets: [{
+                label: 'Reseñas',
+                data: top10Data.map(l => l.resenas),
+                backgroundColor: colors[1],
+                borderColor: colors[1],
+                borderWidth: 2
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            indexAxis: 'y',
+            plugins: {
+                legend: { display: false }
+            },
+            scales: {
+                x: { beginAtZero: true }
+            }
+        }
+    });
+}
+
+// Llenar tablas
+function llenarTablas() {
+    // Tabla Top 10
+    const tablaTop10 = document.getElementById('tablaTop10');
+    top10Data.forEach((lib, index) => {
+        const row = tablaTop10.insertRow();
+        row.insertCell(0).textContent = index + 1;
+        row.insertCell(1).textContent = lib.nombre;
+        row.insertCell(2).textContent = lib.resenas.toLocaleString();
+        row.insertCell(3).innerHTML = '⭐ ' + lib.calificacion;
+        row.insertCell(4).textContent = '$' + lib.venta_mensual.toLocaleString('es-ES', {maximumFractionDigits: 0});
+        row.insertCell(5).textContent = lib.canton;
+        const cellLink = row.insertCell(6);
+        if (lib.url) {
+            const link = document.createElement('a');
+            link.href = lib.url;
+            link.target = '_blank';
+            link.className = 'link-button';
+            link.textContent = 'Ver';
+            cellLink.appendChild(link);
+        }
+    });
+    
+    // Tabla Top 20 Ventas
+    const tablaTop20Ventas = document.getElementById('tablaTop20Ventas');
+    top20VentasData.forEach((lib, index) => {
+        const row = tablaTop20Ventas.insertRow();
+        row.insertCell(0).textContent = index + 1;
+        row.insertCell(1).textContent = lib.nombre;
+        row.insertCell(2).textContent = lib.resenas.toLocaleString();
+        row.insertCell(3).innerHTML = '⭐ ' + lib.calificacion;
+        row.insertCell(4).textContent = '$' + lib.venta_mensual.toLocaleString('es-ES', {maximumFractionDigits: 0});
+        row.insertCell(5).textContent = lib.canton;
+        const cellLink = row.insertCell(6);
+        if (lib.url) {
+            const link = document.createElement('a');
+            link.href = lib.url;
+            link.target = '_blank';
+            link.className = 'link-button';
+            link.textContent = 'Ver';
+            cellLink.appendChild(link);
+        }
+    });
+    
+    // Tabla Todas las Librerías: solo se crean las filas a la vista
+    tablaTodas = new TablaVirtual(
+        document.getElementById('contenedorTodas'),
+        document.getElementById('tablaTodas'),
+        todasLibreriasData,
+        filaLibreria,
+        (visibles, total) => {
+            document.getElementById('contadorTodas').textContent = visibles === total
+                ? `${total.toLocaleString()} librerías`
+                : `${visibles.toLocaleString()} de ${total.toLocaleString()} librerías`;
+        }
+    );
+}
+
+function filaLibreria(c, i) {
+    const enlace = (url, texto) => url
+        ? `<a href="${escaparHTML(url)}" target="_blank" class="link-button">${texto}</a>`
+        : '-';
+    return `<tr>
+        <td>${escaparHTML(c.ruc[i])}</td>
+        <td title="${escaparHTML(c.nombre[i])}">${escaparHTML(c.nombre[i])}</td>
+        <td>${escaparHTML(c.canton[i])}</td>
+        <td>${c.resenas[i].toLocaleString()}</td>
+        <td>${c.calificacion[i] > 0 ? '⭐ ' + c.calificacion[i] : '-'}</td>
+        <td>$${c.venta_mensual[i].toLocaleString('es-ES', {maximumFractionDigits: 0})}</td>
+        <td>${enlace(c.sitio_web[i], 'Web')}</td>
+        <td>${enlace(c.url[i], 'Maps')}</td>
+    </tr>`;
+}
+
+// Filtrar tabla (índice de trigramas, sin recorrer el DOM)
+function filtrarTabla() {
+    tablaTodas.filtrar(document.getElementById('buscarLibreria').value);
+}
+
+// Ordenar por la columna del encabezado (órdenes precalculados en Python)
+function ordenarTabla(th) {
+    const ascendente = tablaTodas.ordenar(th.dataset.columna);
+    document.querySelectorAll('#contenedorTodas th.ordenable').forEach(otro => otro.removeAttribute('data-orden'));
+    th.dataset.orden = ascendente ? 'asc' : 'desc';
+}
+
+// Inicializar al cargar
+window.onload = function() {
+    llenarTablas();
+    inicializarGraficos();
+};
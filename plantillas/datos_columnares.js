@@ -0,0 +1,70 @@
+// Datos por columnas (datos_columnares.py), decodificados una vez al cargar: listas,
+// arreglos tipados, diccionario + índices o columnas de diccionarios (claves
+// compartidas + fin de cada fila)
+const TIPOS_COLUMNA = {
+    u1: Uint8Array, u2: Uint16Array, u4: Uint32Array,
+    i1: Int8Array, i2: Int16Array, i4: Int32Array, f8: Float64Array
+};
+
+function decodificarColumna(columna) {
+    if (Array.isArray(columna)) {
+        return columna;
+    }
+    if (columna.claves) {
+        const fin = decodificarColumna(columna.fin);
+        const claves = decodificarColumna(columna.clave);
+        const contenidos = decodificarColumna(columna.valores);
+        const filas = new Array(fin.length);
+        let inicio = 0;
+        for (let i = 0; i < fin.length; i++) {
+            const fila = {};
+            for (let j = inicio; j < fin[i]; j++) {
+                fila[columna.claves[claves[j]]] = contenidos[j];
+            }
+            filas[i] = fila;
+            inicio = fin[i];
+        }
+        return filas;
+    }
+    // Bucle simple: Uint8Array.from con función es mucho más lento en columnas grandes
+    const texto = atob(columna.datos);
+    const bytes = new Uint8Array(texto.length);
+    for (let i = 0; i < texto.length; i++) {
+        bytes[i] = texto.charCodeAt(i);
+    }
+    const valores = new TIPOS_COLUMNA[columna.tipo](bytes.buffer);
+    if (!columna.dic) {
+        return valores;
+    }
+    const resultado = new Array(valores.length);
+    for (let i = 0; i < valores.length; i++) {
+        resultado[i] = columna.dic[valores[i]];
+    }
+    return resultado;
+}
+
+function decodificarColumnas(columnas) {
+    const resultado = {};
+    Object.keys(columnas).forEach(nombre => {
+        resultado[nombre] = decodificarColumna(columnas[nombre]);
+    });
+    return resultado;
+}
+
+function filasDesdeColumnas(datos) {
+    // Un objeto por fila, para el código que recorre registros (marcadores, detalle)
+    const columnas = decodificarColumnas(datos.columnas);
+    const nombres = Object.keys(columnas);
+    const filas = new Array(datos.total);
+    for (let i = 0; i < datos.total; i++) {
+        const fila = {};
+        for (const nombre of nombres) {
+            const valor = columnas[nombre][i];
+            if (valor !== null) {
+                fila[nombre] = valor;
+            }
+        }
+        filas[i] = fila;
+    }
+    return filas;
+}
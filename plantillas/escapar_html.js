@@ -0,0 +1,6 @@
+// Escape de texto para armar HTML en la página (tabla virtual, consulta en vivo del mapa)
+function escaparHTML(texto) {
+    return String(texto).replace(/[&<>"']/g, c => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[c]);
+}
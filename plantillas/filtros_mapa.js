@@ -0,0 +1,67 @@
+// Operaciones sobre los conjuntos de bits (Uint32Array) precalculados en Python
+// por filtros_mapa.py (base64 de palabras uint32)
+function decodificarBits(base64) {
+    const bytes = Uint8Array.from(atob(base64), c => c.charCodeAt(0));
+    return new Uint32Array(bytes.buffer);
+}
+
+function unirBits(conjuntos, palabras) {
+    const resultado = new Uint32Array(palabras);
+    conjuntos.forEach(bits => {
+        for (let i = 0; i < palabras; i++) {
+            resultado[i] |= bits[i];
+        }
+    });
+    return resultado;
+}
+
+function intersectarBits(a, b) {
+    const resultado = new Uint32Array(a.length);
+    for (let i = 0; i < a.length; i++) {
+        resultado[i] = a[i] & b[i];
+    }
+    return resultado;
+}
+
+function contarBits(bits) {
+    let total = 0;
+    for (let i = 0; i < bits.length; i++) {
+        let v = bits[i] - ((bits[i] >>> 1) & 0x55555555);
+        v = (v & 0x33333333) + ((v >>> 2) & 0x33333333);
+        total += (((v + (v >>> 4)) & 0x0F0F0F0F) * 0x01010101) >>> 24;
+    }
+    return total;
+}
+
+function recorrerBits(bits, funcion) {
+    // Llama a funcion(i) por cada bit encendido, en orden
+    for (let palabra = 0; palabra < bits.length; palabra++) {
+        let v = bits[palabra];
+        while (v) {
+            const bajo = v & -v;
+            funcion(palabra * 32 + 31 - Math.clz32(bajo));
+            v ^= bajo;
+        }
+    }
+}
+
+function indexarBits(valores) {
+    // {valor: bits de las posiciones con ese valor} armado en una pasada
+    const palabras = (valores.length + 31) >>> 5;
+    const resultado = {};
+    valores.forEach((valor, i) => {
+        if (!resultado[valor]) {
+            resultado[valor] = new Uint32Array(palabras);
+        }
+        resultado[valor][i >>> 5] |= 1 << (i & 31);
+    });
+    return resultado;
+}
+
+function decodificarIndice(bitsPorValor) {
+    const resultado = {};
+    Object.keys(bitsPorValor).forEach(valor => {
+        resultado[valor] = decodificarBits(bitsPorValor[valor]);
+    });
+    return resultado;
+}
@@ -0,0 +1,493 @@
+// Mapa filtrado por CIIU (generar_mapa_filtrado.py). Los datos (provinciasDisponibles,
+// ciiuDisponibles, ESTADOS_TABLA y datosMapa con centro, marcadores por columnas, índice de clusters y
+// bits de los filtros) llegan antes en <mapa>_datos/datos.js; el decodificador de
+// columnas, los bits, CapaClusters y la consulta en vivo van en sus propios recursos.
+let map;
+let capaClusters;
+let todosLosMarcadores = [];
+let indiceFiltros;                                  // bits por provincia/CIIU y totales agregados
+let bitsVisibles;                                   // ubicaciones que cumplen los filtros
+let filtroActual = { provincias: [], codigos: [] };
+let detalleTablaActual = null;                      // fragmento de la tabla abierta
+let marcadorTablaActual = null; // Guardar referencia al marcador de la tabla abierta
+const detallesCargados = new Map(); // URL del fragmento → promesa con sus establecimientos
+
+function crearFiltros() {
+    // Una casilla por provincia y por CIIU, copiando las <template> de la página
+    const listaProvincias = document.getElementById('lista-provincias');
+    provinciasDisponibles.forEach(prov => {
+        const casilla = document.getElementById('casilla-provincia').content.firstElementChild.cloneNode(true);
+        const id = 'prov_' + prov.replace(' ', '_');
+        casilla.setAttribute('data-provincia', prov);
+        casilla.querySelector('input').id = id;
+        casilla.querySelector('label').htmlFor = id;
+        casilla.querySelector('label').textContent = prov;
+        listaProvincias.appendChild(casilla);
+    });
+    
+    if (ciiuDisponibles.length === 0) {
+        return;
+    }
+    const listaCIIU = document.getElementById('lista-ciiu');
+    ciiuDisponibles.forEach(({ codigo, descripcion }) => {
+        const casilla = document.getElementById('casilla-ciiu').content.firstElementChild.cloneNode(true);
+        casilla.setAttribute('data-ciiu', codigo);
+        casilla.title = descripcion;
+        casilla.querySelector('input').id = 'ciiu_' + codigo;
+        casilla.querySelector('label').htmlFor = 'ciiu_' + codigo;
+        casilla.querySelector('strong').textContent = codigo;
+        casilla.querySelector('span').textContent = descripcion.length > 50 ? descripcion.slice(0, 50) + '...' : descripcion;
+        listaCIIU.appendChild(casilla);
+    });
+    document.getElementById('filtro-ciiu').style.display = '';
+}
+
+function initMap() {
+    const centro = datosMapa.centro;
+    
+    map = new google.maps.Map(document.getElementById('map'), {
+        zoom: 7,
+        center: centro,
+        mapTypeId: 'roadmap'
+    });
+    
+    const marcadores = filasDesdeColumnas(datosMapa.marcadores);
+    const indiceClusters = datosMapa.indiceClusters;
+    const filtros = datosMapa.filtros;
+    indiceFiltros = {
+        total: filtros.total,
+        provincias: decodificarIndice(filtros.provincias),
+        ciiu: decodificarIndice(filtros.ciiu),
+        establecimientos: filtros.establecimientos
+    };
+    
+    marcadores.forEach(marcador => {
+        // Códigos CIIU de la ubicación (claves del conteo del índice)
+        const codigosUbicacion = Object.keys(marcador.conteo_ciiu).filter(codigo => codigo);
+        marcador.codigos_ciiu = codigosUbicacion.join(', ');
+        
+        todosLosMarcadores.push(marcador);
+    });
+    
+    // Al inicio se ven todas las ubicaciones
+    const palabras = (indiceFiltros.total + 31) >>> 5;
+    bitsVisibles = unirBits(Object.values(indiceFiltros.provincias), palabras);
+    filtroActual = { provincias: [], codigos: obtenerCodigosCIIUSeleccionados() };
+    
+    // Los marcadores se crean solo cuando su ubicación queda suelta y a la vista
+    capaClusters = new CapaClusters(map, indiceClusters, marcadores, crearMarcadorUbicacion);
+    capaClusters.filtrar(bitsVisibles, pesosEstablecimientos(filtroActual.codigos));
+    
+    actualizarEstadisticas();
+    iniciarConsultaVivo();
+}
+
+function crearMarcadorUbicacion(marcador) {
+    const marker = new google.maps.Marker({
+        position: { lat: marcador.lat, lng: marcador.lng },
+        title: marcador.titulo + ' (' + marcador.cantidad.toLocaleString() + ' establecimientos)',
+        icon: {
+            url: marcador.icon_url,
+            scaledSize: new google.maps.Size(32, 32)
+        }
+    });
+    
+    const infoWindow = new google.maps.InfoWindow({
+        content: `
+            <div class="info-window">
+                <h3>${marcador.titulo}</h3>
+                <p><strong>📍 Establecimientos:</strong> ${marcador.cantidad.toLocaleString()}</p>
+                <p><strong>Provincia:</strong> ${marcador.provincia}</p>
+                <p><strong>Cantón:</strong> ${marcador.canton}</p>
+                ${marcador.parroquia ? `<p><strong>Parroquia:</strong> ${marcador.parroquia}</p>` : ''}
+                <p><strong>Códigos CIIU:</strong> ${marcador.codigos_ciiu}</p>
+                <hr>
+                <p><strong>Ejemplos:</strong></p>
+                <div class="establecimientos">${marcador.establecimientos}</div>
+            </div>
+        `
+    });
+    
+    marker.addListener('click', () => {
+        infoWindow.open(map, marker);
+        mostrarTablaDetalle(marcador);
+    });
+    
+    return marker;
+}
+
+function obtenerCodigosCIIUSeleccionados() {
+    const codigosCIIUSeleccionados = [];
+    const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
+    checkboxesCIIU.forEach(checkbox => {
+        if (checkbox.checked) {
+            const div = checkbox.closest('.checkbox-provincia');
+            codigosCIIUSeleccionados.push(div.getAttribute('data-ciiu'));
+        }
+    });
+    return codigosCIIUSeleccionados;
+}
+
+function pesosEstablecimientos(codigosCIIUSeleccionados) {
+    // Establecimientos de cada ubicación con los códigos CIIU seleccionados
+    return todosLosMarcadores.map(marcador => {
+        let establecimientos = 0;
+        codigosCIIUSeleccionados.forEach(codigo => {
+            establecimientos += marcador.conteo_ciiu[codigo] || 0;
+        });
+        return establecimientos;
+    });
+}
+
+function aplicarFiltros() {
+    // Obtener provincias seleccionadas
+    const provinciasSeleccionadas = [];
+    provinciasDisponibles.forEach(prov => {
+        const checkbox = document.getElementById('prov_' + prov.replace(' ', '_'));
+        const div = checkbox.closest('.checkbox-provincia');
+        if (checkbox && checkbox.checked) {
+            provinciasSeleccionadas.push(prov);
+            div.classList.add('activa');
+        } else if (div) {
+            div.classList.remove('activa');
+        }
+    });
+    
+    // Obtener códigos CIIU seleccionados
+    const codigosCIIUSeleccionados = [];
+    const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
+    checkboxesCIIU.forEach(checkbox => {
+        const div = checkbox.closest('.checkbox-provincia');
+        if (checkbox.checked) {
+            const codigo = div.getAttribute('data-ciiu');
+            codigosCIIUSeleccionados.push(codigo);
+            div.classList.add('activa');
+        } else if (div) {
+            div.classList.remove('activa');
+        }
+    });
+    
+    // Ubicaciones visibles = (provincias seleccionadas, o todas) AND (algún CIIU seleccionado)
+    // Si no hay códigos CIIU seleccionados, no se muestra nada
+    const palabras = (indiceFiltros.total + 31) >>> 5;
+    const provinciasFiltro = provinciasSeleccionadas.length > 0 ? provinciasSeleccionadas : Object.keys(indiceFiltros.provincias);
+    const bitsProvincia = unirBits(provinciasFiltro.map(prov => indiceFiltros.provincias[prov]).filter(bits => bits), palabras);
+    const bitsCIIU = unirBits(codigosCIIUSeleccionados.map(codigo => indiceFiltros.ciiu[codigo]).filter(bits => bits), palabras);
+    bitsVisibles = intersectarBits(bitsProvincia, bitsCIIU);
+    filtroActual = { provincias: provinciasSeleccionadas, codigos: codigosCIIUSeleccionados };
+    
+    // En vivo, los filtros del header se vuelven a consultar al servidor
+    if (consultaVivo.activa) {
+        consultarEnVivo();
+        return;
+    }
+    
+    // Solo se redibujan los clusters a la vista
+    capaClusters.filtrar(bitsVisibles, pesosEstablecimientos(codigosCIIUSeleccionados));
+    actualizarEstadisticas();
+    
+    // Si hay una tabla abierta, actualizarla con los nuevos filtros
+    if (marcadorTablaActual) {
+        mostrarTablaDetalle(marcadorTablaActual);
+    }
+}
+
+function seleccionarTodas() {
+    provinciasDisponibles.forEach(prov => {
+        const checkbox = document.getElementById('prov_' + prov.replace(' ', '_'));
+        if (checkbox && !checkbox.checked) {
+            checkbox.checked = true;
+        }
+    });
+    
+    // Seleccionar todos los CIIU también
+    const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
+    checkboxesCIIU.forEach(checkbox => {
+        if (!checkbox.checked) {
+            checkbox.checked = true;
+        }
+    });
+    
+    aplicarFiltros();
+}
+
+function deseleccionarTodas() {
+    provinciasDisponibles.forEach(prov => {
+        const checkbox = document.getElementById('prov_' + prov.replace(' ', '_'));
+        if (checkbox && checkbox.checked) {
+            checkbox.checked = false;
+        }
+    });
+    
+    // Deseleccionar todos los CIIU también
+    const checkboxesCIIU = document.querySelectorAll('[data-ciiu] input[type="checkbox"]');
+    checkboxesCIIU.forEach(checkbox => {
+        if (checkbox.checked) {
+            checkbox.checked = false;
+        }
+    });
+    
+    aplicarFiltros();
+}
+
+function actualizarEstadisticas() {
+    // Ubicaciones visibles: bits encendidos del filtro actual
+    const ubicaciones = contarBits(bitsVisibles);
+    
+    // Establecimientos con los CIIU seleccionados: suma de los totales provincia × CIIU
+    // (las ubicaciones sin esos códigos no suman nada)
+    const totales = indiceFiltros.establecimientos;
+    const provincias = filtroActual.provincias.length > 0 ? filtroActual.provincias : Object.keys(totales);
+    let establecimientos = 0;
+    provincias.forEach(prov => {
+        filtroActual.codigos.forEach(codigo => {
+            establecimientos += (totales[prov] && totales[prov][codigo]) || 0;
+        });
+    });
+    
+    document.querySelector('.stat-item .number').textContent = ubicaciones;
+    document.querySelectorAll('.stat-item .number')[1].textContent = establecimientos.toLocaleString();
+}
+
+function cargarDetalle(marcador) {
+    // Cada fragmento se descarga una sola vez
+    if (!detallesCargados.has(marcador.detalle)) {
+        const peticion = fetch(marcador.detalle).then(respuesta => {
+            if (!respuesta.ok) {
+                throw new Error('HTTP ' + respuesta.status);
+            }
+            return respuesta.json();
+        }).then(detalle => {
+            // Las filas llegan por columnas; la tabla las recorre como objetos
+            detalle.establecimientos = filasDesdeColumnas(detalle.establecimientos);
+            return detalle;
+        });
+        peticion.catch(() => detallesCargados.delete(marcador.detalle));
+        detallesCargados.set(marcador.detalle, peticion);
+    }
+    return detallesCargados.get(marcador.detalle);
+}
+
+function mostrarTablaDetalle(marcador) {
+    // Guardar referencia al marcador actual
+    marcadorTablaActual = marcador;
+    
+    const tablaDetalle = document.getElementById('tabla-detalle');
+    const tituloTabla = document.getElementById('titulo-tabla');
+    const contenidoTabla = document.getElementById('contenido-tabla');
+    
+    tituloTabla.textContent = `Detalle de Establecimientos - ${marcador.titulo}`;
+    
+    if (!detallesCargados.has(marcador.detalle)) {
+        contenidoTabla.innerHTML = '<p style="color: #666;">⏳ Cargando establecimientos...</p>';
+        tablaDetalle.classList.add('visible');
+    }
+    
+    cargarDetalle(marcador).then(detalle => {
+        // Si mientras tanto se abrió otra ubicación, no se pisa su tabla
+        if (marcadorTablaActual === marcador) {
+            renderizarTablaDetalle(marcador, detalle);
+        }
+    }).catch(() => {
+        if (marcadorTablaActual === marcador) {
+            contenidoTabla.innerHTML = `<p style="color: #dc3545;">❌ No se pudo cargar el detalle (${marcador.detalle}).
+                Si abriste el archivo directamente, usa <code>python3 servidor_local.py</code>.</p>`;
+            tablaDetalle.classList.add('visible');
+        }
+    });
+}
+
+function renderizarTablaDetalle(marcador, detalle) {
+    const tablaDetalle = document.getElementById('tabla-detalle');
+    const contenidoTabla = document.getElementById('contenido-tabla');
+    const establecimientosCompletos = detalle.establecimientos;
+    
+    // Bits del fragmento (se decodifican una vez por ubicación)
+    if (!detalle.bits) {
+        detalle.bits = {
+            ciiu: indexarBits(establecimientosCompletos.map(est => est.codigo_ciiu || '')),
+            estados: decodificarIndice(detalle.estados)
+        };
+        detalle.estadoFila = new Array(establecimientosCompletos.length);
+        Object.keys(detalle.bits.estados).forEach(estado => {
+            recorrerBits(detalle.bits.estados[estado], i => { detalle.estadoFila[i] = estado; });
+        });
+    }
+    
+    // Filas con los códigos CIIU seleccionados del header (ninguno seleccionado = tabla vacía)
+    const codigosCIIUSeleccionados = obtenerCodigosCIIUSeleccionados();
+    const palabras = (establecimientosCompletos.length + 31) >>> 5;
+    const bitsFilas = unirBits(codigosCIIUSeleccionados.map(codigo => detalle.bits.ciiu[codigo]).filter(bits => bits), palabras);
+    const filasParaMostrar = [];
+    recorrerBits(bitsFilas, i => filasParaMostrar.push(i));
+    const establecimientosParaMostrar = filasParaMostrar.map(i => establecimientosCompletos[i]);
+    detalleTablaActual = { detalle: detalle, bitsFilas: bitsFilas };
+    
+    // Estados presentes entre esas filas (AND de bits)
+    const estadosArray = Object.keys(detalle.bits.estados)
+        .filter(estado => contarBits(intersectarBits(detalle.bits.estados[estado], bitsFilas)) > 0)
+        .sort();
+    
+    // Generar HTML del filtro de estado
+    let filtroEstadosHtml = '';
+    if (estadosArray.length > 0) {
+        const checkboxesEstados = estadosArray.map(estado => {
+            const estadoId = estado.replace(/[^a-zA-Z0-9]/g, '_');
+            return `
+                <div class="checkbox-estado-tabla activa" data-estado-tabla="${estado}">
+                    <input type="checkbox" id="filtro_estado_${estadoId}" checked onchange="filtrarTablaPorEstado()">
+                    <label for="filtro_estado_${estadoId}">${estado}</label>
+                </div>`;
+        }).join('');
+        
+        filtroEstadosHtml = `
+        <div class="filtro-estado-tabla">
+            <h4>🔍 Filtrar por Estado:</h4>
+            <div class="filtro-estado-opciones">
+                ${checkboxesEstados}
+            </div>
+        </div>`;
+    }
+    
+    // Guardar el total original y el filtrado
+    const totalOriginal = marcador.cantidad;
+    const totalFiltrado = establecimientosParaMostrar.length;
+    const mostrarFiltrado = codigosCIIUSeleccionados.length > 0 && totalFiltrado < totalOriginal;
+    
+    // Obtener códigos CIIU únicos de los establecimientos filtrados
+    const codigosCIIUFiltrados = [...new Set(establecimientosParaMostrar.map(est => est.codigo_ciiu).filter(c => c && c !== 'N/A'))].join(', ');
+    
+    let html = `
+        <div class="info-ubicacion">
+            <p><strong>📍 Ubicación:</strong> ${marcador.titulo}</p>
+            <p><strong>Provincia:</strong> ${marcador.provincia}</p>
+            <p><strong>Cantón:</strong> ${marcador.canton}</p>
+            ${marcador.parroquia ? `<p><strong>Parroquia:</strong> ${marcador.parroquia}</p>` : ''}
+            <p><strong>Total Establecimientos:</strong> <span id="contador-establecimientos">${totalFiltrado.toLocaleString()}</span>${mostrarFiltrado ? ` <span id="contador-filtrado" style="color: #667eea; font-weight: normal;">(de ${totalOriginal.toLocaleString()} total)</span>` : ''}</p>
+            <p><strong>Códigos CIIU:</strong> ${codigosCIIUFiltrados || marcador.codigos_ciiu}</p>
+        </div>
+        ${filtroEstadosHtml}
+        <table class="tabla-establecimientos">
+            <thead>
+                <tr>
+                    <th>RUC</th>
+                    <th>Nombre / Razón Social</th>
+                    <th>Código CIIU</th>
+                    <th>Estado</th>
+                    <th>Actividad Económica</th>
+                </tr>
+            </thead>
+            <tbody>
+    `;
+    
+    filasParaMostrar.forEach(fila => {
+        const est = establecimientosCompletos[fila];
+        const estado = est.estado || 'N/A';
+        
+        // Estado normalizado para el filtro (precalculado en Python) y su color
+        const estadoNormalizado = detalle.estadoFila[fila];
+        let estadoColor = '#666';
+        if (estadoNormalizado === 'SUSPENDIDO') {
+            estadoColor = '#dc3545';
+        } else if (estadoNormalizado === 'ACTIVO' || estadoNormalizado === 'PASIVO') {
+            estadoColor = '#28a745';
+        }
+        
+        html += `
+            <tr data-estado="${estadoNormalizado}">
+                <td>${est.ruc}</td>
+                <td>${est.nombre}</td>
+                <td>${est.codigo_ciiu}</td>
+                <td style="color: ${estadoColor}; font-weight: 600;">${estado}</td>
+                <td>${est.actividad}</td>
+            </tr>
+        `;
+    });
+    
+    html += `
+            </tbody>
+        </table>
+    `;
+    
+    contenidoTabla.innerHTML = html;
+    tablaDetalle.classList.add('visible');
+    
+    // Aplicar filtro inicial
+    filtrarTablaPorEstado();
+}
+
+function claseEstado(estado) {
+    return estado.replace(/[^a-zA-Z0-9]/g, '_');
+}
+
+function filtrarTablaPorEstado() {
+    // Obtener estados seleccionados
+    const checkboxes = document.querySelectorAll('.checkbox-estado-tabla input[type="checkbox"]');
+    const estadosSeleccionados = [];
+    
+    checkboxes.forEach(checkbox => {
+        const div = checkbox.closest('.checkbox-estado-tabla');
+        if (checkbox.checked) {
+            estadosSeleccionados.push(div.getAttribute('data-estado-tabla'));
+            div.classList.add('activa');
+        } else {
+            div.classList.remove('activa');
+        }
+    });
+    
+    // Ocultar filas por estado con una clase en la tabla (sin tocar cada fila)
+    const tabla = document.querySelector('.tabla-establecimientos');
+    if (tabla) {
+        ESTADOS_TABLA.forEach(estado => {
+            tabla.classList.toggle('ocultar-' + claseEstado(estado), !estadosSeleccionados.includes(estado));
+        });
+    }
+    
+    // Filas visibles = bits de la tabla AND bits de los estados seleccionados
+    let filasVisibles = 0;
+    let totalFilas = 0;
+    if (detalleTablaActual) {
+        const bitsFilas = detalleTablaActual.bitsFilas;
+        const bitsEstados = detalleTablaActual.detalle.bits.estados;
+        const seleccion = unirBits(estadosSeleccionados.map(estado => bitsEstados[estado]).filter(bits => bits), bitsFilas.length);
+        filasVisibles = contarBits(intersectarBits(bitsFilas, seleccion));
+        totalFilas = contarBits(bitsFilas);
+    }
+    
+    // Actualizar contador de establecimientos visibles
+    const contadorEstablecimientos = document.getElementById('contador-establecimientos');
+    const contadorFiltrado = document.getElementById('contador-filtrado');
+    const infoUbicacion = document.querySelector('.info-ubicacion');
+    
+    if (contadorEstablecimientos && infoUbicacion) {
+        // Obtener el total original del texto
+        const totalP = infoUbicacion.querySelector('p:nth-child(4)');
+        if (totalP) {
+            // Actualizar el contador con el número de filas visibles
+            contadorEstablecimientos.textContent = filasVisibles.toLocaleString();
+            
+            // Mostrar información adicional si hay filtro activo
+            if (filasVisibles < totalFilas) {
+                contadorFiltrado.textContent = `(de ${totalFilas.toLocaleString()} total)`;
+                contadorFiltrado.style.display = 'inline';
+            } else {
+                contadorFiltrado.textContent = '';
+                contadorFiltrado.style.display = 'none';
+            }
+        }
+    }
+}
+
+function cerrarTabla() {
+    const tablaDetalle = document.getElementById('tabla-detalle');
+    tablaDetalle.classList.remove('visible');
+    marcadorTablaActual = null; // Limpiar referencia
+    detalleTablaActual = null;
+}
+
+// Función global para llamar desde el popup
+window.mostrarTablaDetalle = mostrarTablaDetalle;
+window.filtrarTablaPorEstado = filtrarTablaPorEstado;
+
+// Los filtros del header no esperan a que cargue Google Maps
+crearFiltros();
@@ -0,0 +1,66 @@
+// Mapa de establecimientos (generar_mapa_google.py). datosMapa (centro, marcadores por
+// columnas e índice de clusters) llega antes en mapa_google_maps_datos/datos.js;
+// CapaClusters y el decodificador de columnas van en sus propios recursos.
+
+// Inicializar mapa
+function initMap() {
+    const centro = datosMapa.centro;
+    
+    const map = new google.maps.Map(document.getElementById('map'), {
+        zoom: 7,
+        center: centro,
+        mapTypeId: 'roadmap',
+        styles: [
+            {
+                featureType: 'poi',
+                elementType: 'labels',
+                stylers: [{ visibility: 'off' }]
+            }
+        ]
+    });
+    
+    // Agregar marcadores (agrupados en clusters según el zoom)
+    const marcadores = filasDesdeColumnas(datosMapa.marcadores);
+    const indiceClusters = datosMapa.indiceClusters;
+    
+    new CapaClusters(map, indiceClusters, marcadores, marcador => {
+        const marker = new google.maps.Marker({
+            position: { lat: marcador.lat, lng: marcador.lng },
+            title: marcador.titulo + ' (' + marcador.cantidad.toLocaleString() + ' establecimientos)',
+            icon: {
+                url: marcador.icon_url,
+                scaledSize: new google.maps.Size(32, 32)
+            }
+        });
+        
+        const infoWindow = new google.maps.InfoWindow({
+            content: `
+                <div class="info-window">
+                    <h3>${marcador.titulo}</h3>
+                    <p><strong>📍 Establecimientos:</strong> ${marcador.cantidad.toLocaleString()}</p>
+                    <p><strong>Provincia:</strong> ${marcador.provincia}</p>
+                    <p><strong>Cantón:</strong> ${marcador.canton}</p>
+                    <hr>
+                    <p><strong>Ejemplos:</strong></p>
+                    <div class="establecimientos">${marcador.establecimientos}</div>
+                </div>
+            `
+        });
+        
+        marker.addListener('click', () => {
+            infoWindow.open(map, marker);
+        });
+        
+        return marker;
+    });
+    
+    // Agregar control de tipo de mapa
+    map.setOptions({
+        mapTypeControl: true,
+        mapTypeControlOptions: {
+            style: google.maps.MapTypeControlStyle.HORIZONTAL_BAR,
+            position: google.maps.ControlPosition.TOP_RIGHT,
+            mapTypeIds: ['roadmap', 'satellite', 'hybrid', 'terrain']
+        }
+    });
+}
@@ -0,0 +1,155 @@
+// Tabla virtual: los datos van por columnas (tabla_virtual.py) y solo existen en el DOM
+// las filas a la vista. Plantilla: las filas de reserva llegan como filas_reserva.
+function decodificarOrden(base64) {
+    return decodificarColumna({ tipo: 'u4', datos: base64 });
+}
+
+function normalizarBusqueda(texto) {
+    // Igual que normalizar_texto en Python: sin tildes, mayúsculas y espacios colapsados
+    return String(texto).normalize('NFKD').replace(/[\u0300-\u036f]/g, '')
+        .toUpperCase().replace(/\s+/g, ' ').trim();
+}
+
+class TablaVirtual {
+    constructor(contenedor, cuerpo, datos, renderizarFila, alContar) {
+        this.contenedor = contenedor;
+        this.cuerpo = cuerpo;
+        // Columnas decodificadas una vez (decodificarColumnas, de datos_columnares.py)
+        this.datos = Object.assign({}, datos, { columnas: decodificarColumnas(datos.columnas) });
+        this.renderizarFila = renderizarFila;   // (columnas, fila) → HTML del <tr>
+        this.alContar = alContar || (() => {});  // (filas visibles, total)
+        this.ordenes = new Map();                // columna → permutación ascendente
+        this.orden = null;                       // { columna, ascendente }
+        this.coincidencias = null;               // Uint8Array del filtro (null = todas)
+        this.textos = null;                      // índice de búsqueda (se arma al buscar)
+        this.alturaFila = 0;
+        this.filas = new Uint32Array(0);
+        let pendiente = false;
+        contenedor.addEventListener('scroll', () => {
+            if (!pendiente) {
+                pendiente = true;
+                requestAnimationFrame(() => { pendiente = false; this.renderizar(); });
+            }
+        });
+        this.actualizar();
+    }
+
+    permutacion(columna) {
+        if (!this.ordenes.has(columna)) {
+            this.ordenes.set(columna, decodificarOrden(this.datos.orden[columna]));
+        }
+        return this.ordenes.get(columna);
+    }
+
+    ordenar(columna) {
+        // Segundo clic en la misma columna: de mayor a menor
+        const ascendente = !(this.orden && this.orden.columna === columna && this.orden.ascendente);
+        this.orden = { columna: columna, ascendente: ascendente };
+        this.actualizar();
+        return ascendente;
+    }
+
+    indexar() {
+        // Texto normalizado de cada fila y trigrama → filas que lo contienen
+        const total = this.datos.total;
+        const columnas = this.datos.busqueda.map(columna => this.datos.columnas[columna]);
+        this.textos = new Array(total);
+        this.trigramas = new Map();
+        for (let i = 0; i < total; i++) {
+            const texto = normalizarBusqueda(columnas.map(valores => valores[i]).join(' '));
+            this.textos[i] = texto;
+            for (let j = 0; j + 3 <= texto.length; j++) {
+                const trigrama = texto.substring(j, j + 3);
+                let lista = this.trigramas.get(trigrama);
+                if (!lista) {
+                    lista = [];
+                    this.trigramas.set(trigrama, lista);
+                }
+                if (lista[lista.length - 1] !== i) {
+                    lista.push(i);
+                }
+            }
+        }
+    }
+
+    filtrar(texto) {
+        const consulta = normalizarBusqueda(texto);
+        if (!consulta) {
+            this.coincidencias = null;
+        } else {
+            if (!this.textos) {
+                this.indexar();
+            }
+            this.coincidencias = new Uint8Array(this.datos.total);
+            let candidatas = null;
+            if (consulta.length >= 3) {
+                // Candidatas: las filas del trigrama más raro de la consulta
+                for (let j = 0; j + 3 <= consulta.length; j++) {
+                    const lista = this.trigramas.get(consulta.substring(j, j + 3)) || [];
+                    if (candidatas === null || lista.length < candidatas.length) {
+                        candidatas = lista;
+                    }
+                }
+            }
+            const revisar = i => {
+                if (this.textos[i].includes(consulta)) {
+                    this.coincidencias[i] = 1;
+                }
+            };
+            if (candidatas === null) {
+                for (let i = 0; i < this.datos.total; i++) revisar(i);
+            } else {
+                candidatas.forEach(revisar);
+            }
+        }
+        this.actualizar();
+    }
+
+    actualizar() {
+        // Filas a mostrar = orden actual ∩ filtro (una pasada sobre enteros, sin DOM)
+        const total = this.datos.total;
+        const filas = new Uint32Array(total);
+        let n = 0;
+        const permutacion = this.orden ? this.permutacion(this.orden.columna) : null;
+        for (let k = 0; k < total; k++) {
+            let i = k;
+            if (permutacion) {
+                i = permutacion[this.orden.ascendente ? k : total - 1 - k];
+            }
+            if (!this.coincidencias || this.coincidencias[i]) {
+                filas[n++] = i;
+            }
+        }
+        this.filas = filas.subarray(0, n);
+        this.contenedor.scrollTop = 0;
+        this.alContar(n, total);
+        this.renderizar();
+    }
+
+    renderizar() {
+        const columnas = this.datos.columnas;
+        const columnasTabla = this.cuerpo.closest('table').querySelectorAll('thead th').length;
+        const altura = this.alturaFila || 45;
+        const inicio = Math.max(0, Math.floor(this.contenedor.scrollTop / altura) - {{ filas_reserva }});
+        const fin = Math.min(this.filas.length,
+            Math.ceil((this.contenedor.scrollTop + this.contenedor.clientHeight) / altura) + {{ filas_reserva }});
+
+        let html = inicio > 0 ? `<tr style="height: ${inicio * altura}px"><td colspan="${columnasTabla}"></td></tr>` : '';
+        for (let k = inicio; k < fin; k++) {
+            html += this.renderizarFila(columnas, this.filas[k]);
+        }
+        if (fin < this.filas.length) {
+            html += `<tr style="height: ${(this.filas.length - fin) * altura}px"><td colspan="${columnasTabla}"></td></tr>`;
+        }
+        this.cuerpo.innerHTML = html;
+
+        // La altura real de una fila se mide una vez (depende de la fuente y el CSS)
+        if (!this.alturaFila && fin > inicio) {
+            const fila = this.cuerpo.rows[inicio > 0 ? 1 : 0];
+            if (fila && fila.offsetHeight) {
+                this.alturaFila = fila.offsetHeight;
+                this.renderizar();
+            }
+        }
+    }
+}
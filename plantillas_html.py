@@ -0,0 +1,191 @@
+"""
+Plantillas compiladas y recursos compartidos de los mapas y dashboards.
+Cada página se arma con una plantilla de plantillas/ (marcadores {{ nombre }}, sin
+duplicar llaves como en los f-strings), compilada una sola vez en trozos fijos y
+variables. El CSS y el JS estáticos se escriben una vez en recursos/ con un hash del
+contenido en el nombre (los navegadores los guardan en cache entre páginas y entre
+regeneraciones) y los datos van en un <pagina>_datos/datos.js aparte. Al regenerar
+solo se escriben los archivos cuyo contenido cambió: normalmente, solo los datos.
+
+Uso:
+    python3 plantillas_html.py               # plantillas disponibles y sus variables
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+DIRECTORIO_PLANTILLAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plantillas")
+
+# Carpeta (junto a las páginas) con el CSS/JS compartido, con hash en el nombre
+DIRECTORIO_RECURSOS = "recursos"
+
+_MARCADOR = re.compile(r'{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}')
+
+
+def huella(contenido: str) -> str:
+    """Hash corto del contenido para el nombre de un recurso."""
+    return hashlib.blake2b(contenido.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def escribir_si_cambio(ruta: str, contenido: str) -> bool:
+    """
+    Escribe el archivo solo si su contenido cambió (reemplazo atómico).
+
+    Returns:
+        True si se escribió
+    """
+    datos = contenido.encode('utf-8')
+    if os.path.exists(ruta) and os.path.getsize(ruta) == len(datos):
+        with open(ruta, 'rb') as f:
+            if f.read() == datos:
+                return False
+
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_')
+    with os.fdopen(descriptor, 'wb') as f:
+        f.write(datos)
+    # mkstemp crea el archivo solo para el dueño; las páginas se publican, así que
+    # se conservan los permisos del archivo anterior (o lectura para todos)
+    os.chmod(temporal, os.stat(ruta).st_mode & 0o777 if os.path.exists(ruta) else 0o644)
+    os.replace(temporal, ruta)
+    return True
+
+
+class Plantilla:
+    """Plantilla con marcadores {{ nombre }}, compilada una vez en trozos fijos y variables."""
+
+    def __init__(self, texto: str, nombre: str = '<texto>'):
+        """
+        Compila la plantilla.
+
+        Args:
+            texto: Contenido con marcadores {{ nombre }} (las demás llaves se copian tal cual)
+            nombre: Nombre para los mensajes de error
+        """
+        self.nombre = nombre
+        partes = _MARCADOR.split(texto)
+        # Posiciones pares: texto fijo; impares: nombre de la variable
+        self._fijos = partes[0::2]
+        self._variables = partes[1::2]
+        self.variables = sorted(set(self._variables))
+
+    def renderizar(self, **valores) -> str:
+        """
+        Rellena la plantilla.
+
+        Raises:
+            ValueError: Si falta alguna variable
+        """
+        faltantes = [v for v in self.variables if v not in valores]
+        if faltantes:
+            raise ValueError(f"Faltan variables en la plantilla {self.nombre}: {', '.join(faltantes)}")
+        salida = [self._fijos[0]]
+        for variable, fijo in zip(self._variables, self._fijos[1:]):
+            salida.append(str(valores[variable]))
+            salida.append(fijo)
+        return ''.join(salida)
+
+
+@lru_cache(maxsize=None)
+def leer_archivo_plantilla(nombre: str) -> str:
+    """Contenido de un archivo de plantillas/ (leído una vez por proceso)."""
+    with open(os.path.join(DIRECTORIO_PLANTILLAS, nombre), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def cargar_plantilla(nombre: str) -> Plantilla:
+    """Plantilla compilada de plantillas/<nombre> (compilada una vez por proceso)."""
+    return Plantilla(leer_archivo_plantilla(nombre), nombre)
+
+
+def directorio_datos(archivo_html: str) -> str:
+    """Carpeta de datos de una página: mapa.html → mapa_datos/."""
+    return os.path.splitext(archivo_html)[0] + "_datos"
+
+
+def script_datos(datos: Dict[str, object]) -> str:
+    """JS con una constante global por dato: const nombre = <JSON>; (JSON sin espacios)"""
+    return ''.join(f"const {nombre} = {json.dumps(valor, ensure_ascii=False, separators=(',', ':'))};\n"
+                   for nombre, valor in datos.items())
+
+
+def escribir_pagina(archivo_html: str, plantilla: str, valores: Dict[str, object] = None,
+                    estilos: List[Tuple[str, str]] = (), scripts: List[Tuple[str, str]] = (),
+                    datos: Dict[str, object] = None) -> Dict[str, int]:
+    """
+    Escribe una página con sus recursos y sus datos, solo donde algo cambió.
+
+    La plantilla recibe, además de `valores`, las etiquetas ya armadas en
+    {{ estilos }}, {{ scripts }} y {{ datos }}.
+
+    Args:
+        archivo_html: Página de salida
+        plantilla: Archivo de plantillas/ con el HTML de la página
+        valores: Variables de la plantilla
+        estilos: (nombre, CSS) de cada hoja, en orden; se comparten entre páginas
+        scripts: (nombre, JS) de cada script estático, en orden
+        datos: {constante: valor} que la página lee como variables globales
+
+    Returns:
+        {'html': 1 si se escribió la página, 'datos': 1 si se escribieron sus datos,
+         'recursos': recursos nuevos escritos}
+    """
+    directorio = os.path.dirname(archivo_html)
+    escritos = {'html': 0, 'datos': 0, 'recursos': 0}
+
+    def recurso(nombre: str, contenido: str, extension: str) -> str:
+        relativa = f"{DIRECTORIO_RECURSOS}/{nombre}.{huella(contenido)}.{extension}"
+        # Con el hash en el nombre, un recurso que ya existe nunca cambia
+        ruta = os.path.join(directorio, relativa)
+        if not os.path.exists(ruta):
+            escritos['recursos'] += escribir_si_cambio(ruta, contenido)
+        return relativa
+
+    etiquetas_estilos = '\n    '.join(f'<link rel="stylesheet" href="{recurso(nombre, css, "css")}">'
+                                       for nombre, css in estilos)
+    etiquetas_scripts = '\n    '.join(f'<script src="{recurso(nombre, js, "js")}"></script>'
+                                       for nombre, js in scripts)
+
+    etiqueta_datos = ''
+    if datos is not None:
+        ruta_datos = os.path.join(directorio_datos(archivo_html), "datos.js")
+        contenido_datos = script_datos(datos)
+        escritos['datos'] = int(escribir_si_cambio(ruta_datos, contenido_datos))
+        # Nombre fijo: si solo cambian los datos, la página no se reescribe
+        # (servidor_local.py los sirve con no-cache + ETag, así que se revalidan)
+        relativa = os.path.relpath(ruta_datos, directorio or '.').replace(os.sep, '/')
+        etiqueta_datos = f'<script src="{relativa}"></script>'
+
+    html = cargar_plantilla(plantilla).renderizar(
+        estilos=etiquetas_estilos, scripts=etiquetas_scripts, datos=etiqueta_datos, **(valores or {}))
+    escritos['html'] = int(escribir_si_cambio(archivo_html, html))
+    return escritos
+
+
+def imprimir_escritura(archivo_html: str, escritos: Dict[str, int]):
+    """Muestra qué se escribió al regenerar una página."""
+    partes = [
+        "página" if escritos['html'] else "página sin cambios",
+        "datos" if escritos['datos'] else "datos sin cambios",
+        f"{escritos['recursos']} recursos nuevos" if escritos['recursos'] else "recursos en cache",
+    ]
+    print(f"   ♻️  {archivo_html}: {', '.join(partes)}")
+
+
+def main():
+    """Lista las plantillas y sus variables."""
+    for nombre in sorted(os.listdir(DIRECTORIO_PLANTILLAS)):
+        if nombre.endswith('.html'):
+            plantilla = cargar_plantilla(nombre)
+            print(f"📄 {nombre}: {', '.join(plantilla.variables)}")
+
+
+if __name__ == "__main__":
+    main()
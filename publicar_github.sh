@@ -59,7 +59,7 @@ echo ""
 
 # Agregar archivos
 echo "📤 Agregando archivos a Git..."
-git add mapa_google_maps_filtrado.html .gitignore
+git add mapa_google_maps_filtrado.html mapa_google_maps_filtrado_datos recursos .gitignore
 
 # Verificar si hay cambios
 if git diff --staged --quiet; then
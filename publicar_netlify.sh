@@ -18,7 +18,7 @@ echo "📋 Instrucciones:"
 echo "1. Ve a https://www.netlify.com/"
 echo "2. Inicia sesión o crea una cuenta (gratis)"
 echo "3. En la página principal, verás un área para arrastrar archivos"
-echo "4. Arrastra este archivo HTML o la carpeta completa"
+echo "4. Arrastra la carpeta completa (el HTML necesita mapa_google_maps_filtrado_datos/ y recursos/)"
 echo "5. ¡Listo! Netlify te dará una URL automáticamente"
 echo ""
 echo "💡 Tip: Puedes cambiar el nombre del sitio en:"
@@ -0,0 +1,423 @@
+"""
+Motor de reglas de estimación de ventas.
+Los factores, umbrales y reglas de confianza se describen en reglas_estimacion.json
+(o un YAML con la misma estructura) y se compilan una sola vez en operaciones sobre
+columnas completas, así los analistas pueden ajustar coeficientes sin tocar el código.
+
+Cada sección del archivo (librerias, online, google) tiene un bloque "reglas" con:
+    variables     Columnas derivadas, en orden: puntos, seleccion, mapa, texto, antiguedad
+    casos_fijos   Filas con resultado fijo (p. ej. no encontradas en Google)
+    base          Venta mensual base (una variable de tipo seleccion o mapa)
+    factores      Multiplicadores con condición; "primera_de" aplica solo el primero que cumple
+    acumulacion   "multiplicador" (base × producto de factores) o "valor" (base × f1 × f2 ...)
+    confianza     Variable de tipo seleccion; puede usar "num_factores"
+    razon         Texto con {campos} de la fila
+    redondeo      Decimales de las ventas estimadas
+
+Condiciones: {"campo": X, <operador>: valor} con los operadores presente, verdadero, igual,
+en, contiene (texto o lista; "mayusculas": true compara en mayúsculas), mayor, mayor_igual,
+menor y menor_igual; se combinan con {"todas": [...]}, {"alguna": [...]} y {"no": {...}}.
+"""
+
+import argparse
+import json
+import os
+import re
+import string
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# YAML es opcional: sin PyYAML solo se aceptan archivos JSON
+try:
+    import yaml
+    YAML_DISPONIBLE = True
+except ImportError:
+    YAML_DISPONIBLE = False
+
+RUTA_REGLAS_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reglas_estimacion.json")
+
+OPERADORES = ['presente', 'verdadero', 'igual', 'en', 'contiene', 'mayor', 'mayor_igual', 'menor', 'menor_igual']
+CLAVES_MODELO = {'variables', 'casos_fijos', 'base', 'factores', 'acumulacion', 'confianza', 'razon', 'redondeo'}
+COLUMNAS_RESULTADO = ['base', 'multiplicador', 'venta_estimada_mensual', 'venta_estimada_anual',
+                      'confianza', 'factores_aplicados', 'razon', 'num_factores']
+
+
+class ErrorReglas(ValueError):
+    """El archivo de reglas tiene una estructura inválida."""
+
+
+def cargar_reglas(ruta: str = RUTA_REGLAS_DEFECTO) -> Dict:
+    """Lee el archivo de reglas (JSON, o YAML si PyYAML está instalado)."""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        if ruta.endswith(('.yaml', '.yml')):
+            if not YAML_DISPONIBLE:
+                raise ErrorReglas(f"{ruta}: instala PyYAML (pip install pyyaml) o usa un archivo JSON")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def cargar_seccion(seccion: str, ruta: str = RUTA_REGLAS_DEFECTO) -> Dict:
+    """Devuelve una sección del archivo de reglas (librerias, online o google)."""
+    reglas = cargar_reglas(ruta)
+    if seccion not in reglas:
+        raise ErrorReglas(f"{ruta}: falta la sección '{seccion}'")
+    return reglas[seccion]
+
+
+def convertir_fechas(serie: pd.Series) -> pd.Series:
+    """Convierte fechas como pd.to_datetime valor por valor (NaT si no se pueden leer)."""
+    if pd.api.types.is_datetime64_any_dtype(serie) and getattr(serie.dt, 'tz', None) is None:
+        return serie
+
+    def convertir(valor):
+        try:
+            fecha = pd.to_datetime(valor)
+            return fecha if fecha.tzinfo is None else pd.NaT
+        except Exception:
+            return pd.NaT
+
+    # Cada valor distinto se convierte una sola vez
+    unicos = serie.dropna().unique()
+    return pd.to_datetime(serie.map(dict(zip(unicos, map(convertir, unicos)))))
+
+
+class _Contexto:
+    """Columnas disponibles para las reglas al evaluar un DataFrame."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n = len(df)
+        self.variables = {}
+        self._textos = {}
+
+    def existe(self, campo: str) -> bool:
+        return campo in self.variables or campo in self.df.columns
+
+    def valores(self, campo: str) -> pd.Series:
+        if campo in self.variables:
+            return self.variables[campo]
+        if campo in self.df.columns:
+            return self.df[campo]
+        return pd.Series(None, index=self.df.index, dtype=object)
+
+    def texto(self, campo: str, mayusculas: bool = False) -> pd.Series:
+        """Igual que str(registro.get(campo, '')), opcionalmente en mayúsculas."""
+        clave = (campo, mayusculas)
+        if clave not in self._textos:
+            if not self.existe(campo):
+                texto = pd.Series('', index=self.df.index, dtype=object)
+            else:
+                texto = self.valores(campo).astype(object).map(str)
+            self._textos[clave] = texto.str.upper() if mayusculas else texto
+        return self._textos[clave]
+
+
+def _compilar_condicion(spec: Dict) -> Callable[[_Contexto], np.ndarray]:
+    """Compila una condición en una función que devuelve una máscara booleana."""
+    if not isinstance(spec, dict):
+        raise ErrorReglas(f"Condición inválida: {spec!r}")
+
+    if 'todas' in spec or 'alguna' in spec:
+        todas = 'todas' in spec
+        partes = [_compilar_condicion(parte) for parte in spec['todas' if todas else 'alguna']]
+
+        def combinar(ctx):
+            mascara = np.full(ctx.n, todas)
+            for parte in partes:
+                mascara = (mascara & parte(ctx)) if todas else (mascara | parte(ctx))
+            return mascara
+        return combinar
+    if 'no' in spec:
+        parte = _compilar_condicion(spec['no'])
+        return lambda ctx: ~parte(ctx)
+
+    campo = spec.get('campo')
+    operadores = [op for op in OPERADORES if op in spec]
+    if not campo or len(operadores) != 1:
+        raise ErrorReglas(f"La condición debe tener 'campo' y un operador de {OPERADORES}: {spec!r}")
+    operador = operadores[0]
+    valor = spec[operador]
+    mayusculas = bool(spec.get('mayusculas', False))
+
+    if operador == 'presente':
+        return lambda ctx: ctx.valores(campo).notna().to_numpy() == bool(valor)
+
+    if operador == 'verdadero':
+        def verdadero(ctx):
+            serie = ctx.valores(campo)
+            mascara = (serie.notna() & serie.astype(object).map(bool).astype(bool)).to_numpy()
+            return mascara == bool(valor)
+        return verdadero
+
+    if operador == 'igual':
+        return lambda ctx: (ctx.valores(campo).astype(object) == valor).to_numpy(dtype=bool)
+
+    if operador == 'en':
+        return lambda ctx: ctx.valores(campo).astype(object).isin(list(valor)).to_numpy(dtype=bool)
+
+    if operador == 'contiene':
+        textos = [valor] if isinstance(valor, str) else list(valor)
+        if mayusculas:
+            textos = [t.upper() for t in textos]
+        patron = '|'.join(re.escape(t) for t in textos)
+        return lambda ctx: ctx.texto(campo, mayusculas).str.contains(patron, regex=True).to_numpy(dtype=bool)
+
+    comparar = {
+        'mayor': np.greater, 'mayor_igual': np.greater_equal,
+        'menor': np.less, 'menor_igual': np.less_equal
+    }[operador]
+
+    def comparacion(ctx):
+        numeros = pd.to_numeric(ctx.valores(campo), errors='coerce').to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            return comparar(numeros, float(valor))
+    return comparacion
+
+
+def _formatear(valores: np.ndarray, formato: str) -> np.ndarray:
+    """Aplica format() a cada valor, formateando una sola vez cada par (tipo, valor) distinto."""
+    codigos, unicos = pd.factorize(valores, use_na_sentinel=False)
+    if valores.dtype == object and len(valores):
+        # 0 y 0.0 (o None y NaN) se agrupan juntos pero se formatean distinto: se separan por tipo
+        tipos, _ = pd.factorize(np.frompyfunc(type, 1, 1)(valores))
+        codigos, primeros = pd.factorize(codigos * (tipos.max() + 1) + tipos)
+        posiciones = np.zeros(len(primeros), dtype=int)
+        posiciones[codigos[::-1]] = np.arange(len(valores))[::-1]
+        unicos = valores[posiciones]
+    return np.array([format(v, formato) for v in unicos], dtype=object)[codigos]
+
+
+def _compilar_plantilla(plantilla: str) -> Callable[[_Contexto, Optional[np.ndarray]], object]:
+    """
+    Compila un texto con {campos} (admite formato, p. ej. {antiguedad:.1f}).
+
+    La función resultante recibe el contexto y, opcionalmente, una máscara: solo se
+    formatean las filas seleccionadas.
+    """
+    partes = []
+    for literal, campo, formato, _ in string.Formatter().parse(plantilla):
+        if literal:
+            partes.append(literal)
+        if campo is not None:
+            partes.append((campo, formato or ''))
+
+    if all(isinstance(parte, str) for parte in partes):
+        return lambda ctx, mascara=None: plantilla
+
+    def formatear(ctx, mascara=None):
+        filas = ctx.n if mascara is None else int(mascara.sum())
+        resultado = np.full(filas, '', dtype=object)
+        for parte in partes:
+            if isinstance(parte, str):
+                resultado = resultado + parte
+                continue
+            campo, formato = parte
+            valores = ctx.valores(campo).to_numpy()
+            resultado = resultado + _formatear(valores if mascara is None else valores[mascara], formato)
+        return resultado
+    return formatear
+
+
+def _compilar_variable(nombre: str, spec: Dict) -> Callable[[_Contexto], pd.Series]:
+    """Compila una variable derivada (o la base / confianza de un modelo)."""
+    tipo = spec.get('tipo')
+
+    if tipo == 'puntos':
+        reglas = [(_compilar_condicion(regla['si']), regla['suma']) for regla in spec.get('reglas', [])]
+
+        def puntos(ctx):
+            total = np.zeros(ctx.n, dtype=int)
+            for condicion, suma in reglas:
+                total = total + np.where(condicion(ctx), suma, 0)
+            return pd.Series(total, index=ctx.df.index)
+        return puntos
+
+    if tipo == 'seleccion':
+        casos = [(_compilar_condicion(caso['si']), caso['valor']) for caso in spec.get('casos', [])]
+        defecto = spec.get('defecto')
+        columna = spec.get('columna')
+
+        def seleccion(ctx):
+            # Si la columna ya viene en los datos (p. ej. CLASIFICACION_TAMANO) se usa tal cual
+            if columna and columna in ctx.df.columns:
+                return ctx.df[columna]
+            resultado = np.full(ctx.n, defecto, dtype=object)
+            pendiente = np.ones(ctx.n, dtype=bool)
+            for condicion, valor in casos:
+                mascara = pendiente & condicion(ctx)
+                resultado[mascara] = valor
+                pendiente &= ~mascara
+            return pd.Series(resultado, index=ctx.df.index)
+        return seleccion
+
+    if tipo == 'mapa':
+        campo = spec['campo']
+        valores = spec.get('valores', {})
+        defecto = spec.get('defecto')
+
+        def mapa(ctx):
+            serie = ctx.valores(campo).astype(object)
+            return serie.map(valores).where(serie.isin(list(valores)), defecto).astype(object)
+        return mapa
+
+    if tipo == 'texto':
+        columna = spec['columna']
+        mayusculas = bool(spec.get('mayusculas', False))
+        return lambda ctx: ctx.texto(columna, mayusculas)
+
+    if tipo == 'antiguedad':
+        columna = spec['columna']
+
+        def antiguedad(ctx):
+            # Años desde la fecha, como (datetime.now() - fecha).days / 365
+            if columna not in ctx.df.columns:
+                return pd.Series(np.nan, index=ctx.df.index)
+            fechas = convertir_fechas(ctx.df[columna])
+            return (pd.Timestamp(datetime.now()) - fechas).dt.days / 365
+        return antiguedad
+
+    raise ErrorReglas(f"Variable '{nombre}': tipo desconocido {tipo!r}")
+
+
+class ModeloEstimacion:
+    """Reglas de estimación compiladas en operaciones vectorizadas."""
+
+    def __init__(self, definicion: Dict, nombre: str = 'modelo'):
+        """
+        Compila las reglas de un modelo.
+
+        Args:
+            definicion: Bloque "reglas" de una sección del archivo de reglas
+            nombre: Nombre del modelo (para los mensajes de error)
+        """
+        desconocidas = set(definicion) - CLAVES_MODELO
+        if desconocidas:
+            raise ErrorReglas(f"{nombre}: claves desconocidas {sorted(desconocidas)}")
+
+        self.nombre = nombre
+        self.definicion = definicion
+        self.huella = json.dumps(definicion, sort_keys=True, ensure_ascii=False)
+
+        self.variables = []
+        for variable, spec in definicion.get('variables', {}).items():
+            if variable in COLUMNAS_RESULTADO:
+                raise ErrorReglas(f"{nombre}: '{variable}' es un nombre reservado")
+            self.variables.append((variable, _compilar_variable(variable, spec)))
+
+        self.base = _compilar_variable('base', definicion['base']) if 'base' in definicion else None
+        self.factores = [self._compilar_factor(factor) for factor in definicion.get('factores', [])]
+        self.confianza = _compilar_variable('confianza', definicion['confianza']) \
+            if 'confianza' in definicion else None
+        self.razon = _compilar_plantilla(definicion['razon']) if 'razon' in definicion else None
+        self.casos_fijos = [(_compilar_condicion(caso['si']), caso) for caso in definicion.get('casos_fijos', [])]
+        self.redondeo = definicion.get('redondeo')
+
+        self.acumulacion = definicion.get('acumulacion', 'multiplicador')
+        if self.acumulacion not in ('multiplicador', 'valor'):
+            raise ErrorReglas(f"{nombre}: acumulacion debe ser 'multiplicador' o 'valor'")
+
+    def _compilar_factor(self, spec: Dict) -> List:
+        """Un factor simple o un grupo "primera_de" (solo aplica el primero que cumple)."""
+        opciones = spec['primera_de'] if 'primera_de' in spec else [spec]
+        return [
+            (_compilar_condicion(opcion['si']), float(opcion['multiplicador']),
+             _compilar_plantilla(opcion.get('descripcion', '')))
+            for opcion in opciones
+        ]
+
+    def evaluar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evalúa el modelo sobre todas las filas de df.
+
+        Returns:
+            DataFrame (mismo índice que df) con las variables del modelo y, si el modelo
+            tiene base, venta_estimada_mensual, venta_estimada_anual, confianza,
+            factores_aplicados (texto separado por comas) y razon
+        """
+        ctx = _Contexto(df)
+        for variable, calcular in self.variables:
+            ctx.variables[variable] = calcular(ctx)
+
+        resultado = pd.DataFrame({variable: ctx.variables[variable] for variable, _ in self.variables},
+                                 index=df.index)
+        if self.base is None:
+            return resultado
+
+        base = pd.to_numeric(self.base(ctx)).to_numpy(dtype=float)
+        multiplicador = np.ones(ctx.n)
+        valor = base.copy()
+        factores = np.full(ctx.n, '', dtype=object)
+        num_factores = np.zeros(ctx.n, dtype=int)
+
+        for opciones in self.factores:
+            pendiente = np.ones(ctx.n, dtype=bool)
+            for condicion, factor, descripcion in opciones:
+                mascara = pendiente & condicion(ctx)
+                pendiente &= ~mascara
+                multiplicador = multiplicador * np.where(mascara, factor, 1.0)
+                valor = valor * np.where(mascara, factor, 1.0)
+                if mascara.any():
+                    texto = descripcion(ctx, mascara)
+                    previos = factores[mascara]
+                    factores[mascara] = np.where(previos == '', texto, previos + ', ' + texto)
+                num_factores += mascara
+
+        mensual = base * multiplicador if self.acumulacion == 'multiplicador' else valor
+        anual = mensual * 12
+        if self.redondeo is not None:
+            mensual, anual = np.round(mensual, self.redondeo), np.round(anual, self.redondeo)
+
+        ctx.variables['num_factores'] = pd.Series(num_factores, index=df.index)
+        resultado['base'] = base
+        resultado['multiplicador'] = multiplicador
+        resultado['venta_estimada_mensual'] = mensual
+        resultado['venta_estimada_anual'] = anual
+        resultado['num_factores'] = num_factores
+        resultado['confianza'] = self.confianza(ctx).to_numpy() if self.confianza else None
+        resultado['factores_aplicados'] = factores
+        resultado['razon'] = self.razon(ctx) if self.razon else ''
+
+        # Filas con resultado fijo (el primer caso que cumple)
+        pendiente = np.ones(ctx.n, dtype=bool)
+        for condicion, caso in self.casos_fijos:
+            mascara = pendiente & condicion(ctx)
+            pendiente &= ~mascara
+            if not mascara.any():
+                continue
+            mensual_fijo = caso.get('mensual', 0)
+            resultado.loc[mascara, 'venta_estimada_mensual'] = mensual_fijo
+            resultado.loc[mascara, 'venta_estimada_anual'] = caso.get('anual', mensual_fijo * 12)
+            resultado.loc[mascara, 'confianza'] = caso.get('confianza')
+            resultado.loc[mascara, 'factores_aplicados'] = ''
+            resultado.loc[mascara, 'razon'] = caso.get('razon', '')
+
+        return resultado
+
+
+def cargar_modelo(seccion: str, ruta: str = RUTA_REGLAS_DEFECTO) -> ModeloEstimacion:
+    """Carga y compila el modelo de una sección del archivo de reglas."""
+    datos = cargar_seccion(seccion, ruta)
+    if 'reglas' not in datos:
+        raise ErrorReglas(f"{ruta}: la sección '{seccion}' no tiene bloque 'reglas'")
+    return ModeloEstimacion(datos['reglas'], seccion)
+
+
+def main():
+    """Valida el archivo de reglas y muestra un resumen de cada modelo."""
+    parser = argparse.ArgumentParser(description="Valida el archivo de reglas de estimación")
+    parser.add_argument('--reglas', default=RUTA_REGLAS_DEFECTO, help="Archivo JSON/YAML de reglas")
+    args = parser.parse_args()
+
+    reglas = cargar_reglas(args.reglas)
+    for seccion in ('librerias', 'online', 'google'):
+        modelo = cargar_modelo(seccion, args.reglas)
+        print(f"✅ {seccion}: {len(modelo.variables)} variables, {len(modelo.factores)} factores"
+              f"{', ' + str(len(modelo.casos_fijos)) + ' casos fijos' if modelo.casos_fijos else ''}")
+    print(f"📋 Reglas válidas (versión {reglas.get('version', '?')}): {args.reglas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,477 @@
 """
 Servidor local simple para visualizar el mapa en el navegador.
 Ejecuta este script y abre la URL que te muestra.
+
+Atiende a varios visitantes a la vez (un hilo por conexión) y sirve los mapas y
+dashboards comprimidos (.br/.gz generados junto al original), con ETag,
+peticiones condicionales (304) y rangos, para que un mapa de varios MB no
+bloquee al resto ni se vuelva a descargar si no cambió. El CSS/JS compartido de
+recursos/ (con hash en el nombre) se sirve como inmutable.
+
+Además responde consultas en JSON sobre el catálogo completo cargado en memoria
+(consultas_catalogo.py), que el mapa filtrado usa para vistas nuevas sin regenerarlo:
+    /api/ubicaciones?provincia=el oro&ciiu=G4761&estado=ACTIVO&bbox=sur,oeste,norte,este
+    /api/establecimientos?canton=machala&ciiu=G4761&desde=0&limite=100
+    /api/agregados?por=canton&provincia=el oro
+    /api/ruc?ruc=0791234567001
+    /api/buscar?q=libreria&canton=machala
 """
 
+import argparse
+import email.utils
+import gzip
+import hashlib
 import http.server
-import socketserver
+import json
 import os
+import threading
+import time
 import webbrowser
-from pathlib import Path
+from functools import partial
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from busqueda_nombres import cargar_indice
+from consulta_ruc import abrir_almacen
+from consultas_catalogo import DIMENSIONES, LIMITE_MAXIMO, cargar_catalogo, leer_filtros
+from plantillas_html import DIRECTORIO_RECURSOS
+
+# Brotli es opcional; sin él se sirven solo las versiones .gz
+try:
+    import brotli
+    BROTLI_DISPONIBLE = True
+except ImportError:
+    BROTLI_DISPONIBLE = False
+
+PUERTO_DEFECTO = 8001  # 8001 para evitar conflictos
+
+# Archivos de texto que vale la pena comprimir (los mapas y sus fragmentos son HTML/JSON)
+EXTENSIONES_COMPRIMIBLES = ('.html', '.htm', '.js', '.json', '.css', '.svg', '.txt', '.csv', '.md')
+TAMANO_MINIMO_COMPRESION = 1024
+
+# (Content-Encoding, extensión del archivo hermano), en orden de preferencia
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+# Los mapas se regeneran con el mismo nombre: el navegador guarda la copia pero revalida con el ETag
+CACHE_CONTROL = 'no-cache'
+
+# El CSS/JS de recursos/ lleva el hash del contenido en el nombre (plantillas_html.py):
+# nunca cambia, así que el navegador lo guarda sin volver a preguntar
+CACHE_CONTROL_RECURSOS = 'public, max-age=31536000, immutable'
+
+# Índice de nombres, catálogo en memoria y almacén de RUCs: se cargan con la primera consulta
+_indice_nombres = None
+_lock_indice = threading.Lock()
+_catalogo = None
+_lock_catalogo = threading.Lock()
+_almacen_ruc = None
+_lock_almacen = threading.Lock()
+
+# ETag por archivo: {ruta: (mtime_ns, tamaño, etag)}
+_etags = {}
+_lock_etags = threading.Lock()
+_lock_compresion = threading.Lock()
+
+
+def obtener_indice_nombres():
+    """Índice de búsqueda por nombre (se arma o lee de cache/busqueda/ una sola vez)."""
+    global _indice_nombres
+    with _lock_indice:
+        if _indice_nombres is None:
+            _indice_nombres = cargar_indice()
+        return _indice_nombres
+
+
+def obtener_catalogo():
+    """Catálogo completo en memoria para /api/ubicaciones, /api/establecimientos y /api/agregados."""
+    global _catalogo
+    with _lock_catalogo:
+        if _catalogo is None:
+            inicio = time.perf_counter()
+            _catalogo = cargar_catalogo()
+            print(f"📚 Catálogo en memoria: {len(_catalogo):,} establecimientos "
+                  f"({time.perf_counter() - inicio:.1f} s)")
+        return _catalogo
+
+
+def obtener_almacen_ruc():
+    """Almacén de RUCs (cache/ruc.sqlite) para /api/ruc."""
+    global _almacen_ruc
+    with _lock_almacen:
+        if _almacen_ruc is None:
+            _almacen_ruc = abrir_almacen()
+        return _almacen_ruc
+
+
+def comprimible(ruta: str, tamano: int) -> bool:
+    """Indica si conviene servir una versión comprimida del archivo."""
+    return tamano >= TAMANO_MINIMO_COMPRESION and ruta.lower().endswith(EXTENSIONES_COMPRIMIBLES)
+
+
+def archivo_comprimido(ruta: str, extension: str) -> Optional[str]:
+    """
+    Devuelve el hermano comprimido (ruta + '.gz' o '.br'), creándolo si falta o es más viejo que el original.
+
+    Returns:
+        Ruta del archivo comprimido o None si no se pudo crear (sin brotli, carpeta de solo lectura...)
+    """
+    if extension == '.br' and not BROTLI_DISPONIBLE:
+        return None
+
+    destino = ruta + extension
+    try:
+        original = os.stat(ruta)
+        if os.path.exists(destino) and os.stat(destino).st_mtime_ns >= original.st_mtime_ns:
+            return destino
+
+        with _lock_compresion:
+            # Otro hilo pudo haberlo creado mientras esperábamos
+            if os.path.exists(destino) and os.stat(destino).st_mtime_ns >= original.st_mtime_ns:
+                return destino
+            with open(ruta, 'rb') as f:
+                datos = f.read()
+            comprimido = brotli.compress(datos, quality=11) if extension == '.br' else gzip.compress(datos, 9, mtime=0)
+
+            # Escritura atómica: nunca se sirve un archivo comprimido a medias
+            temporal = f"{destino}.{os.getpid()}.tmp"
+            with open(temporal, 'wb') as f:
+                f.write(comprimido)
+            os.utime(temporal, ns=(original.st_atime_ns, original.st_mtime_ns))
+            os.replace(temporal, destino)
+            return destino
+    except OSError:
+        return None
+
+
+def precomprimir(directorio: str = '.') -> int:
+    """
+    Genera los .gz/.br de los mapas y dashboards del directorio y de sus recursos
+    compartidos (las demás subcarpetas, como los fragmentos de detalle, se comprimen
+    la primera vez que se piden).
+
+    Returns:
+        Número de archivos comprimidos disponibles
+    """
+    disponibles = 0
+    for carpeta in (directorio, os.path.join(directorio, DIRECTORIO_RECURSOS)):
+        if not os.path.isdir(carpeta):
+            continue
+        for nombre in sorted(os.listdir(carpeta)):
+            ruta = os.path.join(carpeta, nombre)
+            if os.path.isfile(ruta) and comprimible(ruta, os.path.getsize(ruta)):
+                disponibles += sum(archivo_comprimido(ruta, extension) is not None for _, extension in CODIFICACIONES)
+    return disponibles
+
+
+def cache_control(ruta_url: str) -> str:
+    """Cache-Control de un archivo: los recursos con hash no caducan, lo demás se revalida."""
+    if ruta_url.split('?', 1)[0].startswith(f"/{DIRECTORIO_RECURSOS}/"):
+        return CACHE_CONTROL_RECURSOS
+    return CACHE_CONTROL
+
+
+def obtener_etag(ruta: str, estado: os.stat_result) -> str:
+    """ETag fuerte (hash del contenido), calculado una vez por versión del archivo."""
+    with _lock_etags:
+        guardado = _etags.get(ruta)
+    if guardado and guardado[:2] == (estado.st_mtime_ns, estado.st_size):
+        return guardado[2]
+
+    resumen = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            resumen.update(bloque)
+    etag = f'"{resumen.hexdigest()}"'
+
+    with _lock_etags:
+        _etags[ruta] = (estado.st_mtime_ns, estado.st_size, etag)
+    return etag
+
+
+def codificaciones_aceptadas(cabecera: str) -> Dict[str, float]:
+    """
+    Interpreta 'Accept-Encoding: br;q=1.0, gzip;q=0.5, *;q=0' en {codificación: q}.
+
+    Returns:
+        q de cada codificación listada (1.0 si no trae q); las que tienen q inválido se ignoran
+    """
+    aceptadas = {}
+    for parte in cabecera.lower().split(','):
+        nombre, *parametros = [p.strip() for p in parte.split(';')]
+        if not nombre:
+            continue
+        q = 1.0
+        for parametro in parametros:
+            clave, _, valor = parametro.partition('=')
+            if clave.strip() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = -1.0
+        if 0 <= q <= 1:
+            aceptadas[nombre] = q
+    return aceptadas
+
+
+def rango_solicitado(cabecera: str, tamano: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta 'Range: bytes=inicio-fin' (un solo rango, también 'inicio-' y '-sufijo').
+
+    Returns:
+        (inicio, fin inclusive), (-1, -1) si el rango no se puede satisfacer o None si
+        la cabecera no es un rango simple (se responde el archivo completo)
+    """
+    unidad, _, especificacion = cabecera.partition('=')
+    if unidad.strip().lower() != 'bytes' or ',' in especificacion:
+        return None
+    inicio, guion, fin = especificacion.strip().partition('-')
+    if not guion:
+        return None
+    try:
+        if not inicio:
+            sufijo = int(fin)
+            if sufijo <= 0:
+                return (-1, -1)
+            return (max(0, tamano - sufijo), tamano - 1)
+        inicio = int(inicio)
+        fin = int(fin) if fin else tamano - 1
+    except ValueError:
+        return None
+    if inicio >= tamano:
+        return (-1, -1)
+    if inicio > fin:
+        return None
+    return (inicio, min(fin, tamano - 1))
+
+
+class ManejadorMapa(http.server.SimpleHTTPRequestHandler):
+    """Sirve los archivos del proyecto (comprimidos, con ETag y rangos) y la búsqueda en /api/buscar."""
+
+    # Conexiones persistentes: el mapa y sus fragmentos viajan por la misma conexión
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        rutas_api = {
+            '/api/buscar': self._buscar,
+            '/api/ubicaciones': self._ubicaciones,
+            '/api/establecimientos': self._establecimientos,
+            '/api/agregados': self._agregados,
+            '/api/ruc': self._ruc,
+        }
+        if url.path in rutas_api:
+            rutas_api[url.path](parse_qs(url.query))
+        else:
+            self._servir_archivo(enviar_cuerpo=True)
+
+    def do_HEAD(self):
+        self._servir_archivo(enviar_cuerpo=False)
+
+    def _servir_archivo(self, enviar_cuerpo: bool):
+        """Responde un archivo estático; carpetas y errores quedan a cargo de SimpleHTTPRequestHandler."""
+        ruta = self.translate_path(self.path)
+        if os.path.isdir(ruta) and self.path.split('?', 1)[0].endswith('/'):
+            ruta = os.path.join(ruta, 'index.html')
+        if not os.path.isfile(ruta):
+            if enviar_cuerpo:
+                super().do_GET()
+            else:
+                super().do_HEAD()
+            return
+
+        original = os.stat(ruta)
+        cabecera_rango = self.headers.get('Range')
+        ruta_servida, codificacion = ruta, None
+        # Los rangos se responden sobre el archivo sin comprimir
+        if not cabecera_rango and comprimible(ruta, original.st_size):
+            aceptadas = codificaciones_aceptadas(self.headers.get('Accept-Encoding', ''))
+            # Una codificación no listada toma el q de '*'; con q=0 queda rechazada
+            candidatas = [(aceptadas.get(nombre, aceptadas.get('*', 0)), nombre, extension)
+                          for nombre, extension in CODIFICACIONES]
+            for q, nombre, extension in sorted(candidatas, key=lambda c: -c[0]):
+                if q > 0:
+                    comprimido = archivo_comprimido(ruta, extension)
+                    if comprimido:
+                        ruta_servida, codificacion = comprimido, nombre
+                        break
+
+        estado = os.stat(ruta_servida)
+        etag = obtener_etag(ruta_servida, estado)
+        cabeceras = {
+            'ETag': etag,
+            'Last-Modified': self.date_time_string(original.st_mtime),
+            'Cache-Control': cache_control(self.path),
+            'Accept-Ranges': 'bytes',
+        }
+        if comprimible(ruta, original.st_size):
+            cabeceras['Vary'] = 'Accept-Encoding'
+
+        if self._no_modificado(etag, original.st_mtime):
+            self.send_response(304)
+            for nombre, valor in cabeceras.items():
+                self.send_header(nombre, valor)
+            self.end_headers()
+            return
+
+        inicio, longitud, estado_http = 0, estado.st_size, 200
+        if cabecera_rango and self._rango_vigente(etag, original.st_mtime):
+            rango = rango_solicitado(cabecera_rango, estado.st_size)
+            if rango == (-1, -1):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{estado.st_size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if rango:
+                inicio, longitud, estado_http = rango[0], rango[1] - rango[0] + 1, 206
+                cabeceras['Content-Range'] = f"bytes {rango[0]}-{rango[1]}/{estado.st_size}"
+
+        self.send_response(estado_http)
+        self.send_header('Content-Type', self.guess_type(ruta))
+        if codificacion:
+            self.send_header('Content-Encoding', codificacion)
+        self.send_header('Content-Length', str(longitud))
+        for nombre, valor in cabeceras.items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+
+        if enviar_cuerpo and longitud:
+            try:
+                with open(ruta_servida, 'rb') as f:
+                    # sendfile: el kernel copia el archivo al socket sin pasar por Python
+                    self.connection.sendfile(f, inicio, longitud)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+    def _no_modificado(self, etag: str, mtime: float) -> bool:
+        """Evalúa If-None-Match (o If-Modified-Since si no vino ETag)."""
+        si_no_coincide = self.headers.get('If-None-Match')
+        if si_no_coincide:
+            etiquetas = [etiqueta.strip().removeprefix('W/') for etiqueta in si_no_coincide.split(',')]
+            return '*' in etiquetas or etag in etiquetas
+
+        desde = self.headers.get('If-Modified-Since')
+        if desde:
+            try:
+                return int(mtime) <= email.utils.parsedate_to_datetime(desde).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+        return False
+
+    def _rango_vigente(self, etag: str, mtime: float) -> bool:
+        """If-Range: el rango solo aplica si el archivo es la misma versión que tiene el cliente."""
+        si_rango = self.headers.get('If-Range')
+        if not si_rango:
+            return True
+        if si_rango.startswith('"'):
+            return si_rango.strip() == etag
+        try:
+            return int(mtime) <= email.utils.parsedate_to_datetime(si_rango).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+
+    def _buscar(self, parametros):
+        """GET /api/buscar?q=libreria&canton=machala&provincia=el oro&limite=10"""
+        def valor(nombre):
+            return parametros.get(nombre, [None])[0]
+
+        try:
+            limite = min(int(valor('limite') or 10), 100)
+        except ValueError:
+            self._responder_json({'error': "limite debe ser un número"}, 400)
+            return
+        if limite < 0:
+            self._responder_json({'error': "limite no puede ser negativo"}, 400)
+            return
+        if not valor('q'):
+            self._responder_json({'error': "Falta el parámetro q"}, 400)
+            return
+
+        resultados = obtener_indice_nombres().buscar(
+            valor('q'), provincia=valor('provincia'), canton=valor('canton'), limite=limite
+        )
+        self._responder_json({'consulta': valor('q'), 'resultados': resultados})
+
+    def _consultar_catalogo(self, parametros, consulta):
+        """Aplica los filtros de la URL con `consulta(catalogo, filtros)` y responde con el tiempo que tomó."""
+        try:
+            filtros = leer_filtros(parametros)
+            catalogo = obtener_catalogo()
+            inicio = time.perf_counter()
+            resultado = consulta(catalogo, filtros)
+        except ValueError as e:
+            self._responder_json({'error': str(e)}, 400)
+            return
+        resultado['milisegundos'] = round((time.perf_counter() - inicio) * 1000, 2)
+        self._responder_json(resultado)
+
+    def _ubicaciones(self, parametros):
+        """GET /api/ubicaciones?provincia=el oro&ciiu=G4761&estado=ACTIVO&bbox=-3.5,-80.2,-3.1,-79.8"""
+        def consulta(catalogo, filtros):
+            ubicaciones = catalogo.ubicaciones(**filtros)
+            return {'total': sum(u['cantidad'] for u in ubicaciones), 'ubicaciones': ubicaciones}
+        self._consultar_catalogo(parametros, consulta)
+
+    def _establecimientos(self, parametros):
+        """GET /api/establecimientos?canton=machala&ciiu=G4761&desde=0&limite=100"""
+        try:
+            desde = int(parametros.get('desde', ['0'])[0])
+            limite = min(int(parametros.get('limite', ['100'])[0]), LIMITE_MAXIMO)
+        except ValueError:
+            self._responder_json({'error': "desde y limite deben ser números"}, 400)
+            return
+        if desde < 0 or limite < 0:
+            self._responder_json({'error': "desde y limite no pueden ser negativos"}, 400)
+            return
+        self._consultar_catalogo(
+            parametros, lambda catalogo, filtros: catalogo.establecimientos(desde, limite, **filtros))
+
+    def _agregados(self, parametros):
+        """GET /api/agregados?por=canton&provincia=el oro"""
+        por = parametros.get('por', ['provincia'])[0]
+        if por not in DIMENSIONES:
+            self._responder_json({'error': f"por debe ser uno de: {', '.join(DIMENSIONES)}"}, 400)
+            return
+        self._consultar_catalogo(parametros, lambda catalogo, filtros: catalogo.agregados(por, **filtros))
+
+    def _ruc(self, parametros):
+        """GET /api/ruc?ruc=0791234567001,0790000000001 (filas de cada RUC por fuente)"""
+        rucs = [r.strip() for valor in parametros.get('ruc', []) for r in valor.split(',') if r.strip()]
+        if not rucs:
+            self._responder_json({'error': "Falta el parámetro ruc"}, 400)
+            return
+        inicio = time.perf_counter()
+        resultado = obtener_almacen_ruc().buscar(rucs[:LIMITE_MAXIMO])
+        self._responder_json({'rucs': resultado,
+                              'milisegundos': round((time.perf_counter() - inicio) * 1000, 2)})
+
+    def _responder_json(self, datos, estado=200):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+class ServidorMapa(http.server.ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexión."""
+
+    # Cola de conexiones pendientes (por defecto 5: con muchos visitantes a la vez se rechazaban)
+    request_queue_size = 128
+
+
+def crear_servidor(puerto: int = PUERTO_DEFECTO, directorio: str = '.', host: str = '') -> ServidorMapa:
+    """Crea el servidor que sirve el directorio con ManejadorMapa."""
+    return ServidorMapa((host, puerto), partial(ManejadorMapa, directory=directorio))
 
 
 def main():
     """Inicia un servidor HTTP local."""
-    PORT = 8001  # Cambiado a 8001 para evitar conflictos
+    parser = argparse.ArgumentParser(description="Servidor local para los mapas y dashboards")
+    parser.add_argument('--puerto', type=int, default=PUERTO_DEFECTO, help="Puerto del servidor")
+    args = parser.parse_args()
+    PORT = args.puerto
     
     # Verificar qué archivos de mapa existen
     archivos_mapas = []
@@ -33,11 +492,11 @@ def main():
     # Cambiar al directorio del script
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
-    # Crear servidor
-    Handler = http.server.SimpleHTTPRequestHandler
+    # Versiones comprimidas de los mapas y dashboards, listas antes del primer visitante
+    comprimidos = precomprimir('.')
     
     try:
-        with socketserver.TCPServer(("", PORT), Handler) as httpd:
+        with crear_servidor(PORT) as httpd:
             url = f"http://localhost:{PORT}/{archivo_mapa}"
             
             print("=" * 60)
@@ -45,6 +504,8 @@ def main():
             print("=" * 60)
             print(f"📍 URL del mapa principal: {url}")
             print(f"📂 Servidor corriendo en: http://localhost:{PORT}/")
+            print(f"🗜️  Archivos comprimidos disponibles: {comprimidos} "
+                  f"({'br y gzip' if BROTLI_DISPONIBLE else 'gzip; instala brotli para .br'})")
             print()
             if len(archivos_mapas) > 1:
                 print("📋 Mapas disponibles:")
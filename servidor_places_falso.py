@@ -0,0 +1,188 @@
+"""
+Servidor local que imita las rutas de Google Places usadas por buscar_info_google_places.py
+(y la de Geocoding usada por los generadores de mapas).
+Sirve para probar el enriquecimiento concurrente sin API key ni costo: responde datos
+deterministas, simula latencia y devuelve OVER_QUERY_LIMIT si se supera su cuota.
+
+Uso:
+    python3 servidor_places_falso.py --puerto 8765 --qps-maximo 20
+    python3 buscar_info_google_places.py --base-url http://localhost:8765 --api-key AIzaPrueba
+"""
+
+import argparse
+import json
+import threading
+import time
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+RUTA_BUSQUEDA = "/maps/api/place/textsearch/json"
+RUTA_DETALLES = "/maps/api/place/details/json"
+RUTA_GEOCODIFICACION = "/maps/api/geocode/json"
+
+
+def _semilla(texto: str) -> int:
+    """Número estable derivado de un texto (igual en cada ejecución)."""
+    return zlib.crc32(texto.encode('utf-8'))
+
+
+def respuesta_busqueda(consulta: str) -> Dict:
+    """Resultado de búsqueda por texto determinista para una consulta."""
+    semilla = _semilla(consulta.replace(' librería', ''))
+    con_palabra_libreria = ' librería ' in consulta
+
+    # ~15% nunca se encuentran; ~20% solo aparecen sin la palabra "librería"
+    if semilla % 100 < 15 or (con_palabra_libreria and semilla % 100 < 35):
+        return {'status': 'ZERO_RESULTS', 'results': []}
+
+    nombre = consulta.split(' librería ')[0] if con_palabra_libreria else consulta.rsplit(' Ecuador', 1)[0]
+    return {
+        'status': 'OK',
+        'results': [{'place_id': f"falso_{semilla:08x}", 'name': nombre.title()}]
+    }
+
+
+def respuesta_detalles(place_id: str) -> Dict:
+    """Detalles deterministas de un lugar falso."""
+    semilla = _semilla(place_id)
+    resultado = {
+        'name': f"Librería {place_id[-4:].upper()}",
+        'rating': round(3 + (semilla % 21) / 10, 1),
+        'user_ratings_total': semilla % 180,
+        'formatted_address': f"Calle {semilla % 97}, Ecuador",
+        'formatted_phone_number': f"0{semilla % 9 + 2} {semilla % 900 + 100} {semilla % 9000 + 1000}"
+    }
+    if semilla % 3 == 0:
+        resultado['website'] = f"https://{place_id}.ec"
+    if semilla % 2 == 0:
+        resultado['photo'] = [{'photo_reference': place_id}]
+    if semilla % 4:
+        resultado['opening_hours'] = {'open_now': bool(semilla % 5), 'weekday_text': ["Lunes: 09:00–18:00"]}
+    return {'status': 'OK', 'result': resultado}
+
+
+def respuesta_geocodificacion(direccion: str) -> Dict:
+    """Coordenadas deterministas dentro de Ecuador continental para una dirección."""
+    semilla = _semilla(direccion)
+    if semilla % 50 == 0:
+        return {'status': 'ZERO_RESULTS', 'results': []}
+    ubicacion = {'lat': -4.5 + (semilla % 4000) / 1000, 'lng': -80.5 + (semilla // 4000 % 4000) / 1000}
+    return {'status': 'OK', 'results': [{'formatted_address': direccion, 'geometry': {'location': ubicacion}}]}
+
+
+class ServidorPlacesFalso:
+    """Servidor HTTP de prueba con latencia y cuota configurables."""
+
+    def __init__(self, puerto: int = 0, latencia: float = 0.05, qps_maximo: Optional[float] = None):
+        """
+        Inicializa el servidor (no arranca hasta llamar a iniciar()).
+
+        Args:
+            puerto: Puerto TCP (0 elige uno libre)
+            latencia: Segundos que tarda cada respuesta
+            qps_maximo: Solicitudes por segundo admitidas antes de responder OVER_QUERY_LIMIT
+        """
+        self.latencia = latencia
+        self.qps_maximo = qps_maximo
+        self.solicitudes = 0
+        self.rechazadas = 0
+        self._recientes = deque()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", puerto), self._crear_manejador())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """URL base para pasar como base_url al cliente de Google Maps."""
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def _excede_cuota(self) -> bool:
+        """Registra una solicitud y dice si supera la cuota del último segundo."""
+        ahora = time.monotonic()
+        with self._lock:
+            self.solicitudes += 1
+            while self._recientes and ahora - self._recientes[0] > 1.0:
+                self._recientes.popleft()
+            if self.qps_maximo and len(self._recientes) >= self.qps_maximo:
+                self.rechazadas += 1
+                return True
+            self._recientes.append(ahora)
+            return False
+
+    def _crear_manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                parametros = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+                if servidor._excede_cuota():
+                    cuerpo = {'status': 'OVER_QUERY_LIMIT', 'error_message': 'Cuota de prueba excedida'}
+                elif url.path == RUTA_BUSQUEDA:
+                    time.sleep(servidor.latencia)
+                    cuerpo = respuesta_busqueda(parametros.get('query', ''))
+                elif url.path == RUTA_DETALLES:
+                    time.sleep(servidor.latencia)
+                    cuerpo = respuesta_detalles(parametros.get('place_id', ''))
+                elif url.path == RUTA_GEOCODIFICACION:
+                    time.sleep(servidor.latencia)
+                    cuerpo = respuesta_geocodificacion(parametros.get('address', ''))
+                else:
+                    self.send_error(404)
+                    return
+
+                datos = json.dumps(cuerpo).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, formato, *args):
+                pass
+
+        return Manejador
+
+    def iniciar(self) -> 'ServidorPlacesFalso':
+        """Arranca el servidor en un hilo de fondo."""
+        self._hilo = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        """Detiene el servidor y libera el puerto."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.detener()
+
+
+def main():
+    """Inicia el servidor falso hasta presionar Ctrl+C."""
+    parser = argparse.ArgumentParser(description="Servidor falso de Google Places para pruebas")
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--latencia', type=float, default=0.05, help="Segundos por respuesta")
+    parser.add_argument('--qps-maximo', type=float, help="Cuota antes de responder OVER_QUERY_LIMIT")
+    args = parser.parse_args()
+
+    servidor = ServidorPlacesFalso(args.puerto, args.latencia, args.qps_maximo)
+    print(f"🧪 Servidor falso de Google Places en {servidor.url}")
+    print("💡 Presiona Ctrl+C para detener el servidor")
+    try:
+        servidor._httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor._httpd.server_close()
+        print(f"\n✅ Servidor detenido ({servidor.solicitudes} solicitudes, {servidor.rechazadas} rechazadas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Tablas grandes de los dashboards en forma columnar con scroll virtual.
+El generador guarda cada columna una sola vez (compacta, con datos_columnares.py) y
+precalcula el orden de las filas por cada columna ordenable; la página solo crea las
+filas que están a la vista y filtra con un índice de trigramas (armado una vez, en la
+primera búsqueda) en lugar de recorrer las filas del DOM en cada tecla.
+"""
+
+import base64
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from datos_columnares import codificar_columna
+from normalizacion_sri import normalizar_texto
+
+# Filas extra que se dibujan arriba y abajo de la vista para que el scroll no parpadee
+FILAS_RESERVA = 20
+
+
+def codificar_orden(valores: pd.Series) -> str:
+    """
+    Permutación que ordena las filas de menor a mayor (uint32 little-endian en base64).
+
+    Los textos se comparan normalizados (sin tildes ni mayúsculas) y los empates
+    conservan el orden original; la página usa la permutación al revés para ordenar
+    de mayor a menor.
+    """
+    if pd.api.types.is_numeric_dtype(valores):
+        claves = valores.to_numpy()
+    else:
+        claves = np.array([normalizar_texto(valor) for valor in valores], dtype=object)
+    orden = np.argsort(claves, kind='stable').astype('<u4')
+    return base64.b64encode(orden.tobytes()).decode('ascii')
+
+
+def construir_tabla(df: pd.DataFrame, ordenables: List[str] = None, busqueda: List[str] = None) -> Dict:
+    """
+    Datos columnares de una tabla virtual.
+
+    Args:
+        df: Filas de la tabla en el orden inicial, una columna por dato (sin vacíos)
+        ordenables: Columnas con orden precalculado (por defecto todas)
+        busqueda: Columnas en las que busca el filtro de texto (por defecto todas)
+
+    Returns:
+        {'total': filas, 'columnas': {columna: valores codificados (datos_columnares.py)},
+         'orden': {columna: permutación}, 'busqueda': columnas}
+    """
+    ordenables = list(df.columns) if ordenables is None else ordenables
+    return {
+        'total': len(df),
+        'columnas': {columna: codificar_columna(df[columna].tolist()) for columna in df.columns},
+        'orden': {columna: codificar_orden(df[columna]) for columna in ordenables},
+        'busqueda': list(df.columns) if busqueda is None else busqueda
+    }
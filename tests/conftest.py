@@ -0,0 +1,44 @@
+"""
+Configuración común de las pruebas.
+Los módulos del proyecto están en la raíz del repositorio (sin paquete), y los datos
+sintéticos y las referencias fila por fila salen de datos_sinteticos.py.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import generar_catalogo_sintetico  # noqa: E402
+
+
+@pytest.fixture
+def en_directorio_temporal(tmp_path, monkeypatch):
+    """Corre la prueba en un directorio vacío: los caches (cache/...) no tocan los del repositorio."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def catalogo_excel(tmp_path):
+    """Carpeta con un Excel del catastro sintético (otra que datos_excel/, fuera del directorio de trabajo)."""
+    directorio = tmp_path / "descargas"
+    directorio.mkdir()
+    df = generar_catalogo_sintetico(300)
+    df['NOMBRE_FANTASIA_COMERCIAL'] = None
+    df.loc[:2, 'RAZON_SOCIAL'] = ['LIBRERIA EL ESTUDIANTE', 'PAPELERIA SAN JOSE', 'LIBRERIA LA ECONOMIA']
+    df.to_excel(directorio / "SRI_RUC_Prueba.xlsx", index=False)
+    return directorio
+
+
+@pytest.fixture
+def ejecutar_script(tmp_path):
+    """Corre un script del proyecto por su CLI en tmp_path y devuelve el proceso terminado."""
+    def ejecutar(script: str, *argumentos: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, os.path.join(RAIZ, script), *argumentos], cwd=tmp_path,
+                              capture_output=True, text=True, encoding='utf-8', timeout=300)
+    return ejecutar
@@ -0,0 +1,53 @@
+"""Pruebas del enriquecimiento con Google Places contra servidor_places_falso.py."""
+
+from buscar_info_google_places import BuscadorGooglePlaces
+from cache_places import CachePlaces
+from datos_sinteticos import generar_catalogo_sintetico
+from servidor_places_falso import ServidorPlacesFalso
+
+
+def _buscador(servidor, ruta, qps=1000):
+    return BuscadorGooglePlaces("AIzaPrueba", qps=qps, base_url=servidor.url, cache_places=CachePlaces(str(ruta)))
+
+
+def test_lote_concurrente_igual_a_secuencial(tmp_path):
+    df = generar_catalogo_sintetico(60)
+    lote = list(zip(df['RAZON_SOCIAL'], df['DESCRIPCION_CANTON_EST'].fillna(''),
+                    df['DESCRIPCION_PROVINCIA_EST'].fillna('')))
+
+    with ServidorPlacesFalso(latencia=0) as servidor:
+        secuencial = _buscador(servidor, tmp_path / "secuencial.sqlite")
+        esperado = [secuencial.buscar_libreria(*consulta) for consulta in lote]
+        secuencial.cache_places.cerrar()
+
+    # La cuota del servidor es menor que la del cliente para forzar OVER_QUERY_LIMIT
+    with ServidorPlacesFalso(latencia=0.01, qps_maximo=80) as servidor:
+        concurrente = _buscador(servidor, tmp_path / "concurrente.sqlite", qps=100)
+        obtenido = concurrente.buscar_lote(lote, hilos=8)
+        concurrente.cache_places.cerrar()
+        rechazadas = servidor.rechazadas
+
+    assert obtenido == esperado
+    assert any(esperado) and not all(esperado)
+    assert rechazadas and concurrente.reintentos >= rechazadas
+
+
+def test_busquedas_repetidas_en_curso_se_comparten(tmp_path):
+    consulta = ('LIBRERIA EL ESTUDIANTE', 'MACHALA', 'EL ORO', '0700000000001#1')
+    with ServidorPlacesFalso(latencia=0.2) as servidor:
+        una = _buscador(servidor, tmp_path / "una.sqlite")
+        esperado = una.buscar_libreria(*consulta)
+        repetidas = _buscador(servidor, tmp_path / "repetidas.sqlite")
+        obtenido = repetidas.buscar_lote([consulta] * 8, hilos=8)
+        una.cache_places.cerrar()
+        repetidas.cache_places.cerrar()
+
+    assert obtenido == [esperado] * 8
+    assert repetidas.llamadas_api == una.llamadas_api
+    assert repetidas.resultado_definitivo(*consulta)
+
+
+def test_limite_sin_diario_se_rechaza(ejecutar_script):
+    proceso = ejecutar_script('buscar_info_google_places.py', '--sin-diario', '--limite', '5')
+    assert proceso.returncode == 2
+    assert "--limite requiere el diario" in proceso.stderr
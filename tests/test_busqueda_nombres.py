@@ -0,0 +1,72 @@
+"""Pruebas de busqueda_nombres.py: índice de trigramas, filtros de ubicación y CLI --json."""
+
+import json
+
+import numpy as np
+import pytest
+
+from busqueda_nombres import _trigramas_bloque, construir_indice, trigramas_consulta
+from datos_sinteticos import generar_catalogo_sintetico
+from normalizacion_sri import normalizar_texto
+
+
+@pytest.fixture(scope='module')
+def catalogo():
+    rng = np.random.default_rng(13)
+    filas = 5000
+    df = generar_catalogo_sintetico(filas)
+    palabras = np.array(['LIBRERÍA', 'PAPELERÍA', 'BAZAR', 'EL ESTUDIANTE', 'LA ECONOMÍA', 'SAN JOSÉ',
+                         'DISTRIBUIDORA', 'FERRETERÍA', 'MARÍA', 'PÉREZ', 'CASTILLO'], dtype=object)
+    partes = palabras[rng.integers(0, len(palabras), (filas, 3))]
+    df['RAZON_SOCIAL'] = partes[:, 0] + ' ' + partes[:, 1] + ' ' + rng.integers(0, 500, filas).astype(str).astype(object)
+    df['NOMBRE_FANTASIA_COMERCIAL'] = np.where(rng.random(filas) < 0.4, partes[:, 2] + ' ' + partes[:, 0], None)
+    return df
+
+
+def _recorriendo(df, indice, texto, limite=10):
+    """Referencia: puntaje de cada nombre recorriendo todas las filas."""
+    consulta = set(trigramas_consulta(texto).tolist())
+    puntajes = []
+    for fila, claves in enumerate(zip(*(df[c].map(normalizar_texto)
+                                        for c in ('RAZON_SOCIAL', 'NOMBRE_FANTASIA_COMERCIAL')))):
+        propios = [set(_trigramas_bloque([clave])[1].tolist()) for clave in claves if clave]
+        mejor = max(((len(consulta & p) / len(consulta), 2 * len(consulta & p) / (len(consulta) + len(p)))
+                     for p in propios), default=None)
+        if mejor and mejor[0] >= 0.5:
+            puntajes.append((-mejor[0], -mejor[1], fila))
+    return [(indice.filas['RUC'].iat[f], round(-c, 3)) for c, _, f in sorted(puntajes)[:limite]]
+
+
+@pytest.mark.parametrize('texto', ['libreria el estudiante', 'papeleria san jose', 'hotl castilo'])
+def test_indice_igual_a_recorrer(catalogo, texto):
+    indice = construir_indice(catalogo)
+    obtenido = [(r['ruc'], r['puntaje']) for r in indice.buscar(texto, limite=10)]
+    assert obtenido == _recorriendo(catalogo, indice, texto)
+
+
+def test_filtro_por_canton(catalogo):
+    indice = construir_indice(catalogo)
+    resultados = indice.buscar('libreria el estudiante', canton='CANTON 007', limite=10)
+    assert resultados
+    assert all(r['canton'] == 'CANTON 007' for r in resultados)
+
+
+@pytest.mark.parametrize('filtro', [{'canton': 'NO EXISTE'}, {'provincia': 'NO EXISTE'},
+                                    {'provincia': 'PROVINCIA 01', 'canton': 'NO EXISTE'}])
+def test_ubicacion_desconocida_sin_resultados(catalogo, filtro):
+    indice = construir_indice(catalogo)
+    assert indice.buscar('libreria el estudiante', limite=10, **filtro) == []
+
+
+def test_cli_json(catalogo_excel, ejecutar_script):
+    proceso = ejecutar_script('busqueda_nombres.py', 'libreria estudiante', '--json',
+                              '--directorio', str(catalogo_excel))
+    assert proceso.returncode == 0, proceso.stderr
+    resultados = json.loads(proceso.stdout)
+    assert resultados[0]['razon_social'] == 'LIBRERIA EL ESTUDIANTE'
+    assert "Índice" in proceso.stderr
+
+    proceso = ejecutar_script('busqueda_nombres.py', 'libreria estudiante', '--json', '--canton', 'NO EXISTE',
+                              '--directorio', str(catalogo_excel))
+    assert proceso.returncode == 0, proceso.stderr
+    assert json.loads(proceso.stdout) == []
@@ -0,0 +1,56 @@
+"""Pruebas de cache_geocodificacion.py: vencimiento, máximo de entradas y claves sin resultado."""
+
+import time
+
+import cache_geocodificacion
+from cache_geocodificacion import CacheGeocodificacion, normalizar_clave
+
+
+def _en_dias(monkeypatch, dias):
+    """Adelanta el reloj del cache `dias` días."""
+    ahora = time.time() + dias * 86400
+    monkeypatch.setattr(cache_geocodificacion.time, 'time', lambda: ahora)
+
+
+def test_normalizar_clave():
+    assert normalizar_clave('El Oro', ' Machala ', 'Pto. Bolívar') == normalizar_clave('EL ORO', 'MACHALA', 'PTO. BOLIVAR')
+    assert normalizar_clave() == ''
+
+
+def test_sin_resultado_vence(tmp_path, monkeypatch):
+    cache = CacheGeocodificacion(str(tmp_path / "geo.sqlite"), ttl_sin_resultado_dias=30)
+    cache.guardar_sin_resultado('x|machala|el oro', consulta='X, Machala, El Oro')
+    assert cache.sin_resultado('x|machala|el oro')
+    assert not cache.sin_resultado('y|machala|el oro')
+
+    _en_dias(monkeypatch, 31)
+    assert not cache.sin_resultado('x|machala|el oro')
+    assert cache.estadisticas()['sin_resultado'] == 0
+    cache.cerrar()
+
+
+def test_guardar_reemplaza_sin_resultado(tmp_path):
+    cache = CacheGeocodificacion(str(tmp_path / "geo.sqlite"))
+    cache.guardar_sin_resultado('x|machala|el oro')
+    cache.guardar('x|machala|el oro', (-3.26, -79.96))
+    assert not cache.sin_resultado('x|machala|el oro')
+    assert cache.obtener('x|machala|el oro') == (-3.26, -79.96)
+    cache.cerrar()
+
+
+def test_cerrar_aplica_vencimiento_y_maximo(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "geo.sqlite")
+    cache = CacheGeocodificacion(ruta, ttl_dias=180, max_entradas=3, ttl_sin_resultado_dias=30)
+    for i in range(5):
+        cache.guardar(f"p{i}|machala|el oro", (-3.0, -80.0 + i))
+    cache.guardar('viejo|machala|el oro', (-3.0, -79.0), creado=time.time() - 200 * 86400)
+    cache.guardar_sin_resultado('x|machala|el oro')
+    _en_dias(monkeypatch, 31)
+    cache.cerrar()
+
+    monkeypatch.undo()
+    cache = CacheGeocodificacion(ruta)
+    entradas = cache.entradas()
+    assert len(entradas) == 3 and 'viejo|machala|el oro' not in entradas
+    assert cache.estadisticas()['sin_resultado'] == 0
+    cache.cerrar()
@@ -0,0 +1,51 @@
+"""Pruebas de consulta_ruc.py: almacén por RUC, fuentes eliminadas y CLI --json."""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from consulta_ruc import AlmacenRUC, normalizar_ruc
+from datos_sinteticos import generar_catalogo_sintetico
+
+
+def test_almacen_igual_a_filtrar(tmp_path):
+    df = generar_catalogo_sintetico(5000)
+    almacen = AlmacenRUC(str(tmp_path / "ruc.sqlite"))
+    almacen.cargar_dataframe('catastro', df)
+    rucs = [normalizar_ruc(r) for r in np.random.default_rng(9).choice(df['NUMERO_RUC'].to_numpy(), 50)]
+
+    esperado = {ruc: df[df['NUMERO_RUC'] == int(ruc)]['RAZON_SOCIAL'].tolist() for ruc in rucs}
+    obtenido = {ruc: [fila['RAZON_SOCIAL'] for fila in fuentes.get('catastro', [])]
+                for ruc, fuentes in almacen.buscar(rucs).items()}
+    prefijo = almacen.buscar_prefijo(rucs[0][:6], 50)
+    almacen.cerrar()
+
+    assert obtenido == esperado
+    assert prefijo and all(r['ruc'].startswith(rucs[0][:6]) for r in prefijo)
+
+
+def test_actualizar_quita_fuentes_sin_archivo(en_directorio_temporal, catalogo_excel):
+    almacen = AlmacenRUC("ruc.sqlite")
+    assert almacen.actualizar(str(catalogo_excel)) == {'catastro:SRI_RUC_Prueba': 300}
+
+    (catalogo_excel / "SRI_RUC_Prueba.xlsx").unlink()
+    assert almacen.actualizar(str(catalogo_excel)) == {}
+    assert almacen.fuentes() == {}
+    almacen.cerrar()
+
+
+def test_cli_json(catalogo_excel, ejecutar_script):
+    ruc = normalizar_ruc(pd.read_excel(catalogo_excel / "SRI_RUC_Prueba.xlsx")['NUMERO_RUC'].iat[0])
+
+    # La primera consulta carga el almacén: su aviso va a stderr y stdout queda como JSON válido
+    proceso = ejecutar_script('consulta_ruc.py', ruc, '--json', '--directorio', str(catalogo_excel))
+    assert proceso.returncode == 0, proceso.stderr
+    resultado = json.loads(proceso.stdout)
+    assert resultado[ruc]['catastro:SRI_RUC_Prueba'][0]['RAZON_SOCIAL'] == 'LIBRERIA EL ESTUDIANTE'
+    assert "Almacén de RUCs actualizado" in proceso.stderr
+
+    proceso = ejecutar_script('consulta_ruc.py', '--actualizar', '--forzar', '--json', '--prefijo', ruc[:8],
+                              '--directorio', str(catalogo_excel))
+    assert proceso.returncode == 0, proceso.stderr
+    assert ruc in [r['ruc'] for r in json.loads(proceso.stdout)]
@@ -0,0 +1,77 @@
+"""Pruebas de consultas_catalogo.py: consultas del catálogo en memoria contra filtrar las filas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from consultas_catalogo import CatalogoConsultas
+from datos_sinteticos import generar_catalogo_sintetico
+from filtros_mapa import categoria_estado
+from normalizacion_sri import normalizar_serie
+
+_NIVELES = (('provincia', 'DESCRIPCION_PROVINCIA_EST'), ('canton', 'DESCRIPCION_CANTON_EST'),
+            ('parroquia', 'DESCRIPCION_PARROQUIA_EST'))
+
+
+@pytest.fixture(scope='module')
+def datos():
+    df = generar_catalogo_sintetico(20000)
+    catalogo = CatalogoConsultas(df)
+    # Coordenadas sintéticas por ubicación (los nombres sintéticos no están en el nomenclátor)
+    rng = np.random.default_rng(5)
+    catalogo.latitud = rng.uniform(-5.0, 1.5, len(catalogo.latitud))
+    catalogo.longitud = rng.uniform(-81.0, -75.0, len(catalogo.longitud))
+    return df, catalogo
+
+
+def _con_pandas(df, catalogo, filtros):
+    """Referencia: normalizar, filtrar y agrupar las filas en cada consulta."""
+    mascara = pd.Series(True, index=df.index)
+    if 'provincia' in filtros:
+        mascara &= normalizar_serie(df['DESCRIPCION_PROVINCIA_EST']).isin(filtros['provincia'])
+    if 'ciiu' in filtros:
+        mascara &= df['CODIGO_CIIU'].astype(str).str.startswith(tuple(filtros['ciiu']))
+    if 'estado' in filtros:
+        mascara &= df['ESTADO_CONTRIBUYENTE'].map(categoria_estado).isin(filtros['estado'])
+    if 'bbox' in filtros:
+        sur, oeste, norte, este = filtros['bbox']
+        latitud = catalogo.latitud[catalogo.codigo_ubicacion]
+        longitud = catalogo.longitud[catalogo.codigo_ubicacion]
+        mascara &= (latitud >= sur) & (latitud <= norte) & (longitud >= oeste) & (longitud <= este)
+    claves = pd.DataFrame({nivel: normalizar_serie(df[columna]).astype(object).fillna('')
+                           for nivel, columna in _NIVELES})
+    conteo = claves[mascara.to_numpy()].groupby([nivel for nivel, _ in _NIVELES]).size()
+    return sorted((clave, int(n)) for clave, n in conteo.items())
+
+
+@pytest.mark.parametrize('filtros', [
+    dict(provincia=['PROVINCIA 03'], ciiu=['G4762']),
+    dict(ciiu=['G47615'], estado=['ACTIVO']),
+    dict(bbox=(-3.5, -80.2, -2.0, -78.5), estado=['SUSPENDIDO']),
+])
+def test_ubicaciones_iguales_a_pandas(datos, filtros):
+    df, catalogo = datos
+    obtenido = sorted((tuple(catalogo.claves_ubicacion[nivel][u['id']] for nivel, _ in _NIVELES), u['cantidad'])
+                      for u in catalogo.ubicaciones(**filtros))
+    assert obtenido == _con_pandas(df, catalogo, filtros)
+
+
+def test_agregados_por_estado(datos):
+    df, catalogo = datos
+    agregado = catalogo.agregados('estado')
+    assert ({g['estado']: g['cantidad'] for g in agregado['grupos']}
+            == df['ESTADO_CONTRIBUYENTE'].map(categoria_estado).value_counts().to_dict())
+
+
+def test_pagina_de_establecimientos(datos):
+    df, catalogo = datos
+    pagina = catalogo.establecimientos(10, 20, provincia=['PROVINCIA 03'])
+    assert pagina['total'] == int((df['DESCRIPCION_PROVINCIA_EST'] == 'PROVINCIA 03').sum())
+    assert len(pagina['establecimientos']) == 20
+    assert all(e['provincia'] == 'PROVINCIA 03' for e in pagina['establecimientos'])
+
+
+@pytest.mark.parametrize('desde, limite', [(-1, 10), (0, -5)])
+def test_pagina_negativa_se_rechaza(datos, desde, limite):
+    with pytest.raises(ValueError):
+        datos[1].establecimientos(desde, limite)
@@ -0,0 +1,42 @@
+"""Pruebas de cubo_sri.py: los reportes leídos del cubo contra agrupar las filas."""
+
+import numpy as np
+import pytest
+
+from cubo_sri import construir_cubo, guardar_cubo, leer_cubo
+from datos_sinteticos import generar_catalogo_sintetico, reportes_con_cubo, reportes_con_groupby
+
+
+@pytest.fixture(scope='module')
+def catalogo():
+    df = generar_catalogo_sintetico(20000)
+    df['ESTIMACION_VENTA_MENSUAL'] = np.random.default_rng(3).integers(500, 50000, len(df))
+    return df
+
+
+def _mismos_valores(a, b):
+    # value_counts y el cubo pueden ordenar distinto los empates
+    return a.sort_index().to_numpy().tolist() == b.sort_index().to_numpy().tolist()
+
+
+def test_reportes_iguales_a_groupby(catalogo, tmp_path):
+    guardar_cubo(construir_cubo(catalogo), 'sintetico', directorio=str(tmp_path))
+    cubo = leer_cubo('sintetico', None, str(tmp_path))
+    esperado = reportes_con_groupby(catalogo)
+    obtenido = reportes_con_cubo(cubo)
+    for reporte in esperado:
+        assert _mismos_valores(esperado[reporte], obtenido[reporte]), reporte
+
+
+def test_totales_y_filtro(catalogo):
+    cubo = construir_cubo(catalogo)
+    assert cubo.total() == len(catalogo)
+    assert cubo.total('venta_mensual') == catalogo['ESTIMACION_VENTA_MENSUAL'].sum()
+    # Una fila por valor de cada dimensión, no por combinación
+    assert cubo.celdas < 2000
+
+    provincia = cubo.por('provincia').index[0]
+    filtrado = cubo.filtrar(provincia=[provincia])
+    assert filtrado.total() == cubo.por('provincia').loc[provincia, 'cantidad']
+    with pytest.raises(KeyError):
+        filtrado.por('canton')
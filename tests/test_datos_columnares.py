@@ -0,0 +1,35 @@
+"""Pruebas de datos_columnares.py: cada forma de columna vuelve a los mismos valores."""
+
+import pytest
+
+from datos_columnares import codificar_columna, codificar_registros, decodificar_columna, decodificar_registros
+
+
+@pytest.mark.parametrize('valores, forma', [
+    ([1, 2, 300], 'u2'),
+    ([-1, 5, 70000], 'i4'),
+    ([0.5, 2, -3.25], 'f8'),
+    (['EL ORO', 'EL ORO', 'LOJA', 'EL ORO'], 'dic'),
+    (['A', 'B', 'C'], 'lista'),
+    ([{'G4761': 2}, {}, {'G4761': 1, 'G4762': 3}], 'claves'),
+    ([10 ** 12, 1], 'lista'),
+    ([[1, 2], None], 'lista'),
+])
+def test_ida_y_vuelta(valores, forma):
+    columna = codificar_columna(valores)
+    if forma == 'lista':
+        assert isinstance(columna, list)
+    elif forma in ('dic', 'claves'):
+        assert forma in columna
+    else:
+        assert columna['tipo'] == forma
+    assert decodificar_columna(columna) == valores
+
+
+def test_registros_sin_claves_vacias():
+    registros = [{'ruc': '0701', 'cantidad': 3, 'canton': 'MACHALA'},
+                 {'ruc': '0702', 'cantidad': 1},
+                 {'ruc': '0703', 'cantidad': 2, 'canton': 'MACHALA'}]
+    datos = codificar_registros(registros)
+    assert datos['total'] == 3
+    assert decodificar_registros(datos) == registros
@@ -0,0 +1,40 @@
+"""Pruebas de los estimadores de ventas vectorizados contra las versiones fila por fila."""
+
+import pandas as pd
+import pytest
+
+from buscar_info_google_places import BuscadorGooglePlaces
+from cache_places import CachePlaces
+from datos_sinteticos import (estimacion_google_original, estimar_ventas_con_iterrows,
+                              generar_librerias_sinteticas, generar_resultados_google,
+                              procesar_online_con_iterrows)
+from estimar_ventas_librerias import EstimadorVentasLibrerias
+from estimar_ventas_online import EstimadorVentasOnline
+
+
+@pytest.fixture(scope='module')
+def librerias():
+    return generar_librerias_sinteticas(3000)
+
+
+def test_estimacion_por_tamano(librerias):
+    estimador = EstimadorVentasLibrerias()
+    assert estimador.estimar_ventas(librerias).equals(estimar_ventas_con_iterrows(estimador, librerias))
+
+
+def test_estimacion_por_indicadores(librerias):
+    estimador = EstimadorVentasOnline()
+    assert estimador.procesar_librerias(librerias).equals(procesar_online_con_iterrows(estimador, librerias))
+
+
+def test_estimacion_con_google(librerias, tmp_path):
+    resultados = generar_resultados_google(len(librerias))
+    buscador = BuscadorGooglePlaces(cache_places=CachePlaces(str(tmp_path / "places.sqlite")))
+    estimaciones = buscador.calcular_estimaciones(resultados, librerias)
+    buscador.cache_places.cerrar()
+
+    esperadas = [estimacion_google_original(info, row) for info, (_, row) in zip(resultados, librerias.iterrows())]
+    esperado = pd.DataFrame({campo: [e[campo] for e in esperadas] for campo in esperadas[0]}, index=librerias.index)
+    obtenido = pd.DataFrame({campo: estimaciones[campo].tolist() for campo in estimaciones.columns},
+                            index=librerias.index)
+    assert obtenido.equals(esperado)
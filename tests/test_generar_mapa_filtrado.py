@@ -0,0 +1,58 @@
+"""Pruebas de punta a punta del mapa filtrado con datos sintéticos y servidor_places_falso.py."""
+
+import json
+import os
+
+import pytest
+
+from cache_geocodificacion import CacheGeocodificacion
+from datos_columnares import decodificar_registros
+from datos_sinteticos import estado_archivos, generar_catalogo_sintetico, marcadores_mapa
+from detalles_mapa import directorio_detalles
+from generar_mapa_filtrado import GeneradorMapaFiltrado
+from servidor_places_falso import ServidorPlacesFalso
+
+
+@pytest.fixture
+def generador(tmp_path):
+    with ServidorPlacesFalso(latencia=0) as servidor:
+        generador = GeneradorMapaFiltrado(google_api_key="AIzaPrueba", qps=1000, hilos=8, base_url=servidor.url,
+                                          cache_geocodificacion=CacheGeocodificacion(str(tmp_path / "cache" / "geo.sqlite")))
+        yield generador
+        generador.cache_coordenadas.cerrar()
+
+
+def test_marcadores_y_detalle(generador, tmp_path):
+    archivo_html = str(tmp_path / "pagina" / "mapa.html")
+    df = generar_catalogo_sintetico(500)
+    ubicaciones = [u for u in generador.procesar_datos_filtrados(df) if u.get('latitud')]
+    generador.generar_html_google_maps(ubicaciones, archivo_html)
+
+    marcadores = marcadores_mapa(archivo_html)
+    assert [(m['lat'], m['lng'], m['cantidad']) for m in marcadores] == \
+        [(u['latitud'], u['longitud'], u['cantidad']) for u in ubicaciones]
+
+    establecimientos = 0
+    for nombre in os.listdir(directorio_detalles(archivo_html)):
+        if nombre.endswith('.json'):
+            with open(os.path.join(directorio_detalles(archivo_html), nombre), 'r', encoding='utf-8') as f:
+                establecimientos += len(decodificar_registros(json.load(f)['establecimientos']))
+    assert establecimientos == sum(u['cantidad'] for u in ubicaciones)
+
+
+def test_regenerar_sin_cambios_no_escribe(generador, tmp_path):
+    archivo_html = str(tmp_path / "pagina" / "mapa.html")
+    df = generar_catalogo_sintetico(500)
+    generador.generar_html_google_maps(generador.procesar_datos_filtrados(df), archivo_html)
+    antes = estado_archivos(os.path.dirname(archivo_html))
+
+    generador.generar_html_google_maps(generador.procesar_datos_filtrados(df), archivo_html)
+    assert estado_archivos(os.path.dirname(archivo_html)) == antes
+
+    # Con otros datos cambian los datos (y los totales de la página), no los recursos
+    cambiado = df[df['DESCRIPCION_CANTON_EST'] != df['DESCRIPCION_CANTON_EST'].iloc[0]]
+    generador.generar_html_google_maps(generador.procesar_datos_filtrados(cambiado), archivo_html)
+    despues = estado_archivos(os.path.dirname(archivo_html))
+    datos = os.path.join(directorio_detalles(archivo_html), "datos.js")
+    assert despues[datos] != antes[datos]
+    assert all(despues[ruta] == info for ruta, info in antes.items() if os.sep + "recursos" + os.sep in ruta)
@@ -0,0 +1,78 @@
+"""Pruebas de la geocodificación en lote de los mapas, contra servidor_places_falso.py."""
+
+import numpy as np
+import pytest
+
+from cache_geocodificacion import CacheGeocodificacion
+from datos_sinteticos import generar_catalogo_sintetico
+from generar_mapa_filtrado import GeneradorMapaFiltrado
+from nomenclator_ecuador import NomenclatorEcuador
+from servidor_places_falso import ServidorPlacesFalso
+
+
+@pytest.fixture(scope='module')
+def servidor():
+    with ServidorPlacesFalso(latencia=0) as servidor:
+        yield servidor
+
+
+@pytest.fixture(scope='module')
+def por_archivo():
+    """Ubicaciones sintéticas repartidas en 3 archivos que repiten muchas entre sí."""
+    columnas = ['DESCRIPCION_PROVINCIA_EST', 'DESCRIPCION_CANTON_EST', 'DESCRIPCION_PARROQUIA_EST']
+    unicas = generar_catalogo_sintetico(4000)[columnas].drop_duplicates().head(200)
+    rng = np.random.default_rng(21)
+    return [[{'provincia': p, 'canton': c, 'parroquia': q}
+             for p, c, q in unicas.itertuples(index=False) if rng.random() < 0.6]
+            for _ in range(3)]
+
+
+def _generador(servidor, ruta, hilos=1):
+    # Nomenclátor vacío: los nombres sintéticos pasan por la API del servidor falso
+    return GeneradorMapaFiltrado("AIzaPrueba", qps=1000, hilos=hilos, base_url=servidor.url,
+                                 nomenclator=NomenclatorEcuador(str(ruta.parent / "vacio.json")),
+                                 cache_geocodificacion=CacheGeocodificacion(str(ruta)))
+
+
+def test_lote_igual_a_archivo_por_archivo(servidor, por_archivo, tmp_path):
+    secuencial = _generador(servidor, tmp_path / "secuencial.sqlite")
+    esperado = [[secuencial.geocodificar_ubicacion(u['provincia'], u['canton'], u['parroquia']) for u in lista]
+                for lista in por_archivo]
+
+    lote = _generador(servidor, tmp_path / "lote.sqlite", hilos=8)
+    todas = [dict(u) for lista in por_archivo for u in lista]
+    resumen = lote.geocodificar_lote(todas)
+    coordenadas = iter((u['latitud'], u['longitud']) if u['latitud'] is not None else None for u in todas)
+    obtenido = [[next(coordenadas) for _ in lista] for lista in por_archivo]
+    secuencial.cache_coordenadas.cerrar()
+    lote.cache_coordenadas.cerrar()
+
+    assert obtenido == esperado
+    assert lote.llamadas_api == resumen['unicas'] == secuencial.llamadas_api
+    assert resumen['ahorradas'] == resumen['solicitadas'] - resumen['unicas']
+
+
+def test_sin_resultado_no_se_vuelve_a_consultar(servidor, por_archivo, tmp_path):
+    ruta = tmp_path / "geo.sqlite"
+    primera = _generador(servidor, ruta, hilos=8)
+    resumen = primera.geocodificar_lote([dict(u) for u in por_archivo[0]])
+    primera.cache_coordenadas.cerrar()
+    assert resumen['llamadas_api'] == resumen['unicas']
+
+    cache = CacheGeocodificacion(str(ruta))
+    sin_resultado = cache.estadisticas()['sin_resultado']
+    cache.cerrar()
+    assert sin_resultado > 0
+
+    segunda = _generador(servidor, ruta, hilos=8)
+    resumen = segunda.geocodificar_lote([dict(u) for u in por_archivo[0]])
+    segunda.cache_coordenadas.cerrar()
+    assert segunda.llamadas_api == 0
+    assert resumen['omitidas'] == sin_resultado
+    # Tampoco por la ruta de a una ubicación
+    tercera = _generador(servidor, ruta)
+    for u in por_archivo[0]:
+        tercera.geocodificar_ubicacion(u['provincia'], u['canton'], u['parroquia'])
+    tercera.cache_coordenadas.cerrar()
+    assert tercera.llamadas_api == 0
+
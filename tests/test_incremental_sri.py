@@ -0,0 +1,37 @@
+"""Pruebas de incremental_sri.py: diferencias entre descargas y su CLI."""
+
+import pandas as pd
+
+from datos_sinteticos import generar_catalogo_sintetico
+from incremental_sri import procesar_incremental
+
+
+def _duplicar_ventas(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(VENTAS=df['NUMERO_RUC'] % 1000 * 2)
+
+
+def test_incremental_igual_a_procesar_todo(tmp_path):
+    df = generar_catalogo_sintetico(2000)
+    procesar_incremental(df, 'prueba', _duplicar_ventas, directorio=str(tmp_path))
+
+    # Segunda descarga: se modifican, eliminan y agregan filas
+    nuevo = df.drop(df.index[:50])
+    nuevo.loc[nuevo.index[:30], 'ESTADO_CONTRIBUYENTE'] = 'SUSPENDIDO'
+    nuevo = pd.concat([nuevo, generar_catalogo_sintetico(40, semilla=1)], ignore_index=True)
+    resultado, resumen = procesar_incremental(nuevo, 'prueba', _duplicar_ventas, directorio=str(tmp_path))
+
+    assert resultado.equals(_duplicar_ventas(nuevo))
+    assert resumen['eliminados'] == 50
+    assert resumen['procesados'] == resumen['agregados'] + resumen['modificados']
+    assert resumen['procesados'] < len(nuevo)
+
+
+def test_cli_con_otro_directorio(catalogo_excel, ejecutar_script):
+    # El Excel está fuera del directorio de trabajo: la ruta debe incluir --directorio
+    primera = ejecutar_script('incremental_sri.py', '--directorio', str(catalogo_excel), '--actualizar')
+    assert primera.returncode == 0, primera.stderr
+    assert "🆕 SRI_RUC_Prueba.xlsx: sin foto anterior (300 filas)" in primera.stdout
+
+    segunda = ejecutar_script('incremental_sri.py', '--directorio', str(catalogo_excel))
+    assert segunda.returncode == 0, segunda.stderr
+    assert "+0 agregadas, -0 eliminadas, ~0 modificadas, 300 sin cambios" in segunda.stdout
@@ -0,0 +1,24 @@
+"""Pruebas de nomenclator_ecuador.py: ubicaciones del nomenclátor sin llamar a la API."""
+
+from cache_geocodificacion import CacheGeocodificacion
+from generar_mapa_filtrado import GeneradorMapaFiltrado
+from nomenclator_ecuador import NomenclatorEcuador
+
+
+def test_nomenclator_sin_red(tmp_path):
+    nomenclator = NomenclatorEcuador()
+    ubicaciones = []
+    for provincia, datos_provincia in nomenclator.datos['provincias'].items():
+        ubicaciones.append({'provincia': provincia, 'canton': None, 'parroquia': None})
+        for canton, datos_canton in datos_provincia.get('cantones', {}).items():
+            ubicaciones.append({'provincia': provincia, 'canton': canton, 'parroquia': None})
+            ubicaciones.extend({'provincia': provincia, 'canton': canton, 'parroquia': parroquia}
+                               for parroquia in datos_canton.get('parroquias', {}))
+
+    # Sin API key: solo el nomenclátor
+    local = GeneradorMapaFiltrado(None, nomenclator=nomenclator,
+                                  cache_geocodificacion=CacheGeocodificacion(str(tmp_path / "geo.sqlite")))
+    resumen = local.geocodificar_lote(ubicaciones)
+    local.cache_coordenadas.cerrar()
+    assert resumen['en_nomenclator'] == len(ubicaciones)
+    assert local.llamadas_api == 0
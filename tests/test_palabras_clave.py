@@ -0,0 +1,38 @@
+"""Pruebas de palabras_clave.py: búsqueda de todas las palabras en una pasada."""
+
+import numpy as np
+import pandas as pd
+
+from analizar_librerias import AnalizadorLibrerias
+from palabras_clave import BuscadorPalabras, plegar_texto
+
+
+def _nombres(filas: int) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    fragmentos = np.array(['LIBRERÍA', 'LIBRERIA', 'PAPELERÍA', 'LIBROS', 'EL LIBRO', 'BOOKS', 'OFICINA',
+                           'SUMINISTROS', 'ESCOLAR', 'EDUCACIÓN', 'COMERCIAL', 'S.A.', 'PÉREZ', 'PAPELES'],
+                          dtype=object)
+    partes = fragmentos[rng.integers(0, len(fragmentos), (filas, 3))]
+    return pd.DataFrame({'RAZON_SOCIAL': partes[:, 0] + ' ' + partes[:, 1] + ' ' + partes[:, 2]
+                         + ' ' + rng.integers(0, filas, filas).astype(str).astype(object)})
+
+
+def test_igual_a_str_contains():
+    df = _nombres(5000)
+    analizador = AnalizadorLibrerias()
+    nombres = plegar_texto(df['RAZON_SOCIAL'])
+
+    coincidencias = analizador.buscar_palabras_clave(df)
+    assert analizador.identificar_palabras_clave(df, coincidencias) == {
+        p: int(nombres.str.contains(p, regex=False).sum()) for p in analizador.palabras_clave}
+    assert (coincidencias[analizador.palabras_verificacion].any(axis=1).tolist()
+            == nombres.str.contains('|'.join(analizador.palabras_verificacion), regex=True).tolist())
+
+
+def test_muchas_palabras():
+    df = _nombres(2000)
+    palabras = [f"{a}{b}" for a in 'bcdlmprst' for b in 'aeiou']
+    nombres = plegar_texto(df['RAZON_SOCIAL'])
+    coincidencias = BuscadorPalabras(palabras).coincidencias(df['RAZON_SOCIAL'])
+    for palabra in palabras:
+        assert coincidencias[palabra].tolist() == nombres.str.contains(palabra, regex=False).tolist()
@@ -0,0 +1,44 @@
+"""Pruebas de plantillas_html.py: render de plantillas y escritura solo de lo que cambió."""
+
+import os
+import re
+
+import pytest
+
+from plantillas_html import DIRECTORIO_PLANTILLAS, Plantilla, cargar_plantilla, escribir_pagina
+
+
+@pytest.mark.parametrize('nombre', sorted(n for n in os.listdir(DIRECTORIO_PLANTILLAS)
+                                          if n.endswith(('.html', '.js', '.css'))))
+def test_render_igual_a_reemplazar_marcadores(nombre):
+    plantilla = cargar_plantilla(nombre)
+    valores = {variable: f"<{variable}>" for variable in plantilla.variables}
+    with open(os.path.join(DIRECTORIO_PLANTILLAS, nombre), 'r', encoding='utf-8') as f:
+        texto = f.read()
+    directa = re.sub(r'{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}', lambda m: valores[m.group(1)], texto)
+    assert plantilla.renderizar(**valores) == directa
+
+
+def test_falta_una_variable():
+    plantilla = Plantilla("<h1>{{ titulo }}</h1>{{cuerpo}} {no es marcador}", 'prueba.html')
+    assert plantilla.variables == ['cuerpo', 'titulo']
+    assert plantilla.renderizar(titulo='A', cuerpo='B') == "<h1>A</h1>B {no es marcador}"
+    with pytest.raises(ValueError, match='cuerpo'):
+        plantilla.renderizar(titulo='A')
+
+
+def test_escribe_solo_lo_que_cambio(tmp_path):
+    archivo = str(tmp_path / "mapa.html")
+
+    def escribir(datos):
+        return escribir_pagina(archivo, 'mapa_google.html',
+                               {'total_ubicaciones': 1, 'total_establecimientos': 2, 'google_api_key': 'AIza'},
+                               estilos=[('mapa_google', 'body {}')], scripts=[('mapa_google', 'let a;')],
+                               datos={'datosMapa': datos})
+
+    assert escribir({'n': 1}) == {'html': 1, 'datos': 1, 'recursos': 2}
+    assert escribir({'n': 1}) == {'html': 0, 'datos': 0, 'recursos': 0}
+    assert escribir({'n': 2}) == {'html': 0, 'datos': 1, 'recursos': 0}
+    with open(archivo, 'r', encoding='utf-8') as f:
+        html = f.read()
+    assert 'mapa_datos/datos.js' in html and '{{' not in html
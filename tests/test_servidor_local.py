@@ -0,0 +1,97 @@
+"""Pruebas de servidor_local.py: compresión, revalidación, rangos y errores de la API."""
+
+import gzip
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from detalles_mapa import directorio_detalles, escribir_fragmentos, nombre_fragmento
+from servidor_local import archivo_comprimido, crear_servidor, precomprimir
+
+
+@pytest.fixture(scope='module')
+def servidor(tmp_path_factory):
+    directorio = tmp_path_factory.mktemp("servidor")
+    contenido = ("<!DOCTYPE html><html><body><script>const marcadores = "
+                 + json.dumps([{'ruc': str(i), 'nombre': f"LIBRERIA {i}"} for i in range(5000)])
+                 + ";</script></body></html>").encode('utf-8')
+    (directorio / "mapa.html").write_bytes(contenido)
+    precomprimir(str(directorio))
+
+    servidor = crear_servidor(0, str(directorio), '127.0.0.1')
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor.server_address[1], contenido
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _pedir(puerto, ruta, metodo='GET', cabeceras=None):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+    conexion.request(metodo, ruta, headers=cabeceras or {})
+    respuesta = conexion.getresponse()
+    cuerpo = respuesta.read()
+    conexion.close()
+    return respuesta, cuerpo
+
+
+def test_visitantes_simultaneos(servidor):
+    puerto, contenido = servidor
+
+    def visitante(_):
+        respuesta, cuerpo = _pedir(puerto, '/mapa.html', cabeceras={'Accept-Encoding': 'gzip'})
+        assert respuesta.getheader('Content-Encoding') == 'gzip'
+        return gzip.decompress(cuerpo)
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        assert list(executor.map(visitante, range(40))) == [contenido] * 40
+
+
+@pytest.mark.parametrize('cabecera, esperada', [('gzip;q=0', None), ('gzip; q=0.0, identity', None),
+                                                 ('deflate', None), ('GZIP;Q=0.5', 'gzip'),
+                                                 ('br;q=0, *', 'gzip'), ('*;q=0', None),
+                                                 ('gzip;q=0, br;q=0, *', None)])
+def test_accept_encoding_con_q(servidor, cabecera, esperada):
+    puerto, contenido = servidor
+    respuesta, cuerpo = _pedir(puerto, '/mapa.html', cabeceras={'Accept-Encoding': cabecera})
+    assert respuesta.getheader('Content-Encoding') == esperada
+    assert (gzip.decompress(cuerpo) if esperada else cuerpo) == contenido
+
+
+def test_revalidacion_y_rango(servidor):
+    puerto, contenido = servidor
+    respuesta, _ = _pedir(puerto, '/mapa.html', 'HEAD')
+    etag = respuesta.getheader('ETag')
+
+    respuesta, cuerpo = _pedir(puerto, '/mapa.html', cabeceras={'If-None-Match': etag})
+    assert respuesta.status == 304 and cuerpo == b''
+
+    respuesta, cuerpo = _pedir(puerto, '/mapa.html', cabeceras={'Range': 'bytes=100-199'})
+    assert respuesta.status == 206 and cuerpo == contenido[100:200]
+
+
+@pytest.mark.parametrize('ruta', ['/api/establecimientos?desde=-1', '/api/establecimientos?limite=-5',
+                                  '/api/establecimientos?desde=abc', '/api/buscar?q=libreria&limite=-1',
+                                  '/api/buscar', '/api/agregados?por=color'])
+def test_parametros_invalidos(servidor, ruta):
+    respuesta, cuerpo = _pedir(servidor[0], ruta)
+    assert respuesta.status == 400
+    assert 'error' in json.loads(cuerpo)
+
+
+def test_fragmentos_viejos_sin_comprimidos(tmp_path):
+    archivo_html = str(tmp_path / "mapa.html")
+    detalles = {clave: [{'ruc': str(i), 'nombre': f"LIBRERIA {i}"} for i in range(100)]
+                for clave in ('PICHINCHA|QUITO|', 'GUAYAS|GUAYAQUIL|')}
+    escribir_fragmentos(detalles, archivo_html)
+    directorio = directorio_detalles(archivo_html)
+    for clave in detalles:
+        assert archivo_comprimido(os.path.join(directorio, nombre_fragmento(clave)), '.gz')
+
+    del detalles['GUAYAS|GUAYAQUIL|']
+    escribir_fragmentos(detalles, archivo_html)
+    vigente = nombre_fragmento('PICHINCHA|QUITO|')
+    assert sorted(os.listdir(directorio)) == [vigente, vigente + '.gz']
@@ -0,0 +1,67 @@
+"""Pruebas de la tabla 'Todas las Librerías' del dashboard en forma columnar."""
+
+import base64
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datos_columnares import decodificar_columna
+from datos_sinteticos import generar_librerias_sinteticas
+from generar_dashboard_completo import tabla_todas_librerias
+from normalizacion_sri import normalizar_texto
+
+FILAS = 3000
+
+
+@pytest.fixture(scope='module')
+def librerias():
+    df = generar_librerias_sinteticas(FILAS)
+    rng = np.random.default_rng(13)
+    df['NUMERO_RESENAS'] = rng.integers(0, 2000, FILAS)
+    df['CALIFICACION_GOOGLE'] = np.where(rng.random(FILAS) < 0.8, rng.uniform(1, 5, FILAS), np.nan)
+    df['ESTIMACION_VENTA_MENSUAL'] = rng.integers(500, 50000, FILAS)
+    df['SITIO_WEB'] = np.where(rng.random(FILAS) < 0.2, 'https://libreria.ec', None)
+    df['URL_GOOGLE_MAPS'] = np.where(rng.random(FILAS) < 0.7, 'https://maps.google.com/?cid=1', None)
+    return df
+
+
+@pytest.fixture(scope='module')
+def tabla(librerias):
+    tabla = tabla_todas_librerias(librerias)
+    return tabla, {columna: decodificar_columna(valores) for columna, valores in tabla['columnas'].items()}
+
+
+def test_mismas_filas_que_iterrows(librerias, tabla):
+    _, columnas = tabla
+    ordenadas = librerias.sort_values('ESTIMACION_VENTA_MENSUAL', ascending=False, kind='stable')
+    for i, (_, row) in enumerate(ordenadas.iterrows()):
+        nombre = row['NOMBRE_FANTASIA_COMERCIAL'] if pd.notna(row['NOMBRE_FANTASIA_COMERCIAL']) else row['RAZON_SOCIAL']
+        assert columnas['ruc'][i] == str(row['NUMERO_RUC'])
+        assert columnas['nombre'][i] == str(nombre)
+        assert columnas['resenas'][i] == int(row['NUMERO_RESENAS'])
+
+
+def test_ordenes_precalculados(tabla):
+    tabla, columnas = tabla
+    for columna in tabla['orden']:
+        orden = np.frombuffer(base64.b64decode(tabla['orden'][columna]), dtype='<u4')
+        valores = [columnas[columna][i] for i in orden]
+        if isinstance(valores[0], str):
+            valores = [normalizar_texto(v) for v in valores]
+        assert len(orden) == FILAS
+        assert all(a <= b for a, b in zip(valores, valores[1:])), columna
+
+
+@pytest.mark.parametrize('consulta', ['PAPELERIA', 'MACHALA', 'LIBRERIA 12', 'QUITO'])
+def test_filtro_por_trigramas(tabla, consulta):
+    # Candidatas del trigrama más raro + verificación, igual que la página
+    tabla, columnas = tabla
+    textos = [normalizar_texto(' '.join(str(columnas[c][i]) for c in tabla['busqueda'])) for i in range(FILAS)]
+    trigramas = defaultdict(list)
+    for i, texto in enumerate(textos):
+        for trigrama in {texto[j:j + 3] for j in range(len(texto) - 2)}:
+            trigramas[trigrama].append(i)
+    candidatas = min((trigramas.get(consulta[j:j + 3], []) for j in range(len(consulta) - 2)), key=len)
+    assert [i for i in sorted(candidatas) if consulta in textos[i]] == [i for i, t in enumerate(textos) if consulta in t]
@@ -0,0 +1,13 @@
+"""Pruebas de ubicaciones_sri.py: agrupación vectorizada por ubicación."""
+
+from datos_sinteticos import agrupar_con_iterrows, generar_catalogo_sintetico
+from ubicaciones_sri import agrupar_por_ubicacion
+
+
+def test_agrupacion_igual_a_iterrows():
+    df = generar_catalogo_sintetico(5000)
+    assert list(agrupar_por_ubicacion(df).items()) == list(agrupar_con_iterrows(df).items())
+
+
+def test_agrupacion_vacia():
+    assert agrupar_por_ubicacion(generar_catalogo_sintetico(0)) == {}
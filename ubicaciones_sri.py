@@ -0,0 +1,109 @@
+"""
+Agrupación de establecimientos del SRI por ubicación (parroquia, cantón, provincia).
+Versión vectorizada compartida por generar_mapa_filtrado.py y generar_mapa_google.py.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Campos de cada establecimiento en 'establecimientos_todos'
+CAMPOS_ESTABLECIMIENTO = ('ruc', 'nombre', 'provincia', 'canton', 'parroquia', 'codigo_ciiu', 'actividad', 'estado')
+
+# Campos cuyo texto se recorta (igual que el procesamiento original fila por fila)
+CAMPOS_RECORTADOS = {'provincia', 'canton', 'parroquia', 'estado'}
+
+
+def detectar_columnas(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """Detecta las columnas del Excel que corresponden a cada campo del establecimiento."""
+    columnas = list(df.columns)
+    return {
+        'ruc': next((col for col in columnas if 'ruc' in col.lower()), None),
+        'nombre': next((col for col in columnas if any(x in col.lower() for x in ['razon', 'nombre'])), None),
+        'provincia': next((col for col in columnas if 'provincia' in col.lower()), None),
+        'canton': next((col for col in columnas if 'canton' in col.lower()), None),
+        'parroquia': next((col for col in columnas if 'parroquia' in col.lower()), None),
+        'codigo_ciiu': next((col for col in columnas if 'ciiu' in col.lower()), None),
+        'actividad': next((col for col in columnas if 'actividad' in col.lower()), None),
+        'estado': next((col for col in columnas if 'estado_contribuyente' in col.lower()), None)
+    }
+
+
+def _columna_texto(df: pd.DataFrame, columna: Optional[str], recortar: bool) -> pd.Series:
+    """Convierte una columna a texto (None donde hay vacíos), equivalente a str(valor)."""
+    if columna is None:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+    serie = df[columna]
+    presentes = serie.notna().to_numpy()
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        # astype(str) omite la hora en fechas a medianoche; str() no
+        texto = serie.map(str)
+    else:
+        texto = serie.astype(str)
+    if recortar:
+        texto = texto.str.strip()
+
+    valores = texto.to_numpy(dtype=object)
+    valores[~presentes] = None
+    return pd.Series(valores, index=df.index, dtype=object)
+
+
+def agrupar_por_ubicacion(df: pd.DataFrame, campos: Sequence[str] = CAMPOS_ESTABLECIMIENTO,
+                          usar_parroquia: bool = True) -> Dict[str, List[Dict]]:
+    """
+    Agrupa los establecimientos por ubicación sin recorrer el DataFrame fila por fila.
+
+    La clave es 'parroquia, cantón, provincia' (o 'cantón, provincia' / 'provincia' si faltan
+    datos); las filas sin provincia se descartan. El orden de los grupos y de los
+    establecimientos dentro de cada grupo es el de aparición en el DataFrame.
+
+    Args:
+        df: DataFrame con los establecimientos
+        campos: Campos a incluir en el diccionario de cada establecimiento
+        usar_parroquia: False para agrupar solo por cantón y provincia
+
+    Returns:
+        Diccionario {clave_ubicacion: [establecimientos]}
+    """
+    if df.empty:
+        return {}
+
+    columnas = detectar_columnas(df)
+    textos = {
+        campo: _columna_texto(df, columnas[campo], campo in CAMPOS_RECORTADOS)
+        for campo in set(campos) | {'provincia', 'canton', 'parroquia'}
+    }
+
+    provincia = textos['provincia'].fillna('')
+    canton = textos['canton'].fillna('')
+    parroquia = textos['parroquia'].fillna('') if usar_parroquia else pd.Series('', index=df.index)
+
+    tiene_provincia = (provincia != '').to_numpy()
+    tiene_canton = (canton != '').to_numpy()
+    tiene_parroquia = (parroquia != '').to_numpy()
+
+    clave = np.where(
+        tiene_parroquia & tiene_canton & tiene_provincia,
+        (parroquia + ', ' + canton + ', ' + provincia).to_numpy(dtype=object),
+        np.where(
+            tiene_canton & tiene_provincia,
+            (canton + ', ' + provincia).to_numpy(dtype=object),
+            np.where(tiene_provincia, provincia.to_numpy(dtype=object), None)
+        )
+    )
+
+    # factorize respeta el orden de primera aparición; las filas sin clave quedan en -1
+    codigos, claves = pd.factorize(pd.Series(clave, dtype=object))
+    registros = pd.DataFrame({campo: textos[campo] for campo in campos}).to_dict('records')
+
+    orden = np.argsort(codigos, kind='stable')
+    limites = np.searchsorted(codigos[orden], np.arange(len(claves) + 1))
+
+    grupos = {}
+    for i, clave_grupo in enumerate(claves):
+        grupos[clave_grupo] = [registros[j] for j in orden[limites[i]:limites[i + 1]]]
+
+    return grupos